@@ -0,0 +1,114 @@
+"""Benchmark recall@10 and latency of IVFFlatIndex against brute force.
+
+Two datasets are measured:
+
+* ``simple``: 128-dim SimpleEmbedding vectors of synthetic agent memories
+* ``768d``: clustered 768-dim vectors, matching the embedding size used by
+  the intelligence system's VectorSearchConfig (text-embedding-004)
+
+Usage:
+    python benchmarks/ann_recall.py [--size 50000] [--queries 200]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.memory.ann_index import IVFFlatIndex  # noqa: E402
+from src.memory.vector_memory import SimpleEmbedding, VectorMemory  # noqa: E402
+
+VECTOR_SEARCH_DIMENSIONS = 768
+
+WORDS = (
+    "invoice customer refund deploy pipeline latency error budget agent "
+    "memory cache route model token cost report weekly sync ticket "
+    "priority escalate schedule meeting summary draft review approve"
+).split()
+
+
+def simple_embedding_dataset(size: int, queries: int, seed: int):
+    """Build SimpleEmbedding vectors from random short sentences."""
+    rng = random.Random(seed)
+    embedder = SimpleEmbedding(128)
+
+    def sentence() -> str:
+        return " ".join(rng.choices(WORDS, k=rng.randint(3, 12)))
+
+    data = np.asarray([embedder.embed(sentence()) for _ in range(size)], dtype=np.float32)
+    query = np.asarray([embedder.embed(sentence()) for _ in range(queries)], dtype=np.float32)
+    return data, query
+
+
+def clustered_dataset(size: int, queries: int, dim: int, seed: int):
+    """Build vectors drawn around random cluster centres."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((max(1, size // 500), dim)).astype(np.float32)
+
+    def draw(count: int) -> np.ndarray:
+        picks = rng.integers(0, len(centres), size=count)
+        return centres[picks] + 0.6 * rng.standard_normal((count, dim)).astype(np.float32)
+
+    return draw(size), draw(queries)
+
+
+def run(name: str, data: np.ndarray, queries: np.ndarray, k: int = 10) -> None:
+    """Report exact vs IVF latency and recall@k for a dataset."""
+    dim = data.shape[1]
+    exact = VectorMemory(embedding_dim=dim)
+    ivf = IVFFlatIndex(dim=dim)
+
+    start = time.perf_counter()
+    ids = [exact.store("bench", "", embedding=row.tolist()) for row in data]
+    load_exact = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for memory_id, row in zip(ids, data):
+        ivf.add(memory_id, row.tolist())
+    ivf.train()
+    load_ivf = time.perf_counter() - start
+
+    query_lists = [q.tolist() for q in queries]
+    start = time.perf_counter()
+    truth = [
+        {r.memory.memory_id for r in exact.search("", query_embedding=q, top_k=k)}
+        for q in query_lists
+    ]
+    exact_ms = (time.perf_counter() - start) * 1000 / len(query_lists)
+
+    print(f"\n== {name}: {len(data):,} vectors x {dim} dims ==")
+    print(f"load: exact {load_exact:.2f}s, ivf {load_ivf:.2f}s (nlist={ivf.num_lists})")
+    print(f"brute force: {exact_ms:.3f} ms/query")
+    print(f"{'nprobe':>8} {'recall@10':>10} {'ms/query':>10}")
+    for nprobe in (1, 4, 8, 16, 32, 64):
+        start = time.perf_counter()
+        found = [
+            {memory_id for memory_id, _ in ivf.search(q, k, nprobe=nprobe)}
+            for q in query_lists
+        ]
+        ann_ms = (time.perf_counter() - start) * 1000 / len(query_lists)
+        recall = np.mean([len(f & t) / max(1, len(t)) for f, t in zip(found, truth)])
+        print(f"{nprobe:>8} {recall:>10.3f} {ann_ms:>10.3f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    run("simple", *simple_embedding_dataset(args.size, args.queries, args.seed))
+    run(
+        "768d",
+        *clustered_dataset(args.size, args.queries, VECTOR_SEARCH_DIMENSIONS, args.seed),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Benchmark MessageBroker pub/sub throughput.
+
+Subscribes ``--agents`` agents, each to one of ``--topics`` topics (and a
+few monitors to a message type), then runs ``--publishers`` concurrent publisher tasks
+sending a mix of direct, topic and broadcast messages while consumer
+tasks drain the queues, with publish() and with publish_many(). Also
+times unsubscribing every agent.
+
+Usage:
+    python benchmarks/broker_throughput.py [--agents 500] [--messages 50000] [--batch 100]
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.coordination.a2a_protocol import A2AMessage, MessageType  # noqa: E402
+from src.coordination.message_broker import MessageBroker  # noqa: E402
+
+TYPES = [MessageType.TASK_ASSIGNMENT, MessageType.NOTIFICATION, MessageType.TASK_PROGRESS]
+
+
+def make_messages(count: int, agents: int, topics: int) -> list:
+    """Messages to random agents, with every tenth one broadcast to a topic."""
+    rng = random.Random(0)
+    messages = []
+    for i in range(count):
+        broadcast = i % 10 == 0
+        messages.append((
+            A2AMessage(
+                from_agent_id=f"agent-{rng.randrange(agents)}",
+                to_agent_id=None if broadcast else f"agent-{rng.randrange(agents)}",
+                message_type=rng.choice(TYPES),
+            ),
+            f"team-{rng.randrange(topics)}" if broadcast else None,
+        ))
+    return messages
+
+
+async def run(args: argparse.Namespace, batched: bool) -> tuple:
+    """Return (messages published per second, deliveries, unsubscribe seconds)."""
+    broker = MessageBroker(max_queue_size=args.messages * 2)
+    queues = [
+        await broker.subscribe(
+            f"agent-{i}",
+            topic=f"team-{i % args.topics}",
+            # Every 50th agent also monitors one message type
+            message_types=[TYPES[i % 3]] if i % 50 == 0 else None,
+        )
+        for i in range(args.agents)
+    ]
+    messages = make_messages(args.messages, args.agents, args.topics)
+    deliveries = 0
+
+    async def consume(queue: asyncio.Queue) -> None:
+        nonlocal deliveries
+        while True:
+            await queue.get()
+            deliveries += 1
+
+    async def publisher(part: list) -> None:
+        for start in range(0, len(part), args.batch):
+            chunk = part[start:start + args.batch]
+            if batched:
+                by_topic: dict = {}
+                for message, topic in chunk:
+                    by_topic.setdefault(topic, []).append(message)
+                for topic, group in by_topic.items():
+                    await broker.publish_many(group, topic=topic)
+            else:
+                for message, topic in chunk:
+                    await broker.publish(message, topic=topic)
+            await asyncio.sleep(0)  # Let consumers run
+
+    consumers = [asyncio.create_task(consume(queue)) for queue in queues]
+    start = time.perf_counter()
+    await asyncio.gather(*(publisher(messages[i::args.publishers]) for i in range(args.publishers)))
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(0)
+    for task in consumers:
+        task.cancel()
+
+    start = time.perf_counter()
+    for i in range(args.agents):
+        await broker.unsubscribe(f"agent-{i}")
+    unsubscribe_seconds = time.perf_counter() - start
+    return args.messages / elapsed, deliveries, unsubscribe_seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agents", type=int, default=500)
+    parser.add_argument("--topics", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=50_000)
+    parser.add_argument("--publishers", type=int, default=8)
+    parser.add_argument("--batch", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{args.agents} agents, {args.topics} topics, {args.messages:,} messages, "
+          f"{args.publishers} publishers")
+    print(f"{'mode':<14} {'msgs/s':>10} {'deliveries':>11} {'unsubscribe all ms':>19}")
+    modes = [("publish", False)]
+    if hasattr(MessageBroker, "publish_many"):
+        modes.append(("publish_many", True))
+    for label, batched in modes:
+        rate, deliveries, unsubscribe_seconds = asyncio.run(run(args, batched))
+        print(f"{label:<14} {rate:>10,.0f} {deliveries:>11,} {unsubscribe_seconds * 1e3:>19.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Compare ResultCache eviction policies under a byte budget.
+
+Replays a Zipf-distributed request stream mixed with one-off scan
+requests. Response sizes range from 50 bytes to 200 KB and each key is
+priced as a random model call. Reports hit rate, dollars saved by hits
+(priced with CostTracker) and throughput per policy.
+
+Usage:
+    python benchmarks/cache_eviction.py [--requests 200000] [--budget-mb 20]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.optimization.caching import EVICTION_POLICIES, ResultCache  # noqa: E402
+from src.optimization.cost_tracker import CostTracker  # noqa: E402
+
+MODELS = ["gpt-4", "gpt-4-turbo", "gpt-3.5-turbo", "claude-3-haiku"]
+
+
+def build_workload(requests: int, keys: int, scan_fraction: float, seed: int):
+    """Return the request stream and each key's (size, metadata)."""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) ** 0.9 for rank in range(keys)]
+    stream = rng.choices(range(keys), weights=weights, k=requests)
+    scan_key = keys
+    for i in range(len(stream)):
+        if rng.random() < scan_fraction:
+            stream[i] = scan_key
+            scan_key += 1
+
+    catalog = {}
+    for key in set(stream):
+        size = int(min(200_000, max(50, rng.lognormvariate(7.5, 1.5))))
+        catalog[key] = (size, {
+            "model": rng.choice(MODELS),
+            "input_tokens": rng.randint(100, 4000),
+            "output_tokens": size // 4,
+        })
+    return stream, catalog
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--keys", type=int, default=20_000)
+    parser.add_argument("--scan-fraction", type=float, default=0.3)
+    parser.add_argument("--budget-mb", type=float, default=20.0)
+    args = parser.parse_args()
+
+    stream, catalog = build_workload(args.requests, args.keys, args.scan_fraction, seed=0)
+    tracker = CostTracker()
+    payloads = {size: "x" * (size - 2) for size, _ in catalog.values()}
+
+    print(f"{len(stream):,} requests, {len(catalog):,} distinct keys, {args.budget_mb} MB budget")
+    print(f"{'policy':<8} {'hit rate':>9} {'$ saved':>10} {'requests/s':>12}")
+    for policy in EVICTION_POLICIES:
+        cache = ResultCache(
+            max_size=len(catalog),
+            default_ttl_seconds=None,
+            max_size_bytes=int(args.budget_mb * 1024 * 1024),
+            eviction_policy=policy,
+            cost_tracker=tracker,
+        )
+        saved = 0.0
+        start = time.perf_counter()
+        for request in stream:
+            key = str(request)
+            size, metadata = catalog[request]
+            if cache.get(key) is not None:
+                saved += tracker.estimate_call_cost(
+                    metadata["model"], metadata["input_tokens"], metadata["output_tokens"]
+                )
+            else:
+                cache.set(key, payloads[size], metadata=metadata)
+        elapsed = time.perf_counter() - start
+        stats = cache.get_stats()
+        print(f"{policy:<8} {stats.hit_rate:8.2f}% {saved:10.2f} {len(stream) / elapsed:12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
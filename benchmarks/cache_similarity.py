@@ -0,0 +1,69 @@
+"""Benchmark ResultCache similar-prompt lookup against a full scan.
+
+Fills the cache with ``--size`` prompts split across two models and times
+``find_similar`` (token index with prefix filtering) against the
+equivalent linear scan over every entry.
+
+Usage:
+    python benchmarks/cache_similarity.py [--size 100000] [--threshold 0.95]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.optimization.caching import ResultCache  # noqa: E402
+
+VOCABULARY = [f"word{i}" for i in range(5000)]
+
+
+def make_prompt(rng: random.Random) -> str:
+    """Build a prompt mixing common and rare words."""
+    pool = VOCABULARY[: rng.choice([100, 1000, len(VOCABULARY)])]
+    return " ".join(rng.choice(pool) for _ in range(rng.randint(4, 20)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--threshold", type=float, default=0.95)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    cache = ResultCache(max_size=args.size, similarity_threshold=args.threshold)
+    stored = []
+    start = time.perf_counter()
+    for i in range(args.size):
+        prompt = make_prompt(rng)
+        model = "model-a" if i % 2 else "model-b"
+        cache.set(f"key-{i}", i, metadata={"prompt": prompt, "model": model})
+        stored.append((prompt, model))
+    print(f"set() with indexing: {(time.perf_counter() - start) * 1e6 / args.size:.2f} us/entry")
+
+    queries = []
+    for _ in range(args.queries):
+        prompt, model = rng.choice(stored)
+        queries.append((prompt + " " + rng.choice(VOCABULARY), model))
+
+    start = time.perf_counter()
+    found = sum(bool(cache.find_similar(p, m)) for p, m in queries)
+    indexed = (time.perf_counter() - start) / len(queries)
+
+    scan_queries = queries[:20]
+    start = time.perf_counter()
+    for p, m in scan_queries:
+        cache._scan_similar(p, m, args.threshold)
+    scanned = (time.perf_counter() - start) / len(scan_queries)
+
+    print(f"{args.size:,} entries, threshold {args.threshold}, {found}/{len(queries)} queries matched")
+    print(f"find_similar (indexed): {indexed * 1000:8.3f} ms/query")
+    print(f"full scan:              {scanned * 1000:8.3f} ms/query  ({scanned / indexed:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
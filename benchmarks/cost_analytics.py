@@ -0,0 +1,79 @@
+"""Benchmark CostTracker analytics over a large columnar record store.
+
+Bulk-loads ``--size`` records spread over ``--days`` days into a
+CostRecordStore and times 30-day top-spenders, stats and trend queries,
+cold (first run) and warm (whole-partition aggregates cached).
+
+Usage:
+    python benchmarks/cost_analytics.py [--size 10000000] [--days 60]
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.optimization.cost_store import CostRecordStore  # noqa: E402
+from src.optimization.cost_tracker import CostTracker  # noqa: E402
+
+CHUNK = 500_000
+
+
+def load(store: CostRecordStore, size: int, days: int) -> None:
+    """Append ``size`` synthetic records in time order."""
+    rng = random.Random(0)
+    agents = [f"agent-{i}" for i in range(1000)]
+    users = [f"user-{i}" for i in range(5000)]
+    models = ["gpt-4", "gpt-3.5-turbo", "claude-3-haiku", "local-slm"]
+    start = datetime.now() - timedelta(days=days)
+    step = timedelta(days=days) / size
+
+    for offset in range(0, size, CHUNK):
+        count = min(CHUNK, size - offset)
+        store.extend(
+            timestamps=[start + step * (offset + i) for i in range(count)],
+            categories=["llm_api"] * count,
+            amounts=[rng.random() / 100 for _ in range(count)],
+            agent_ids=[rng.choice(agents) for _ in range(count)],
+            user_ids=[rng.choice(users) for _ in range(count)],
+            model_names=[rng.choice(models) for _ in range(count)],
+            tokens_used=[rng.randint(10, 2000) for _ in range(count)],
+        )
+
+
+def timed(label: str, func) -> None:
+    """Report cold and warm timings for a query."""
+    results = []
+    for run in ("cold", "warm"):
+        start = time.perf_counter()
+        func()
+        results.append(f"{run} {(time.perf_counter() - start) * 1000:8.1f} ms")
+    print(f"{label:<34} " + "   ".join(results))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=10_000_000)
+    parser.add_argument("--days", type=int, default=60)
+    args = parser.parse_args()
+
+    store = CostRecordStore()
+    start = time.perf_counter()
+    load(store, args.size, args.days)
+    print(f"Loaded {len(store):,} records into {store.num_partitions} partitions "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    tracker = CostTracker(enable_alerts=False, store=store)
+    timed("get_top_spenders(agent, 30 days)", lambda: tracker.get_top_spenders("agent", days=30))
+    timed("get_top_spenders(user, 30 days)", lambda: tracker.get_top_spenders("user", days=30))
+    timed("get_stats(all time)", lambda: tracker.get_stats())
+    timed("get_agent_stats(agent-7, 30 days)", lambda: tracker.get_agent_stats("agent-7"))
+    timed("get_cost_trends(30 days, daily)", lambda: tracker.get_cost_trends(days=30))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark ExperienceReplayPattern add, sample and priority-update costs.
+
+Fills a buffer of ``--size`` experiences (then keeps adding to exercise
+ring-buffer eviction) and times prioritized sampling, agent-filtered
+sampling and priority updates, which are all O(log N) per item.
+
+Usage:
+    python benchmarks/experience_replay.py [--size 1000000] [--agents 100]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.memory.patterns import ExperienceReplayPattern  # noqa: E402
+
+
+def timed(label: str, operations: int, func) -> None:
+    """Run ``func`` once and report microseconds per operation."""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed * 1e6 / operations:10.2f} us/op  ({elapsed:.2f}s total)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--agents", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    random.seed(0)
+    replay = ExperienceReplayPattern(max_experiences=args.size, batch_size=32)
+    state: dict = {}
+    ids = []
+
+    def fill() -> None:
+        for i in range(args.size):
+            ids.append(
+                replay.add_experience(
+                    f"agent-{i % args.agents}", state, state, rng.random(), state,
+                    priority=rng.random(),
+                )
+            )
+
+    def evicting_adds() -> None:
+        for i in range(args.rounds * 10):
+            replay.add_experience(f"agent-{i % args.agents}", state, state, 0.0, state)
+
+    def sample() -> None:
+        for _ in range(args.rounds):
+            replay.sample_batch()
+
+    def sample_agent() -> None:
+        for i in range(args.rounds):
+            replay.sample_batch(agent_id=f"agent-{i % args.agents}")
+
+    def sample_uniform() -> None:
+        for _ in range(args.rounds):
+            replay.sample_batch(use_priority=False)
+
+    live_ids = ids  # Refreshed after eviction below
+
+    def update() -> None:
+        for _ in range(args.rounds):
+            batch = rng.sample(live_ids, 32)
+            replay.update_priorities(batch, [rng.random() for _ in batch])
+
+    print(f"ExperienceReplayPattern, {args.size:,} experiences, {args.agents} agents")
+    timed("add (filling)", args.size, fill)
+    timed("add (at capacity, evicting)", args.rounds * 10, evicting_adds)
+    live_ids = [e.experience_id for e in replay.get_recent_experiences(100_000)]
+    timed("sample_batch(32) prioritized", args.rounds, sample)
+    timed("sample_batch(32) per agent", args.rounds, sample_agent)
+    timed("sample_batch(32) uniform", args.rounds, sample_uniform)
+    timed("update_priorities(32)", args.rounds, update)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Benchmark the LocalSLM fast path.
+
+Times is_routine_task() on routine and non-routine prompts, and execute()
+with and without the response cache, in microseconds per call.
+
+Usage:
+    python benchmarks/local_slm_latency.py [--calls 50000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.optimization.local_slm import LocalSLM  # noqa: E402
+
+PROMPTS = {
+    "greeting": "hello there",
+    "status check": "what is the status of the build",
+    "calculation": "calculate 5 plus 3",
+    "non-routine": "could you please write me a poem about the sea and the sky at night",
+}
+
+
+def per_call(func, calls: int) -> float:
+    """Return microseconds per call of ``func``."""
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) * 1e6 / calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=50_000)
+    args = parser.parse_args()
+
+    cached = LocalSLM()
+    uncached = LocalSLM(response_cache_size=0)
+
+    print(f"{'prompt':<14} {'is_routine':>11} {'execute':>9} {'cached':>9}  (us/call)")
+    for label, prompt in PROMPTS.items():
+        classify = per_call(lambda: uncached.is_routine_task(prompt), args.calls)
+        execute = per_call(lambda: uncached.execute(prompt), args.calls)
+        execute_cached = per_call(lambda: cached.execute(prompt), args.calls)
+        print(f"{label:<14} {classify:11.2f} {execute:9.2f} {execute_cached:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
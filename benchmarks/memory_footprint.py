@@ -0,0 +1,72 @@
+"""Benchmark bytes per stored memory for default vs compact VectorMemory.
+
+Measures traced allocations while storing ``--size`` memories with
+128-dim embeddings, first for the memory objects alone (``use_index=False``)
+and then including the NumPy search index.
+
+Usage:
+    python benchmarks/memory_footprint.py [--size 20000] [--dim 128]
+"""
+
+import argparse
+import gc
+import random
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.memory.vector_memory import VectorMemory  # noqa: E402
+
+TAGS = ["billing", "support", "sales", "ops", "incident", "weekly", "customer"]
+
+
+def measure(size: int, dim: int, compact: bool, use_index: bool) -> float:
+    """Return traced bytes per memory for one configuration."""
+    rng = random.Random(0)
+    payload = [
+        (
+            f"agent-{i % 50}",
+            f"memory number {i}",
+            [rng.random() for _ in range(dim)],
+            rng.sample(TAGS, 2),
+        )
+        for i in range(size)
+    ]
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    memory = VectorMemory(embedding_dim=dim, use_index=use_index, compact=compact)
+    for agent_id, content, embedding, tags in payload:
+        # Fresh float objects, as an embedder would produce
+        memory.store(agent_id, content, tags=list(tags), embedding=[x + 0.0 for x in embedding])
+
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert memory.get_memory_count() == size
+    return (after - before) / size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=20_000)
+    parser.add_argument("--dim", type=int, default=128)
+    args = parser.parse_args()
+
+    raw = args.dim * 4
+    print(f"{args.size:,} memories x {args.dim} dims (raw float32 vector: {raw} bytes)")
+    print(f"{'configuration':<28} {'bytes/memory':>14} {'x raw':>8}")
+    for use_index in (False, True):
+        for compact in (False, True):
+            label = f"{'compact' if compact else 'default'}{' + index' if use_index else ''}"
+            per_memory = measure(args.size, args.dim, compact, use_index)
+            print(f"{label:<28} {per_memory:>14,.0f} {per_memory / raw:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark LLMRouter routing throughput.
+
+Routes a pool of synthetic prompts with the decision cache disabled
+(classifier cost only), with the cache enabled (repeated prompts) and
+through route_batch().
+
+Usage:
+    python benchmarks/router_throughput.py [--prompts 2000] [--seconds 2]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.optimization.llm_router import LLMRouter  # noqa: E402
+
+WORDS = (
+    "the a user data report please service system analyze explain summarize list "
+    "security distributed async performance algorithm code review integrate "
+    "translate customer order invoice status"
+).split()
+
+
+def throughput(func, prompts, seconds: float) -> float:
+    """Return prompts routed per second."""
+    routed = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        func(prompts)
+        routed += len(prompts)
+    return routed / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--prompts", type=int, default=2000)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    prompts = [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 150)))
+        for _ in range(args.prompts)
+    ]
+
+    uncached = LLMRouter(cache_size=0)
+    cached = LLMRouter(cache_size=args.prompts * 2)
+    batched = LLMRouter(cache_size=args.prompts * 2)
+
+    results = {
+        "route (no cache)": throughput(
+            lambda ps: [uncached.route(p, context_length=500) for p in ps], prompts, args.seconds
+        ),
+        "route (cached)": throughput(
+            lambda ps: [cached.route(p, context_length=500) for p in ps], prompts, args.seconds
+        ),
+        "route_batch": throughput(
+            lambda ps: batched.route_batch(ps, context_length=500), prompts, args.seconds
+        ),
+    }
+    for label, rate in results.items():
+        print(f"{label:<18} {rate:12,.0f} routes/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Benchmark session entry codecs: size and (de)serialization time.
+
+Encodes ``--sessions`` sessions of ``--history`` entries (the default
+max_history_length) with each codec, then times a full get_session of
+every session through SessionMemory on fakeredis.
+
+Usage:
+    python benchmarks/session_codec.py [--sessions 200] [--history 100]
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.memory.session_memory import (  # noqa: E402
+    MSGPACK_AVAILABLE,
+    JsonSessionCodec,
+    MsgpackSessionCodec,
+    Session,
+    SessionEntry,
+    SessionMemory,
+    StructSessionCodec,
+    decode_entry,
+)
+
+WORDS = ["invoice", "refund", "order", "customer", "shipping", "delay", "account",
+         "password", "the", "please", "check", "status", "thanks", "issue", "ticket"]
+
+
+def timed(fn: Callable[[], Any]) -> Tuple[float, Any]:
+    """Return (elapsed seconds, result) of one call."""
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def make_sessions(count: int, history: int) -> list:
+    """Sessions of chat-like entries; every few entries carry metadata."""
+    rng = random.Random(0)
+    start = datetime(2024, 1, 1)
+    sessions = []
+    for i in range(count):
+        entries = []
+        for j in range(history):
+            length = rng.choice([8, 20, 40, 120])
+            entries.append(SessionEntry(
+                role="user" if j % 2 == 0 else "agent",
+                content=" ".join(rng.choice(WORDS) for _ in range(length)),
+                timestamp=start + timedelta(seconds=i * 1000 + j),
+                metadata={"tokens": length, "model": "gpt-4o-mini"} if j % 4 == 1 else {},
+            ))
+        sessions.append(Session(agent_id=f"agent-{i % 20}", history=entries))
+    return sessions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--history", type=int, default=100)
+    args = parser.parse_args()
+
+    sessions = make_sessions(args.sessions, args.history)
+    entries = [entry for session in sessions for entry in session.history]
+    codecs = [
+        ("json", JsonSessionCodec()),
+        ("struct", StructSessionCodec(compress_threshold=0)),
+        ("struct + zlib > 512B", StructSessionCodec(compress_threshold=512)),
+    ]
+    if MSGPACK_AVAILABLE:
+        codecs.append(("msgpack", MsgpackSessionCodec(compress_threshold=0)))
+
+    print(f"{args.sessions} sessions x {args.history} entries ({len(entries):,} entries)")
+    print(f"{'codec':<22} {'bytes/entry':>12} {'encode us':>10} {'decode us':>10} {'get_session ms':>15}")
+    for label, codec in codecs:
+        encode_seconds, encoded = timed(lambda: [codec.encode_entry(entry) for entry in entries])
+        size = sum(len(data.encode() if isinstance(data, str) else data) for data in encoded)
+        decode_seconds, decoded = timed(lambda: [decode_entry(data) for data in encoded])
+        assert decoded[-1].content == entries[-1].content
+
+        memory = SessionMemory(codec=codec, max_history_length=args.history)
+        for session in sessions:
+            memory.store_session(session)
+        read_seconds, _ = timed(lambda: [memory.get_session(s.session_id) for s in sessions])
+
+        print(f"{label:<22} {size / len(entries):>12,.0f} "
+              f"{encode_seconds / len(entries) * 1e6:>10.2f} {decode_seconds / len(entries) * 1e6:>10.2f} "
+              f"{read_seconds / len(sessions) * 1e3:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Benchmark concurrent session traffic: SessionMemory vs AsyncSessionMemory.
+
+Simulates ``--agents`` agents, each running ``--turns`` turns of
+``--reads`` session reads followed by one history append, against a
+shared fakeredis server. ``--latency-ms`` adds a simulated network round
+trip to every command or pipeline, which is where asyncio concurrency and
+the local read-through cache pay off; fakeredis itself has none.
+
+Usage:
+    python benchmarks/session_memory_async.py [--agents 200] [--turns 5] [--reads 3] [--latency-ms 1]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Tuple
+
+import fakeredis
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.memory.session_memory import AsyncSessionMemory, Session, SessionMemory  # noqa: E402
+
+
+class _Delayed:
+    """Proxy adding a round-trip delay to client commands and pipeline executes.
+
+    Commands queued on a pipeline are free; its ``execute`` and ``watch``
+    each cost one round trip.
+    """
+
+    def __init__(self, target: Any, delay: float, is_async: bool, pipeline: bool = False) -> None:
+        self._target = target
+        self._delay = delay
+        self._is_async = is_async
+        self._pipeline = pipeline
+
+    def pipeline(self, *args: Any, **kwargs: Any) -> Any:
+        return _Delayed(self._target.pipeline(*args, **kwargs), self._delay, self._is_async, True)
+
+    async def __aenter__(self) -> "_Delayed":
+        await self._target.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self._target.__aexit__(*exc)
+
+    def __enter__(self) -> "_Delayed":
+        self._target.__enter__()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._target.__exit__(*exc)
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if not callable(attr) or (self._pipeline and name not in ("execute", "watch")):
+            return attr
+        if self._is_async:
+            async def call(*args: Any, **kwargs: Any) -> Any:
+                await asyncio.sleep(self._delay)
+                return await attr(*args, **kwargs)
+        else:
+            def call(*args: Any, **kwargs: Any) -> Any:
+                time.sleep(self._delay)
+                return attr(*args, **kwargs)
+        return call
+
+
+def _wrap(client: Any, latency_ms: float, is_async: bool) -> Any:
+    """Add simulated latency to a client, if any is configured."""
+    return _Delayed(client, latency_ms / 1000, is_async) if latency_ms > 0 else client
+
+
+def timed(fn: Callable[[], Any]) -> Tuple[float, Any]:
+    """Return (elapsed seconds, result) of one call."""
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def seed(server: fakeredis.FakeServer, agents: int) -> list:
+    """Store one session per agent and return their IDs."""
+    memory = SessionMemory(redis_client=fakeredis.FakeRedis(server=server, decode_responses=True))
+    ids = []
+    for i in range(agents):
+        session = Session(agent_id=f"agent-{i}", context={"topic": "billing", "step": 0})
+        memory.store_session(session)
+        ids.append(session.session_id)
+    return ids
+
+
+def run_sync(args: argparse.Namespace) -> int:
+    server = fakeredis.FakeServer()
+    ids = seed(server, args.agents)
+    client = fakeredis.FakeRedis(server=server, decode_responses=True)
+    memory = SessionMemory(redis_client=_wrap(client, args.latency_ms, False))
+    operations = 0
+    for _ in range(args.turns):
+        for session_id in ids:
+            for _ in range(args.reads):
+                memory.get_session(session_id)
+            memory.append_to_history(session_id, "agent", "reply")
+            operations += args.reads + 1
+    return operations
+
+
+def run_async(args: argparse.Namespace, cache_ttl: float) -> int:
+    server = fakeredis.FakeServer()
+    ids = seed(server, args.agents)
+
+    async def agent(memory: AsyncSessionMemory, session_id: str) -> int:
+        for _ in range(args.turns):
+            for _ in range(args.reads):
+                await memory.get_session(session_id)
+            await memory.append_to_history(session_id, "agent", "reply")
+        return args.turns * (args.reads + 1)
+
+    async def main() -> int:
+        client = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+        memory = AsyncSessionMemory(
+            redis_client=_wrap(client, args.latency_ms, True), local_cache_ttl_seconds=cache_ttl
+        )
+        counts = await asyncio.gather(*(agent(memory, session_id) for session_id in ids))
+        await client.aclose()
+        return sum(counts)
+
+    return asyncio.run(main())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agents", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--reads", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"{args.agents} agents x {args.turns} turns x ({args.reads} reads + 1 append), "
+          f"{args.latency_ms} ms simulated round trip")
+    print(f"{'configuration':<28} {'seconds':>9} {'ops/s':>10}")
+    runs = [
+        ("SessionMemory (sequential)", lambda: run_sync(args)),
+        ("AsyncSessionMemory", lambda: run_async(args, cache_ttl=0)),
+        ("AsyncSessionMemory + cache", lambda: run_async(args, cache_ttl=1.0)),
+    ]
+    for label, run in runs:
+        seconds, operations = timed(run)
+        print(f"{label:<28} {seconds:>9.2f} {operations / seconds:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
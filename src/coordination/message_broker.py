@@ -5,8 +5,8 @@ messaging patterns between agents.
 """
 
 import asyncio
-from collections import defaultdict
-from typing import Callable, Dict, List, Optional, Set
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
 import logging
 
 from .a2a_protocol import A2AMessage, MessageType
@@ -14,6 +14,59 @@ from .a2a_protocol import A2AMessage, MessageType
 
 logger = logging.getLogger(__name__)
 
+# Most fan-out lists memoized per routing table snapshot
+_MAX_RESOLVED_ROUTES = 4096
+
+
+@dataclass(frozen=True)
+class _RoutingTable:
+    """Immutable snapshot of the broker's topic and type subscriptions.
+
+    Subscribe and unsubscribe build a new table and swap it in, so
+    publishers read the current one without taking the broker's lock.
+    Resolved fan-out lists are memoized on the snapshot and disappear with
+    it when the subscriptions change.
+    """
+
+    topics: Dict[str, Tuple[asyncio.Queue, ...]] = field(default_factory=dict)
+    types: Dict[MessageType, Tuple[asyncio.Queue, ...]] = field(default_factory=dict)
+    resolved: Dict[Tuple[Any, ...], Tuple[Tuple[asyncio.Queue, ...], FrozenSet[asyncio.Queue]]] = field(
+        default_factory=dict
+    )
+
+    def resolve(
+        self,
+        topic: Optional[str],
+        message_type: MessageType,
+        broadcast: bool,
+    ) -> Tuple[Tuple[asyncio.Queue, ...], FrozenSet[asyncio.Queue]]:
+        """Topic, type and broadcast subscribers of a message, each once.
+
+        Args:
+            topic: Topic the message is published to, if any
+            message_type: Type of the message
+            broadcast: Whether the message has no specific recipient
+
+        Returns:
+            Tuple of distinct queues, and the same queues as a set
+        """
+        key = (topic, message_type, broadcast)
+        fan_out = self.resolved.get(key)
+        if fan_out is not None:
+            return fan_out
+
+        # 1. Topic subscribers, 3. message type subscribers,
+        # 4. broadcast (the agent-specific queue is added by the broker)
+        sources = [self.topics.get(topic, ()) if topic else (), self.types.get(message_type, ())]
+        if broadcast:
+            sources.append(self.topics.get("broadcast", ()))
+        queues = tuple(dict.fromkeys(queue for source in sources for queue in source))
+
+        if len(self.resolved) >= _MAX_RESOLVED_ROUTES:
+            self.resolved.clear()
+        fan_out = self.resolved[key] = (queues, frozenset(queues))
+        return fan_out
+
 
 class MessageBroker:
     """In-memory message broker for agent communication.
@@ -24,6 +77,12 @@ class MessageBroker:
     - Message type filtering
     - Message persistence (optional, in-memory)
     - Dead letter queue for failed messages
+
+    Publishing does not take the broker's lock: it reads an immutable
+    topic/type routing table that subscribe and unsubscribe replace
+    (copy-on-write), plus the agent map, which is only changed under the
+    lock. A reverse index from each queue to its subscriptions lets
+    unsubscribe touch only the agent's own routes.
     """
 
     def __init__(self, max_queue_size: int = 1000, enable_persistence: bool = False):
@@ -33,9 +92,10 @@ class MessageBroker:
             max_queue_size: Maximum number of messages to queue per subscriber
             enable_persistence: Whether to keep a history of all messages
         """
-        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._routes = _RoutingTable()
         self._agent_subscribers: Dict[str, asyncio.Queue] = {}
-        self._type_subscribers: Dict[MessageType, Set[asyncio.Queue]] = defaultdict(set)
+        # Reverse index: queue -> ("topic", topic) / ("type", message_type) routes
+        self._queue_routes: Dict[asyncio.Queue, List[Tuple[str, Any]]] = {}
         self._max_queue_size = max_queue_size
         self._enable_persistence = enable_persistence
         self._message_history: List[A2AMessage] = [] if enable_persistence else None
@@ -62,65 +122,97 @@ class MessageBroker:
         Returns:
             True if message was delivered to at least one subscriber, False otherwise
         """
-        async with self._lock:
-            if not self._running:
-                logger.warning("MessageBroker is not running, message rejected")
-                return False
-
-            # Store in history if persistence is enabled
-            if self._enable_persistence:
-                self._message_history.append(message)
-
-            delivered = False
-            delivery_queues: Set[asyncio.Queue] = set()
-
-            # Collect all queues that should receive this message
-            # 1. Topic subscribers
-            if topic and topic in self._subscribers:
-                delivery_queues.update(self._subscribers[topic])
-
-            # 2. Agent-specific subscription
-            if message.to_agent_id and message.to_agent_id in self._agent_subscribers:
-                delivery_queues.add(self._agent_subscribers[message.to_agent_id])
-
-            # 3. Message type subscribers
-            if message.message_type in self._type_subscribers:
-                delivery_queues.update(self._type_subscribers[message.message_type])
-
-            # 4. Broadcast (no specific recipient)
-            if not message.to_agent_id and "broadcast" in self._subscribers:
-                delivery_queues.update(self._subscribers["broadcast"])
-
-            # Deliver to all queues
-            for queue in delivery_queues:
-                try:
-                    if queue.qsize() < self._max_queue_size:
-                        queue.put_nowait(message)
-                        delivered = True
-                    else:
-                        logger.warning(
-                            f"Queue full, moving message {message.message_id} to dead letter queue"
-                        )
-                        self._dead_letter_queue.append(message)
-                except asyncio.QueueFull:
-                    logger.warning(
-                        f"Queue full, moving message {message.message_id} to dead letter queue"
-                    )
-                    self._dead_letter_queue.append(message)
-
-            if delivered:
-                logger.debug(
-                    f"Published message {message.message_id} from {message.from_agent_id} "
-                    f"to {len(delivery_queues)} subscriber(s)"
-                )
-            else:
+        if not self._running:
+            logger.warning("MessageBroker is not running, message rejected")
+            return False
+
+        # Store in history if persistence is enabled
+        if self._enable_persistence:
+            self._message_history.append(message)
+
+        return self._deliver(message, self._route(self._routes, message, topic))
+
+    async def publish_many(
+        self,
+        messages: List[A2AMessage],
+        topic: Optional[str] = None,
+    ) -> List[bool]:
+        """Publish a batch of messages to subscribers.
+
+        All messages are routed against the same subscription snapshot,
+        and history, state checks and lookups are done once per batch.
+
+        Args:
+            messages: The A2A messages to publish, in order
+            topic: Optional topic to publish all of them to
+
+        Returns:
+            For each message, whether it was delivered to at least one subscriber
+        """
+        if not self._running:
+            logger.warning(f"MessageBroker is not running, {len(messages)} message(s) rejected")
+            return [False] * len(messages)
+
+        if self._enable_persistence:
+            self._message_history.extend(messages)
+
+        routes = self._routes
+        route = self._route
+        deliver = self._deliver
+        return [deliver(message, route(routes, message, topic)) for message in messages]
+
+    def _route(
+        self,
+        routes: _RoutingTable,
+        message: A2AMessage,
+        topic: Optional[str],
+    ) -> Tuple[asyncio.Queue, ...]:
+        """Queues a message should be delivered to, each once."""
+        to_agent_id = message.to_agent_id
+        queues, members = routes.resolve(topic, message.message_type, not to_agent_id)
+
+        # 2. Agent-specific subscription
+        if to_agent_id:
+            agent_queue = self._agent_subscribers.get(to_agent_id)
+            if agent_queue is not None and agent_queue not in members:
+                queues = queues + (agent_queue,)
+        return queues
+
+    def _deliver(self, message: A2AMessage, queues: Tuple[asyncio.Queue, ...]) -> bool:
+        """Put a message on its queues, dead-lettering it where that fails.
+
+        Args:
+            message: Message to deliver
+            queues: Resolved recipient queues
+
+        Returns:
+            True if at least one queue accepted the message
+        """
+        delivered = False
+        for queue in queues:
+            try:
+                queue.put_nowait(message)
+                delivered = True
+            except asyncio.QueueFull:
                 logger.warning(
-                    f"Message {message.message_id} has no subscribers, "
-                    f"moved to dead letter queue"
+                    f"Queue full, moving message {message.message_id} to dead letter queue"
                 )
                 self._dead_letter_queue.append(message)
 
-            return delivered
+        if delivered:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    f"Published message {message.message_id} from {message.from_agent_id} "
+                    f"to {len(queues)} subscriber(s)"
+                )
+        else:
+            logger.warning(
+                f"Message {message.message_id} has no subscribers, "
+                f"moved to dead letter queue"
+            )
+            self._dead_letter_queue.append(message)
+
+        return delivered
 
     async def subscribe(
         self,
@@ -141,30 +233,41 @@ class MessageBroker:
         async with self._lock:
             # Create a new queue for this subscription
             queue = asyncio.Queue(maxsize=self._max_queue_size)
+            topics, types = self._routes.topics, self._routes.types
+            queue_routes: List[Tuple[str, Any]] = []
 
             # Subscribe to agent-specific messages
             self._agent_subscribers[agent_id] = queue
 
             # Subscribe to topic if provided
             if topic:
-                self._subscribers[topic].add(queue)
+                topics = {**topics, topic: topics.get(topic, ()) + (queue,)}
+                queue_routes.append(("topic", topic))
                 logger.debug(f"Agent {agent_id} subscribed to topic '{topic}'")
 
             # Subscribe to message types if provided
             if message_types:
-                for msg_type in message_types:
-                    self._type_subscribers[msg_type].add(queue)
+                types = dict(types)
+                for msg_type in dict.fromkeys(message_types):
+                    types[msg_type] = types.get(msg_type, ()) + (queue,)
+                    queue_routes.append(("type", msg_type))
                 logger.debug(
                     f"Agent {agent_id} subscribed to message types: "
                     f"{[mt.value for mt in message_types]}"
                 )
 
+            if queue_routes:
+                self._queue_routes[queue] = queue_routes
+                self._routes = _RoutingTable(topics=topics, types=types)
             logger.info(f"Agent {agent_id} subscribed to message broker")
             return queue
 
     async def unsubscribe(self, agent_id: str) -> None:
         """Unsubscribe an agent from all messages.
 
+        Only the topics and types the agent's queue is subscribed to are
+        updated, found through the reverse index.
+
         Args:
             agent_id: ID of the agent to unsubscribe
         """
@@ -173,14 +276,20 @@ class MessageBroker:
             queue = self._agent_subscribers.pop(agent_id, None)
 
             if queue:
-                # Remove from topic subscribers
-                for topic_queues in self._subscribers.values():
-                    topic_queues.discard(queue)
-
-                # Remove from type subscribers
-                for type_queues in self._type_subscribers.values():
-                    type_queues.discard(queue)
-
+                queue_routes = self._queue_routes.pop(queue, ())
+                if queue_routes:
+                    topics, types = dict(self._routes.topics), dict(self._routes.types)
+
+                    # Remove from topic and type subscribers
+                    for kind, key in queue_routes:
+                        table = topics if kind == "topic" else types
+                        remaining = tuple(q for q in table[key] if q is not queue)
+                        if remaining:
+                            table[key] = remaining
+                        else:
+                            del table[key]
+
+                    self._routes = _RoutingTable(topics=topics, types=types)
                 logger.info(f"Agent {agent_id} unsubscribed from message broker")
 
     async def get_message_history(
@@ -252,9 +361,9 @@ class MessageBroker:
         """Shutdown the message broker."""
         async with self._lock:
             self._running = False
-            self._subscribers.clear()
+            self._routes = _RoutingTable()
             self._agent_subscribers.clear()
-            self._type_subscribers.clear()
+            self._queue_routes.clear()
             logger.info("MessageBroker shut down")
 
     def get_stats(self) -> Dict[str, int]:
@@ -263,10 +372,11 @@ class MessageBroker:
         Returns:
             Dictionary with broker statistics
         """
+        routes = self._routes
         return {
             "total_subscribers": len(self._agent_subscribers),
-            "topic_subscriptions": sum(len(queues) for queues in self._subscribers.values()),
-            "type_subscriptions": sum(len(queues) for queues in self._type_subscribers.values()),
+            "topic_subscriptions": sum(len(queues) for queues in routes.topics.values()),
+            "type_subscriptions": sum(len(queues) for queues in routes.types.values()),
             "messages_in_history": len(self._message_history) if self._enable_persistence else 0,
             "dead_letter_count": len(self._dead_letter_queue),
         }
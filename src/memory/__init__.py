@@ -7,22 +7,39 @@ consolidation utilities, and advanced memory patterns.
 
 # Session Memory (Short-term)
 from .session_memory import (
+    AsyncSessionMemory,
+    JsonSessionCodec,
+    MsgpackSessionCodec,
     Session,
+    SessionCodec,
     SessionEntry,
     SessionMemory,
+    StructSessionCodec,
+    register_codec,
 )
 
 # Vector Memory (Long-term)
 from .vector_memory import (
+    CompactMemoryVector,
     MemoryVector,
     SearchResult,
     SimpleEmbedding,
     VectorMemory,
 )
 
+# Approximate Nearest Neighbour Search
+from .ann_index import (
+    ANNIndex,
+    IVFFlatIndex,
+)
+
+# Persistent Snapshots
+from .snapshot import MemorySnapshot
+
 # Memory Consolidation
 from .consolidation import (
     ConsolidationConfig,
+    IncrementalConsolidator,
     MemoryConsolidator,
     calculate_importance_score,
     find_redundant_memories,
@@ -44,16 +61,29 @@ from .patterns import (
 
 __all__ = [
     # Session Memory
+    "AsyncSessionMemory",
+    "JsonSessionCodec",
+    "MsgpackSessionCodec",
     "Session",
+    "SessionCodec",
     "SessionEntry",
     "SessionMemory",
+    "StructSessionCodec",
+    "register_codec",
     # Vector Memory
+    "CompactMemoryVector",
     "MemoryVector",
     "SearchResult",
     "SimpleEmbedding",
     "VectorMemory",
+    # ANN Search
+    "ANNIndex",
+    "IVFFlatIndex",
+    # Snapshots
+    "MemorySnapshot",
     # Consolidation
     "ConsolidationConfig",
+    "IncrementalConsolidator",
     "MemoryConsolidator",
     "calculate_importance_score",
     "find_redundant_memories",
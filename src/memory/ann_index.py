@@ -0,0 +1,385 @@
+"""Approximate Nearest Neighbour Index - IVF-flat search for vector memory.
+
+This module provides a pure NumPy inverted-file (IVF-flat) index that can
+be plugged into VectorMemory for stores holding millions of memories.
+Vectors are bucketed by their nearest k-means centroid and a query only
+scans the ``nprobe`` closest buckets, trading a little recall for a large
+cut in latency.
+"""
+
+import math
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+
+class ANNIndex(ABC):
+    """
+    Interface for approximate nearest neighbour backends.
+
+    Implementations index normalized embeddings by memory ID and return
+    raw cosine similarities (-1.0 to 1.0); VectorMemory applies its own
+    0-1 scaling on top.
+    """
+
+    @abstractmethod
+    def add(self, memory_id: str, embedding: List[float]) -> None:
+        """Add or replace the embedding for a memory."""
+
+    @abstractmethod
+    def remove(self, memory_id: str) -> bool:
+        """Remove a memory, returning True if it was indexed."""
+
+    @abstractmethod
+    def search(
+        self,
+        query_embedding: List[float],
+        top_k: int,
+    ) -> List[Tuple[str, float]]:
+        """Return up to ``top_k`` (memory_id, cosine) pairs, best first."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove every entry from the index."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of indexed memories."""
+
+
+# Most entries in one chunk of the vectors x centroids score matrix
+_ASSIGN_CHUNK_CELLS = 1 << 22
+
+
+def _assign(vectors: "np.ndarray", centroids: "np.ndarray") -> "np.ndarray":
+    """Index of the closest centroid for each vector, scored in row chunks."""
+    chunk = max(1, _ASSIGN_CHUNK_CELLS // len(centroids))
+    if len(vectors) <= chunk:
+        return np.argmax(vectors @ centroids.T, axis=1)
+    return np.concatenate([
+        np.argmax(vectors[start:start + chunk] @ centroids.T, axis=1)
+        for start in range(0, len(vectors), chunk)
+    ])
+
+
+class _InvertedList:
+    """Contiguous storage for the vectors assigned to one centroid."""
+
+    def __init__(self, dim: int, capacity: int = 64):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.seqs = np.zeros(capacity, dtype=np.int64)
+        self.ids: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def append(self, memory_id: str, vector: "np.ndarray", seq: int) -> int:
+        """Append a vector and return its position in the list."""
+        pos = len(self.ids)
+        if pos >= self.vectors.shape[0]:
+            capacity = self.vectors.shape[0] * 2
+            vectors = np.zeros((capacity, self.vectors.shape[1]), dtype=np.float32)
+            vectors[:pos] = self.vectors[:pos]
+            seqs = np.zeros(capacity, dtype=np.int64)
+            seqs[:pos] = self.seqs[:pos]
+            self.vectors, self.seqs = vectors, seqs
+
+        self.vectors[pos] = vector
+        self.seqs[pos] = seq
+        self.ids.append(memory_id)
+        return pos
+
+    def swap_remove(self, pos: int) -> Optional[str]:
+        """
+        Remove the entry at ``pos`` by moving the last entry into its slot.
+
+        Returns:
+            ID of the entry that moved into ``pos`` (None if nothing moved)
+        """
+        last = len(self.ids) - 1
+        moved = None
+        if pos != last:
+            self.vectors[pos] = self.vectors[last]
+            self.seqs[pos] = self.seqs[last]
+            self.ids[pos] = self.ids[last]
+            moved = self.ids[pos]
+        self.ids.pop()
+        return moved
+
+
+class IVFFlatIndex(ANNIndex):
+    """
+    Inverted-file index with exact (flat) scoring inside each bucket.
+
+    Until ``train_threshold`` vectors have been added, everything lives in
+    a single bucket and search is exact; the index trains itself once at
+    that size. Once trained, inserts go to the nearest centroid and deletes
+    are O(D) swap-removes, so the index can be maintained incrementally.
+
+    Retraining is never done on the insert path: once the index has grown
+    by ``retrain_factor`` since the last training, ``needs_retrain`` turns
+    True and the owner should call ``train()`` (e.g. from a maintenance
+    job). K-means runs on at most ``training_sample_size`` vectors and
+    assignments are computed in row chunks, so training memory stays
+    bounded however large the index gets.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        train_threshold: int = 2048,
+        retrain_factor: float = 4.0,
+        kmeans_iterations: int = 10,
+        seed: int = 0,
+        training_sample_size: int = 65536,
+    ):
+        """
+        Initialize the IVF index.
+
+        Args:
+            dim: Dimension of the indexed embeddings
+            nlist: Number of buckets (defaults to 4 * sqrt(N) at training time)
+            nprobe: Buckets scanned per query; higher is slower but more accurate
+            train_threshold: Vectors required before clustering kicks in
+            retrain_factor: Growth since last training after which
+                ``needs_retrain`` reports True
+            kmeans_iterations: Lloyd iterations per training run
+            seed: Random seed for centroid initialization
+            training_sample_size: Most vectors k-means is run on
+        """
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_threshold = train_threshold
+        self.retrain_factor = retrain_factor
+        self.kmeans_iterations = kmeans_iterations
+        self.training_sample_size = training_sample_size
+        self._rng = np.random.default_rng(seed)
+
+        self._centroids: Optional[np.ndarray] = None
+        self._trained_size = 0
+        self._lists: List[_InvertedList] = [_InvertedList(dim)]
+        self._locations: Dict[str, Tuple[int, int]] = {}
+        self._unindexable: Set[str] = set()
+        self._next_seq = 0
+
+    def __len__(self) -> int:
+        return len(self._locations) + len(self._unindexable)
+
+    @property
+    def num_lists(self) -> int:
+        """Number of buckets currently in use."""
+        return len(self._lists)
+
+    @property
+    def is_trained(self) -> bool:
+        """Whether vectors are bucketed by centroid."""
+        return self._centroids is not None
+
+    @property
+    def needs_retrain(self) -> bool:
+        """Whether the index grew by ``retrain_factor`` since it was trained."""
+        if self._centroids is None:
+            return False
+        return len(self._locations) >= self._trained_size * self.retrain_factor
+
+    def _normalize(self, embedding: List[float]) -> Optional["np.ndarray"]:
+        """Return the unit-length vector, or None if it cannot be scored."""
+        if len(embedding) != self.dim:
+            return None
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            return None
+        return vector / norm
+
+    def _nearest_list(self, vectors: "np.ndarray") -> "np.ndarray":
+        """Assign each vector to its closest centroid."""
+        if self._centroids is None:
+            return np.zeros(len(vectors), dtype=np.int64)
+        return _assign(vectors, self._centroids)
+
+    def add(self, memory_id: str, embedding: List[float]) -> None:
+        """
+        Add or replace the embedding for a memory.
+
+        Args:
+            memory_id: ID of the memory
+            embedding: Raw (unnormalized) embedding
+        """
+        self.remove(memory_id)
+
+        vector = self._normalize(embedding)
+        if vector is None:
+            # Zero or mis-sized vectors score 0.0 and are never returned
+            self._unindexable.add(memory_id)
+            return
+
+        list_id = int(self._nearest_list(vector[None, :])[0])
+        pos = self._lists[list_id].append(memory_id, vector, self._next_seq)
+        self._locations[memory_id] = (list_id, pos)
+        self._next_seq += 1
+
+        # Only the first training happens here, at a bounded size; later
+        # growth is rebalanced by an explicit train() (see needs_retrain)
+        if self._centroids is None and len(self._locations) >= self.train_threshold:
+            self.train()
+
+    def remove(self, memory_id: str) -> bool:
+        """
+        Remove a memory from the index.
+
+        Args:
+            memory_id: ID of the memory
+
+        Returns:
+            True if removed, False if not indexed
+        """
+        if memory_id in self._unindexable:
+            self._unindexable.discard(memory_id)
+            return True
+
+        location = self._locations.pop(memory_id, None)
+        if location is None:
+            return False
+
+        list_id, pos = location
+        moved = self._lists[list_id].swap_remove(pos)
+        if moved is not None:
+            self._locations[moved] = (list_id, pos)
+        return True
+
+    def clear(self) -> None:
+        """Remove every entry and forget the trained centroids."""
+        self._centroids = None
+        self._trained_size = 0
+        self._lists = [_InvertedList(self.dim)]
+        self._locations = {}
+        self._unindexable = set()
+        self._next_seq = 0
+
+    def train(self) -> None:
+        """
+        Cluster the indexed vectors with spherical k-means and rebucket them.
+
+        Runs automatically once the index reaches ``train_threshold``; call
+        it directly after a bulk load, and whenever ``needs_retrain`` is
+        True. K-means sees a random sample of at most
+        ``training_sample_size`` vectors; every vector is then reassigned
+        to its nearest centroid in row chunks.
+        """
+        old_lists = self._lists
+        total = len(self._locations)
+        if total == 0:
+            return
+
+        sample = self._training_sample(old_lists, total)
+        nlist = self.nlist or max(1, int(4 * math.sqrt(total)))
+        nlist = min(nlist, len(sample))
+
+        centroids = sample[self._rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(self.kmeans_iterations):
+            assignments = _assign(sample, centroids)
+            order = np.argsort(assignments, kind="stable")
+            clusters, starts = np.unique(assignments[order], return_index=True)
+            sums = np.add.reduceat(sample[order], starts, axis=0)
+            norms = np.linalg.norm(sums, axis=1)
+            # Empty clusters keep their previous centroid
+            filled = norms > 0
+            centroids[clusters[filled]] = sums[filled] / norms[filled, None]
+
+        self._centroids = centroids
+        self._trained_size = total
+        self._lists = [_InvertedList(self.dim) for _ in range(nlist)]
+        self._locations = {}
+        for inverted in old_lists:
+            count = len(inverted)
+            if count == 0:
+                continue
+            vectors = inverted.vectors[:count]
+            assignments = _assign(vectors, centroids)
+            for memory_id, vector, seq, list_id in zip(
+                inverted.ids, vectors, inverted.seqs[:count].tolist(), assignments.tolist()
+            ):
+                pos = self._lists[list_id].append(memory_id, vector, seq)
+                self._locations[memory_id] = (list_id, pos)
+
+    def _training_sample(self, lists: List[_InvertedList], total: int) -> "np.ndarray":
+        """Gather up to ``training_sample_size`` random indexed vectors."""
+        counts = [len(inverted) for inverted in lists]
+        if total <= self.training_sample_size:
+            return np.concatenate([inverted.vectors[:count] for inverted, count in zip(lists, counts)])
+
+        picks = np.sort(self._rng.choice(total, size=self.training_sample_size, replace=False))
+        offsets = np.cumsum([0] + counts)
+        owners = np.searchsorted(offsets, picks, side="right") - 1
+        # Picks are sorted, so each list's picks form one contiguous run
+        owner_ids, starts = np.unique(owners, return_index=True)
+        ends = starts[1:].tolist() + [len(picks)]
+        return np.concatenate([
+            lists[list_id].vectors[picks[start:end] - offsets[list_id]]
+            for list_id, start, end in zip(owner_ids.tolist(), starts.tolist(), ends)
+        ])
+
+    def search(
+        self,
+        query_embedding: List[float],
+        top_k: int,
+        nprobe: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Find approximate nearest neighbours by cosine similarity.
+
+        Args:
+            query_embedding: Query embedding with ``dim`` entries
+            top_k: Number of results to return
+            nprobe: Optional override of the number of buckets to scan
+
+        Returns:
+            List of (memory_id, cosine similarity) pairs, best first
+        """
+        query = self._normalize(query_embedding)
+        if query is None or top_k <= 0 or not self._locations:
+            return []
+
+        if self._centroids is None:
+            probe = [0]
+        else:
+            probe_count = min(nprobe or self.nprobe, len(self._lists))
+            centroid_scores = self._centroids @ query
+            probe = np.argpartition(-centroid_scores, probe_count - 1)[:probe_count].tolist()
+
+        scores_parts = []
+        seqs_parts = []
+        owners = []
+        for list_id in probe:
+            inverted = self._lists[list_id]
+            count = len(inverted)
+            if count == 0:
+                continue
+            scores_parts.append(inverted.vectors[:count] @ query)
+            seqs_parts.append(inverted.seqs[:count])
+            owners.append((list_id, count))
+
+        if not scores_parts:
+            return []
+
+        scores = np.concatenate(scores_parts)
+        seqs = np.concatenate(seqs_parts)
+        if len(scores) > top_k:
+            selected = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            selected = np.arange(len(scores))
+        selected = selected[np.lexsort((seqs[selected], -scores[selected]))]
+
+        offsets = np.cumsum([0] + [count for _, count in owners])
+        results = []
+        for flat in selected.tolist():
+            part = int(np.searchsorted(offsets, flat, side="right")) - 1
+            list_id, _ = owners[part]
+            memory_id = self._lists[list_id].ids[flat - offsets[part]]
+            results.append((memory_id, float(scores[flat])))
+        return results
@@ -5,12 +5,29 @@ importance-based pruning, similar memory merging, and time-based decay
 to optimize memory usage and maintain relevant information.
 """
 
+import asyncio
 import math
+import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Callable, Dict, List, Optional, Set, Tuple
 
-from .vector_memory import MemoryVector, VectorMemory
+from .vector_memory import (
+    NUMPY_AVAILABLE,
+    CompactMemoryVector,
+    MemoryVector,
+    VectorMemory,
+    _to_epoch,
+)
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+# Slack on the vectorized pre-filter so float rounding never drops a pair
+# that the exact cosine similarity would accept. Scores read from a
+# reduced-precision index get at least _INDEX_EPSILON_ULPS ulps of slack.
+_CANDIDATE_EPSILON = 1e-9
+_INDEX_EPSILON_ULPS = 10
 
 
 @dataclass
@@ -25,6 +42,11 @@ class ConsolidationConfig:
         access_boost: Importance boost per access
         time_decay_enabled: Whether to apply time-based decay
         merge_enabled: Whether to merge similar memories
+        merge_blocking: How merge candidates are found: "exact" (blockwise
+            NumPy kernel over all pairs), "lsh" (random-hyperplane buckets,
+            approximate) or "none" (pure-Python pairwise loop)
+        lsh_tables: Number of LSH hash tables when merge_blocking is "lsh"
+        lsh_bits: Hyperplanes per LSH table when merge_blocking is "lsh"
     """
 
     max_memories: int = 10000
@@ -34,6 +56,9 @@ class ConsolidationConfig:
     access_boost: float = 0.05
     time_decay_enabled: bool = True
     merge_enabled: bool = True
+    merge_blocking: str = "exact"
+    lsh_tables: int = 16
+    lsh_bits: int = 8
 
 
 class MemoryConsolidator:
@@ -110,7 +135,6 @@ class MemoryConsolidator:
             Number of memories that were decayed
         """
         now = datetime.utcnow()
-        decayed_count = 0
 
         memories = (
             vector_memory.get_memories_by_agent(agent_id)
@@ -118,6 +142,24 @@ class MemoryConsolidator:
             else list(vector_memory.memories.values())
         )
 
+        # Written back in one batch so the journal and observers see it
+        return vector_memory.update_importances(self._decayed_importance(memories, now))
+
+    def _decayed_importance(self, memories: List[MemoryVector], now: datetime) -> Dict[str, float]:
+        """
+        Compute decayed importance for memories without modifying them.
+
+        Args:
+            memories: Memories to decay
+            now: Reference time for ages
+
+        Returns:
+            Mapping of memory ID to new importance, for changed memories only
+        """
+        if NUMPY_AVAILABLE:
+            return self._decay_vectorized(memories, now)
+
+        updates: Dict[str, float] = {}
         for memory in memories:
             # Calculate age in days
             age_days = (now - memory.timestamp).total_seconds() / 86400.0
@@ -138,10 +180,46 @@ class MemoryConsolidator:
             new_importance = max(0.0, min(1.0, new_importance))
 
             if new_importance != memory.importance:
-                memory.importance = new_importance
-                decayed_count += 1
+                updates[memory.memory_id] = new_importance
+
+        return updates
 
-        return decayed_count
+    def _decay_vectorized(self, memories: List[MemoryVector], now: datetime) -> Dict[str, float]:
+        """
+        Compute the decay formula of ``apply_decay`` over NumPy arrays.
+
+        Args:
+            memories: Memories to decay
+            now: Reference time for ages
+
+        Returns:
+            Mapping of memory ID to new importance, for changed memories only
+        """
+        count = len(memories)
+        if count == 0:
+            return {}
+
+        now_epoch = _to_epoch(now)
+        ages = np.fromiter(
+            (
+                now_epoch - (m._timestamp if isinstance(m, CompactMemoryVector) else _to_epoch(m.timestamp))
+                for m in memories
+            ),
+            dtype=np.float64,
+            count=count,
+        )
+        importance = np.fromiter((m.importance for m in memories), dtype=np.float64, count=count)
+        accesses = np.fromiter((m.access_count for m in memories), dtype=np.float64, count=count)
+
+        decay_factor = np.exp(-self.config.decay_rate * (ages / 86400.0))
+        access_boost = np.minimum(accesses * self.config.access_boost, 0.5)
+        new_importance = np.clip(importance * decay_factor + access_boost, 0.0, 1.0)
+
+        changed = np.flatnonzero(new_importance != importance)
+        return {
+            memories[i].memory_id: value
+            for i, value in zip(changed.tolist(), new_importance[changed].tolist())
+        }
 
     def prune_memories(
         self,
@@ -219,6 +297,32 @@ class MemoryConsolidator:
         # Sort by timestamp (oldest first) to prefer keeping older memories
         memories.sort(key=lambda m: m.timestamp)
 
+        if self.config.merge_blocking != "none" and NUMPY_AVAILABLE:
+            # Embeddings never change during a merge, so the similar pairs
+            # can be found up front and replayed in the same greedy order
+            neighbours = _similar_pairs(
+                vector_memory,
+                memories,
+                self.config.merge_similarity_threshold,
+                blocking=self.config.merge_blocking,
+                lsh_tables=self.config.lsh_tables,
+                lsh_bits=self.config.lsh_bits,
+            )
+            for i in sorted(neighbours):
+                memory1 = memories[i]
+                if memory1.memory_id in processed_ids:
+                    continue
+                for j, _ in neighbours[i]:
+                    memory2 = memories[j]
+                    if memory2.memory_id in processed_ids:
+                        continue
+                    self._merge_memories(memory1, memory2)
+                    vector_memory.delete(memory2.memory_id)
+                    vector_memory.reindex(memory1.memory_id)
+                    processed_ids.add(memory2.memory_id)
+                    merged_count += 1
+            return merged_count
+
         for i, memory1 in enumerate(memories):
             if memory1.memory_id in processed_ids:
                 continue
@@ -237,6 +341,7 @@ class MemoryConsolidator:
                 if similarity >= self.config.merge_similarity_threshold:
                     self._merge_memories(memory1, memory2)
                     vector_memory.delete(memory2.memory_id)
+                    vector_memory.reindex(memory1.memory_id)
                     processed_ids.add(memory2.memory_id)
                     merged_count += 1
 
@@ -271,6 +376,417 @@ class MemoryConsolidator:
         target.metadata["merged_from"].append(source.memory_id)
 
 
+class IncrementalConsolidator:
+    """
+    Budgeted, resumable consolidation that runs in small time slices.
+
+    Each ``tick`` first merges memories stored or edited since they were
+    last examined (the dirty set, fed by VectorMemory change
+    notifications), then decays and prunes the next slice of memories
+    after a cursor. When the cursor wraps, the ``max_memories`` limit is
+    enforced and the cycle ends, so one cycle corresponds to one
+    ``MemoryConsolidator.consolidate`` pass spread over many ticks. Each
+    decay pass compounds, so the next cycle starts no sooner than
+    ``cycle_interval_seconds`` after the previous one started; merging
+    continues in between. Use ``start``/``stop`` to drive it from an
+    asyncio task.
+    """
+
+    def __init__(
+        self,
+        vector_memory: VectorMemory,
+        config: Optional[ConsolidationConfig] = None,
+        agent_id: Optional[str] = None,
+        batch_size: int = 500,
+        time_budget_ms: float = 5.0,
+        cycle_interval_seconds: float = 86400.0,
+    ):
+        """
+        Initialize the incremental consolidator.
+
+        Args:
+            vector_memory: VectorMemory instance to consolidate
+            config: Optional consolidation configuration
+            agent_id: Optional agent ID to restrict consolidation to
+            batch_size: Default maximum memories decayed per tick
+            time_budget_ms: Default time budget per tick in milliseconds
+            cycle_interval_seconds: Minimum time between the starts of decay
+                cycles; set it to the interval batch consolidation would run
+                at (defaults to daily, the unit of ``decay_rate``)
+        """
+        self.vector_memory = vector_memory
+        self.consolidator = MemoryConsolidator(config)
+        self.config = self.consolidator.config
+        self.agent_id = agent_id
+        self.batch_size = batch_size
+        self.time_budget_ms = time_budget_ms
+        self.cycle_interval_seconds = cycle_interval_seconds
+
+        self._cycle: List[str] = []
+        self._cursor = 0
+        self._cycle_started: Optional[float] = None
+        self._dirty: Dict[str, None] = {}
+        self._applying = False
+        self._task: Optional[asyncio.Task] = None
+
+        self.cycles_completed = 0
+
+        # Everything already stored still needs its first merge check
+        for memory in self._scope():
+            self._dirty[memory.memory_id] = None
+        vector_memory.add_observer(self)
+
+    # ===== VectorMemory observer interface =====
+
+    def record_put(self, memory: MemoryVector) -> None:
+        """Mark a stored or edited memory for a merge check."""
+        if not self._applying and (not self.agent_id or memory.agent_id == self.agent_id):
+            self._dirty[memory.memory_id] = None
+
+    def record_delete(self, memory_id: str) -> None:
+        """Forget a deleted memory."""
+        self._dirty.pop(memory_id, None)
+
+    def record_importance(self, memory_id: str, importance: float) -> None:
+        """Importance changes are picked up by the next decay slice."""
+
+    def record_importances(self, updates: Dict[str, float]) -> None:
+        """Importance changes are picked up by the next decay slice."""
+
+    # ===== Work =====
+
+    @property
+    def pending(self) -> int:
+        """Number of dirty memories awaiting a merge check."""
+        return len(self._dirty)
+
+    def _scope(self) -> List[MemoryVector]:
+        if self.agent_id:
+            return self.vector_memory.get_memories_by_agent(self.agent_id)
+        return list(self.vector_memory.memories.values())
+
+    def tick(
+        self,
+        max_items: Optional[int] = None,
+        max_ms: Optional[float] = None,
+    ) -> Dict[str, int]:
+        """
+        Do one bounded slice of consolidation work.
+
+        Args:
+            max_items: Maximum memories to decay this tick (defaults to batch_size)
+            max_ms: Time budget in milliseconds (defaults to time_budget_ms)
+
+        Returns:
+            Dictionary with this tick's statistics
+        """
+        max_items = self.batch_size if max_items is None else max_items
+        max_ms = self.time_budget_ms if max_ms is None else max_ms
+        deadline = time.perf_counter() + max_ms / 1000.0
+        stats = {"merged": 0, "decayed": 0, "pruned": 0, "cycles_completed": 0}
+
+        self._applying = True
+        try:
+            if self.config.merge_enabled:
+                while self._dirty and time.perf_counter() < deadline:
+                    memory_id = next(iter(self._dirty))
+                    del self._dirty[memory_id]
+                    stats["merged"] += self._merge_dirty(memory_id)
+
+            processed = 0
+            while processed < max_items and time.perf_counter() < deadline:
+                if self._cursor >= len(self._cycle):
+                    if self._cycle:
+                        stats["pruned"] += self._finish_cycle()
+                        stats["cycles_completed"] += 1
+                        self._cycle = []
+                        break
+                    now = time.monotonic()
+                    if (
+                        self._cycle_started is not None
+                        and now - self._cycle_started < self.cycle_interval_seconds
+                    ):
+                        break
+                    self._cycle = [m.memory_id for m in self._scope()]
+                    self._cursor = 0
+                    self._cycle_started = now
+                    if not self._cycle:
+                        break
+
+                chunk = min(max_items - processed, 64, len(self._cycle) - self._cursor)
+                ids = self._cycle[self._cursor:self._cursor + chunk]
+                self._cursor += chunk
+                processed += chunk
+
+                memories = [
+                    self.vector_memory.memories[memory_id]
+                    for memory_id in ids
+                    if memory_id in self.vector_memory.memories
+                ]
+                stats["decayed"] += self._decay(memories)
+                for memory in memories:
+                    if memory.importance < self.config.min_importance:
+                        self.vector_memory.delete(memory.memory_id)
+                        stats["pruned"] += 1
+        finally:
+            self._applying = False
+
+        return stats
+
+    def _decay(self, memories: List[MemoryVector]) -> int:
+        """Decay a slice of memories."""
+        if not self.config.time_decay_enabled or not memories:
+            return 0
+        updates = self.consolidator._decayed_importance(memories, datetime.utcnow())
+        return self.vector_memory.update_importances(updates)
+
+    def _merge_dirty(self, memory_id: str) -> int:
+        """
+        Merge a dirty memory with its near-duplicates, keeping the oldest.
+
+        Returns:
+            Number of memories merged away
+        """
+        memory = self.vector_memory.memories.get(memory_id)
+        if memory is None:
+            return 0
+
+        threshold = self.config.merge_similarity_threshold
+        similar = [
+            other for other in self._neighbours(memory)
+            if self.vector_memory._cosine_similarity(memory.embedding, other.embedding) >= threshold
+        ]
+        if not similar:
+            return 0
+
+        group = sorted([memory] + similar, key=lambda m: m.timestamp)
+        keeper = group[0]
+        for other in group[1:]:
+            self.consolidator._merge_memories(keeper, other)
+            self.vector_memory.delete(other.memory_id)
+        self.vector_memory.reindex(keeper.memory_id)
+        return len(group) - 1
+
+    def _neighbours(self, memory: MemoryVector) -> List[MemoryVector]:
+        """Return in-scope memories that may exceed the merge threshold."""
+        vector_memory = self.vector_memory
+        index = vector_memory._index
+        if index is None or len(memory.embedding) != vector_memory.embedding_dim:
+            return [m for m in self._scope() if m.memory_id != memory.memory_id]
+
+        index = vector_memory._ensure_index()
+        rows = None
+        if self.agent_id:
+            rows = index.rows_for(vector_memory._candidate_ids(self.agent_id, None) or [])
+        rows, similarities = index.scores(memory.embedding, rows)
+        epsilon = max(_CANDIDATE_EPSILON, float(np.finfo(index.dtype).eps) * _INDEX_EPSILON_ULPS)
+        keep = similarities >= self.config.merge_similarity_threshold - epsilon
+        return [
+            vector_memory.memories[index.memory_id_at(row)]
+            for row in rows[keep].tolist()
+            if index.memory_id_at(row) != memory.memory_id
+        ]
+
+    def _finish_cycle(self) -> int:
+        """Enforce max_memories at the end of a cycle."""
+        self.cycles_completed += 1
+        memories = self._scope()
+        excess = len(memories) - self.config.max_memories
+        if excess <= 0:
+            return 0
+
+        memories.sort(key=lambda m: m.importance)
+        for memory in memories[:excess]:
+            self.vector_memory.delete(memory.memory_id)
+        return excess
+
+    # ===== Background driver =====
+
+    async def run(self, interval_seconds: float = 0.05) -> None:
+        """
+        Tick forever, yielding to the event loop between slices.
+
+        Args:
+            interval_seconds: Pause between ticks
+        """
+        while True:
+            self.tick()
+            await asyncio.sleep(interval_seconds)
+
+    def start(self, interval_seconds: float = 0.05) -> asyncio.Task:
+        """
+        Start ticking in a background asyncio task.
+
+        Args:
+            interval_seconds: Pause between ticks
+
+        Returns:
+            The running task
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(interval_seconds))
+        return self._task
+
+    async def stop(self) -> None:
+        """Cancel the background task and detach from the memory store."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.vector_memory.remove_observer(self)
+
+
+def _similar_pairs(
+    vector_memory: VectorMemory,
+    memories: List[MemoryVector],
+    threshold: float,
+    blocking: str = "exact",
+    lsh_tables: int = 16,
+    lsh_bits: int = 8,
+    block_elements: int = 4_000_000,
+) -> Dict[int, List[Tuple[int, float]]]:
+    """
+    Find all pairs i < j of memories at or above a similarity threshold.
+
+    Candidates come from a blockwise NumPy similarity kernel (or from
+    random-hyperplane LSH buckets when ``blocking`` is "lsh") and are then
+    confirmed with ``VectorMemory._cosine_similarity``, so accepted pairs
+    and their scores match the pure-Python pairwise loop.
+
+    Args:
+        vector_memory: VectorMemory providing the exact similarity
+        memories: Memories to compare, indexed by position
+        threshold: Minimum 0-1 scaled similarity
+        blocking: "exact" or "lsh"
+        lsh_tables: Number of LSH hash tables
+        lsh_bits: Hyperplanes per LSH table
+        block_elements: Similarity matrix entries computed per block
+
+    Returns:
+        Mapping of position i to [(j, similarity), ...] with j > i ascending
+    """
+    neighbours: Dict[int, List[Tuple[int, float]]] = {}
+
+    if threshold <= 0.0:
+        # Every pair qualifies (even zero vectors score 0.0)
+        for i, memory1 in enumerate(memories):
+            neighbours[i] = [
+                (j, vector_memory._cosine_similarity(memory1.embedding, memories[j].embedding))
+                for j in range(i + 1, len(memories))
+            ]
+        return neighbours
+
+    # Cosine similarity of the scaled threshold, minus float slack
+    cosine_threshold = 2.0 * threshold - 1.0 - _CANDIDATE_EPSILON
+
+    # Only embeddings of equal length can score above zero
+    by_length: Dict[int, List[int]] = {}
+    for position, memory in enumerate(memories):
+        if len(memory.embedding) > 0:
+            by_length.setdefault(len(memory.embedding), []).append(position)
+
+    candidates: List[Tuple[int, int]] = []
+    for positions in by_length.values():
+        if len(positions) < 2:
+            continue
+
+        vectors = np.asarray([memories[p].embedding for p in positions], dtype=np.float64)
+        norms = np.linalg.norm(vectors, axis=1)
+        valid = np.flatnonzero(norms > 0)
+        vectors = vectors[valid] / norms[valid, None]
+        group = np.asarray(positions, dtype=np.int64)[valid]
+
+        if blocking == "lsh":
+            pairs = _lsh_candidate_pairs(vectors, cosine_threshold, lsh_tables, lsh_bits)
+        else:
+            pairs = _blockwise_candidate_pairs(vectors, cosine_threshold, block_elements)
+
+        candidates.extend(zip(group[pairs[:, 0]].tolist(), group[pairs[:, 1]].tolist()))
+
+    for a, b in candidates:
+        i, j = (a, b) if a < b else (b, a)
+        similarity = vector_memory._cosine_similarity(memories[i].embedding, memories[j].embedding)
+        if similarity >= threshold:
+            neighbours.setdefault(i, []).append((j, similarity))
+
+    for pairs_of_i in neighbours.values():
+        pairs_of_i.sort()
+    return neighbours
+
+
+def _blockwise_candidate_pairs(
+    vectors: "np.ndarray",
+    cosine_threshold: float,
+    block_elements: int,
+) -> "np.ndarray":
+    """
+    Return all row pairs (i < j) whose cosine meets the threshold.
+
+    Computes the upper triangle of the similarity matrix one row block at
+    a time to bound memory use.
+    """
+    count = len(vectors)
+    block_rows = max(1, block_elements // max(1, count))
+    found = []
+
+    for start in range(0, count, block_rows):
+        end = min(count, start + block_rows)
+        similarities = vectors[start:end] @ vectors[start:].T
+        # Keep only columns after each row (strict upper triangle)
+        similarities[np.tril_indices(end - start, k=0, m=count - start)] = -np.inf
+        rows, cols = np.nonzero(similarities >= cosine_threshold)
+        found.append(np.stack([rows + start, cols + start], axis=1))
+
+    if not found:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.concatenate(found)
+
+
+def _lsh_candidate_pairs(
+    vectors: "np.ndarray",
+    cosine_threshold: float,
+    tables: int,
+    bits: int,
+    seed: int = 0,
+) -> "np.ndarray":
+    """
+    Return row pairs (i < j) that share a random-hyperplane LSH bucket in
+    any table and whose cosine meets the threshold.
+
+    Approximate: pairs that never collide are missed, with probability
+    falling quickly as ``tables`` grows.
+    """
+    rng = np.random.default_rng(seed)
+    planes = rng.standard_normal((tables * bits, vectors.shape[1]))
+    signs = (vectors @ planes.T) > 0
+    weights = 1 << np.arange(bits, dtype=np.int64)
+    codes = signs.reshape(len(vectors), tables, bits).astype(np.int64) @ weights
+
+    seen: Set[Tuple[int, int]] = set()
+    found = []
+    for table in range(tables):
+        order = np.argsort(codes[:, table], kind="stable")
+        sorted_codes = codes[order, table]
+        boundaries = np.flatnonzero(np.diff(sorted_codes)) + 1
+        for bucket in np.split(order, boundaries):
+            if len(bucket) < 2:
+                continue
+            bucket = np.sort(bucket)
+            similarities = vectors[bucket] @ vectors[bucket].T
+            rows, cols = np.nonzero(np.triu(similarities >= cosine_threshold, k=1))
+            for i, j in zip(bucket[rows].tolist(), bucket[cols].tolist()):
+                if (i, j) not in seen:
+                    seen.add((i, j))
+                    found.append((i, j))
+
+    if not found:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.asarray(found, dtype=np.int64)
+
+
 def calculate_importance_score(
     memory: MemoryVector,
     recency_weight: float = 0.3,
@@ -321,6 +837,7 @@ def find_redundant_memories(
     vector_memory: VectorMemory,
     agent_id: Optional[str] = None,
     similarity_threshold: float = 0.9,
+    blocking: str = "exact",
 ) -> List[Tuple[str, str, float]]:
     """
     Find pairs of highly similar (redundant) memories.
@@ -329,6 +846,7 @@ def find_redundant_memories(
         vector_memory: VectorMemory instance
         agent_id: Optional agent ID to filter
         similarity_threshold: Minimum similarity to be considered redundant
+        blocking: Candidate search: "exact", "lsh" (approximate) or "none"
 
     Returns:
         List of tuples (memory_id1, memory_id2, similarity)
@@ -341,6 +859,17 @@ def find_redundant_memories(
 
     redundant_pairs = []
 
+    if blocking != "none" and NUMPY_AVAILABLE:
+        neighbours = _similar_pairs(vector_memory, memories, similarity_threshold, blocking=blocking)
+        for i in sorted(neighbours):
+            for j, similarity in neighbours[i]:
+                redundant_pairs.append((
+                    memories[i].memory_id,
+                    memories[j].memory_id,
+                    similarity,
+                ))
+        return redundant_pairs
+
     for i, memory1 in enumerate(memories):
         for memory2 in memories[i + 1:]:
             similarity = vector_memory._cosine_similarity(
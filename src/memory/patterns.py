@@ -6,6 +6,7 @@ experiences and digital twin for maintaining agent state snapshots.
 """
 
 import json
+import operator
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any, Callable, Dict, List, Optional, Tuple
@@ -83,6 +84,120 @@ class Experience:
         )
 
 
+class _SegmentTree:
+    """
+    Array-backed binary tree of leaf values with a running reduction.
+
+    Supports O(log N) point updates and, for sum trees, O(log N)
+    prefix-sum search used by prioritized sampling. Capacity doubles
+    automatically when a leaf beyond it is written.
+    """
+
+    def __init__(self, capacity: int = 1, reduce: Callable[[float, float], float] = operator.add):
+        """
+        Initialize an all-zero tree.
+
+        Args:
+            capacity: Initial number of leaves
+            reduce: Associative reduction (operator.add or max) with 0.0 identity
+        """
+        self._reduce = reduce
+        self._size = 1
+        while self._size < capacity:
+            self._size *= 2
+        self._tree = [0.0] * (2 * self._size)
+
+    @property
+    def total(self) -> float:
+        """Reduction over all leaves."""
+        return self._tree[1]
+
+    def get(self, index: int) -> float:
+        """Return the value of a leaf."""
+        return self._tree[self._size + index]
+
+    def set(self, index: int, value: float) -> None:
+        """Set a leaf value and update its ancestors."""
+        if index >= self._size:
+            self._grow(index + 1)
+
+        tree = self._tree
+        reduce = self._reduce
+        position = self._size + index
+        tree[position] = value
+        position //= 2
+        while position >= 1:
+            tree[position] = reduce(tree[2 * position], tree[2 * position + 1])
+            position //= 2
+
+    def _grow(self, capacity: int) -> None:
+        """Double the leaf count until ``capacity`` fits, rebuilding the tree."""
+        leaves = self._tree[self._size:]
+        while self._size < capacity:
+            self._size *= 2
+        self._tree = [0.0] * self._size + leaves + [0.0] * (self._size - len(leaves))
+        for position in range(self._size - 1, 0, -1):
+            self._tree[position] = self._reduce(
+                self._tree[2 * position], self._tree[2 * position + 1]
+            )
+
+    def find_prefix(self, value: float) -> int:
+        """
+        Find the leaf where the running sum first exceeds ``value``.
+
+        Only meaningful for sum trees; never returns a zero-valued leaf
+        while the total is positive.
+
+        Args:
+            value: Target prefix sum in [0, total)
+
+        Returns:
+            Leaf index
+        """
+        tree = self._tree
+        position = 1
+        while position < self._size:
+            left = 2 * position
+            if value < tree[left] or tree[left + 1] <= 0.0:
+                position = left
+            else:
+                value -= tree[left]
+                position = left + 1
+        return position - self._size
+
+
+class _AgentReplayBuffer:
+    """Per-agent view of the replay buffer: its slots plus a priority sum tree."""
+
+    def __init__(self) -> None:
+        self.slots: List[int] = []
+        self.positions: Dict[int, int] = {}
+        self.weights = _SegmentTree()
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def add(self, slot: int, weight: float) -> None:
+        self.positions[slot] = len(self.slots)
+        self.weights.set(len(self.slots), weight)
+        self.slots.append(slot)
+
+    def update(self, slot: int, weight: float) -> None:
+        self.weights.set(self.positions[slot], weight)
+
+    def remove(self, slot: int) -> None:
+        """Swap-remove a slot, keeping the sum tree dense."""
+        position = self.positions.pop(slot)
+        last = len(self.slots) - 1
+        if position != last:
+            moved = self.slots[last]
+            self.slots[position] = moved
+            self.positions[moved] = position
+            self.weights.set(position, self.weights.get(last))
+        self.weights.set(last, 0.0)
+        self.slots.pop()
+
+
 class ExperienceReplayPattern:
     """
     Experience Replay Pattern for agent learning.
@@ -90,6 +205,11 @@ class ExperienceReplayPattern:
     Stores and samples past experiences to enable agents to learn
     from historical interactions. Useful for reinforcement learning
     and improving decision-making over time.
+
+    Experiences live in a fixed-capacity ring buffer. Sampling weights
+    (priority ** priority_alpha) are kept in sum trees, globally and per
+    agent, so adding, prioritized sampling and priority updates are
+    O(log N); an ID index makes lookups O(1).
     """
 
     def __init__(
@@ -109,8 +229,68 @@ class ExperienceReplayPattern:
         self.max_experiences = max_experiences
         self.batch_size = batch_size
         self.priority_alpha = priority_alpha
-        self.experiences: List[Experience] = []
-        self.priorities: List[float] = []
+        self._reset()
+
+    def _reset(self) -> None:
+        """Empty the ring buffer and its indexes."""
+        self._slots: List[Optional[Experience]] = []
+        self._raw_priorities: List[float] = []
+        self._head = 0  # Slot of the oldest experience once the ring is full
+        self._slot_by_id: Dict[str, int] = {}
+        self._agents: Dict[str, _AgentReplayBuffer] = {}
+        self._weights = _SegmentTree(min(self.max_experiences, 1024))
+        self._max_priority = _SegmentTree(min(self.max_experiences, 1024), reduce=max)
+        self._weights_alpha = self.priority_alpha
+
+    def __len__(self) -> int:
+        return len(self._slot_by_id)
+
+    def _ordered_slots(self) -> List[int]:
+        """Occupied slots from oldest to newest."""
+        count = len(self._slots)
+        return [
+            slot for slot in ((self._head + i) % count for i in range(count))
+            if self._slots[slot] is not None
+        ]
+
+    @property
+    def experiences(self) -> List[Experience]:
+        """Stored experiences from oldest to newest."""
+        return [self._slots[slot] for slot in self._ordered_slots()]  # type: ignore[misc]
+
+    @property
+    def priorities(self) -> List[float]:
+        """Priorities aligned with ``experiences``."""
+        return [self._raw_priorities[slot] for slot in self._ordered_slots()]
+
+    def _weight(self, priority: float) -> float:
+        return max(priority, 0.0) ** self.priority_alpha
+
+    def _rebuild_weights(self) -> None:
+        """Recompute sampling weights after ``priority_alpha`` changed."""
+        self._weights_alpha = self.priority_alpha
+        for slot, experience in enumerate(self._slots):
+            if experience is not None:
+                weight = self._weight(self._raw_priorities[slot])
+                self._weights.set(slot, weight)
+                self._agents[experience.agent_id].update(slot, weight)
+
+    def _evict(self, slot: int) -> None:
+        """Remove the experience in a slot from every index."""
+        experience = self._slots[slot]
+        if experience is None:
+            return
+
+        self._slots[slot] = None
+        self._raw_priorities[slot] = 0.0
+        self._weights.set(slot, 0.0)
+        self._max_priority.set(slot, 0.0)
+        del self._slot_by_id[experience.experience_id]
+
+        agent_buffer = self._agents[experience.agent_id]
+        agent_buffer.remove(slot)
+        if not agent_buffer:
+            del self._agents[experience.agent_id]
 
     def add_experience(
         self,
@@ -149,19 +329,31 @@ class ExperienceReplayPattern:
             metadata=metadata or {},
         )
 
-        # Add to buffer
-        if len(self.experiences) >= self.max_experiences:
-            # Remove oldest experience
-            self.experiences.pop(0)
-            self.priorities.pop(0)
-
-        self.experiences.append(experience)
+        # Pick a slot, overwriting the oldest experience when full
+        if len(self._slots) < self.max_experiences:
+            slot = len(self._slots)
+            self._slots.append(None)
+            self._raw_priorities.append(0.0)
+        else:
+            slot = self._head
+            self._head = (self._head + 1) % self.max_experiences
+            self._evict(slot)
 
         # Set priority (default to max priority for new experiences)
         if priority is None:
-            priority = max(self.priorities) if self.priorities else 1.0
+            priority = self._max_priority.total if self._slot_by_id else 1.0
 
-        self.priorities.append(priority)
+        weight = self._weight(priority)
+        self._slots[slot] = experience
+        self._raw_priorities[slot] = priority
+        self._slot_by_id[experience.experience_id] = slot
+        self._weights.set(slot, weight)
+        self._max_priority.set(slot, priority)
+
+        agent_buffer = self._agents.get(agent_id)
+        if agent_buffer is None:
+            agent_buffer = self._agents[agent_id] = _AgentReplayBuffer()
+        agent_buffer.add(slot, weight)
 
         return experience.experience_id
 
@@ -174,6 +366,9 @@ class ExperienceReplayPattern:
         """
         Sample a batch of experiences for training.
 
+        Prioritized sampling draws with replacement in proportion to
+        priority ** priority_alpha; uniform sampling draws without replacement.
+
         Args:
             batch_size: Size of batch (uses default if None)
             agent_id: Optional filter by agent ID
@@ -184,43 +379,41 @@ class ExperienceReplayPattern:
         """
         batch_size = batch_size or self.batch_size
 
-        # Filter by agent if specified
         if agent_id:
-            candidate_indices = [
-                i for i, exp in enumerate(self.experiences)
-                if exp.agent_id == agent_id
-            ]
+            agent_buffer = self._agents.get(agent_id)
+            if agent_buffer is None:
+                return []
+            count = len(agent_buffer)
         else:
-            candidate_indices = list(range(len(self.experiences)))
+            agent_buffer = None
+            count = len(self._slot_by_id)
 
-        if not candidate_indices:
+        if count == 0:
             return []
 
         # Sample based on priority or uniform
-        sample_size = min(batch_size, len(candidate_indices))
+        sample_size = min(batch_size, count)
 
         if use_priority and self.priority_alpha > 0:
-            # Prioritized sampling
-            candidate_priorities = [self.priorities[i] for i in candidate_indices]
-
-            # Apply priority exponent
-            priorities_alpha = [p ** self.priority_alpha for p in candidate_priorities]
-            total_priority = sum(priorities_alpha)
-
-            if total_priority > 0:
-                probabilities = [p / total_priority for p in priorities_alpha]
-                sampled_indices = random.choices(
-                    candidate_indices,
-                    weights=probabilities,
-                    k=sample_size,
-                )
-            else:
-                sampled_indices = random.sample(candidate_indices, sample_size)
+            if self._weights_alpha != self.priority_alpha:
+                self._rebuild_weights()
+
+            tree = agent_buffer.weights if agent_buffer is not None else self._weights
+            total = tree.total
+            if total > 0:
+                positions = [tree.find_prefix(random.random() * total) for _ in range(sample_size)]
+                if agent_buffer is not None:
+                    return [self._slots[agent_buffer.slots[p]] for p in positions]  # type: ignore[misc]
+                return [self._slots[p] for p in positions]  # type: ignore[misc]
+
+        # Uniform sampling
+        if agent_buffer is not None:
+            slots = random.sample(agent_buffer.slots, sample_size)
+        elif count == len(self._slots):
+            slots = random.sample(range(count), sample_size)
         else:
-            # Uniform sampling
-            sampled_indices = random.sample(candidate_indices, sample_size)
-
-        return [self.experiences[i] for i in sampled_indices]
+            slots = random.sample(list(self._slot_by_id.values()), sample_size)
+        return [self._slots[slot] for slot in slots]  # type: ignore[misc]
 
     def update_priorities(
         self,
@@ -243,11 +436,16 @@ class ExperienceReplayPattern:
         updated = 0
 
         for exp_id, priority in zip(experience_ids, priorities):
-            for i, exp in enumerate(self.experiences):
-                if exp.experience_id == exp_id:
-                    self.priorities[i] = priority
-                    updated += 1
-                    break
+            slot = self._slot_by_id.get(exp_id)
+            if slot is None:
+                continue
+
+            weight = self._weight(priority)
+            self._raw_priorities[slot] = priority
+            self._weights.set(slot, weight)
+            self._max_priority.set(slot, priority)
+            self._agents[self._slots[slot].agent_id].update(slot, weight)  # type: ignore[union-attr]
+            updated += 1
 
         return updated
 
@@ -261,10 +459,8 @@ class ExperienceReplayPattern:
         Returns:
             Experience or None if not found
         """
-        for exp in self.experiences:
-            if exp.experience_id == experience_id:
-                return exp
-        return None
+        slot = self._slot_by_id.get(experience_id)
+        return self._slots[slot] if slot is not None else None
 
     def get_recent_experiences(
         self,
@@ -322,19 +518,37 @@ class ExperienceReplayPattern:
             Number of experiences cleared
         """
         if agent_id:
-            original_count = len(self.experiences)
-            self.experiences = [
-                exp for exp in self.experiences
-                if exp.agent_id != agent_id
+            agent_buffer = self._agents.get(agent_id)
+            if agent_buffer is None:
+                return 0
+
+            # Rebuild the ring with the remaining experiences, oldest first
+            kept = [
+                (self._slots[slot], self._raw_priorities[slot])
+                for slot in self._ordered_slots()
+                if self._slots[slot].agent_id != agent_id  # type: ignore[union-attr]
             ]
-            self.priorities = self.priorities[:len(self.experiences)]
-            return original_count - len(self.experiences)
+            removed = len(agent_buffer)
+            self._reset()
+            for experience, priority in kept:
+                self._append(experience, priority)  # type: ignore[arg-type]
+            return removed
         else:
-            count = len(self.experiences)
-            self.experiences.clear()
-            self.priorities.clear()
+            count = len(self._slot_by_id)
+            self._reset()
             return count
 
+    def _append(self, experience: Experience, priority: float) -> None:
+        """Append an existing experience into a free slot."""
+        slot = len(self._slots)
+        weight = self._weight(priority)
+        self._slots.append(experience)
+        self._raw_priorities.append(priority)
+        self._slot_by_id[experience.experience_id] = slot
+        self._weights.set(slot, weight)
+        self._max_priority.set(slot, priority)
+        self._agents.setdefault(experience.agent_id, _AgentReplayBuffer()).add(slot, weight)
+
     def get_statistics(self) -> Dict[str, Any]:
         """
         Get statistics about the replay buffer.
@@ -342,7 +556,7 @@ class ExperienceReplayPattern:
         Returns:
             Dictionary containing buffer statistics
         """
-        if not self.experiences:
+        if not self._slot_by_id:
             return {
                 "total_experiences": 0,
                 "avg_reward": 0.0,
@@ -351,16 +565,15 @@ class ExperienceReplayPattern:
                 "unique_agents": 0,
             }
 
-        rewards = [exp.reward for exp in self.experiences]
-        unique_agents = set(exp.agent_id for exp in self.experiences)
+        rewards = [exp.reward for exp in self._slots if exp is not None]
 
         return {
-            "total_experiences": len(self.experiences),
+            "total_experiences": len(rewards),
             "avg_reward": sum(rewards) / len(rewards),
             "max_reward": max(rewards),
             "min_reward": min(rewards),
-            "unique_agents": len(unique_agents),
-            "capacity_usage": len(self.experiences) / self.max_experiences,
+            "unique_agents": len(self._agents),
+            "capacity_usage": len(rewards) / self.max_experiences,
         }
 
 
@@ -6,13 +6,19 @@ with fakeredis support for testing without external dependencies.
 """
 
 import json
-from dataclasses import dataclass, field
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+import struct
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from uuid import uuid4
 
 try:
     import redis
+    import redis.asyncio
     REDIS_AVAILABLE = True
 except ImportError:
     REDIS_AVAILABLE = False
@@ -23,6 +29,12 @@ try:
 except ImportError:
     FAKEREDIS_AVAILABLE = False
 
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
 
 @dataclass
 class SessionEntry:
@@ -134,13 +146,495 @@ class Session:
         )
 
 
-class SessionMemory:
+def _text(value: Union[str, bytes]) -> str:
+    """Decode a Redis reply from clients with or without decode_responses."""
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _is_error(reply: Any) -> bool:
+    """Whether a pipeline reply (run with raise_on_error=False) is an error."""
+    return isinstance(reply, Exception)
+
+
+def _epoch(moment: datetime) -> float:
+    """Seconds since the epoch of a naive UTC datetime."""
+    return moment.replace(tzinfo=timezone.utc).timestamp()
+
+
+# ===== Session Codecs =====
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Header byte of binary entries: codec format ID, high bit set if compressed.
+# JSON entries carry no header; they start with "{".
+_COMPRESSED = 0x80
+
+
+def _micros(moment: datetime) -> int:
+    """Microseconds since the epoch; aware datetimes are converted to UTC."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return (moment - _EPOCH) // _MICROSECOND
+
+
+class SessionCodec(ABC):
+    """Serialization of history entries and timestamps for SessionMemory.
+
+    Binary codecs write a one-byte header naming their format, so entries
+    written by any registered codec (or as JSON by older versions) can be
+    read whichever codec is configured. Bodies larger than
+    ``compress_threshold`` bytes are zlib-compressed when that helps.
+
+    Timestamps are written as integer microseconds since the epoch.
+    Decoded datetimes are naive UTC, like those SessionEntry creates.
+    """
+
+    format_id: int = 0
+    binary: bool = True
+
+    def __init__(self, compress_threshold: int = 1024, compress_level: int = 1):
+        """
+        Initialize the codec.
+
+        Args:
+            compress_threshold: Compress bodies larger than this many bytes (0 disables)
+            compress_level: zlib compression level
+        """
+        self.compress_threshold = compress_threshold
+        self.compress_level = compress_level
+
+    def encode_entry(self, entry: SessionEntry) -> Union[str, bytes]:
+        """Encode a history entry with its header."""
+        body = self.pack_entry(entry)
+        if self.compress_threshold and len(body) > self.compress_threshold:
+            compressed = zlib.compress(body, self.compress_level)
+            if len(compressed) < len(body):
+                return bytes((self.format_id | _COMPRESSED,)) + compressed
+        return bytes((self.format_id,)) + body
+
+    def encode_time(self, moment: datetime) -> str:
+        """Encode a session timestamp for the session hash."""
+        return str(_micros(moment))
+
+    @abstractmethod
+    def pack_entry(self, entry: SessionEntry) -> bytes:
+        """Serialize an entry, without header."""
+
+    @abstractmethod
+    def unpack_entry(self, body: bytes) -> SessionEntry:
+        """Deserialize an entry body written by ``pack_entry``."""
+
+
+class JsonSessionCodec(SessionCodec):
+    """JSON entries and ISO timestamps, as written by earlier versions.
+
+    Works with clients using decode_responses=True, and the data stays
+    readable by older deployments.
+    """
+
+    binary = False
+
+    def encode_entry(self, entry: SessionEntry) -> str:
+        """Encode a history entry as a JSON object."""
+        return json.dumps(entry.to_dict())
+
+    def encode_time(self, moment: datetime) -> str:
+        """Encode a session timestamp in ISO format."""
+        return moment.isoformat()
+
+    def pack_entry(self, entry: SessionEntry) -> bytes:
+        return json.dumps(entry.to_dict()).encode()
+
+    def unpack_entry(self, body: bytes) -> SessionEntry:
+        return SessionEntry.from_dict(json.loads(body))
+
+
+class StructSessionCodec(SessionCodec):
+    """Struct-packed entries: fixed header, then UTF-8 strings.
+
+    Layout: timestamp (int64 microseconds), byte lengths of entry_id,
+    role, content and metadata, then the four fields. Metadata is compact
+    JSON, and empty metadata takes no bytes.
+    """
+
+    format_id = 1
+    _header = struct.Struct("<qHHII")
+
+    def pack_entry(self, entry: SessionEntry) -> bytes:
+        entry_id = entry.entry_id.encode()
+        role = entry.role.encode()
+        content = entry.content.encode()
+        metadata = json.dumps(entry.metadata, separators=(",", ":")).encode() if entry.metadata else b""
+        return b"".join((
+            self._header.pack(_micros(entry.timestamp), len(entry_id), len(role), len(content), len(metadata)),
+            entry_id, role, content, metadata,
+        ))
+
+    def unpack_entry(self, body: bytes) -> SessionEntry:
+        timestamp, id_len, role_len, content_len, metadata_len = self._header.unpack_from(body)
+        start = self._header.size
+        role_start = start + id_len
+        content_start = role_start + role_len
+        metadata_start = content_start + content_len
+        if metadata_start + metadata_len != len(body):
+            raise ValueError("Truncated session entry")
+        return SessionEntry(
+            entry_id=body[start:role_start].decode(),
+            role=body[role_start:content_start].decode(),
+            content=body[content_start:metadata_start].decode(),
+            timestamp=_EPOCH + timedelta(microseconds=timestamp),
+            metadata=json.loads(body[metadata_start:]) if metadata_len else {},
+        )
+
+
+class MsgpackSessionCodec(SessionCodec):
+    """msgpack-encoded entries; requires the msgpack package."""
+
+    format_id = 2
+
+    def __init__(self, compress_threshold: int = 1024, compress_level: int = 1):
+        if not MSGPACK_AVAILABLE:
+            raise ImportError("MsgpackSessionCodec requires the msgpack package")
+        super().__init__(compress_threshold, compress_level)
+
+    def pack_entry(self, entry: SessionEntry) -> bytes:
+        return msgpack.packb(
+            [_micros(entry.timestamp), entry.entry_id, entry.role, entry.content, entry.metadata],
+            use_bin_type=True,
+        )
+
+    def unpack_entry(self, body: bytes) -> SessionEntry:
+        timestamp, entry_id, role, content, metadata = msgpack.unpackb(body, raw=False)
+        return SessionEntry(
+            entry_id=entry_id,
+            role=role,
+            content=content,
+            timestamp=_EPOCH + timedelta(microseconds=timestamp),
+            metadata=metadata,
+        )
+
+
+# Binary codecs by format ID, for decoding
+_codec_formats: Dict[int, SessionCodec] = {}
+
+
+def register_codec(codec: SessionCodec) -> None:
+    """Make entries in a codec's format readable.
+
+    Args:
+        codec: Binary codec with a format ID between 1 and 127
+
+    Raises:
+        ValueError: If the format ID is out of range or taken by another codec
+    """
+    if not 0 < codec.format_id < _COMPRESSED or codec.format_id == ord("{"):
+        raise ValueError(f"Invalid codec format ID: {codec.format_id}")
+    current = _codec_formats.get(codec.format_id)
+    if current is not None and type(current) is not type(codec):
+        raise ValueError(f"Codec format ID {codec.format_id} is used by {type(current).__name__}")
+    _codec_formats[codec.format_id] = codec
+
+
+register_codec(StructSessionCodec())
+if MSGPACK_AVAILABLE:
+    register_codec(MsgpackSessionCodec())
+
+
+def decode_entry(data: Union[str, bytes]) -> SessionEntry:
+    """Decode a history entry written by any registered codec or as JSON.
+
+    Raises:
+        ValueError: If the entry is malformed or its format is unknown
+    """
+    if isinstance(data, str) or data[:1] == b"{":
+        return SessionEntry.from_dict(json.loads(data))
+    codec = _codec_formats.get(data[0] & ~_COMPRESSED)
+    if codec is None:
+        raise ValueError(f"Unknown session entry format: {data[0]}")
+    try:
+        body = zlib.decompress(data[1:]) if data[0] & _COMPRESSED else data[1:]
+        return codec.unpack_entry(body)
+    except (struct.error, zlib.error, UnicodeDecodeError, TypeError) as e:
+        raise ValueError(f"Invalid session entry: {e}") from e
+
+
+def decode_time(value: Union[str, bytes]) -> datetime:
+    """Decode a session timestamp written as epoch microseconds or ISO text."""
+    value = _text(value)
+    if value.isdigit():
+        return _EPOCH + timedelta(microseconds=int(value))
+    return datetime.fromisoformat(value)
+
+
+# Index keys: sorted sets of session IDs by last access and by expiry time,
+# and a set of session IDs per agent
+_LAST_ACCESS_INDEX = "session_index:last_access"
+_EXPIRY_INDEX = "session_index:expires"
+_AGENT_INDEX_PREFIX = "session_index:agent:"
+
+
+# Shared asyncio connection pools, keyed by URL and size
+_async_pools: Dict[Tuple[str, int, bool], Any] = {}
+
+
+def shared_connection_pool(
+    redis_url: str = "redis://localhost:6379/0",
+    max_connections: int = 50,
+    decode_responses: bool = True,
+) -> Any:
+    """Return the process-wide asyncio connection pool for a Redis URL.
+
+    The pool blocks callers while all connections are busy instead of
+    failing, so a burst of agents queues for a connection.
+
+    Args:
+        redis_url: Redis server URL
+        max_connections: Most connections the pool opens
+        decode_responses: Whether connections decode replies to str
+
+    Returns:
+        A redis.asyncio BlockingConnectionPool
+    """
+    key = (redis_url, max_connections, decode_responses)
+    pool = _async_pools.get(key)
+    if pool is None:
+        pool = _async_pools[key] = redis.asyncio.BlockingConnectionPool.from_url(
+            redis_url, max_connections=max_connections, decode_responses=decode_responses
+        )
+    return pool
+
+
+class _RedisSessionLayout:
+    """
+    Redis key layout shared by SessionMemory and AsyncSessionMemory.
+
+    Each session is stored in native Redis structures, all sharing the
+    session's TTL:
+
+    - ``session:{id}``: hash of session_id, agent_id, created_at, last_accessed
+    - ``session_history:{id}``: list of entries encoded by ``codec``, trimmed with LTRIM
+    - ``session_context:{id}``: hash of context field -> JSON value
+    - ``session_metadata:{id}``: hash of metadata field -> JSON value
+
+    Sorted sets of session IDs by last access and by expiry time, and a
+    set per agent, are kept up to date by the same transactions.
+
+    The methods here only queue commands on a pipeline and decode the
+    replies; the sync and async stores execute them. Pipeline command
+    methods are synchronous in both redis and redis.asyncio.
+    """
+
+    ttl_seconds: int
+    max_history_length: int
+    codec: SessionCodec
+
+    @staticmethod
+    def _check_client(client: Any, codec: SessionCodec) -> None:
+        """Reject clients that would decode a binary codec's bytes as text."""
+        pool = getattr(client, "connection_pool", None)
+        if codec.binary and getattr(pool, "connection_kwargs", {}).get("decode_responses"):
+            raise ValueError(f"{type(codec).__name__} needs a Redis client with decode_responses=False")
+
+    @staticmethod
+    def _session_keys(session_id: str) -> Tuple[str, str, str, str]:
+        """Redis keys of a session: main hash, history, context, metadata."""
+        return (
+            f"session:{session_id}",
+            f"session_history:{session_id}",
+            f"session_context:{session_id}",
+            f"session_metadata:{session_id}",
+        )
+
+    def _queue_expire(self, pipe: Any, session_id: str, ttl: int) -> None:
+        """Queue EXPIRE of all of a session's keys on a pipeline."""
+        for key in self._session_keys(session_id):
+            pipe.expire(key, ttl)
+
+    @staticmethod
+    def _queue_index(
+        pipe: Any,
+        session_id: str,
+        accessed_at: datetime,
+        ttl: int,
+        agent_id: Optional[str] = None,
+    ) -> None:
+        """Queue index updates for an access to a session.
+
+        With an agent_id the session is (re-)added to the indexes; without
+        one only sessions already indexed are updated (ZADD XX), so
+        touching a missing session leaves no index entries.
+        """
+        accessed = _epoch(accessed_at)
+        existing_only = agent_id is None
+        pipe.zadd(_LAST_ACCESS_INDEX, {session_id: accessed}, xx=existing_only)
+        pipe.zadd(_EXPIRY_INDEX, {session_id: accessed + ttl}, xx=existing_only)
+        if agent_id is not None:
+            pipe.sadd(f"{_AGENT_INDEX_PREFIX}{agent_id}", session_id)
+
+    def _queue_store(self, pipe: Any, session: Session, ttl: int) -> None:
+        """Queue replacing a session's keys and indexing it."""
+        main_key, history_key, context_key, metadata_key = self._session_keys(session.session_id)
+        pipe.delete(main_key, history_key, context_key, metadata_key)
+        pipe.hset(main_key, mapping={
+            "session_id": session.session_id,
+            "agent_id": session.agent_id,
+            "created_at": self.codec.encode_time(session.created_at),
+            "last_accessed": self.codec.encode_time(session.last_accessed),
+        })
+        if session.history:
+            pipe.rpush(history_key, *(self.codec.encode_entry(entry) for entry in session.history))
+        if session.context:
+            pipe.hset(context_key, mapping={k: json.dumps(v) for k, v in session.context.items()})
+        if session.metadata:
+            pipe.hset(metadata_key, mapping={k: json.dumps(v) for k, v in session.metadata.items()})
+        self._queue_expire(pipe, session.session_id, ttl)
+        self._queue_index(pipe, session.session_id, session.last_accessed, ttl, agent_id=session.agent_id)
+
+    def _queue_read(self, pipe: Any, session_id: str) -> None:
+        """Queue the four reads decoded by ``_parse_read``."""
+        main_key, history_key, context_key, metadata_key = self._session_keys(session_id)
+        pipe.hgetall(main_key)
+        pipe.lrange(history_key, 0, -1)
+        pipe.hgetall(context_key)
+        pipe.hgetall(metadata_key)
+
+    def _queue_touch(self, pipe: Any, session_id: str, now: datetime) -> None:
+        """Queue updating last_accessed and refreshing the TTL."""
+        pipe.hset(f"session:{session_id}", "last_accessed", self.codec.encode_time(now))
+        self._queue_expire(pipe, session_id, self.ttl_seconds)
+        self._queue_index(pipe, session_id, now, self.ttl_seconds)
+
+    def _queue_append(self, pipe: Any, session_id: str, entry: SessionEntry) -> None:
+        """Queue pushing a history entry and trimming the history."""
+        history_key = f"session_history:{session_id}"
+        pipe.rpush(history_key, self.codec.encode_entry(entry))
+        # Trim history if it exceeds max length
+        pipe.ltrim(history_key, -self.max_history_length, -1)
+
+    @staticmethod
+    def _queue_context(pipe: Any, session_id: str, context_updates: Dict[str, Any]) -> None:
+        """Queue merging context fields."""
+        if context_updates:
+            pipe.hset(
+                f"session_context:{session_id}",
+                mapping={k: json.dumps(v) for k, v in context_updates.items()},
+            )
+
+    def _queue_update(self, pipe: Any, session_id: str, queue: Callable[[Any], None], now: datetime) -> None:
+        """Queue an existence check, ``queue``'s writes and a touch.
+
+        The first reply tells whether the session existed (an error means
+        it is stored in the legacy JSON format).
+        """
+        pipe.hexists(f"session:{session_id}", "session_id")
+        queue(pipe)
+        self._queue_touch(pipe, session_id, now)
+
+    @staticmethod
+    def _is_complete(main: Dict[Any, Any]) -> bool:
+        """Whether a main hash belongs to a stored session.
+
+        Touching a missing session leaves a hash holding only
+        last_accessed, which does not count.
+        """
+        return "session_id" in main or b"session_id" in main
+
+    def _parse_read(self, replies: List[Any]) -> Tuple[str, Optional[Session]]:
+        """Decode the replies of ``_queue_read``.
+
+        Returns:
+            ("ok", session), ("legacy", None) for a session stored as one
+            JSON string, ("missing", None) or ("invalid", None)
+        """
+        main, history, context, metadata = replies
+        if _is_error(main):
+            return "legacy", None
+        if not self._is_complete(main):
+            return "missing", None
+        try:
+            main = {_text(k): _text(v) for k, v in main.items()}
+            session = Session(
+                session_id=main["session_id"],
+                agent_id=main.get("agent_id", ""),
+                created_at=decode_time(main["created_at"]),
+                last_accessed=decode_time(main["last_accessed"]),
+                history=[decode_entry(entry) for entry in history],
+                context={_text(k): json.loads(v) for k, v in context.items()},
+                metadata={_text(k): json.loads(v) for k, v in metadata.items()},
+            )
+        except (json.JSONDecodeError, KeyError, ValueError):
+            # Invalid session data
+            return "invalid", None
+        return "ok", session
+
+    @staticmethod
+    def _parse_legacy(value: Optional[Union[str, bytes]]) -> Optional[Session]:
+        """Decode a session stored by older versions as one JSON string."""
+        if value is None:
+            return None
+        try:
+            return Session.from_dict(json.loads(value))
+        except (json.JSONDecodeError, KeyError, ValueError):
+            return None
+
+    @staticmethod
+    def _stale_bounds(max_age: int) -> Tuple[str, float]:
+        """ZRANGEBYSCORE bounds for a cleanup sweep.
+
+        Returns:
+            Exclusive last-access cutoff, and the current time for the
+            expiry index
+        """
+        now = datetime.utcnow()
+        return f"({_epoch(now - timedelta(seconds=max_age))}", _epoch(now)
+
+    def _queue_delete(self, pipe: Any, session_ids: List[str], agent_ids: List[Any]) -> None:
+        """Queue deleting sessions and their index entries.
+
+        Replies start with one DEL per session, counting its main key.
+        """
+        for session_id in session_ids:
+            pipe.delete(f"session:{session_id}")
+        for session_id, agent_id in zip(session_ids, agent_ids):
+            pipe.delete(*self._session_keys(session_id)[1:])
+            if agent_id is not None and not _is_error(agent_id):
+                pipe.srem(f"{_AGENT_INDEX_PREFIX}{_text(agent_id)}", session_id)
+        pipe.zrem(_LAST_ACCESS_INDEX, *session_ids)
+        pipe.zrem(_EXPIRY_INDEX, *session_ids)
+
+    @staticmethod
+    def _orphans(session_ids: List[str], has_session_id: List[Any]) -> List[str]:
+        """Sessions whose main key is absent or holds only last_accessed."""
+        return [
+            session_id for session_id, exists in zip(session_ids, has_session_id)
+            if not _is_error(exists) and not exists
+        ]
+
+
+class SessionMemory(_RedisSessionLayout):
     """
     Short-term memory storage using Redis.
 
     Manages agent session data including conversation history, context,
     and temporary state. Uses fakeredis for testing without external
     Redis dependencies.
+
+    Sessions use the native Redis layout described in
+    ``_RedisSessionLayout``. Appends, context updates and reads are single
+    MULTI/EXEC round trips that refresh the TTL with EXPIRE instead of
+    rewriting the session. Sessions written by older versions as one JSON
+    string are migrated on first access.
+
+    Agent listing, cleanup and counting use the session indexes instead of
+    ``KEYS``; entries for sessions that expired through their TTL are
+    dropped lazily.
+
+    History entries are written with ``codec``. The default JSON codec keeps
+    the data readable by older versions; StructSessionCodec (or
+    MsgpackSessionCodec) is smaller and faster to decode. Entries in any
+    known format are readable whatever the codec, so switching codecs needs
+    no migration.
     """
 
     def __init__(
@@ -149,6 +643,7 @@ class SessionMemory:
         use_fakeredis: bool = True,
         ttl_seconds: int = 3600,
         max_history_length: int = 100,
+        codec: Optional[SessionCodec] = None,
     ):
         """
         Initialize session memory.
@@ -158,78 +653,482 @@ class SessionMemory:
             use_fakeredis: Whether to use fakeredis for in-memory storage
             ttl_seconds: Default TTL for sessions in seconds
             max_history_length: Maximum number of history entries to keep
+            codec: Codec for history entries and timestamps (defaults to JSON)
+
+        Raises:
+            ImportError: If no client is given and neither redis nor
+                fakeredis is installed
+            ValueError: If a binary codec is given a client with decode_responses=True
         """
         self.ttl_seconds = ttl_seconds
         self.max_history_length = max_history_length
+        self.codec = codec or JsonSessionCodec()
+        decode_responses = not self.codec.binary
 
         if redis_client is not None:
+            self._check_client(redis_client, self.codec)
             self.redis = redis_client
         elif use_fakeredis and FAKEREDIS_AVAILABLE:
-            self.redis = fakeredis.FakeRedis(decode_responses=True)
+            self.redis = fakeredis.FakeRedis(decode_responses=decode_responses)
         elif REDIS_AVAILABLE:
             # Fallback to real Redis
-            self.redis = redis.Redis(decode_responses=True)
+            self.redis = redis.Redis(decode_responses=decode_responses)
         else:
-            # In-memory fallback if neither is available
-            self.redis = None
-            self._memory_store: Dict[str, str] = {}
+            raise ImportError("SessionMemory requires the redis or fakeredis package")
+
+    def store_session(self, session: Session, ttl_override: Optional[int] = None) -> None:
+        """
+        Store a session in memory.
 
-    def _set(self, key: str, value: str, ex: Optional[int] = None) -> None:
-        """Set a key-value pair in storage.
+        Replaces any stored session with the same ID in one transaction.
 
         Args:
-            key: Storage key
-            value: String value to store
-            ex: Optional expiration in seconds
+            session: Session to store
+            ttl_override: Optional TTL override in seconds
         """
-        if self.redis is not None:
-            self.redis.set(key, value, ex=ex)
-        else:
-            self._memory_store[key] = value
+        session.last_accessed = datetime.utcnow()
+        ttl = ttl_override if ttl_override is not None else self.ttl_seconds
+        pipe = self.redis.pipeline()
+        self._queue_store(pipe, session, ttl)
+        pipe.execute()
 
-    def _get(self, key: str) -> Optional[str]:
-        """Get a value from storage.
+    def get_session(self, session_id: str) -> Optional[Session]:
+        """
+        Retrieve a session from memory.
+
+        Reading also updates last_accessed and refreshes the TTL, in the
+        same round trip.
 
         Args:
-            key: Storage key
+            session_id: ID of the session to retrieve
 
         Returns:
-            Stored value or None if not found
+            Session instance or None if not found
         """
-        if self.redis is not None:
-            return self.redis.get(key)
-        else:
-            return self._memory_store.get(key)
+        return self.get_sessions_many([session_id]).get(session_id)
+
+    def get_sessions_many(self, session_ids: List[str]) -> Dict[str, Session]:
+        """
+        Retrieve several sessions in one round trip.
 
-    def _delete(self, key: str) -> None:
-        """Delete a key from storage.
+        Every session found is touched, as by ``get_session``.
 
         Args:
-            key: Storage key to delete
+            session_ids: IDs of the sessions to retrieve
+
+        Returns:
+            Dictionary of the sessions found, by session ID
         """
-        if self.redis is not None:
-            self.redis.delete(key)
-        else:
-            self._memory_store.pop(key, None)
+        session_ids = list(dict.fromkeys(session_ids))
+        if not session_ids:
+            return {}
+
+        now = datetime.utcnow()
+        pipe = self.redis.pipeline()
+        for session_id in session_ids:
+            self._queue_read(pipe, session_id)
+            self._queue_touch(pipe, session_id, now)
+        replies = pipe.execute(raise_on_error=False)
+        step = len(replies) // len(session_ids)
+
+        sessions: Dict[str, Session] = {}
+        missing = []
+        for i, session_id in enumerate(session_ids):
+            status, session = self._parse_read(replies[i * step:i * step + 4])
+            if status == "legacy":
+                session = self._migrate_legacy(session_id)
+            elif status == "missing":
+                missing.append(session_id)
+            if session is not None:
+                if status == "ok":
+                    session.last_accessed = now
+                sessions[session_id] = session
+
+        if missing:
+            self._discard_orphans(missing)
+        return sessions
 
-    def _keys(self, pattern: str) -> List[str]:
-        """Get keys matching a pattern.
+    def delete_session(self, session_id: str) -> None:
+        """
+        Delete a session from memory.
 
         Args:
-            pattern: Key pattern (e.g., "session:*")
+            session_id: ID of the session to delete
+        """
+        self._delete_sessions([session_id])
+
+    def append_to_history(
+        self,
+        session_id: str,
+        role: str,
+        content: str,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """
+        Append an entry to a session's history.
+
+        The entry is pushed onto the history list, which is trimmed to
+        max_history_length, in a single transaction that also touches the
+        session; the rest of the session is not read or rewritten.
+
+        Args:
+            session_id: ID of the session
+            role: Role of the participant (user, agent, system)
+            content: Content of the message
+            metadata: Optional metadata for the entry
 
         Returns:
-            List of matching keys
+            True if successful, False if session not found
+        """
+        entry = SessionEntry(
+            role=role,
+            content=content,
+            metadata=metadata or {},
+        )
+        return self._update_session(
+            session_id, lambda pipe: self._queue_append(pipe, session_id, entry)
+        )
+
+    def update_context(
+        self,
+        session_id: str,
+        context_updates: Dict[str, Any],
+    ) -> bool:
+        """
+        Update session context.
+
+        Only the updated context fields are written.
+
+        Args:
+            session_id: ID of the session
+            context_updates: Dictionary of context updates to merge
+
+        Returns:
+            True if successful, False if session not found
         """
-        if self.redis is not None:
-            keys = self.redis.keys(pattern)
-            # Handle both bytes and str returns from different redis versions
-            return [k.decode() if isinstance(k, bytes) else k for k in keys]
+        return self._update_session(
+            session_id, lambda pipe: self._queue_context(pipe, session_id, context_updates)
+        )
+
+    def get_sessions_by_agent(self, agent_id: str) -> List[Session]:
+        """
+        Get all sessions for a specific agent.
+
+        Reads the agent's index set, then all its sessions in one pipelined
+        round trip. IDs of sessions that expired or changed agent are
+        removed from the set.
+
+        Args:
+            agent_id: ID of the agent
+
+        Returns:
+            List of sessions belonging to the agent
+        """
+        agent_key = f"{_AGENT_INDEX_PREFIX}{agent_id}"
+        session_ids = sorted(_text(member) for member in self.redis.smembers(agent_key))
+        sessions = []
+        stale = []
+
+        for session_id, session in zip(session_ids, self._load_sessions(session_ids)):
+            if session is not None and session.agent_id == agent_id:
+                sessions.append(session)
+            else:
+                stale.append(session_id)
+
+        if stale:
+            self.redis.srem(agent_key, *stale)
+        return sessions
+
+    def cleanup_expired_sessions(self, max_age_seconds: Optional[int] = None) -> int:
+        """
+        Clean up expired sessions based on last access time.
+
+        Sweeps the last-access index with ZRANGEBYSCORE, so the cost is
+        proportional to the number of sessions removed. Index entries of
+        sessions Redis already expired through their TTL are dropped too.
+
+        Args:
+            max_age_seconds: Maximum age in seconds (defaults to ttl_seconds)
+
+        Returns:
+            Number of sessions cleaned up
+        """
+        max_age = max_age_seconds if max_age_seconds is not None else self.ttl_seconds
+        cutoff, now = self._stale_bounds(max_age)
+
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zrangebyscore(_LAST_ACCESS_INDEX, "-inf", cutoff)
+        pipe.zrangebyscore(_EXPIRY_INDEX, "-inf", now)
+        idle, expired = pipe.execute()
+        return self._delete_sessions(sorted({_text(member) for member in idle + expired}))
+
+    def get_session_count(self) -> int:
+        """
+        Get the total number of active sessions.
+
+        Counts index entries whose expiry time has not passed (ZCOUNT).
+
+        Returns:
+            Number of sessions in storage
+        """
+        return self.redis.zcount(_EXPIRY_INDEX, f"({_epoch(datetime.utcnow())}", "+inf")
+
+    def rebuild_indexes(self, batch_size: int = 500) -> int:
+        """
+        Re-create the session indexes from the stored sessions.
+
+        Walks ``session:*`` with cursor SCAN, one batch at a time, so Redis
+        is never blocked by a full keyspace walk. Use it after upgrading
+        from a version without indexes. Sessions stored as one JSON string
+        are migrated along the way.
+
+        Args:
+            batch_size: SCAN COUNT hint and pipeline size
+
+        Returns:
+            Number of sessions indexed
+        """
+        indexed = 0
+        batch: List[str] = []
+        for key in self.redis.scan_iter(match="session:*", count=batch_size):
+            batch.append(_text(key)[len("session:"):])
+            if len(batch) >= batch_size:
+                indexed += self._index_batch(batch)
+                batch = []
+        if batch:
+            indexed += self._index_batch(batch)
+        return indexed
+
+    def _index_batch(self, session_ids: List[str]) -> int:
+        """Index a batch of stored sessions with their remaining TTLs."""
+        sessions = self._load_sessions(session_ids)
+        pipe = self.redis.pipeline(transaction=False)
+        for session_id in session_ids:
+            pipe.ttl(f"session:{session_id}")
+        ttls = pipe.execute()
+
+        indexed = 0
+        pipe = self.redis.pipeline(transaction=False)
+        for session, ttl in zip(sessions, ttls):
+            if session is None or ttl == -2:
+                continue
+            self._queue_index(
+                pipe, session.session_id, session.last_accessed,
+                ttl if ttl >= 0 else self.ttl_seconds, agent_id=session.agent_id,
+            )
+            indexed += 1
+        pipe.execute()
+        return indexed
+
+    def _delete_sessions(self, session_ids: List[str]) -> int:
+        """Delete sessions and their index entries.
+
+        Args:
+            session_ids: IDs of the sessions to delete
+
+        Returns:
+            Number of sessions that still existed
+        """
+        if not session_ids:
+            return 0
+
+        pipe = self.redis.pipeline(transaction=False)
+        for session_id in session_ids:
+            pipe.hget(f"session:{session_id}", "agent_id")
+        agent_ids = pipe.execute(raise_on_error=False)
+
+        pipe = self.redis.pipeline()
+        self._queue_delete(pipe, session_ids, agent_ids)
+        return sum(pipe.execute()[:len(session_ids)])
+
+    def _update_session(self, session_id: str, queue: Callable[[Any], None]) -> bool:
+        """Apply queued writes to an existing session in one transaction.
+
+        The transaction checks the session exists, runs ``queue``'s writes,
+        bumps last_accessed and refreshes the TTL. If the session turns out
+        to be missing, keys the writes created are removed again.
+
+        Args:
+            session_id: ID of the session
+            queue: Function queueing the writes on the pipeline
+
+        Returns:
+            True if the session existed and was updated
+        """
+        pipe = self.redis.pipeline()
+        self._queue_update(pipe, session_id, queue, datetime.utcnow())
+        exists = pipe.execute(raise_on_error=False)[0]
+
+        if _is_error(exists):
+            if self._migrate_legacy(session_id, touch=False) is None:
+                return False
+            return self._update_session(session_id, queue)
+        if not exists:
+            self._discard_orphans([session_id])
+            return False
+        return True
+
+    def _discard_orphans(self, session_ids: List[str]) -> None:
+        """Delete keys that touches and writes to missing sessions created.
+
+        Guarded by WATCH so a session stored concurrently is never removed.
+        """
+        main_keys = [f"session:{session_id}" for session_id in session_ids]
+        try:
+            with self.redis.pipeline() as pipe:
+                pipe.watch(*main_keys)
+                check = self.redis.pipeline(transaction=False)
+                for key in main_keys:
+                    check.hexists(key, "session_id")
+                orphans = self._orphans(session_ids, check.execute(raise_on_error=False))
+                if not orphans:
+                    return
+                pipe.multi()
+                for session_id in orphans:
+                    pipe.delete(*self._session_keys(session_id))
+                pipe.execute()
+        except redis.exceptions.WatchError:
+            # Stored concurrently; the keys are a real session now
+            pass
+
+    def _load_sessions(self, session_ids: List[str]) -> List[Optional[Session]]:
+        """Read sessions in one pipelined round trip, without touching them.
+
+        Args:
+            session_ids: IDs of the sessions to read
+
+        Returns:
+            Sessions in the same order, None for missing or invalid ones
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        for session_id in session_ids:
+            self._queue_read(pipe, session_id)
+        replies = pipe.execute(raise_on_error=False)
+
+        sessions: List[Optional[Session]] = []
+        for i, session_id in enumerate(session_ids):
+            status, session = self._parse_read(replies[4 * i:4 * i + 4])
+            if status == "legacy":
+                session = self._migrate_legacy(session_id, touch=False)
+            sessions.append(session)
+        return sessions
+
+    def _migrate_legacy(self, session_id: str, touch: bool = True) -> Optional[Session]:
+        """Rewrite a session stored as one JSON string in the current layout.
+
+        Args:
+            session_id: ID of the session
+            touch: Whether this counts as an access (updates last_accessed)
+
+        Returns:
+            The migrated session, or None if it is missing or invalid
+        """
+        main_key = f"session:{session_id}"
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.get(main_key)
+        pipe.ttl(main_key)
+        value, ttl = pipe.execute(raise_on_error=False)
+        session = self._parse_legacy(value if not _is_error(value) else None)
+        if session is None:
+            return None
+
+        last_accessed = session.last_accessed
+        # An access refreshes the TTL, as reads do; otherwise keep the old one
+        self.store_session(session, ttl_override=None if touch or ttl <= 0 else ttl)
+        if not touch:
+            session.last_accessed = last_accessed
+            pipe = self.redis.pipeline()
+            pipe.hset(main_key, "last_accessed", self.codec.encode_time(last_accessed))
+            pipe.zadd(_LAST_ACCESS_INDEX, {session_id: _epoch(last_accessed)})
+            pipe.execute()
+        return session
+
+
+class AsyncSessionMemory(_RedisSessionLayout):
+    """
+    Asyncio session memory on redis.asyncio.
+
+    Same storage layout and API as SessionMemory, with coroutine methods,
+    so session reads don't block the event loop. Clients created here
+    share a process-wide connection pool per Redis URL.
+
+    Hot sessions are kept in a small in-process read-through cache for
+    ``local_cache_ttl_seconds``. Writes through this instance update or
+    drop the cached copy; writes from other processes become visible when
+    the cached copy expires, and reads served from the cache don't
+    refresh the session's TTL.
+
+    Example:
+        >>> memory = AsyncSessionMemory(redis_url="redis://redis:6379/0")
+        >>> await memory.store_session(Session(agent_id="agent-001"))
+        >>> sessions = await memory.get_sessions_many(session_ids)
+    """
+
+    def __init__(
+        self,
+        redis_client: Optional[Any] = None,
+        use_fakeredis: bool = True,
+        ttl_seconds: int = 3600,
+        max_history_length: int = 100,
+        redis_url: str = "redis://localhost:6379/0",
+        max_connections: int = 50,
+        local_cache_ttl_seconds: float = 1.0,
+        local_cache_size: int = 1024,
+        codec: Optional[SessionCodec] = None,
+    ):
+        """
+        Initialize async session memory.
+
+        Args:
+            redis_client: Optional redis.asyncio client (will create fakeredis if None)
+            use_fakeredis: Whether to use fakeredis for in-memory storage
+            ttl_seconds: Default TTL for sessions in seconds
+            max_history_length: Maximum number of history entries to keep
+            redis_url: Redis URL used when no client is given and fakeredis is off
+            max_connections: Size of the shared connection pool for redis_url
+            local_cache_ttl_seconds: How long sessions stay in the local cache (0 disables it)
+            local_cache_size: Most sessions in the local cache
+            codec: Codec for history entries and timestamps (defaults to JSON)
+
+        Raises:
+            ImportError: If no client is given and neither redis nor
+                fakeredis is installed
+            ValueError: If a binary codec is given a client with decode_responses=True
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_history_length = max_history_length
+        self.local_cache_ttl_seconds = local_cache_ttl_seconds
+        self.local_cache_size = local_cache_size
+        self.codec = codec or JsonSessionCodec()
+        decode_responses = not self.codec.binary
+
+        if redis_client is not None:
+            self._check_client(redis_client, self.codec)
+            self.redis = redis_client
+        elif use_fakeredis and FAKEREDIS_AVAILABLE:
+            self.redis = fakeredis.FakeAsyncRedis(decode_responses=decode_responses)
+        elif REDIS_AVAILABLE:
+            self.redis = redis.asyncio.Redis(
+                connection_pool=shared_connection_pool(redis_url, max_connections, decode_responses)
+            )
         else:
-            import fnmatch
-            return [k for k in self._memory_store.keys() if fnmatch.fnmatch(k, pattern)]
+            raise ImportError("AsyncSessionMemory requires the redis or fakeredis package")
 
-    def store_session(self, session: Session, ttl_override: Optional[int] = None) -> None:
+        # Local read-through cache: session_id -> (expires at, session)
+        self._local: "OrderedDict[str, Tuple[float, Session]]" = OrderedDict()
+        self._stats = {"local_hits": 0, "redis_reads": 0}
+
+    async def close(self) -> None:
+        """Close the client; a shared connection pool stays open."""
+        await self.redis.aclose()
+
+    async def __aenter__(self) -> "AsyncSessionMemory":
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        await self.close()
+
+    async def store_session(self, session: Session, ttl_override: Optional[int] = None) -> None:
         """
         Store a session in memory.
 
@@ -238,14 +1137,15 @@ class SessionMemory:
             ttl_override: Optional TTL override in seconds
         """
         session.last_accessed = datetime.utcnow()
-        key = f"session:{session.session_id}"
-        value = json.dumps(session.to_dict())
         ttl = ttl_override if ttl_override is not None else self.ttl_seconds
-        self._set(key, value, ex=ttl)
+        pipe = self.redis.pipeline()
+        self._queue_store(pipe, session, ttl)
+        await pipe.execute()
+        self._cache_put(session)
 
-    def get_session(self, session_id: str) -> Optional[Session]:
+    async def get_session(self, session_id: str) -> Optional[Session]:
         """
-        Retrieve a session from memory.
+        Retrieve a session, from the local cache if it is fresh.
 
         Args:
             session_id: ID of the session to retrieve
@@ -253,36 +1153,66 @@ class SessionMemory:
         Returns:
             Session instance or None if not found
         """
-        key = f"session:{session_id}"
-        value = self._get(key)
-
-        if value is None:
-            return None
+        return (await self.get_sessions_many([session_id])).get(session_id)
 
-        try:
-            data = json.loads(value)
-            session = Session.from_dict(data)
+    async def get_sessions_many(self, session_ids: List[str]) -> Dict[str, Session]:
+        """
+        Retrieve several sessions, reading uncached ones in one round trip.
 
-            # Update last accessed time
-            session.last_accessed = datetime.utcnow()
-            self.store_session(session)
+        Args:
+            session_ids: IDs of the sessions to retrieve
 
-            return session
-        except (json.JSONDecodeError, KeyError) as e:
-            # Invalid session data
-            return None
+        Returns:
+            Dictionary of the sessions found, by session ID
+        """
+        sessions: Dict[str, Session] = {}
+        to_read = []
+        for session_id in dict.fromkeys(session_ids):
+            cached = self._cache_get(session_id)
+            if cached is not None:
+                sessions[session_id] = cached
+            else:
+                to_read.append(session_id)
+        self._stats["local_hits"] += len(sessions)
+        if not to_read:
+            return sessions
+        self._stats["redis_reads"] += len(to_read)
+
+        now = datetime.utcnow()
+        pipe = self.redis.pipeline()
+        for session_id in to_read:
+            self._queue_read(pipe, session_id)
+            self._queue_touch(pipe, session_id, now)
+        replies = await pipe.execute(raise_on_error=False)
+        step = len(replies) // len(to_read)
+
+        missing = []
+        for i, session_id in enumerate(to_read):
+            status, session = self._parse_read(replies[i * step:i * step + 4])
+            if status == "legacy":
+                session = await self._migrate_legacy(session_id)
+            elif status == "missing":
+                missing.append(session_id)
+            if session is not None:
+                if status == "ok":
+                    session.last_accessed = now
+                self._cache_put(session)
+                sessions[session_id] = _copy_session(session)
+
+        if missing:
+            await self._discard_orphans(missing)
+        return sessions
 
-    def delete_session(self, session_id: str) -> None:
+    async def delete_session(self, session_id: str) -> None:
         """
         Delete a session from memory.
 
         Args:
             session_id: ID of the session to delete
         """
-        key = f"session:{session_id}"
-        self._delete(key)
+        await self._delete_sessions([session_id])
 
-    def append_to_history(
+    async def append_to_history(
         self,
         session_id: str,
         role: str,
@@ -290,7 +1220,7 @@ class SessionMemory:
         metadata: Optional[Dict[str, Any]] = None,
     ) -> bool:
         """
-        Append an entry to a session's history.
+        Append an entry to a session's history in one transaction.
 
         Args:
             session_id: ID of the session
@@ -301,32 +1231,22 @@ class SessionMemory:
         Returns:
             True if successful, False if session not found
         """
-        session = self.get_session(session_id)
-        if session is None:
-            return False
-
         entry = SessionEntry(
             role=role,
             content=content,
             metadata=metadata or {},
         )
+        return await self._update_session(
+            session_id, lambda pipe: self._queue_append(pipe, session_id, entry)
+        )
 
-        session.history.append(entry)
-
-        # Trim history if it exceeds max length
-        if len(session.history) > self.max_history_length:
-            session.history = session.history[-self.max_history_length:]
-
-        self.store_session(session)
-        return True
-
-    def update_context(
+    async def update_context(
         self,
         session_id: str,
         context_updates: Dict[str, Any],
     ) -> bool:
         """
-        Update session context.
+        Merge context fields into a session.
 
         Args:
             session_id: ID of the session
@@ -335,17 +1255,13 @@ class SessionMemory:
         Returns:
             True if successful, False if session not found
         """
-        session = self.get_session(session_id)
-        if session is None:
-            return False
-
-        session.context.update(context_updates)
-        self.store_session(session)
-        return True
+        return await self._update_session(
+            session_id, lambda pipe: self._queue_context(pipe, session_id, context_updates)
+        )
 
-    def get_sessions_by_agent(self, agent_id: str) -> List[Session]:
+    async def get_sessions_by_agent(self, agent_id: str) -> List[Session]:
         """
-        Get all sessions for a specific agent.
+        Get all sessions for a specific agent, via the agent index.
 
         Args:
             agent_id: ID of the agent
@@ -353,24 +1269,24 @@ class SessionMemory:
         Returns:
             List of sessions belonging to the agent
         """
+        agent_key = f"{_AGENT_INDEX_PREFIX}{agent_id}"
+        session_ids = sorted(_text(member) for member in await self.redis.smembers(agent_key))
         sessions = []
-        keys = self._keys("session:*")
-
-        for key in keys:
-            value = self._get(key)
-            if value:
-                try:
-                    data = json.loads(value)
-                    if data.get("agent_id") == agent_id:
-                        sessions.append(Session.from_dict(data))
-                except (json.JSONDecodeError, KeyError):
-                    continue
+        stale = []
+
+        for session_id, session in zip(session_ids, await self._load_sessions(session_ids)):
+            if session is not None and session.agent_id == agent_id:
+                sessions.append(session)
+            else:
+                stale.append(session_id)
 
+        if stale:
+            await self.redis.srem(agent_key, *stale)
         return sessions
 
-    def cleanup_expired_sessions(self, max_age_seconds: Optional[int] = None) -> int:
+    async def cleanup_expired_sessions(self, max_age_seconds: Optional[int] = None) -> int:
         """
-        Clean up expired sessions based on last access time.
+        Clean up sessions idle longer than max_age_seconds.
 
         Args:
             max_age_seconds: Maximum age in seconds (defaults to ttl_seconds)
@@ -379,34 +1295,148 @@ class SessionMemory:
             Number of sessions cleaned up
         """
         max_age = max_age_seconds if max_age_seconds is not None else self.ttl_seconds
-        cutoff_time = datetime.utcnow() - timedelta(seconds=max_age)
+        cutoff, now = self._stale_bounds(max_age)
 
-        cleaned = 0
-        keys = self._keys("session:*")
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zrangebyscore(_LAST_ACCESS_INDEX, "-inf", cutoff)
+        pipe.zrangebyscore(_EXPIRY_INDEX, "-inf", now)
+        idle, expired = await pipe.execute()
+        return await self._delete_sessions(sorted({_text(member) for member in idle + expired}))
 
-        for key in keys:
-            value = self._get(key)
-            if value:
-                try:
-                    data = json.loads(value)
-                    last_accessed = datetime.fromisoformat(data["last_accessed"])
-
-                    if last_accessed < cutoff_time:
-                        self._delete(key)
-                        cleaned += 1
-                except (json.JSONDecodeError, KeyError):
-                    # Invalid data, clean it up
-                    self._delete(key)
-                    cleaned += 1
-
-        return cleaned
-
-    def get_session_count(self) -> int:
+    async def get_session_count(self) -> int:
         """
         Get the total number of active sessions.
 
         Returns:
             Number of sessions in storage
         """
-        keys = self._keys("session:*")
-        return len(keys)
+        return await self.redis.zcount(_EXPIRY_INDEX, f"({_epoch(datetime.utcnow())}", "+inf")
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get local cache statistics.
+
+        Returns:
+            Dictionary with local_hits, redis_reads and cached session count
+        """
+        return {**self._stats, "cached": len(self._local)}
+
+    def _cache_get(self, session_id: str) -> Optional[Session]:
+        """Copy of a fresh locally cached session, or None."""
+        cached = self._local.get(session_id)
+        if cached is None:
+            return None
+        if cached[0] < time.monotonic():
+            del self._local[session_id]
+            return None
+        self._local.move_to_end(session_id)
+        return _copy_session(cached[1])
+
+    def _cache_put(self, session: Session) -> None:
+        """Cache a copy of a session, evicting the least recently used."""
+        if self.local_cache_ttl_seconds <= 0:
+            return
+        self._local[session.session_id] = (
+            time.monotonic() + self.local_cache_ttl_seconds, _copy_session(session)
+        )
+        self._local.move_to_end(session.session_id)
+        while len(self._local) > self.local_cache_size:
+            self._local.popitem(last=False)
+
+    async def _delete_sessions(self, session_ids: List[str]) -> int:
+        """Delete sessions and their index entries, returning how many existed."""
+        if not session_ids:
+            return 0
+        for session_id in session_ids:
+            self._local.pop(session_id, None)
+
+        pipe = self.redis.pipeline(transaction=False)
+        for session_id in session_ids:
+            pipe.hget(f"session:{session_id}", "agent_id")
+        agent_ids = await pipe.execute(raise_on_error=False)
+
+        pipe = self.redis.pipeline()
+        self._queue_delete(pipe, session_ids, agent_ids)
+        return sum((await pipe.execute())[:len(session_ids)])
+
+    async def _update_session(self, session_id: str, queue: Callable[[Any], None]) -> bool:
+        """Apply queued writes to an existing session in one transaction."""
+        self._local.pop(session_id, None)
+        pipe = self.redis.pipeline()
+        self._queue_update(pipe, session_id, queue, datetime.utcnow())
+        exists = (await pipe.execute(raise_on_error=False))[0]
+
+        if _is_error(exists):
+            if await self._migrate_legacy(session_id, touch=False) is None:
+                return False
+            return await self._update_session(session_id, queue)
+        if not exists:
+            await self._discard_orphans([session_id])
+            return False
+        return True
+
+    async def _discard_orphans(self, session_ids: List[str]) -> None:
+        """Delete keys created for missing sessions, guarded by WATCH."""
+        main_keys = [f"session:{session_id}" for session_id in session_ids]
+        try:
+            async with self.redis.pipeline() as pipe:
+                await pipe.watch(*main_keys)
+                check = self.redis.pipeline(transaction=False)
+                for key in main_keys:
+                    check.hexists(key, "session_id")
+                orphans = self._orphans(session_ids, await check.execute(raise_on_error=False))
+                if not orphans:
+                    return
+                pipe.multi()
+                for session_id in orphans:
+                    pipe.delete(*self._session_keys(session_id))
+                await pipe.execute()
+        except redis.exceptions.WatchError:
+            # Stored concurrently; the keys are a real session now
+            pass
+
+    async def _load_sessions(self, session_ids: List[str]) -> List[Optional[Session]]:
+        """Read sessions in one pipelined round trip, without touching them."""
+        pipe = self.redis.pipeline(transaction=False)
+        for session_id in session_ids:
+            self._queue_read(pipe, session_id)
+        replies = await pipe.execute(raise_on_error=False)
+
+        sessions: List[Optional[Session]] = []
+        for i, session_id in enumerate(session_ids):
+            status, session = self._parse_read(replies[4 * i:4 * i + 4])
+            if status == "legacy":
+                session = await self._migrate_legacy(session_id, touch=False)
+            sessions.append(session)
+        return sessions
+
+    async def _migrate_legacy(self, session_id: str, touch: bool = True) -> Optional[Session]:
+        """Rewrite a session stored as one JSON string in the current layout."""
+        main_key = f"session:{session_id}"
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.get(main_key)
+        pipe.ttl(main_key)
+        value, ttl = await pipe.execute(raise_on_error=False)
+        session = self._parse_legacy(value if not _is_error(value) else None)
+        if session is None:
+            return None
+
+        last_accessed = session.last_accessed
+        await self.store_session(session, ttl_override=None if touch or ttl <= 0 else ttl)
+        self._local.pop(session_id, None)
+        if not touch:
+            session.last_accessed = last_accessed
+            pipe = self.redis.pipeline()
+            pipe.hset(main_key, "last_accessed", self.codec.encode_time(last_accessed))
+            pipe.zadd(_LAST_ACCESS_INDEX, {session_id: _epoch(last_accessed)})
+            await pipe.execute()
+        return session
+
+
+def _copy_session(session: Session) -> Session:
+    """Copy a session deep enough that callers can't change a cached one."""
+    return replace(
+        session,
+        history=list(session.history),
+        context=dict(session.context),
+        metadata=dict(session.metadata),
+    )
@@ -0,0 +1,494 @@
+"""Memory Snapshot - Binary, memory-mapped persistence for vector memory.
+
+This module persists a VectorMemory as a float32 embedding matrix in an
+``.npy`` file, a columnar NumPy sidecar holding the remaining memory fields,
+and an append-only delta log of changes made since the snapshot was taken.
+Restarted agents memory-map the matrix instead of parsing embeddings from
+JSON, so embeddings are paged in lazily as searches touch them, and
+MemoryVector objects are only built for the rows that are read.
+
+Layout of a snapshot directory::
+
+    manifest.json           # current generation, dimension, row count
+    embeddings-<gen>.npy    # float32 matrix, one row per memory
+    columns-<gen>.npz       # columnar metadata (ids, agents, tags, ...)
+    delta-<gen>.log         # NDJSON log of put/delete/importance ops
+
+Version 1 snapshots, with a ``columns-<gen>.json`` sidecar, can still be
+loaded; the next ``save`` rewrites them in the current format.
+"""
+
+import gc
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+from .vector_memory import (
+    MemoryVector,
+    SimpleEmbedding,
+    VectorMemory,
+    _from_epoch,
+    _LazyMemories,
+    _to_epoch,
+)
+
+SNAPSHOT_FORMAT_VERSION = 2
+
+
+def _text_column(values: List[str]) -> Dict[str, "np.ndarray"]:
+    """Encode strings as one UTF-8 buffer plus character offsets."""
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, values), dtype=np.int64, count=len(values)), out=offsets[1:])
+    return {
+        "text": np.frombuffer("".join(values).encode("utf-8"), dtype=np.uint8),
+        "offsets": offsets,
+    }
+
+
+def _loads_or_empty(text: str, empty_text: str, empty: Callable[[], Any]) -> Any:
+    """Decode a JSON cell, skipping the parser for the common empty value."""
+    return empty() if text == empty_text else json.loads(text)
+
+
+class _TextColumn:
+    """Strings stored by ``_text_column``, sliced out on access."""
+
+    def __init__(self, text: "np.ndarray", offsets: "np.ndarray"):
+        self._text = text.tobytes().decode("utf-8")
+        self._offsets = offsets
+
+    def __getitem__(self, row: int) -> str:
+        return self._text[self._offsets[row]:self._offsets[row + 1]]
+
+    def tolist(self) -> List[str]:
+        bounds = self._offsets.tolist()
+        return list(map(self._text.__getitem__, map(slice, bounds[:-1], bounds[1:])))
+
+
+def _from_epoch_column(values: List[float]) -> List[datetime]:
+    """Convert a column of epoch seconds to naive UTC datetimes in bulk."""
+    micros = np.round(np.asarray(values, dtype=np.float64) * 1e6).astype("int64")
+    return micros.astype("datetime64[us]").astype(object).tolist()
+
+
+def _build_memories(columns: Dict[str, Any], embeddings: List[Any]) -> List[MemoryVector]:
+    """Construct MemoryVector objects from sidecar columns in bulk."""
+    # Building millions of objects triggers needless cyclic GC passes
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return [
+            MemoryVector(
+                memory_id=memory_id,
+                agent_id=agent_id,
+                content=content,
+                embedding=embedding,
+                timestamp=timestamp,
+                access_count=access_count,
+                last_accessed=last_accessed,
+                importance=importance,
+                metadata=metadata,
+                tags=tags,
+            )
+            for (
+                memory_id, agent_id, content, embedding, timestamp,
+                access_count, last_accessed, importance, metadata, tags,
+            ) in zip(
+                columns["memory_id"],
+                columns["agent_id"],
+                columns["content"],
+                embeddings,
+                _from_epoch_column(columns["timestamp"]),
+                columns["access_count"],
+                _from_epoch_column(columns["last_accessed"]),
+                columns["importance"],
+                columns["metadata"],
+                columns["tags"],
+            )
+        ]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+class _RowAttributes:
+    """Indexed attributes of a memory that has not been built yet."""
+
+    __slots__ = ("memory_id", "agent_id", "tags")
+
+    def __init__(self, memory_id: str, agent_id: str, tags: List[str]):
+        self.memory_id = memory_id
+        self.agent_id = agent_id
+        self.tags = tags
+
+
+class _SnapshotRows:
+    """Row source building MemoryVector objects from a loaded snapshot's columns."""
+
+    def __init__(self, columns: Any, matrix: "np.ndarray"):
+        """
+        Read the sidecar columns.
+
+        Args:
+            columns: Arrays saved in the ``.npz`` sidecar
+            matrix: Embedding matrix, one row per memory
+        """
+        # A plain ndarray view shares the mapping but indexes much faster
+        self._matrix = matrix.view(np.ndarray)
+        self._text = {
+            name: _TextColumn(columns[f"{name}_text"], columns[f"{name}_offsets"])
+            for name in ("memory_id", "agent_id", "content", "metadata", "tags")
+        }
+        self._timestamp = columns["timestamp"]
+        self._access_count = columns["access_count"]
+        self._last_accessed = columns["last_accessed"]
+        self._importance = columns["importance"]
+        self._empty_embedding = columns["empty_embedding"]
+        self._ragged = {
+            int(row): embedding
+            for row, embedding in json.loads(columns["ragged_embeddings"].tobytes()).items()
+        }
+
+    def memory_ids(self) -> List[str]:
+        """Memory IDs in row order."""
+        return self._text["memory_id"].tolist()
+
+    def _embedding(self, row: int) -> Any:
+        """Embedding of the memory at a row."""
+        if self._empty_embedding[row]:
+            return []
+        embedding = self._ragged.get(row)
+        return self._matrix[row] if embedding is None else embedding
+
+    def build(self, row: int) -> MemoryVector:
+        """Build the memory stored at a row."""
+        return MemoryVector(
+            memory_id=self._text["memory_id"][row],
+            agent_id=self._text["agent_id"][row],
+            content=self._text["content"][row],
+            embedding=self._embedding(row),
+            timestamp=_from_epoch(float(self._timestamp[row])),
+            access_count=int(self._access_count[row]),
+            last_accessed=_from_epoch(float(self._last_accessed[row])),
+            importance=float(self._importance[row]),
+            metadata=_loads_or_empty(self._text["metadata"][row], "{}", dict),
+            tags=_loads_or_empty(self._text["tags"][row], "[]", list),
+        )
+
+    def build_many(self, rows: List[int]) -> List[MemoryVector]:
+        """Build the memories at many rows, decoding each column in bulk."""
+        if len(rows) == len(self._empty_embedding):
+            # Nothing built or deleted since load: every row, in order
+            def take(values: List[Any]) -> List[Any]:
+                return values
+
+            index: Any = slice(None)
+            embeddings: List[Any] = list(self._matrix)
+            for row in np.flatnonzero(self._empty_embedding).tolist():
+                embeddings[row] = []
+            for row, embedding in self._ragged.items():
+                embeddings[row] = embedding
+        else:
+            def take(values: List[Any]) -> List[Any]:
+                return [values[row] for row in rows]
+
+            index = np.asarray(rows, dtype=np.int64)
+            embeddings = [self._embedding(row) for row in rows]
+
+        columns = {
+            name: take(column.tolist()) for name, column in self._text.items()
+        }
+        columns["metadata"] = [{} if text == "{}" else json.loads(text) for text in columns["metadata"]]
+        columns["tags"] = [[] if text == "[]" else json.loads(text) for text in columns["tags"]]
+        columns.update(
+            timestamp=self._timestamp[index],
+            access_count=self._access_count[index].tolist(),
+            last_accessed=self._last_accessed[index],
+            importance=self._importance[index].tolist(),
+        )
+        return _build_memories(columns, embeddings)
+
+    def attributes(self) -> List[_RowAttributes]:
+        """Agent and tags of every row, decoded in bulk."""
+        decoded: Dict[str, List[str]] = {}
+        tags = [
+            decoded[text] if text in decoded else decoded.setdefault(text, json.loads(text))
+            for text in self._text["tags"].tolist()
+        ]
+        return list(map(
+            _RowAttributes, self._text["memory_id"].tolist(), self._text["agent_id"].tolist(), tags,
+        ))
+
+    def record_access(self, rows: List[int], now: datetime) -> None:
+        """Count an access to memories that have not been built yet."""
+        self._access_count[rows] += 1
+        self._last_accessed[rows] = _to_epoch(now)
+
+
+class MemorySnapshot:
+    """
+    Snapshot and delta log for a VectorMemory stored in a directory.
+
+    ``save`` writes a new generation and starts an empty delta log;
+    ``load`` memory-maps the latest generation, replays its delta log and
+    attaches this snapshot as the memory's journal so further changes are
+    appended to the log. Access statistics updated by ``get``/``search``
+    are not journaled and are persisted by the next ``save``.
+    """
+
+    def __init__(self, path: Union[str, Path], fsync: bool = False):
+        """
+        Initialize snapshot storage.
+
+        Args:
+            path: Directory holding the snapshot files (created if missing)
+            fsync: Whether to fsync the delta log after every append
+        """
+        self.path = Path(path)
+        self.fsync = fsync
+        self._log_file: Optional[Any] = None
+
+    # ===== Manifest =====
+
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        """Read the manifest, or None if no snapshot has been saved."""
+        manifest_path = self.path / "manifest.json"
+        if not manifest_path.exists():
+            return None
+        with open(manifest_path) as f:
+            return json.load(f)
+
+    def exists(self) -> bool:
+        """Whether a snapshot has been saved to this directory."""
+        return self._read_manifest() is not None
+
+    def _file(self, kind: str, generation: int, suffix: str) -> Path:
+        return self.path / f"{kind}-{generation}{suffix}"
+
+    # ===== Save =====
+
+    def save(self, vector_memory: VectorMemory) -> int:
+        """
+        Write a full snapshot of the memory and start a fresh delta log.
+
+        Files for the new generation are written first and the manifest is
+        swapped atomically, so a crash mid-save leaves the old snapshot
+        and its delta log intact.
+
+        Args:
+            vector_memory: VectorMemory to persist
+
+        Returns:
+            Number of memories written
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        manifest = self._read_manifest()
+        previous = manifest["generation"] if manifest else None
+        generation = (previous or 0) + 1
+
+        memories = list(vector_memory.memories.values())
+        dim = vector_memory.embedding_dim
+
+        matrix = np.lib.format.open_memmap(
+            self._file("embeddings", generation, ".npy"),
+            mode="w+",
+            dtype=np.float32,
+            shape=(len(memories), dim),
+        )
+        ragged: Dict[str, List[float]] = {}
+        for row, memory in enumerate(memories):
+            if len(memory.embedding) == dim:
+                matrix[row] = memory.embedding
+            elif len(memory.embedding) > 0:
+                ragged[str(row)] = [float(x) for x in memory.embedding]
+        matrix.flush()
+        del matrix
+
+        count = len(memories)
+        columns: Dict[str, "np.ndarray"] = {
+            "timestamp": np.fromiter((_to_epoch(m.timestamp) for m in memories), np.float64, count),
+            "access_count": np.fromiter((m.access_count for m in memories), np.int64, count),
+            "last_accessed": np.fromiter((_to_epoch(m.last_accessed) for m in memories), np.float64, count),
+            "importance": np.fromiter((m.importance for m in memories), np.float64, count),
+            "empty_embedding": np.fromiter((len(m.embedding) == 0 for m in memories), bool, count),
+            "ragged_embeddings": np.frombuffer(json.dumps(ragged).encode("utf-8"), dtype=np.uint8),
+        }
+        texts = {
+            "memory_id": [m.memory_id for m in memories],
+            "agent_id": [m.agent_id for m in memories],
+            "content": [m.content for m in memories],
+            "metadata": [json.dumps(m.metadata, separators=(",", ":")) for m in memories],
+            "tags": [json.dumps(m.tags, separators=(",", ":")) for m in memories],
+        }
+        for name, values in texts.items():
+            for part, array in _text_column(values).items():
+                columns[f"{name}_{part}"] = array
+        with open(self._file("columns", generation, ".npz"), "wb") as f:
+            np.savez(f, **columns)
+
+        self._file("delta", generation, ".log").touch()
+
+        manifest_tmp = self.path / "manifest.json.tmp"
+        with open(manifest_tmp, "w") as f:
+            json.dump(
+                {
+                    "version": SNAPSHOT_FORMAT_VERSION,
+                    "generation": generation,
+                    "dim": dim,
+                    "count": len(memories),
+                    "saved_at": datetime.utcnow().isoformat(),
+                },
+                f,
+            )
+        os.replace(manifest_tmp, self.path / "manifest.json")
+
+        self.close()
+        if previous is not None:
+            for kind, suffix in (
+                ("embeddings", ".npy"), ("columns", ".npz"), ("columns", ".json"), ("delta", ".log"),
+            ):
+                self._file(kind, previous, suffix).unlink(missing_ok=True)
+
+        return len(memories)
+
+    # ===== Load =====
+
+    def load(
+        self,
+        embedder: Optional[SimpleEmbedding] = None,
+        mmap: bool = True,
+        use_index: bool = True,
+    ) -> VectorMemory:
+        """
+        Load the latest snapshot, replay its delta log and attach the journal.
+
+        Args:
+            embedder: Optional custom embedding generator
+            mmap: Whether to memory-map the embedding matrix (read eagerly if False)
+            use_index: Whether to keep a NumPy embedding index for search
+
+        Returns:
+            VectorMemory holding the snapshot contents (empty if none exists)
+        """
+        manifest = self._read_manifest()
+        if manifest is None:
+            vector_memory = VectorMemory(embedder=embedder, use_index=use_index)
+            vector_memory.journal = self
+            return vector_memory
+
+        if manifest.get("version") not in (1, SNAPSHOT_FORMAT_VERSION):
+            raise ValueError(f"Unsupported snapshot version: {manifest.get('version')}")
+
+        generation = manifest["generation"]
+        vector_memory = VectorMemory(
+            embedding_dim=manifest["dim"],
+            embedder=embedder,
+            use_index=use_index,
+        )
+
+        matrix = np.load(
+            self._file("embeddings", generation, ".npy"),
+            mmap_mode="r" if mmap else None,
+        )
+        if manifest["version"] == 1:
+            memories: Any = self._load_json_columns(generation, matrix)
+        else:
+            with np.load(self._file("columns", generation, ".npz")) as columns:
+                rows = _SnapshotRows(columns, matrix)
+            memories = _LazyMemories(rows.memory_ids(), rows)
+
+        vector_memory._adopt(memories, matrix)
+        self._replay(vector_memory, self._file("delta", generation, ".log"))
+        vector_memory.journal = self
+        return vector_memory
+
+    def _load_json_columns(self, generation: int, matrix: "np.ndarray") -> List[MemoryVector]:
+        """Build every memory of a version 1 snapshot from its JSON sidecar."""
+        with open(self._file("columns", generation, ".json")) as f:
+            columns = json.load(f)
+
+        # Plain ndarray row views share the mapping but index much faster
+        embeddings: List[Any] = list(matrix.view(np.ndarray))
+        for row, empty in enumerate(columns["empty_embedding"]):
+            if empty:
+                embeddings[row] = []
+        for row, embedding in columns["ragged_embeddings"].items():
+            embeddings[int(row)] = embedding
+
+        return _build_memories(columns, embeddings)
+
+    def _replay(self, vector_memory: VectorMemory, log_path: Path) -> int:
+        """
+        Apply delta log operations to a freshly loaded memory.
+
+        A truncated final line (from a crash mid-append) is ignored.
+
+        Returns:
+            Number of operations applied
+        """
+        if not log_path.exists():
+            return 0
+
+        applied = 0
+        with open(log_path) as f:
+            for line in f:
+                try:
+                    op = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+
+                if op["op"] == "put":
+                    vector_memory.import_memories([op["memory"]])
+                elif op["op"] == "delete":
+                    vector_memory.delete(op["memory_id"])
+                elif op["op"] == "importance":
+                    vector_memory.update_importance(op["memory_id"], op["importance"])
+                elif op["op"] == "importances":
+                    vector_memory.update_importances(op["updates"])
+                applied += 1
+
+        return applied
+
+    # ===== Journal =====
+
+    def _append(self, op: Dict[str, Any]) -> None:
+        """Append one operation to the current delta log."""
+        if self._log_file is None:
+            manifest = self._read_manifest()
+            if manifest is None:
+                # No base snapshot yet: changes are captured by the first save
+                return
+            self._log_file = open(
+                self._file("delta", manifest["generation"], ".log"), "a", buffering=1
+            )
+
+        self._log_file.write(json.dumps(op, separators=(",", ":")) + "\n")
+        if self.fsync:
+            self._log_file.flush()
+            os.fsync(self._log_file.fileno())
+
+    def record_put(self, memory: MemoryVector) -> None:
+        """Journal a stored or modified memory."""
+        self._append({"op": "put", "memory": memory.to_dict()})
+
+    def record_delete(self, memory_id: str) -> None:
+        """Journal a deleted memory."""
+        self._append({"op": "delete", "memory_id": memory_id})
+
+    def record_importance(self, memory_id: str, importance: float) -> None:
+        """Journal an importance update."""
+        self._append({"op": "importance", "memory_id": memory_id, "importance": importance})
+
+    def record_importances(self, updates: Dict[str, float]) -> None:
+        """Journal a batch of importance updates as one operation."""
+        self._append({"op": "importances", "updates": updates})
+
+    def close(self) -> None:
+        """Close the delta log file handle."""
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
@@ -8,11 +8,24 @@ dependencies like vector databases.
 import hashlib
 import json
 import math
+import sys
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 from uuid import uuid4
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+if TYPE_CHECKING:
+    from .ann_index import ANNIndex
+
 
 @dataclass
 class MemoryVector:
@@ -52,7 +65,7 @@ class MemoryVector:
             "memory_id": self.memory_id,
             "agent_id": self.agent_id,
             "content": self.content,
-            "embedding": self.embedding,
+            "embedding": self.embedding if isinstance(self.embedding, list) else self.embedding.tolist(),
             "timestamp": self.timestamp.isoformat(),
             "access_count": self.access_count,
             "last_accessed": self.last_accessed.isoformat(),
@@ -112,6 +125,140 @@ class SearchResult:
         }
 
 
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_epoch(value: datetime) -> float:
+    """Convert a naive UTC datetime to epoch seconds."""
+    return (value - _EPOCH).total_seconds()
+
+
+def _from_epoch(value: float) -> datetime:
+    """Convert epoch seconds to a naive UTC datetime."""
+    return _EPOCH + timedelta(seconds=value)
+
+
+class CompactMemoryVector:
+    """A low-overhead memory entry used by ``VectorMemory(compact=True)``.
+
+    Exposes the same attributes as MemoryVector but uses ``__slots__``,
+    keeps timestamps as epoch floats (converted to datetimes on access),
+    interns agent IDs and tags, creates the metadata dict lazily, and
+    holds the embedding as a float32 view into a shared arena buffer.
+    """
+
+    __slots__ = (
+        "memory_id",
+        "agent_id",
+        "content",
+        "embedding",
+        "access_count",
+        "importance",
+        "tags",
+        "_timestamp",
+        "_last_accessed",
+        "_metadata",
+        "_slot",
+    )
+
+    def __init__(
+        self,
+        memory_id: Optional[str] = None,
+        agent_id: str = "",
+        content: str = "",
+        embedding: Optional[Any] = None,
+        timestamp: Optional[datetime] = None,
+        access_count: int = 0,
+        last_accessed: Optional[datetime] = None,
+        importance: float = 0.5,
+        metadata: Optional[Dict[str, Any]] = None,
+        tags: Optional[List[str]] = None,
+    ):
+        now = time.time()
+        self.memory_id = memory_id or str(uuid4())
+        self.agent_id = sys.intern(agent_id)
+        self.content = content
+        self.embedding = embedding if embedding is not None else []
+        self.access_count = access_count
+        self.importance = importance
+        self.tags = [sys.intern(tag) for tag in tags] if tags else []
+        self._timestamp = _to_epoch(timestamp) if timestamp is not None else now
+        self._last_accessed = _to_epoch(last_accessed) if last_accessed is not None else now
+        self._metadata = metadata or None
+        self._slot: Optional[int] = None
+
+    @property
+    def timestamp(self) -> datetime:
+        return _from_epoch(self._timestamp)
+
+    @timestamp.setter
+    def timestamp(self, value: datetime) -> None:
+        self._timestamp = _to_epoch(value)
+
+    @property
+    def last_accessed(self) -> datetime:
+        return _from_epoch(self._last_accessed)
+
+    @last_accessed.setter
+    def last_accessed(self, value: datetime) -> None:
+        self._last_accessed = _to_epoch(value)
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        if self._metadata is None:
+            self._metadata = {}
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, value: Dict[str, Any]) -> None:
+        self._metadata = value
+
+    def __repr__(self) -> str:
+        return f"CompactMemoryVector(memory_id={self.memory_id!r}, agent_id={self.agent_id!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert memory to dictionary representation.
+
+        Returns:
+            Dictionary containing all memory fields
+        """
+        return {
+            "memory_id": self.memory_id,
+            "agent_id": self.agent_id,
+            "content": self.content,
+            "embedding": self.embedding if isinstance(self.embedding, list) else self.embedding.tolist(),
+            "timestamp": self.timestamp.isoformat(),
+            "access_count": self.access_count,
+            "last_accessed": self.last_accessed.isoformat(),
+            "importance": self.importance,
+            "metadata": self.metadata,
+            "tags": self.tags,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CompactMemoryVector":
+        """Create memory from dictionary representation.
+
+        Args:
+            data: Dictionary containing memory fields
+
+        Returns:
+            CompactMemoryVector instance
+        """
+        return cls(
+            memory_id=data.get("memory_id"),
+            agent_id=data.get("agent_id", ""),
+            content=data.get("content", ""),
+            embedding=data.get("embedding", []),
+            timestamp=datetime.fromisoformat(data["timestamp"]) if "timestamp" in data else None,
+            access_count=data.get("access_count", 0),
+            last_accessed=datetime.fromisoformat(data["last_accessed"]) if "last_accessed" in data else None,
+            importance=data.get("importance", 0.5),
+            metadata=data.get("metadata"),
+            tags=data.get("tags"),
+        )
+
+
 class SimpleEmbedding:
     """
     Simple embedding generator for text without external dependencies.
@@ -119,16 +266,67 @@ class SimpleEmbedding:
     Uses a combination of character-based and word-based features to
     create deterministic embeddings. Not as sophisticated as transformer
     models but works without external dependencies.
+
+    Embeddings are memoized in an LRU cache keyed by the normalized text,
+    and ``embed_batch`` vectorizes feature extraction with NumPy.
     """
 
-    def __init__(self, embedding_dim: int = 128):
+    def __init__(self, embedding_dim: int = 128, cache_size: int = 1024):
         """
         Initialize embedding generator.
 
         Args:
             embedding_dim: Dimension of the embedding vectors
+            cache_size: Maximum number of cached embeddings (0 disables caching)
         """
         self.embedding_dim = embedding_dim
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+    def _cache_get(self, key: str) -> Optional[List[float]]:
+        """Look up a cached embedding, returning a copy on hit."""
+        if self.cache_size <= 0:
+            return None
+        embedding = self._cache.get(key)
+        if embedding is None:
+            self._cache_misses += 1
+            return None
+        self._cache.move_to_end(key)
+        self._cache_hits += 1
+        return list(embedding)
+
+    def _cache_put(self, key: str, embedding: List[float]) -> None:
+        """Insert an embedding, evicting the least recently used entry."""
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = list(embedding)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get embedding cache statistics.
+
+        Returns:
+            Dictionary with cache size, hits, misses and hit rate
+        """
+        lookups = self._cache_hits + self._cache_misses
+        return {
+            "size": len(self._cache),
+            "max_size": self.cache_size,
+            "hits": self._cache_hits,
+            "misses": self._cache_misses,
+            "hit_rate": self._cache_hits / lookups if lookups > 0 else 0.0,
+        }
+
+    def clear_cache(self) -> None:
+        """Drop all cached embeddings and reset statistics."""
+        self._cache.clear()
+        self._cache_hits = 0
+        self._cache_misses = 0
 
     def embed(self, text: str) -> List[float]:
         """
@@ -143,9 +341,141 @@ class SimpleEmbedding:
         if not text:
             return [0.0] * self.embedding_dim
 
-        # Normalize text
-        text = text.lower().strip()
+        key = text.lower().strip()
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        embedding = self._embed_uncached(key)
+        self._cache_put(key, embedding)
+        return embedding
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for many texts at once.
+
+        Cache hits are served directly; the remaining texts are featurized
+        together with NumPy. Falls back to ``embed`` without NumPy.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            List of embeddings, one per input text
+        """
+        if not NUMPY_AVAILABLE:
+            return [self.embed(text) for text in texts]
+
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        pending: Dict[str, List[int]] = {}
+        for i, text in enumerate(texts):
+            if not text:
+                results[i] = [0.0] * self.embedding_dim
+                continue
+            key = text.lower().strip()
+            if key in pending:
+                # Duplicate within the batch counts as a cache hit
+                pending[key].append(i)
+                if self.cache_size > 0:
+                    self._cache_hits += 1
+                continue
+            cached = self._cache_get(key)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending[key] = [i]
+
+        if pending:
+            keys = list(pending)
+            matrix = self._featurize_batch(keys)
+            for key, row in zip(keys, matrix.tolist()):
+                self._cache_put(key, row)
+                positions = pending[key]
+                results[positions[0]] = row
+                for position in positions[1:]:
+                    results[position] = list(row)
+
+        return results  # type: ignore[return-value]
 
+    def _featurize_batch(self, texts: List[str]) -> "np.ndarray":
+        """
+        Vectorized equivalent of ``_embed_uncached`` for normalized texts.
+
+        Args:
+            texts: Lower-cased, stripped, non-empty-input texts
+
+        Returns:
+            Matrix of normalized embeddings, one row per text
+        """
+        count = len(texts)
+        width = max(96, self.embedding_dim)
+        features = np.zeros((count, width), dtype=np.float64)
+
+        # Feature 1: Character distribution over a-z and 0-5
+        lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=count)
+        codes = np.frombuffer("".join(texts).encode("utf-32-le"), dtype=np.uint32)
+        lookup = np.full(128, 32, dtype=np.int64)
+        lookup[ord("a"):ord("z") + 1] = np.arange(26)
+        lookup[ord("0"):ord("5") + 1] = np.arange(26, 32)
+        buckets = np.where(codes < 128, lookup[np.minimum(codes, 127)], 32)
+        owners = np.repeat(np.arange(count), lengths)
+        char_counts = np.bincount(owners * 33 + buckets, minlength=count * 33).reshape(count, 33)
+        safe_lengths = np.maximum(lengths, 1)[:, None]
+        features[:, :32] = np.where(lengths[:, None] > 0, char_counts[:, :32] / safe_lengths, 0.0)
+
+        # Feature 2: First hash byte of the first 32 words (memoized per batch)
+        word_bytes: Dict[str, int] = {}
+        word_counts = np.zeros(count, dtype=np.float64)
+        for row, text in enumerate(texts):
+            words = text.split()
+            word_counts[row] = len(words)
+            for col, word in enumerate(words[:32]):
+                value = word_bytes.get(word)
+                if value is None:
+                    value = hashlib.md5(word.encode()).digest()[0]
+                    word_bytes[word] = value
+                features[row, 32 + col] = value / 255.0
+
+        # Feature 3: Bytes of the text hash
+        digests = np.frombuffer(
+            b"".join(hashlib.md5(t.encode()).digest() for t in texts), dtype=np.uint8
+        ).reshape(count, 16)
+        features[:, 64:80] = digests / 255.0
+
+        # Feature 4: Structural features, then hex digits of the text hash
+        remaining = self.embedding_dim - 96
+        if remaining > 0:
+            avg_word_length = np.where(word_counts > 0, lengths / np.maximum(word_counts, 1), 0.0)
+            structural = [
+                np.minimum(word_counts / 100.0, 1.0),
+                np.minimum(lengths / 500.0, 1.0),
+                np.minimum(avg_word_length / 10.0, 1.0),
+            ]
+            for i, column in enumerate(structural[:remaining]):
+                features[:, 96 + i] = column
+            if remaining > 3:
+                nibbles = np.empty((count, 32), dtype=np.float64)
+                nibbles[:, 0::2] = digests >> 4
+                nibbles[:, 1::2] = digests & 0x0F
+                hex_index = np.arange(3, remaining) % 32
+                features[:, 99:96 + remaining] = nibbles[:, hex_index] / 15.0
+
+        # Normalize the embedding vectors
+        norms = np.linalg.norm(features, axis=1)
+        nonzero = norms > 0
+        features[nonzero] /= norms[nonzero, None]
+        return features
+
+    def _embed_uncached(self, text: str) -> List[float]:
+        """
+        Compute the embedding of an already normalized text.
+
+        Args:
+            text: Lower-cased, stripped text
+
+        Returns:
+            List of floats representing the embedding vector
+        """
         # Create a hash-based seed for deterministic embeddings
         text_hash = hashlib.md5(text.encode()).hexdigest()
 
@@ -211,6 +541,498 @@ class SimpleEmbedding:
         return embedding
 
 
+class _EmbeddingArena:
+    """
+    Shared float32 storage for the raw embeddings of compact memories.
+
+    Rows live in fixed-size blocks that are never reallocated, so the
+    views handed out to CompactMemoryVector stay valid as the arena grows.
+    Released rows are reused by later allocations.
+    """
+
+    def __init__(self, dim: int, block_rows: int = 4096):
+        """
+        Initialize an empty arena.
+
+        Args:
+            dim: Dimension of the stored embeddings
+            block_rows: Rows allocated per block
+        """
+        self.dim = dim
+        self.block_rows = block_rows
+        self._blocks: List["np.ndarray"] = []
+        self._free: List[int] = []
+        self._next_slot = 0
+
+    def allocate(self, embedding: Any) -> Tuple[int, "np.ndarray"]:
+        """
+        Copy an embedding into the arena.
+
+        Args:
+            embedding: Embedding with ``dim`` entries
+
+        Returns:
+            Tuple of (slot, float32 row view)
+        """
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot = self._next_slot
+            self._next_slot += 1
+            if slot // self.block_rows >= len(self._blocks):
+                self._blocks.append(np.zeros((self.block_rows, self.dim), dtype=np.float32))
+
+        row = self._blocks[slot // self.block_rows][slot % self.block_rows]
+        row[:] = embedding
+        return slot, row
+
+    def release(self, slot: int) -> None:
+        """Return a slot to the free list."""
+        self._free.append(slot)
+
+
+class _EmbeddingIndex:
+    """
+    Contiguous, pre-normalized embedding matrix backing VectorMemory search.
+
+    Rows are kept in insertion order (deletes leave tombstones that are
+    compacted in bulk), so ties resolve exactly as in the pure-Python scan.
+    Rows whose embedding is zero or has the wrong dimension are stored as
+    invalid and always score 0.0, mirroring ``_cosine_similarity``.
+
+    A raw matrix adopted with ``load_matrix`` (usually memory-mapped) stays
+    the base of the index and is never copied: searches read it in chunks
+    and divide by row norms computed once. Later writes form an overlay of
+    appended rows, replacement vectors for base rows and a tombstone mask.
+    Only compaction, once most rows are tombstones, copies the base.
+    """
+
+    # Most base matrix entries read per chunk (16 MB as float64)
+    _CHUNK_CELLS = 1 << 21
+
+    def __init__(self, dim: int, initial_capacity: int = 1024, dtype: Any = None):
+        """
+        Initialize an empty index.
+
+        Args:
+            dim: Dimension of the indexed embeddings
+            initial_capacity: Number of rows to preallocate
+            dtype: Matrix dtype (defaults to float64)
+        """
+        self.dim = dim
+        self._chunk_rows = max(1, self._CHUNK_CELLS // max(1, dim))
+        capacity = max(1, initial_capacity)
+        # Appended rows; row r lives at _vectors[r - _base_count]
+        self._vectors = np.zeros((capacity, dim), dtype=dtype or np.float64)
+        self._valid = np.zeros(capacity, dtype=bool)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._ids: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        # Raw base matrix from load_matrix, its lazily computed row norms,
+        # and normalized replacements for rewritten base rows
+        self._base: Optional["np.ndarray"] = None
+        self._base_count = 0
+        self._base_norms: Optional["np.ndarray"] = None
+        self._patches: Dict[int, "np.ndarray"] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self._rows
+
+    @property
+    def dtype(self) -> Any:
+        """Dtype the embedding matrix is stored in."""
+        return self._vectors.dtype
+
+    def _normalized(self, embedding: List[float]) -> Optional["np.ndarray"]:
+        """Unit-length copy of an embedding, or None if it cannot be scored."""
+        if len(embedding) != self.dim:
+            return None
+        vector = np.asarray(embedding, dtype=np.float64)
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            return None
+        return vector / norm
+
+    def _write_row(self, row: int, embedding: List[float]) -> None:
+        """Normalize an embedding into a matrix row (or a base row patch)."""
+        vector = self._normalized(embedding)
+        self._valid[row] = vector is not None
+        if row < self._base_count:
+            self._patches[row] = (
+                vector.astype(self._vectors.dtype) if vector is not None
+                else np.zeros(self.dim, dtype=self._vectors.dtype)
+            )
+        else:
+            self._vectors[row - self._base_count] = 0.0 if vector is None else vector
+
+    def load_matrix(self, memory_ids: List[str], matrix: "np.ndarray") -> None:
+        """
+        Replace the index contents with a raw embedding matrix in bulk.
+
+        The matrix may be memory-mapped; it is kept as the base of the
+        index without being copied or normalized.
+
+        Args:
+            memory_ids: IDs of the memories, one per matrix row
+            matrix: Raw embeddings with shape (len(memory_ids), dim)
+        """
+        count = len(memory_ids)
+        self._ids = list(memory_ids)
+        self._rows = {memory_id: row for row, memory_id in enumerate(self._ids)}
+        self._base = matrix
+        self._base_count = count
+        self._base_norms = None
+        self._patches = {}
+        self._vectors = np.zeros((max(1, count // 8), self.dim), dtype=matrix.dtype)
+        capacity = count + self._vectors.shape[0]
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._alive[:count] = True
+        self._valid = np.zeros(capacity, dtype=bool)
+
+    def _ensure_norms(self) -> None:
+        """Compute base row norms and validity, reading the base in chunks."""
+        if self._base is None or self._base_norms is not None:
+            return
+
+        count = self._base_count
+        norms = np.zeros(count, dtype=np.float64)
+        for start in range(0, count, self._chunk_rows):
+            block = np.asarray(self._base[start:start + self._chunk_rows], dtype=np.float64)
+            norms[start:start + len(block)] = np.linalg.norm(block, axis=1)
+        self._base_norms = norms
+        self._valid[:count] = (norms > 0) & self._alive[:count]
+        for row, vector in self._patches.items():
+            self._valid[row] = self._alive[row] and bool(vector.any())
+
+    def _materialize(self) -> None:
+        """Copy the normalized base rows into memory and drop the base."""
+        if self._base is None:
+            return
+
+        self._ensure_norms()
+        count = self._base_count
+        appended = len(self._ids) - count
+        vectors = np.zeros((max(1, len(self._ids)), self.dim), dtype=self._vectors.dtype)
+        for start in range(0, count, self._chunk_rows):
+            block = np.asarray(self._base[start:start + self._chunk_rows], dtype=vectors.dtype)
+            norms = self._base_norms[start:start + len(block)]
+            valid = norms > 0
+            vectors[start:start + len(block)][valid] = block[valid] / norms[valid, None]
+        for row, vector in self._patches.items():
+            vectors[row] = vector
+        vectors[count:count + appended] = self._vectors[:appended]
+
+        self._vectors = vectors
+        self._valid = self._valid[:len(vectors)].copy()
+        self._alive = self._alive[:len(vectors)].copy()
+        self._base = None
+        self._base_count = 0
+        self._base_norms = None
+        self._patches = {}
+
+    def add(self, memory_id: str, embedding: List[float]) -> None:
+        """
+        Add or replace the embedding for a memory.
+
+        Args:
+            memory_id: ID of the memory
+            embedding: Raw (unnormalized) embedding
+        """
+        row = self._rows.get(memory_id)
+        if row is None:
+            row = len(self._ids)
+            if row - self._base_count >= self._vectors.shape[0]:
+                self._grow()
+            self._ids.append(memory_id)
+            self._rows[memory_id] = row
+            self._alive[row] = True
+        self._write_row(row, embedding)
+
+    def remove(self, memory_id: str) -> bool:
+        """
+        Remove a memory from the index.
+
+        Args:
+            memory_id: ID of the memory
+
+        Returns:
+            True if removed, False if not indexed
+        """
+        row = self._rows.pop(memory_id, None)
+        if row is None:
+            return False
+
+        self._ids[row] = None
+        self._alive[row] = False
+        self._valid[row] = False
+        self._patches.pop(row, None)
+
+        tombstones = len(self._ids) - len(self._rows)
+        if tombstones > 1024 and tombstones > len(self._rows):
+            self._compact()
+        return True
+
+    def clear(self) -> None:
+        """Remove every row from the index."""
+        if self._base is not None:
+            self._base = None
+            self._base_count = 0
+            self._base_norms = None
+            self._patches = {}
+            self._valid = self._valid[:self._vectors.shape[0]].copy()
+            self._alive = self._alive[:self._vectors.shape[0]].copy()
+        self._vectors[:] = 0.0
+        self._valid[:] = False
+        self._alive[:] = False
+        self._ids = []
+        self._rows = {}
+
+    def _grow(self) -> None:
+        """Double the preallocated capacity for appended rows."""
+        capacity = self._vectors.shape[0] * 2
+        vectors = np.zeros((capacity, self.dim), dtype=self._vectors.dtype)
+        vectors[: self._vectors.shape[0]] = self._vectors
+        extra = capacity - self._vectors.shape[0]
+        self._vectors = vectors
+        self._valid = np.concatenate([self._valid, np.zeros(extra, dtype=bool)])
+        self._alive = np.concatenate([self._alive, np.zeros(extra, dtype=bool)])
+
+    def _compact(self) -> None:
+        """Drop tombstoned rows, preserving insertion order."""
+        self._materialize()
+        used = len(self._ids)
+        keep = np.flatnonzero(self._alive[:used])
+        count = len(keep)
+
+        self._vectors[:count] = self._vectors[keep]
+        self._vectors[count:used] = 0.0
+        self._valid[:count] = self._valid[keep]
+        self._valid[count:used] = False
+        self._alive[:count] = True
+        self._alive[count:used] = False
+
+        self._ids = [self._ids[row] for row in keep]
+        self._rows = {memory_id: row for row, memory_id in enumerate(self._ids)}
+
+    def rows_for(self, memory_ids: Iterable[str]) -> "np.ndarray":
+        """
+        Map memory IDs to sorted row numbers, skipping unknown IDs.
+
+        Args:
+            memory_ids: IDs of the memories
+
+        Returns:
+            Sorted array of row numbers
+        """
+        rows = [self._rows[m] for m in memory_ids if m in self._rows]
+        result = np.asarray(rows, dtype=np.int64)
+        result.sort()
+        return result
+
+    def memory_id_at(self, row: int) -> str:
+        """Return the memory ID stored at a row."""
+        return self._ids[row]  # type: ignore[return-value]
+
+    def scores(
+        self,
+        query_embedding: List[float],
+        rows: Optional["np.ndarray"] = None,
+    ) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Compute 0-1 scaled cosine similarities against the query.
+
+        Args:
+            query_embedding: Query embedding with the index dimension
+            rows: Optional candidate rows (defaults to all live rows)
+
+        Returns:
+            Tuple of (rows, similarities) in row order
+        """
+        self._ensure_norms()
+        used = len(self._ids)
+        if rows is None:
+            rows = np.flatnonzero(self._alive[:used])
+
+        query = np.asarray(query_embedding, dtype=np.float64)
+        norm = float(np.linalg.norm(query))
+        if norm == 0.0 or len(rows) == 0:
+            return rows, np.zeros(len(rows), dtype=np.float64)
+
+        query = (query / norm).astype(self._vectors.dtype)
+        dots = np.zeros(len(rows), dtype=np.float64)
+        split = int(np.searchsorted(rows, self._base_count)) if self._base is not None else 0
+        if split:
+            self._score_base(rows[:split], query, dots[:split])
+        if split < len(rows):
+            appended = rows[split:] - self._base_count
+            if len(appended) == used - self._base_count:
+                # Every appended row: a contiguous slice, no gather
+                dots[split:] = self._vectors[: len(appended)] @ query
+            else:
+                dots[split:] = self._vectors[appended] @ query
+        valid = self._valid[rows]
+
+        similarities = np.clip((dots + 1.0) / 2.0, 0.0, 1.0)
+        similarities[~valid] = 0.0
+        return rows, similarities
+
+    def _score_base(self, rows: "np.ndarray", query: "np.ndarray", out: "np.ndarray") -> None:
+        """Cosine of base rows against a unit query, read in chunks."""
+        count = self._base_count
+        everything = len(rows) == count
+        for start in range(0, len(rows), self._chunk_rows):
+            stop = start + self._chunk_rows
+            if everything:
+                block = self._base[start:stop]
+            else:
+                block = self._base[rows[start:stop]]
+            out[start:start + len(block)] = np.asarray(block, dtype=query.dtype) @ query
+
+        norms = self._base_norms[rows]
+        np.divide(out, norms, out=out, where=norms > 0)
+        if self._patches:
+            positions = np.searchsorted(rows, list(self._patches))
+            for position, row in zip(positions.tolist(), self._patches):
+                if position < len(rows) and rows[position] == row:
+                    out[position] = float(self._patches[row] @ query)
+
+    @staticmethod
+    def top_k(
+        rows: "np.ndarray",
+        similarities: "np.ndarray",
+        top_k: int,
+    ) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Select the best rows, ordered by similarity then insertion order.
+
+        Args:
+            rows: Candidate rows in ascending order
+            similarities: Similarities aligned with ``rows``
+            top_k: Number of results to keep
+
+        Returns:
+            Tuple of (rows, similarities) for the selected results
+        """
+        if top_k <= 0 or len(rows) == 0:
+            return rows[:0], similarities[:0]
+
+        if len(rows) > top_k:
+            # argpartition is arbitrary among ties at the cut-off, so keep
+            # everything strictly better and the earliest rows equal to it.
+            kth = np.partition(similarities, len(similarities) - top_k)[len(similarities) - top_k]
+            better = np.flatnonzero(similarities > kth)
+            equal = np.flatnonzero(similarities == kth)[: top_k - len(better)]
+            selected = np.concatenate([better, equal])
+        else:
+            selected = np.arange(len(rows))
+
+        order = np.lexsort((rows[selected], -similarities[selected]))
+        selected = selected[order]
+        return rows[selected], similarities[selected]
+
+
+class _LazyMemories(MutableMapping):
+    """
+    Memory ID -> MemoryVector mapping whose values are built on first access.
+
+    Used for snapshot loads: each entry starts as the row number it will be
+    built from and is replaced by its MemoryVector the first time it is
+    read, so loading costs one dict entry per memory rather than one
+    object. Insertion order is preserved as for a plain dict.
+
+    Reading every value (``values``/``items``) builds the remaining
+    memories in one batch.
+
+    The row source provides ``build(row)``, ``build_many(rows)``,
+    ``attributes()`` (per row, an
+    object with ``memory_id``, ``agent_id`` and ``tags``) and
+    ``record_access(rows, now)``, so indexing and access statistics don't
+    force every memory to be built.
+    """
+
+    def __init__(self, memory_ids: List[str], rows: Any):
+        """
+        Initialize the mapping.
+
+        Args:
+            memory_ids: Memory IDs in row order
+            rows: Row source the memories are built from
+        """
+        self._entries: Dict[str, Any] = dict(zip(memory_ids, range(len(memory_ids))))
+        self._rows = rows
+
+    def __getitem__(self, memory_id: str) -> MemoryVector:
+        value = self._entries[memory_id]
+        if type(value) is int:
+            value = self._entries[memory_id] = self._rows.build(value)
+        return value
+
+    def __setitem__(self, memory_id: str, memory: MemoryVector) -> None:
+        self._entries[memory_id] = memory
+
+    def __delitem__(self, memory_id: str) -> None:
+        del self._entries[memory_id]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, memory_id: object) -> bool:
+        return memory_id in self._entries
+
+    def get(self, memory_id: str, default: Any = None) -> Any:
+        if memory_id in self._entries:
+            return self[memory_id]
+        return default
+
+    def values(self) -> Any:
+        self._build_all()
+        return self._entries.values()
+
+    def items(self) -> Any:
+        self._build_all()
+        return self._entries.items()
+
+    def _build_all(self) -> None:
+        """Build every memory not built yet in one batch."""
+        pending = [
+            (memory_id, value) for memory_id, value in self._entries.items() if type(value) is int
+        ]
+        if pending:
+            memories = self._rows.build_many([row for _, row in pending])
+            for (memory_id, _), memory in zip(pending, memories):
+                self._entries[memory_id] = memory
+
+    @property
+    def built(self) -> int:
+        """Number of memories built so far."""
+        return sum(1 for value in self._entries.values() if type(value) is not int)
+
+    def attributes(self) -> Iterator[Any]:
+        """Yield the agent and tags of every memory without building it."""
+        rows = self._rows.attributes()
+        for value in self._entries.values():
+            yield rows[value] if type(value) is int else value
+
+    def record_access(self, memory_ids: Iterable[str], now: datetime) -> None:
+        """Count an access to each memory, built or not."""
+        rows = []
+        for memory_id in memory_ids:
+            value = self._entries[memory_id]
+            if type(value) is int:
+                rows.append(value)
+            else:
+                value.access_count += 1
+                value.last_accessed = now
+        if rows:
+            self._rows.record_access(rows, now)
+
+
 class VectorMemory:
     """
     Long-term memory storage with vector similarity search.
@@ -224,6 +1046,9 @@ class VectorMemory:
         self,
         embedding_dim: int = 128,
         embedder: Optional[SimpleEmbedding] = None,
+        use_index: bool = True,
+        ann_index: Optional["ANNIndex"] = None,
+        compact: bool = False,
     ):
         """
         Initialize vector memory.
@@ -231,10 +1056,41 @@ class VectorMemory:
         Args:
             embedding_dim: Dimension of embedding vectors
             embedder: Optional custom embedding generator
+            use_index: Whether to keep a NumPy embedding matrix for
+                vectorized search (ignored if NumPy is not installed)
+            ann_index: Optional approximate nearest neighbour backend used
+                for unfiltered searches (e.g. IVFFlatIndex)
+            compact: Whether to store memories as CompactMemoryVector with
+                embeddings in a shared float32 arena (float32 search index)
         """
         self.embedding_dim = embedding_dim
         self.embedder = embedder or SimpleEmbedding(embedding_dim)
         self.memories: Dict[str, MemoryVector] = {}
+        self.compact = compact
+        self._memory_cls: Any = CompactMemoryVector if compact else MemoryVector
+        self._arena: Optional[_EmbeddingArena] = (
+            _EmbeddingArena(embedding_dim) if compact and NUMPY_AVAILABLE else None
+        )
+        self._index: Optional[_EmbeddingIndex] = (
+            _EmbeddingIndex(embedding_dim, dtype=np.float32 if compact else None)
+            if use_index and NUMPY_AVAILABLE
+            else None
+        )
+        self.ann_index = ann_index
+
+        # Secondary indexes: agent -> memory IDs in insertion order, tag ->
+        # memory IDs, and the (insertion sequence, agent_id, tags) each
+        # memory was indexed with
+        self._agent_index: Dict[str, Dict[str, None]] = {}
+        self._tag_index: Dict[str, Set[str]] = {}
+        self._indexed: Dict[str, Tuple[int, str, Tuple[str, ...]]] = {}
+        self._next_seq = 0
+
+        # Optional write-ahead journal (e.g. MemorySnapshot) and other
+        # observers notified of changes via record_put/record_delete/
+        # record_importance/record_importances
+        self.journal: Optional[Any] = None
+        self._observers: List[Any] = []
 
     def store(
         self,
@@ -263,7 +1119,7 @@ class VectorMemory:
         if embedding is None:
             embedding = self.embedder.embed(content)
 
-        memory = MemoryVector(
+        memory = self._memory_cls(
             agent_id=agent_id,
             content=content,
             embedding=embedding,
@@ -271,10 +1127,58 @@ class VectorMemory:
             tags=tags or [],
             metadata=metadata or {},
         )
+        self._place_embedding(memory)
 
         self.memories[memory.memory_id] = memory
+        self._index_memory(memory)
+        self._notify("record_put", memory)
         return memory.memory_id
 
+    def store_many(
+        self,
+        agent_id: str,
+        contents: List[str],
+        importance: float = 0.5,
+        tags: Optional[List[str]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        embeddings: Optional[List[List[float]]] = None,
+    ) -> List[str]:
+        """
+        Store many memories for one agent, embedding them in a single batch.
+
+        Args:
+            agent_id: ID of the agent storing the memories
+            contents: Text content of each memory
+            importance: Importance score applied to every memory
+            tags: Optional list of tags applied to every memory
+            metadata: Optional metadata copied into every memory
+            embeddings: Optional pre-computed embeddings, one per content
+
+        Returns:
+            IDs of the stored memories, in input order
+        """
+        if embeddings is None:
+            embeddings = self._embed_many(contents)
+
+        return [
+            self.store(
+                agent_id,
+                content,
+                importance=importance,
+                tags=list(tags) if tags else None,
+                metadata=dict(metadata) if metadata else None,
+                embedding=embedding,
+            )
+            for content, embedding in zip(contents, embeddings)
+        ]
+
+    def _embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts through the embedder's batch API when it has one."""
+        embed_batch = getattr(self.embedder, "embed_batch", None)
+        if embed_batch is not None:
+            return embed_batch(texts)
+        return [self.embedder.embed(text) for text in texts]
+
     def get(self, memory_id: str) -> Optional[MemoryVector]:
         """
         Retrieve a memory by ID.
@@ -302,7 +1206,13 @@ class VectorMemory:
             True if deleted, False if not found
         """
         if memory_id in self.memories:
-            del self.memories[memory_id]
+            self._release_embedding(self.memories.pop(memory_id))
+            self._unindex_attributes(memory_id)
+            if self._index is not None:
+                self._index.remove(memory_id)
+            if self.ann_index is not None:
+                self.ann_index.remove(memory_id)
+            self._notify("record_delete", memory_id)
             return True
         return False
 
@@ -333,18 +1243,25 @@ class VectorMemory:
         if query_embedding is None:
             query_embedding = self.embedder.embed(query)
 
-        # Filter memories
-        candidate_memories = []
-        for memory in self.memories.values():
-            # Filter by agent_id if specified
-            if agent_id and memory.agent_id != agent_id:
-                continue
+        if (
+            self.ann_index is not None
+            and not agent_id
+            and not tags
+            and len(query_embedding) == self.embedding_dim
+        ):
+            return self._search_ann(query_embedding, top_k, min_similarity)
 
-            # Filter by tags if specified
-            if tags and not any(tag in memory.tags for tag in tags):
-                continue
+        if self._index is not None and len(query_embedding) == self.embedding_dim:
+            return self._search_index(
+                query_embedding, agent_id, top_k, min_similarity, tags
+            )
 
-            candidate_memories.append(memory)
+        # Filter memories
+        candidate_ids = self._candidate_ids(agent_id, tags)
+        if candidate_ids is None:
+            candidate_memories = list(self.memories.values())
+        else:
+            candidate_memories = [self.memories[memory_id] for memory_id in candidate_ids]
 
         # Calculate similarities
         results = []
@@ -372,6 +1289,357 @@ class VectorMemory:
 
         return search_results
 
+    def search_many(
+        self,
+        queries: List[str],
+        agent_id: Optional[str] = None,
+        top_k: int = 10,
+        min_similarity: float = 0.0,
+        tags: Optional[List[str]] = None,
+    ) -> List[List[SearchResult]]:
+        """
+        Run several searches, embedding all queries in a single batch.
+
+        Args:
+            queries: Query texts to search for
+            agent_id: Optional agent ID to filter by
+            top_k: Number of top results to return per query
+            min_similarity: Minimum similarity threshold (0.0 to 1.0)
+            tags: Optional list of tags to filter by
+
+        Returns:
+            One list of SearchResult objects per query, in input order
+        """
+        return [
+            self.search(
+                query,
+                agent_id=agent_id,
+                top_k=top_k,
+                min_similarity=min_similarity,
+                tags=tags,
+                query_embedding=query_embedding,
+            )
+            for query, query_embedding in zip(queries, self._embed_many(queries))
+        ]
+
+    def _search_index(
+        self,
+        query_embedding: List[float],
+        agent_id: Optional[str],
+        top_k: int,
+        min_similarity: float,
+        tags: Optional[List[str]],
+    ) -> List[SearchResult]:
+        """
+        Vectorized search over the embedding matrix.
+
+        Produces the same results as the pure-Python scan in ``search``:
+        one matrix-vector product followed by a partial top-k selection.
+
+        Args:
+            query_embedding: Query embedding with ``embedding_dim`` entries
+            agent_id: Optional agent ID to filter by
+            top_k: Number of top results to return
+            min_similarity: Minimum similarity threshold (0.0 to 1.0)
+            tags: Optional list of tags to filter by
+
+        Returns:
+            List of SearchResult objects ordered by similarity
+        """
+        index = self._ensure_index()
+
+        rows = None
+        candidate_ids = self._candidate_ids(agent_id, tags)
+        if candidate_ids is not None:
+            rows = index.rows_for(candidate_ids)
+
+        rows, similarities = index.scores(query_embedding, rows)
+        matched = similarities >= min_similarity
+        rows, similarities = rows[matched], similarities[matched]
+
+        # Update access statistics for every match, as the scan does
+        now = datetime.utcnow()
+        matched_ids = [index.memory_id_at(row) for row in rows.tolist()]
+        if isinstance(self.memories, _LazyMemories):
+            self.memories.record_access(matched_ids, now)
+        else:
+            for memory_id in matched_ids:
+                memory = self.memories[memory_id]
+                memory.access_count += 1
+                memory.last_accessed = now
+
+        rows, similarities = index.top_k(rows, similarities, top_k)
+
+        return [
+            SearchResult(
+                memory=self.memories[index.memory_id_at(row)],
+                similarity=similarity,
+                rank=i,
+            )
+            for i, (row, similarity) in enumerate(zip(rows.tolist(), similarities.tolist()))
+        ]
+
+    def _search_ann(
+        self,
+        query_embedding: List[float],
+        top_k: int,
+        min_similarity: float,
+    ) -> List[SearchResult]:
+        """
+        Approximate search through the configured ANN backend.
+
+        Only the neighbours the backend returns are considered, so access
+        statistics are updated for the returned results alone.
+
+        Args:
+            query_embedding: Query embedding with ``embedding_dim`` entries
+            top_k: Number of top results to return
+            min_similarity: Minimum similarity threshold (0.0 to 1.0)
+
+        Returns:
+            List of SearchResult objects ordered by similarity
+        """
+        ann_index = self.ann_index
+        assert ann_index is not None
+
+        if len(ann_index) != len(self.memories):
+            ann_index.clear()
+            for memory in self.memories.values():
+                ann_index.add(memory.memory_id, memory.embedding)
+
+        now = datetime.utcnow()
+        results = []
+        for memory_id, cosine in ann_index.search(query_embedding, top_k):
+            similarity = max(0.0, min(1.0, (cosine + 1.0) / 2.0))
+            if similarity < min_similarity:
+                continue
+
+            memory = self.memories[memory_id]
+            memory.access_count += 1
+            memory.last_accessed = now
+            results.append(SearchResult(memory=memory, similarity=similarity, rank=len(results)))
+
+        return results
+
+    def _candidate_ids(
+        self,
+        agent_id: Optional[str],
+        tags: Optional[List[str]],
+    ) -> Optional[List[str]]:
+        """
+        Resolve search filters through the agent and tag indexes.
+
+        Args:
+            agent_id: Optional agent ID to filter by
+            tags: Optional list of tags to filter by (any match)
+
+        Returns:
+            Matching memory IDs in insertion order, or None if unfiltered
+        """
+        if not agent_id and not tags:
+            return None
+
+        self._ensure_attribute_indexes()
+
+        if agent_id:
+            agent_ids = self._agent_index.get(agent_id, {})
+            if not tags:
+                return list(agent_ids)
+            wanted = set(tags)
+            return [
+                memory_id for memory_id in agent_ids
+                if not wanted.isdisjoint(self._indexed[memory_id][2])
+            ]
+
+        return self._ids_with_tags(tags)
+
+    def _ids_with_tags(self, tags: List[str]) -> List[str]:
+        """Return IDs of memories carrying any of the tags, in insertion order."""
+        matched: Set[str] = set()
+        for tag in set(tags):
+            matched.update(self._tag_index.get(tag, ()))
+        return sorted(matched, key=lambda memory_id: self._indexed[memory_id][0])
+
+    def _index_attributes(self, memory: MemoryVector) -> None:
+        """Add a memory to the agent and tag indexes."""
+        memory_id = memory.memory_id
+        tags = tuple(dict.fromkeys(memory.tags))
+        previous = self._indexed.get(memory_id)
+        if previous is not None:
+            if previous[1:] == (memory.agent_id, tags):
+                return
+            seq = previous[0]
+            self._unindex_attributes(memory_id)
+        else:
+            seq = self._next_seq
+            self._next_seq += 1
+
+        self._indexed[memory_id] = (seq, memory.agent_id, tags)
+        for tag in tags:
+            self._tag_index.setdefault(tag, set()).add(memory_id)
+
+        bucket = self._agent_index.setdefault(memory.agent_id, {})
+        bucket[memory_id] = None
+        if previous is not None and len(bucket) > 1:
+            # Overwrites keep their dict position, so keep the agent's order too
+            ordered = sorted(bucket, key=lambda m: self._indexed[m][0])
+            bucket.clear()
+            bucket.update(dict.fromkeys(ordered))
+
+    def _unindex_attributes(self, memory_id: str) -> None:
+        """Remove a memory from the agent and tag indexes."""
+        indexed = self._indexed.pop(memory_id, None)
+        if indexed is None:
+            return
+
+        _, agent_id, tags = indexed
+        agent_bucket = self._agent_index.get(agent_id)
+        if agent_bucket is not None:
+            agent_bucket.pop(memory_id, None)
+            if not agent_bucket:
+                del self._agent_index[agent_id]
+
+        for tag in tags:
+            tag_bucket = self._tag_index.get(tag)
+            if tag_bucket is not None:
+                tag_bucket.discard(memory_id)
+                if not tag_bucket:
+                    del self._tag_index[tag]
+
+    def _ensure_attribute_indexes(self) -> None:
+        """Rebuild the agent and tag indexes if ``memories`` was modified directly."""
+        if len(self._indexed) == len(self.memories):
+            return
+
+        self._agent_index = {}
+        self._tag_index = {}
+        self._indexed = {}
+        self._next_seq = 0
+        if isinstance(self.memories, _LazyMemories):
+            memories: Iterable[Any] = self.memories.attributes()
+        else:
+            memories = self.memories.values()
+        for memory in memories:
+            self._index_attributes(memory)
+
+    def reindex(self, memory_id: str) -> bool:
+        """
+        Refresh the agent and tag indexes after a memory was edited in place.
+
+        Call this after changing ``agent_id`` or ``tags`` on a stored
+        MemoryVector (e.g. when merging memories).
+
+        Args:
+            memory_id: ID of the edited memory
+
+        Returns:
+            True if reindexed, False if not found
+        """
+        memory = self.memories.get(memory_id)
+        if memory is None:
+            return False
+        self._index_attributes(memory)
+        self._notify("record_put", memory)
+        return True
+
+    def add_observer(self, observer: Any) -> None:
+        """
+        Register an observer notified after memories change.
+
+        Observers implement ``record_put(memory)``, ``record_delete(memory_id)``,
+        ``record_importance(memory_id, importance)`` and
+        ``record_importances(updates)``.
+
+        Args:
+            observer: Observer to register
+        """
+        self._observers.append(observer)
+
+    def remove_observer(self, observer: Any) -> None:
+        """Unregister an observer added with ``add_observer``."""
+        if observer in self._observers:
+            self._observers.remove(observer)
+
+    def _notify(self, method: str, *args: Any) -> None:
+        """Forward a change to the journal and observers."""
+        if self.journal is not None:
+            getattr(self.journal, method)(*args)
+        for observer in self._observers:
+            getattr(observer, method)(*args)
+
+    def _place_embedding(self, memory: Any) -> None:
+        """Move a compact memory's embedding into the shared arena."""
+        if self._arena is not None and len(memory.embedding) == self.embedding_dim:
+            memory._slot, memory.embedding = self._arena.allocate(memory.embedding)
+
+    def _release_embedding(self, memory: Any) -> None:
+        """Give a removed compact memory a private copy and free its arena row."""
+        slot = getattr(memory, "_slot", None)
+        if self._arena is not None and slot is not None:
+            memory.embedding = np.array(memory.embedding)
+            memory._slot = None
+            self._arena.release(slot)
+
+    def _index_memory(self, memory: MemoryVector) -> None:
+        """Add a memory to the attribute and search indexes."""
+        self._index_attributes(memory)
+        if self._index is not None:
+            self._index.add(memory.memory_id, memory.embedding)
+        if self.ann_index is not None:
+            self.ann_index.add(memory.memory_id, memory.embedding)
+
+    def _ensure_index(self) -> _EmbeddingIndex:
+        """
+        Return the embedding index, rebuilding it if ``memories`` was
+        modified directly instead of through store/delete/import.
+
+        Returns:
+            Embedding index in sync with ``memories``
+        """
+        index = self._index
+        assert index is not None
+
+        if len(index) != len(self.memories):
+            index.clear()
+            for memory in self.memories.values():
+                index.add(memory.memory_id, memory.embedding)
+
+        return index
+
+    def _adopt(
+        self,
+        memories: Union[List[MemoryVector], _LazyMemories],
+        matrix: Optional["np.ndarray"] = None,
+    ) -> None:
+        """
+        Replace the store contents in bulk (used when loading snapshots).
+
+        Args:
+            memories: Memories to hold in insertion order, or a lazy mapping
+                that builds them on access (held as-is)
+            matrix: Optional raw embedding matrix aligned with ``memories``;
+                when given, the search index adopts it without copying
+        """
+        if isinstance(memories, _LazyMemories):
+            self.memories = memories
+        else:
+            self.memories = {memory.memory_id: memory for memory in memories}
+        self._agent_index = {}
+        self._tag_index = {}
+        self._indexed = {}
+        self._next_seq = 0
+
+        if self._index is not None:
+            if matrix is not None:
+                self._index.load_matrix(list(self.memories), matrix)
+            else:
+                self._index.clear()
+                for memory in self.memories.values():
+                    self._index.add(memory.memory_id, memory.embedding)
+
+        if self.ann_index is not None:
+            self.ann_index.clear()
+
     def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
         """
         Calculate cosine similarity between two vectors.
@@ -408,9 +1676,10 @@ class VectorMemory:
         Returns:
             List of memories belonging to the agent
         """
+        self._ensure_attribute_indexes()
         return [
-            memory for memory in self.memories.values()
-            if memory.agent_id == agent_id
+            self.memories[memory_id]
+            for memory_id in self._agent_index.get(agent_id, {})
         ]
 
     def get_memories_by_tags(self, tags: List[str]) -> List[MemoryVector]:
@@ -423,10 +1692,8 @@ class VectorMemory:
         Returns:
             List of memories with matching tags
         """
-        return [
-            memory for memory in self.memories.values()
-            if any(tag in memory.tags for tag in tags)
-        ]
+        self._ensure_attribute_indexes()
+        return [self.memories[memory_id] for memory_id in self._ids_with_tags(tags)]
 
     def update_importance(self, memory_id: str, importance: float) -> bool:
         """
@@ -442,9 +1709,33 @@ class VectorMemory:
         memory = self.memories.get(memory_id)
         if memory:
             memory.importance = max(0.0, min(1.0, importance))
+            self._notify("record_importance", memory_id, memory.importance)
             return True
         return False
 
+    def update_importances(self, updates: Dict[str, float]) -> int:
+        """
+        Update the importance scores of many memories at once.
+
+        Observers and the journal receive one ``record_importances`` call for
+        the whole batch rather than one ``record_importance`` per memory.
+
+        Args:
+            updates: Mapping of memory ID to new importance score (0.0 to 1.0)
+
+        Returns:
+            Number of memories updated
+        """
+        applied: Dict[str, float] = {}
+        for memory_id, importance in updates.items():
+            memory = self.memories.get(memory_id)
+            if memory:
+                memory.importance = max(0.0, min(1.0, importance))
+                applied[memory_id] = memory.importance
+        if applied:
+            self._notify("record_importances", applied)
+        return len(applied)
+
     def get_memory_count(self) -> int:
         """
         Get the total number of stored memories.
@@ -472,17 +1763,14 @@ class VectorMemory:
 
         total_importance = sum(m.importance for m in self.memories.values())
         total_access_count = sum(m.access_count for m in self.memories.values())
-        unique_agents = set(m.agent_id for m in self.memories.values())
-        all_tags = set()
-        for m in self.memories.values():
-            all_tags.update(m.tags)
+        self._ensure_attribute_indexes()
 
         return {
             "total_memories": len(self.memories),
             "avg_importance": total_importance / len(self.memories),
             "avg_access_count": total_access_count / len(self.memories),
-            "total_agents": len(unique_agents),
-            "total_tags": len(all_tags),
+            "total_agents": len(self._agent_index),
+            "total_tags": len(self._tag_index),
         }
 
     def export_memories(self) -> List[Dict[str, Any]]:
@@ -507,8 +1795,14 @@ class VectorMemory:
         count = 0
         for data in memories_data:
             try:
-                memory = MemoryVector.from_dict(data)
+                memory = self._memory_cls.from_dict(data)
+                previous = self.memories.get(memory.memory_id)
+                if previous is not None:
+                    self._release_embedding(previous)
+                self._place_embedding(memory)
                 self.memories[memory.memory_id] = memory
+                self._index_memory(memory)
+                self._notify("record_put", memory)
                 count += 1
             except (KeyError, ValueError):
                 continue
@@ -7,7 +7,7 @@ agent performance, resource utilization, and operational health.
 
 import time
 from contextlib import contextmanager
-from typing import Any, Dict, Generator, List, Optional
+from typing import Any, Callable, Dict, Generator, List, Optional
 from datetime import datetime
 
 try:
@@ -86,6 +86,7 @@ class AgentMetrics:
         active_requests: Gauge for currently active requests
         errors_total: Counter for total errors
         llm_tokens_total: Counter for LLM token usage
+        llm_request_duration_seconds: Histogram for LLM call latency by model
         task_duration_seconds: Histogram for task durations
 
     Example:
@@ -113,6 +114,7 @@ class AgentMetrics:
         """
         self.namespace = namespace
         self.subsystem = subsystem
+        self._llm_observers: List[Callable[[str, float, bool, Optional[float]], None]] = []
 
         if PROMETHEUS_AVAILABLE:
             self.registry = registry or CollectorRegistry()
@@ -175,6 +177,15 @@ class AgentMetrics:
             registry=self.registry,
         )
 
+        # Histogram: LLM call latency by model
+        self.llm_request_duration_seconds = Histogram(
+            name=f"{self.namespace}_{self.subsystem}_llm_request_duration_seconds",
+            documentation="LLM request duration in seconds",
+            labelnames=["agent_id", "model", "status"],
+            buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+            registry=self.registry,
+        )
+
         # Histogram: Task-specific duration tracking
         self.task_duration_seconds = Histogram(
             name=f"{self.namespace}_{self.subsystem}_task_duration_seconds",
@@ -240,6 +251,11 @@ class AgentMetrics:
             "LLM tokens",
             ("agent_id", "model", "token_type"),
         )
+        self.llm_request_duration_seconds = MockMetric(
+            "llm_request_duration_seconds",
+            "LLM request duration",
+            ("agent_id", "model", "status"),
+        )
         self.task_duration_seconds = MockMetric(
             "task_duration_seconds",
             "Task duration",
@@ -412,6 +428,54 @@ class AgentMetrics:
             token_type="completion",
         ).inc(completion_tokens)
 
+    def record_llm_request(
+        self,
+        agent_id: str,
+        model: str,
+        duration_seconds: float,
+        success: bool = True,
+        cost_usd: Optional[float] = None,
+    ) -> None:
+        """
+        Record the latency and outcome of one LLM call.
+
+        Registered LLM observers (e.g. an LLMRouter tracking model health)
+        are notified with the same values.
+
+        Args:
+            agent_id: Unique agent identifier
+            model: Name of the LLM model
+            duration_seconds: Call latency in seconds
+            success: Whether the call succeeded
+            cost_usd: Optional cost of the call in USD
+
+        Example:
+            >>> metrics.record_llm_request("agent-1", "gpt-4", 1.2, cost_usd=0.03)
+        """
+        self.llm_request_duration_seconds.labels(
+            agent_id=agent_id,
+            model=model,
+            status="success" if success else "error",
+        ).observe(duration_seconds)
+
+        if cost_usd is not None:
+            self.record_cost(agent_id, cost_usd, "llm")
+
+        for observer in self._llm_observers:
+            observer(model, duration_seconds, success, cost_usd)
+
+    def add_llm_observer(
+        self,
+        observer: Callable[[str, float, bool, Optional[float]], None],
+    ) -> None:
+        """
+        Register a callback for every recorded LLM request.
+
+        Args:
+            observer: Callable taking (model, duration_seconds, success, cost_usd)
+        """
+        self._llm_observers.append(observer)
+
     def record_error(
         self,
         agent_id: str,
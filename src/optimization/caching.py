@@ -4,13 +4,20 @@ This module provides the ResultCache class which caches LLM responses
 to reduce costs by avoiding duplicate API calls for similar requests.
 """
 
+from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Callable, Optional, List, Set, Tuple, FrozenSet, Union
 from datetime import datetime, timedelta
+from pathlib import Path
 import hashlib
+import heapq
 import json
+import math
+import re
 from collections import OrderedDict
 
+import yaml
+
 
 @dataclass
 class CacheEntry:
@@ -24,6 +31,7 @@ class CacheEntry:
     access_count: int = 0
     ttl_seconds: Optional[int] = None
     tags: List[str] = field(default_factory=list)
+    size_bytes: int = 0
 
 
 @dataclass
@@ -37,20 +45,472 @@ class CacheStats:
     total_entries: int
     total_size_bytes: int
     evictions: int
+    admission_rejections: int = 0
+
+
+class EvictionPolicy(ABC):
+    """
+    Interface for ResultCache eviction policies.
+
+    The cache reports inserts, hits, lookups and removals; when it is over
+    its entry or byte budget it asks the policy for victims one at a time.
+    """
+
+    @abstractmethod
+    def on_insert(self, entry: CacheEntry) -> None:
+        """A new entry was stored (replacements are a remove then an insert)."""
+
+    @abstractmethod
+    def on_access(self, entry: CacheEntry) -> None:
+        """An entry was read."""
+
+    @abstractmethod
+    def on_remove(self, key: str) -> None:
+        """An entry left the cache for any reason."""
+
+    @abstractmethod
+    def victim(self) -> Optional[str]:
+        """Key to evict next, or None if the policy tracks no entries."""
+
+    def on_lookup(self, key: str) -> None:
+        """A key was requested, whether or not it was cached."""
+
+    def clear(self) -> None:
+        """Forget every tracked entry."""
+
+
+class LRUPolicy(EvictionPolicy):
+    """Evict the least recently used entry."""
+
+    def __init__(self) -> None:
+        self._order: OrderedDict = OrderedDict()
+
+    def on_insert(self, entry: CacheEntry) -> None:
+        self._order[entry.key] = None
+
+    def on_access(self, entry: CacheEntry) -> None:
+        self._order.move_to_end(entry.key)
+
+    def on_remove(self, key: str) -> None:
+        self._order.pop(key, None)
+
+    def victim(self) -> Optional[str]:
+        return next(iter(self._order), None)
+
+    def clear(self) -> None:
+        self._order.clear()
+
+
+class LFUPolicy(EvictionPolicy):
+    """Evict the least frequently used entry, least recent first on ties.
+
+    Keys are bucketed by access count so every operation is O(1).
+    """
+
+    def __init__(self) -> None:
+        self._buckets: Dict[int, OrderedDict] = {}
+        self._counts: Dict[str, int] = {}
+        self._min_count = 0
+
+    def on_insert(self, entry: CacheEntry) -> None:
+        self._counts[entry.key] = 0
+        self._buckets.setdefault(0, OrderedDict())[entry.key] = None
+        self._min_count = 0
+
+    def on_access(self, entry: CacheEntry) -> None:
+        count = self._counts[entry.key]
+        self._unlink(entry.key, count)
+        self._counts[entry.key] = count + 1
+        self._buckets.setdefault(count + 1, OrderedDict())[entry.key] = None
+        if self._min_count == count and count not in self._buckets:
+            self._min_count = count + 1
+
+    def on_remove(self, key: str) -> None:
+        count = self._counts.pop(key, None)
+        if count is not None:
+            self._unlink(key, count)
+
+    def victim(self) -> Optional[str]:
+        if not self._counts:
+            return None
+        if self._min_count not in self._buckets:
+            # A removal emptied the lowest bucket
+            self._min_count = min(self._buckets)
+        return next(iter(self._buckets[self._min_count]))
+
+    def clear(self) -> None:
+        self._buckets.clear()
+        self._counts.clear()
+        self._min_count = 0
+
+    def _unlink(self, key: str, count: int) -> None:
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[count]
+
+
+# Halves every byte, for aging the frequency sketch
+_HALVE = bytes(value >> 1 for value in range(256))
+_MASK64 = (1 << 64) - 1
+# Unrelated odd 64-bit multipliers, one per sketch row
+_SKETCH_SEEDS = (
+    0x9E3779B97F4A7C15,
+    0xC2B2AE3D27D4EB4F,
+    0x165667B19E3779F9,
+    0xD6E8FEB86659FD93,
+    0xFF51AFD7ED558CCD,
+    0xC4CEB9FE1A85EC53,
+    0x94D049BB133111EB,
+    0xBF58476D1CE4E5B9,
+)
+
+
+class _FrequencySketch:
+    """Count-Min sketch of request frequencies with periodic aging.
+
+    Rows are four counters per cached entry wide to keep collisions rare.
+    Counters saturate at 15 and are all halved after ``10 * width``
+    increments, so the sketch tracks recent popularity.
+    """
+
+    def __init__(self, capacity: int, depth: int = 4) -> None:
+        width = 16
+        while width < 4 * capacity:
+            width <<= 1
+        # Multiply-shift hashing: the top bits of the key hash times a
+        # per-row odd constant give a near-independent index per row
+        self._shift = 64 - (width.bit_length() - 1)
+        self._rows = [bytearray(width) for _ in range(depth)]
+        self._seeds = _SKETCH_SEEDS[:depth]
+        self._sample_size = 10 * width
+        self._additions = 0
+
+    def increment(self, key: str) -> None:
+        base = hash(key) & _MASK64
+        shift = self._shift
+        for row, seed in zip(self._rows, self._seeds):
+            index = ((base * seed) & _MASK64) >> shift
+            if row[index] < 15:
+                row[index] += 1
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            self._rows = [row.translate(_HALVE) for row in self._rows]
+            self._additions //= 2
+
+    def estimate(self, key: str) -> int:
+        base = hash(key) & _MASK64
+        shift = self._shift
+        return min(
+            row[((base * seed) & _MASK64) >> shift]
+            for row, seed in zip(self._rows, self._seeds)
+        )
+
+
+class TinyLFUPolicy(EvictionPolicy):
+    """W-TinyLFU: a small LRU admission window in front of an LRU main region.
+
+    New entries enter the window, which holds ``window_fraction`` of the
+    tracked bytes. Entries pushed out of the window join the main region as
+    candidates; while the cache must evict, each candidate survives only as
+    long as the frequency sketch says it is requested more often than the
+    main region's LRU victim, so one-off requests cannot flush popular
+    entries.
+    """
+
+    def __init__(self, capacity: int, window_fraction: float = 0.01) -> None:
+        self._window: OrderedDict = OrderedDict()
+        self._main: OrderedDict = OrderedDict()
+        self._candidates: List[str] = []
+        self._sizes: Dict[str, int] = {}
+        self._window_bytes = 0
+        self._total_bytes = 0
+        self._window_fraction = window_fraction
+        self._sketch = _FrequencySketch(capacity)
+        self.rejections = 0
+
+    def on_lookup(self, key: str) -> None:
+        self._sketch.increment(key)
+
+    def on_insert(self, entry: CacheEntry) -> None:
+        # Candidates left from the previous insert were admitted
+        self._candidates.clear()
+        size = max(entry.size_bytes, 1)
+        self._sizes[entry.key] = size
+        self._window[entry.key] = None
+        self._window_bytes += size
+        self._total_bytes += size
+
+        limit = self._total_bytes * self._window_fraction
+        while self._window and self._window_bytes > limit:
+            key, _ = self._window.popitem(last=False)
+            self._window_bytes -= self._sizes[key]
+            self._main[key] = None
+            self._candidates.append(key)
+
+    def on_access(self, entry: CacheEntry) -> None:
+        if entry.key in self._window:
+            self._window.move_to_end(entry.key)
+        else:
+            self._main.move_to_end(entry.key)
+
+    def on_remove(self, key: str) -> None:
+        size = self._sizes.pop(key, None)
+        if size is None:
+            return
+        self._total_bytes -= size
+        if key in self._window:
+            del self._window[key]
+            self._window_bytes -= size
+            return
+        del self._main[key]
+        if key in self._candidates:
+            self._candidates.remove(key)
+
+    def victim(self) -> Optional[str]:
+        victim = next(iter(self._main), None)
+        if victim is None:
+            return next(iter(self._window), None)
+        if self._candidates:
+            candidate = self._candidates[-1]
+            if candidate != victim and (
+                self._sketch.estimate(candidate) <= self._sketch.estimate(victim)
+            ):
+                self.rejections += 1
+                return candidate
+        return victim
+
+    def clear(self) -> None:
+        self._window.clear()
+        self._main.clear()
+        self._candidates.clear()
+        self._sizes.clear()
+        self._window_bytes = 0
+        self._total_bytes = 0
+
+
+class CostAwarePolicy(EvictionPolicy):
+    """GreedyDual-Size-Frequency: keep entries that are costly to recompute.
+
+    An entry's priority is ``L + hits * miss_cost / size_bytes``, where L
+    is the priority of the last evicted entry, so cheap, large or cold
+    entries go first and idle entries age out as L rises.
+    """
+
+    def __init__(self, miss_cost: Callable[[CacheEntry], float]) -> None:
+        self._miss_cost = miss_cost
+        self._heap: List[Tuple[float, int, str]] = []
+        self._priority: Dict[str, float] = {}
+        self._value: Dict[str, float] = {}
+        self._hits: Dict[str, int] = {}
+        self._inflation = 0.0
+        self._sequence = 0
+
+    def on_insert(self, entry: CacheEntry) -> None:
+        self._value[entry.key] = max(self._miss_cost(entry), 1e-9) / max(entry.size_bytes, 1)
+        self._hits[entry.key] = 1
+        self._push(entry.key)
+
+    def on_access(self, entry: CacheEntry) -> None:
+        self._hits[entry.key] += 1
+        self._push(entry.key)
+
+    def on_remove(self, key: str) -> None:
+        self._priority.pop(key, None)
+        self._value.pop(key, None)
+        self._hits.pop(key, None)
+
+    def victim(self) -> Optional[str]:
+        heap = self._heap
+        while heap:
+            priority, _, key = heap[0]
+            if self._priority.get(key) == priority:
+                self._inflation = priority
+                return key
+            heapq.heappop(heap)
+        return None
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self._priority.clear()
+        self._value.clear()
+        self._hits.clear()
+        self._inflation = 0.0
+
+    def _push(self, key: str) -> None:
+        priority = self._inflation + self._hits[key] * self._value[key]
+        self._priority[key] = priority
+        self._sequence += 1
+        heapq.heappush(self._heap, (priority, self._sequence, key))
+        if len(self._heap) > 2 * len(self._priority) + 64:
+            # Drop superseded heap items
+            self._heap = [
+                item for item in self._heap if self._priority.get(item[2]) == item[0]
+            ]
+            heapq.heapify(self._heap)
+
+
+@dataclass
+class CacheRule:
+    """One ``cache_rules`` entry: keys matching ``pattern`` get this TTL.
+
+    Attributes:
+        pattern: Regular expression matched against the start of the key
+        ttl_seconds: Time-to-live for matching keys (None = cache default)
+        enabled: Whether matching keys are cached at all
+    """
+
+    pattern: str
+    ttl_seconds: Optional[int] = None
+    enabled: bool = True
+
+
+class CacheRules:
+    """
+    Ordered cache rules compiled into a single regular expression.
+
+    Later rules take precedence, so a config listing a catch-all ``.*``
+    first and specific prefixes after it behaves as expected. Rules match
+    the cache key; keys built with ``generate_key(..., namespace=...)``
+    start with their namespace, e.g. ``real_time:<hash>``.
+    """
+
+    def __init__(self, rules: List[Union[CacheRule, Dict[str, Any]]]) -> None:
+        """Compile the rules.
+
+        Args:
+            rules: CacheRule objects or ``cache_rules`` dicts with
+                "pattern", optional "ttl" and optional "enabled"
+        """
+        self.rules: List[CacheRule] = [
+            rule if isinstance(rule, CacheRule) else CacheRule(
+                pattern=rule["pattern"],
+                ttl_seconds=rule.get("ttl"),
+                enabled=rule.get("enabled", True)
+            )
+            for rule in rules
+        ]
+
+        # One alternation, last rule first: re.match tries alternatives in
+        # order, so the first that matches is the highest-precedence rule.
+        # Each rule is wrapped in a group whose number maps back to it.
+        alternatives = []
+        self._rule_by_group: Dict[int, CacheRule] = {}
+        group = 1
+        for rule in reversed(self.rules):
+            alternatives.append(f"({rule.pattern})")
+            self._rule_by_group[group] = rule
+            group += 1 + re.compile(rule.pattern).groups
+        self._pattern = re.compile("|".join(alternatives)) if alternatives else None
+
+    @classmethod
+    def from_config(cls, config_path: str = "config/optimization.yaml") -> "CacheRules":
+        """Load ``caching.cache_rules`` from the config.
+
+        Args:
+            config_path: Path to optimization.yaml
+
+        Returns:
+            Compiled CacheRules
+        """
+        path = Path(config_path)
+        if not path.exists():
+            raise FileNotFoundError(f"YAML file not found: {config_path}")
+
+        with open(path, 'r') as f:
+            data = yaml.safe_load(f) or {}
+
+        return cls((data.get("caching") or {}).get("cache_rules") or [])
+
+    def match(self, key: str) -> Optional[CacheRule]:
+        """Return the highest-precedence rule matching a key, if any.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Matching CacheRule or None
+        """
+        if self._pattern is None:
+            return None
+        found = self._pattern.match(key)
+        if found is None:
+            return None
+        # A rule's wrapper group closes after any groups inside it
+        return self._rule_by_group.get(found.lastindex)
+
+    def is_enabled(self, key: str) -> bool:
+        """Whether a key may be cached (keys matching no rule may)."""
+        rule = self.match(key)
+        return rule is None or rule.enabled
+
+    def ttl_for(self, key: str, default: Optional[int] = None) -> Optional[int]:
+        """TTL for a key: its rule's TTL, or ``default`` if none is set.
+
+        Args:
+            key: Cache key
+            default: TTL used when no rule, or a rule without a TTL, matches
+
+        Returns:
+            TTL in seconds, or None for no expiry
+        """
+        rule = self.match(key)
+        if rule is None or rule.ttl_seconds is None:
+            return default
+        return rule.ttl_seconds
+
+
+EVICTION_POLICIES = ("lru", "lfu", "tinylfu", "cost")
+
+
+def _hashable(value: Any) -> bool:
+    """Whether a metadata value can key the metadata index."""
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+def _result_size(result: Any) -> int:
+    """Approximate memory cost of a cached result, in serialized bytes."""
+    try:
+        return len(json.dumps(result).encode())
+    except (TypeError, ValueError):
+        return len(repr(result).encode())
 
 
 class ResultCache:
     """Cache for LLM responses to reduce API calls and costs.
 
     This cache uses semantic hashing to identify similar requests and
-    implements LRU eviction with TTL support for memory management.
+    implements pluggable eviction (LRU by default) with TTL support for
+    memory management.
+
+    Entries are byte-accounted by their serialized size, and the cache is
+    bounded by entry count and, optionally, total bytes. Expiry times sit
+    in a heap so cleanup only touches entries that are actually due.
+
+    Entries whose metadata carries a "prompt" are also indexed by prompt
+    token, per "model", so similar-prompt lookups only verify entries that
+    can reach the similarity threshold instead of scanning the whole cache.
+    Tags and metadata values are indexed too, so tag invalidation and
+    metadata search touch only matching entries. Change metadata through
+    ``update_metadata`` to keep the index current.
+
+    Optional cache rules, compiled once, set each key's TTL or exclude it
+    from caching when ``set`` is called without an explicit TTL.
     """
 
     def __init__(
         self,
         max_size: int = 1000,
         default_ttl_seconds: Optional[int] = 3600,
-        similarity_threshold: float = 0.95
+        similarity_threshold: float = 0.95,
+        max_size_bytes: Optional[int] = None,
+        eviction_policy: Union[str, EvictionPolicy] = "lru",
+        cost_tracker: Optional[Any] = None,
+        cache_rules: Optional[Union[CacheRules, List[Dict[str, Any]]]] = None
     ) -> None:
         """Initialize the result cache.
 
@@ -58,27 +518,138 @@ class ResultCache:
             max_size: Maximum number of entries in cache
             default_ttl_seconds: Default time-to-live for entries (None = no expiry)
             similarity_threshold: Threshold for semantic similarity matching (0.0-1.0)
+            max_size_bytes: Optional bound on the total size of cached results
+            eviction_policy: "lru", "lfu", "tinylfu", "cost" or a policy instance
+            cost_tracker: CostTracker whose pricing values entries under the
+                "cost" policy
+            cache_rules: CacheRules or ``cache_rules`` dicts mapping key
+                patterns to TTLs
         """
         self._cache: OrderedDict[str, CacheEntry] = OrderedDict()
         self._max_size = max_size
+        self._max_size_bytes = max_size_bytes
         self._default_ttl_seconds = default_ttl_seconds
         self._similarity_threshold = similarity_threshold
+        self._cost_tracker = cost_tracker
+        if cache_rules is not None and not isinstance(cache_rules, CacheRules):
+            cache_rules = CacheRules(cache_rules)
+        self._rules = cache_rules
+        self._policy = self._create_policy(eviction_policy)
+        self._total_bytes = 0
+
+        # Expiry heap of (expires_at, sequence, key); items whose sequence no
+        # longer matches the key's entry are stale and skipped
+        self._expiry_heap: List[Tuple[float, int, str]] = []
+        self._expiry_sequence: Dict[str, int] = {}
+        self._next_expiry_sequence = 0
+
+        # Similar-prompt index: model -> token -> token count -> keys,
+        # plus each key's tokens
+        self._token_index: Dict[Any, Dict[str, Dict[int, Set[str]]]] = {}
+        self._entry_tokens: Dict[str, Tuple[Any, FrozenSet[str]]] = {}
+        # Tag -> keys, and metadata field -> value -> keys (hashable values)
+        self._tag_index: Dict[str, Set[str]] = {}
+        self._metadata_index: Dict[str, Dict[Any, Set[str]]] = {}
+        # What each key was indexed under, so removal doesn't depend on the
+        # entry's current (possibly mutated) tags and metadata
+        self._entry_fields: Dict[str, Tuple[Tuple[str, ...], Tuple[Tuple[str, Any], ...]]] = {}
+        # Recency sequence mirroring the OrderedDict order, for tie-breaking
+        self._recency: Dict[str, int] = {}
+        self._next_recency = 0
 
         # Statistics tracking
         self._stats = {
             "total_requests": 0,
             "cache_hits": 0,
             "cache_misses": 0,
-            "evictions": 0
+            "evictions": 0,
+            "admission_rejections": 0
         }
 
+    @classmethod
+    def from_config(
+        cls,
+        config_path: str = "config/optimization.yaml",
+        cost_tracker: Optional[Any] = None
+    ) -> "ResultCache":
+        """Create a cache from the ``caching`` section of the config.
+
+        Uses ``max_entries``, ``ttl_seconds``, ``memory.max_size_mb``,
+        ``memory.eviction_policy``, ``semantic_similarity.threshold`` and
+        ``cache_rules``.
+
+        Args:
+            config_path: Path to optimization.yaml
+            cost_tracker: CostTracker used by the "cost" eviction policy
+
+        Returns:
+            Configured ResultCache
+        """
+        path = Path(config_path)
+        if not path.exists():
+            raise FileNotFoundError(f"YAML file not found: {config_path}")
+
+        with open(path, 'r') as f:
+            data = yaml.safe_load(f) or {}
+
+        caching = data.get("caching") or {}
+        memory = caching.get("memory") or {}
+        max_size_mb = memory.get("max_size_mb")
+        return cls(
+            max_size=caching.get("max_entries", 1000),
+            default_ttl_seconds=caching.get("ttl_seconds", 3600),
+            similarity_threshold=(caching.get("semantic_similarity") or {}).get("threshold", 0.95),
+            max_size_bytes=int(max_size_mb * 1024 * 1024) if max_size_mb else None,
+            eviction_policy=memory.get("eviction_policy", "lru"),
+            cost_tracker=cost_tracker,
+            cache_rules=CacheRules(caching.get("cache_rules") or [])
+        )
+
+    def _create_policy(self, policy: Union[str, EvictionPolicy]) -> EvictionPolicy:
+        """Build the eviction policy named in the constructor."""
+        if isinstance(policy, EvictionPolicy):
+            return policy
+        name = policy.lower().replace("-", "")
+        if name == "lru":
+            return LRUPolicy()
+        if name == "lfu":
+            return LFUPolicy()
+        if name in ("tinylfu", "wtinylfu"):
+            return TinyLFUPolicy(self._max_size)
+        if name == "cost":
+            return CostAwarePolicy(self._miss_cost)
+        raise ValueError(
+            f"Unknown eviction policy: {policy} (expected one of {', '.join(EVICTION_POLICIES)})"
+        )
+
+    def _miss_cost(self, entry: CacheEntry) -> float:
+        """Dollar cost of recomputing an entry on a miss.
+
+        Uses metadata "cost" if present, otherwise prices metadata
+        "input_tokens"/"output_tokens" (or "tokens_used" as output) for
+        metadata "model" with the cost tracker.
+        """
+        metadata = entry.metadata
+        cost = metadata.get("cost")
+        if isinstance(cost, (int, float)):
+            return float(cost)
+        model = metadata.get("model")
+        if self._cost_tracker is None or not model:
+            return 0.0
+        return self._cost_tracker.estimate_call_cost(
+            model,
+            metadata.get("input_tokens", 0),
+            metadata.get("output_tokens", metadata.get("tokens_used", 0))
+        )
+
     def generate_key(
         self,
         prompt: str,
         model: str = "default",
         parameters: Optional[Dict[str, Any]] = None,
         context: Optional[Dict[str, Any]] = None,
-        use_semantic: bool = True
+        use_semantic: bool = True,
+        namespace: Optional[str] = None
     ) -> str:
         """Generate a cache key for a request.
 
@@ -88,9 +659,11 @@ class ResultCache:
             parameters: Model parameters (temperature, max_tokens, etc.)
             context: Additional context that affects the response
             use_semantic: Whether to use semantic hashing (ignores minor variations)
+            namespace: Optional prefix (e.g. "real_time") that cache rules
+                can match
 
         Returns:
-            Cache key as a hex string
+            Cache key as a hex string, prefixed with "<namespace>:" if given
         """
         parameters = parameters or {}
         context = context or {}
@@ -117,6 +690,9 @@ class ResultCache:
         key_string = json.dumps(key_data, sort_keys=True)
         cache_key = hashlib.sha256(key_string.encode()).hexdigest()
 
+        if namespace:
+            cache_key = f"{namespace}:{cache_key}"
+
         return cache_key
 
     def get(
@@ -134,32 +710,90 @@ class ResultCache:
             Cached result if found and valid, None otherwise
         """
         self._stats["total_requests"] += 1
+        self._policy.on_lookup(key)
 
-        if key not in self._cache:
+        entry = self._get_live_entry(key)
+        if entry is None:
             self._stats["cache_misses"] += 1
             return None
 
-        entry = self._cache[key]
+        # Update access information
+        if update_access:
+            self._touch(entry)
+
+        self._stats["cache_hits"] += 1
+        return entry.result
+
+    def get_or_similar(
+        self,
+        prompt: str,
+        model: str = "default",
+        parameters: Optional[Dict[str, Any]] = None,
+        context: Optional[Dict[str, Any]] = None,
+        threshold: Optional[float] = None,
+        update_access: bool = True
+    ) -> Optional[Any]:
+        """Retrieve a result by exact key, falling back to the most similar prompt.
+
+        The exact semantic key is tried first; on a miss the best entry
+        for the same model whose prompt similarity reaches the threshold
+        is returned. Counts as a single cache request.
+
+        Args:
+            prompt: The user's request text
+            model: Model identifier
+            parameters: Model parameters used to build the exact key
+            context: Additional context used to build the exact key
+            threshold: Similarity threshold (uses instance default if None)
+            update_access: Whether to update access time and count
+
+        Returns:
+            Cached result if found and valid, None otherwise
+        """
+        self._stats["total_requests"] += 1
+
+        key = self.generate_key(prompt, model=model, parameters=parameters, context=context)
+        self._policy.on_lookup(key)
+        entry = self._get_live_entry(key)
+
+        if entry is None:
+            for similar_key, _, _ in self._similar_entries(prompt, model, threshold):
+                entry = self._get_live_entry(similar_key)
+                if entry is not None:
+                    break
+
+        if entry is None:
+            self._stats["cache_misses"] += 1
+            return None
+
+        if update_access:
+            self._touch(entry)
+
+        self._stats["cache_hits"] += 1
+        return entry.result
+
+    def _get_live_entry(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry for a key, removing it if it has expired."""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
 
         # Check if entry has expired
         if entry.ttl_seconds is not None:
             age = (datetime.now() - entry.created_at).total_seconds()
             if age > entry.ttl_seconds:
                 # Entry expired, remove it
-                del self._cache[key]
-                self._stats["cache_misses"] += 1
+                self._remove(key)
                 return None
 
-        # Update access information
-        if update_access:
-            entry.last_accessed = datetime.now()
-            entry.access_count += 1
-
-            # Move to end (most recently used)
-            self._cache.move_to_end(key)
+        return entry
 
-        self._stats["cache_hits"] += 1
-        return entry.result
+    def _touch(self, entry: CacheEntry) -> None:
+        """Record an access and mark the entry most recently used."""
+        entry.last_accessed = datetime.now()
+        entry.access_count += 1
+        self._mark_recent(entry.key)
+        self._policy.on_access(entry)
 
     def set(
         self,
@@ -171,23 +805,41 @@ class ResultCache:
     ) -> None:
         """Store a result in the cache.
 
+        Expired entries are reclaimed first; if the cache is then over its
+        entry or byte budget the eviction policy picks victims, which under
+        W-TinyLFU may be the new entry itself. Results larger than the
+        whole byte budget, and keys whose cache rule is disabled, are not
+        cached.
+
         Args:
             key: Cache key
             result: Result to cache
             metadata: Optional metadata about the result
-            ttl_seconds: Time-to-live in seconds (None uses default)
+            ttl_seconds: Time-to-live in seconds (None uses the matching
+                cache rule, then the default)
             tags: Optional tags for categorization
         """
         metadata = metadata or {}
         tags = tags or []
 
-        # Use default TTL if not specified
+        rule = self._rules.match(key) if self._rules is not None else None
+        if rule is not None and not rule.enabled:
+            if key in self._cache:
+                self._remove(key)
+            return
+
+        # Use the rule's or the default TTL if not specified
         if ttl_seconds is None:
             ttl_seconds = self._default_ttl_seconds
+            if rule is not None and rule.ttl_seconds is not None:
+                ttl_seconds = rule.ttl_seconds
 
-        # Check if we need to evict entries
-        if len(self._cache) >= self._max_size and key not in self._cache:
-            self._evict_lru()
+        size_bytes = _result_size(result)
+        if self._max_size_bytes is not None and size_bytes > self._max_size_bytes:
+            self._stats["admission_rejections"] += 1
+            if key in self._cache:
+                self._remove(key)
+            return
 
         # Create cache entry
         entry = CacheEntry(
@@ -195,14 +847,28 @@ class ResultCache:
             result=result,
             metadata=metadata,
             ttl_seconds=ttl_seconds,
-            tags=tags
+            tags=tags,
+            size_bytes=size_bytes
         )
 
         # Store in cache
+        if key in self._cache:
+            self._remove(key)
         self._cache[key] = entry
+        self._total_bytes += size_bytes
+        self._index_prompt(entry)
+        self._index_fields(entry)
+        self._policy.on_insert(entry)
+        if ttl_seconds is not None:
+            self._schedule_expiry(entry)
 
         # Move to end (most recently used)
-        self._cache.move_to_end(key)
+        self._mark_recent(key)
+
+        if self._over_budget():
+            self.cleanup_expired()
+            while self._over_budget() and self._evict():
+                pass
 
     def invalidate(self, key: str) -> bool:
         """Invalidate a cache entry.
@@ -214,7 +880,7 @@ class ResultCache:
             True if entry was found and removed, False otherwise
         """
         if key in self._cache:
-            del self._cache[key]
+            self._remove(key)
             return True
         return False
 
@@ -227,19 +893,26 @@ class ResultCache:
         Returns:
             Number of entries invalidated
         """
-        keys_to_remove = [
-            key for key, entry in self._cache.items()
-            if tag in entry.tags
-        ]
+        keys_to_remove = list(self._tag_index.get(tag, ()))
 
         for key in keys_to_remove:
-            del self._cache[key]
+            self._remove(key)
 
         return len(keys_to_remove)
 
     def clear(self) -> None:
         """Clear all entries from the cache."""
         self._cache.clear()
+        self._token_index.clear()
+        self._entry_tokens.clear()
+        self._tag_index.clear()
+        self._metadata_index.clear()
+        self._entry_fields.clear()
+        self._recency.clear()
+        self._policy.clear()
+        self._total_bytes = 0
+        self._expiry_heap.clear()
+        self._expiry_sequence.clear()
 
     def get_stats(self) -> CacheStats:
         """Get cache statistics.
@@ -251,20 +924,18 @@ class ResultCache:
         cache_hits = self._stats["cache_hits"]
         hit_rate = (cache_hits / total_requests * 100) if total_requests > 0 else 0
 
-        # Estimate cache size
-        total_size = sum(
-            len(json.dumps(entry.result).encode())
-            for entry in self._cache.values()
-        )
-
         return CacheStats(
             total_requests=total_requests,
             cache_hits=cache_hits,
             cache_misses=self._stats["cache_misses"],
             hit_rate=round(hit_rate, 2),
             total_entries=len(self._cache),
-            total_size_bytes=total_size,
-            evictions=self._stats["evictions"]
+            total_size_bytes=self._total_bytes,
+            evictions=self._stats["evictions"],
+            admission_rejections=(
+                self._stats["admission_rejections"]
+                + getattr(self._policy, "rejections", 0)
+            )
         )
 
     def get_entry(self, key: str) -> Optional[CacheEntry]:
@@ -284,15 +955,34 @@ class ResultCache:
     ) -> List[Tuple[str, CacheEntry]]:
         """Search cache entries by metadata.
 
+        The smallest index posting among the filter's fields is verified
+        against the whole filter; the cache is only scanned when no field
+        can use the index (None or unhashable values).
+
         Args:
             metadata_filter: Dictionary of metadata key-value pairs to match
 
         Returns:
-            List of (key, entry) tuples matching the filter
+            List of (key, entry) tuples matching the filter, least recently
+            used first
         """
+        candidates: Optional[Set[str]] = None
+        for field_name, value in metadata_filter.items():
+            if value is None or not _hashable(value):
+                continue
+            keys = self._metadata_index.get(field_name, {}).get(value, set())
+            if candidates is None or len(keys) < len(candidates):
+                candidates = keys
+
+        if candidates is None:
+            items = self._cache.items()
+        else:
+            ordered = sorted(candidates, key=self._recency.__getitem__)
+            items = [(key, self._cache[key]) for key in ordered]
+
         results = []
 
-        for key, entry in self._cache.items():
+        for key, entry in items:
             # Check if all filter criteria match
             if all(
                 entry.metadata.get(k) == v
@@ -322,22 +1012,46 @@ class ResultCache:
     def cleanup_expired(self) -> int:
         """Remove all expired entries from the cache.
 
+        Pops due items off the expiry heap, so the cost is proportional to
+        the number of expired entries rather than the cache size.
+
         Returns:
             Number of entries removed
         """
-        now = datetime.now()
-        keys_to_remove = []
-
-        for key, entry in self._cache.items():
-            if entry.ttl_seconds is not None:
-                age = (now - entry.created_at).total_seconds()
-                if age > entry.ttl_seconds:
-                    keys_to_remove.append(key)
-
-        for key in keys_to_remove:
-            del self._cache[key]
-
-        return len(keys_to_remove)
+        now = datetime.now().timestamp()
+        heap = self._expiry_heap
+        removed = 0
+
+        while heap and heap[0][0] < now:
+            _, sequence, key = heapq.heappop(heap)
+            if self._expiry_sequence.get(key) == sequence:
+                self._remove(key)
+                removed += 1
+
+        return removed
+
+    def _schedule_expiry(self, entry: CacheEntry) -> None:
+        """Push an entry's expiry time onto the expiry heap."""
+        sequence = self._next_expiry_sequence
+        self._next_expiry_sequence += 1
+        self._expiry_sequence[entry.key] = sequence
+        heapq.heappush(
+            self._expiry_heap,
+            (entry.created_at.timestamp() + entry.ttl_seconds, sequence, entry.key)
+        )
+        if len(self._expiry_heap) > 2 * len(self._expiry_sequence) + 64:
+            # Drop items for removed or replaced entries
+            self._expiry_heap = [
+                item for item in self._expiry_heap
+                if self._expiry_sequence.get(item[2]) == item[1]
+            ]
+            heapq.heapify(self._expiry_heap)
+
+    def _over_budget(self) -> bool:
+        """Whether the cache holds more entries or bytes than allowed."""
+        return len(self._cache) > self._max_size or (
+            self._max_size_bytes is not None and self._total_bytes > self._max_size_bytes
+        )
 
     def _normalize_prompt(self, prompt: str) -> str:
         """Normalize a prompt for semantic matching.
@@ -360,12 +1074,105 @@ class ResultCache:
 
         return normalized
 
-    def _evict_lru(self) -> None:
-        """Evict the least recently used entry."""
-        if self._cache:
-            # Remove first item (least recently used)
-            self._cache.popitem(last=False)
-            self._stats["evictions"] += 1
+    def _evict(self) -> bool:
+        """Evict the eviction policy's victim, returning False if none."""
+        key = self._policy.victim()
+        if key is None or key not in self._cache:
+            return False
+        self._remove(key)
+        self._stats["evictions"] += 1
+        return True
+
+    def _remove(self, key: str) -> None:
+        """Delete an entry and drop it from the prompt index and policy."""
+        entry = self._cache.pop(key)
+        self._total_bytes -= entry.size_bytes
+        self._recency.pop(key, None)
+        self._expiry_sequence.pop(key, None)
+        self._unindex_prompt(key)
+        self._unindex_fields(key)
+        self._policy.on_remove(key)
+
+    def _mark_recent(self, key: str) -> None:
+        """Move a key to the most recently used position."""
+        self._cache.move_to_end(key)
+        self._recency[key] = self._next_recency
+        self._next_recency += 1
+
+    def _prompt_tokens(self, prompt: str) -> FrozenSet[str]:
+        """Token set of a normalized prompt, as compared by similarity."""
+        return frozenset(self._normalize_prompt(prompt).split())
+
+    def _index_prompt(self, entry: CacheEntry) -> None:
+        """Add an entry's prompt tokens to its model's inverted index."""
+        prompt = entry.metadata.get("prompt")
+        if not isinstance(prompt, str):
+            return
+
+        tokens = self._prompt_tokens(prompt)
+        if not tokens:
+            return
+
+        model = entry.metadata.get("model")
+        postings = self._token_index.setdefault(model, {})
+        size = len(tokens)
+        for token in tokens:
+            postings.setdefault(token, {}).setdefault(size, set()).add(entry.key)
+        self._entry_tokens[entry.key] = (model, tokens)
+
+    def _unindex_prompt(self, key: str) -> None:
+        """Remove a key from the prompt index."""
+        indexed = self._entry_tokens.pop(key, None)
+        if indexed is None:
+            return
+
+        model, tokens = indexed
+        postings = self._token_index[model]
+        size = len(tokens)
+        for token in tokens:
+            by_size = postings[token]
+            keys = by_size[size]
+            keys.discard(key)
+            if not keys:
+                del by_size[size]
+                if not by_size:
+                    del postings[token]
+        if not postings:
+            del self._token_index[model]
+
+    def _index_fields(self, entry: CacheEntry) -> None:
+        """Add an entry's tags and hashable metadata values to the indexes."""
+        tags = tuple(set(entry.tags))
+        fields = tuple(
+            (field_name, value) for field_name, value in entry.metadata.items()
+            if _hashable(value)
+        )
+        for tag in tags:
+            self._tag_index.setdefault(tag, set()).add(entry.key)
+        for field_name, value in fields:
+            self._metadata_index.setdefault(field_name, {}).setdefault(value, set()).add(entry.key)
+        self._entry_fields[entry.key] = (tags, fields)
+
+    def _unindex_fields(self, key: str) -> None:
+        """Remove a key from the tag and metadata indexes."""
+        indexed = self._entry_fields.pop(key, None)
+        if indexed is None:
+            return
+
+        tags, fields = indexed
+        for tag in tags:
+            keys = self._tag_index[tag]
+            keys.discard(key)
+            if not keys:
+                del self._tag_index[tag]
+        for field_name, value in fields:
+            by_value = self._metadata_index[field_name]
+            keys = by_value[value]
+            keys.discard(key)
+            if not keys:
+                del by_value[value]
+                if not by_value:
+                    del self._metadata_index[field_name]
 
     def _calculate_similarity(self, prompt1: str, prompt2: str) -> float:
         """Calculate semantic similarity between two prompts.
@@ -405,7 +1212,71 @@ class ResultCache:
         Returns:
             List of (key, entry, similarity) tuples above threshold
         """
+        return self._similar_entries(prompt, model, threshold)
+
+    def _similar_entries(
+        self,
+        prompt: str,
+        model: str,
+        threshold: Optional[float]
+    ) -> List[Tuple[str, CacheEntry, float]]:
+        """Find similar entries through the per-model token index.
+
+        Any entry with Jaccard similarity >= t shares at least ceil(t * |Q|)
+        tokens with the query Q, so it must contain one of any
+        |Q| - ceil(t * |Q|) + 1 query tokens. Only the postings of the
+        rarest such tokens are probed; candidates are then verified exactly.
+        """
         threshold = threshold or self._similarity_threshold
+
+        if threshold <= 0:
+            # Every entry for the model qualifies, even with no shared tokens
+            return self._scan_similar(prompt, model, threshold)
+
+        query = self._prompt_tokens(prompt)
+        postings = self._token_index.get(model)
+        if not query or not postings:
+            return []
+
+        query_size = len(query)
+        required = max(1, math.ceil(threshold * query_size - 1e-9))
+        prefix_length = query_size - required + 1
+        if prefix_length <= 0:
+            return []
+
+        # Size filter: Jaccard can't reach threshold if sizes differ too much
+        min_size = required
+        max_size = math.floor(query_size / threshold + 1e-9)
+
+        def posting_count(token: str) -> int:
+            return sum(len(keys) for keys in postings.get(token, {}).values())
+
+        candidates: Set[str] = set()
+        for token in sorted(query, key=posting_count)[:prefix_length]:
+            for size, keys in postings.get(token, {}).items():
+                if min_size <= size <= max_size:
+                    candidates.update(keys)
+
+        results = []
+        for key in candidates:
+            tokens = self._entry_tokens[key][1]
+            intersection = len(query & tokens)
+            similarity = intersection / (query_size + len(tokens) - intersection)
+            if similarity >= threshold:
+                results.append((key, self._cache[key], similarity))
+
+        # Sort by similarity (highest first), least recently used first on ties
+        results.sort(key=lambda x: (-x[2], self._recency[x[0]]))
+
+        return results
+
+    def _scan_similar(
+        self,
+        prompt: str,
+        model: str,
+        threshold: float
+    ) -> List[Tuple[str, CacheEntry, float]]:
+        """Compare the prompt against every cached entry for the model."""
         results = []
 
         for key, entry in self._cache.items():
@@ -445,10 +1316,16 @@ class ResultCache:
             return False
 
         entry = self._cache[key]
+        self._unindex_fields(key)
 
         if merge:
             entry.metadata.update(metadata)
         else:
             entry.metadata = metadata
 
+        # Prompt or model may have changed
+        self._unindex_prompt(key)
+        self._index_prompt(entry)
+        self._index_fields(entry)
+
         return True
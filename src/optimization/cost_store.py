@@ -0,0 +1,876 @@
+"""Columnar cost record storage for fast analytics queries.
+
+This module provides the CostRecordStore class which keeps cost records
+in NumPy columns split into time partitions. String dimensions (category,
+agent, user, task, model) are dictionary-encoded, time-range queries only
+touch overlapping partitions, and group-bys are vectorized with bincount.
+Older partitions can optionally be spilled to a SQLite file, and old records
+can be compacted into per-interval rollups, to bound memory.
+"""
+
+import bisect
+import json
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_HOUR_US = 3600 * 1_000_000
+_DAY_US = 24 * _HOUR_US
+
+# Dimensions that are dictionary-encoded, in row order after the timestamp
+DIMENSIONS = ("category", "agent", "user", "task", "model")
+
+_COLUMN_DTYPES = {
+    "timestamp": np.int64,
+    "amount": np.float64,
+    "tokens": np.int64,
+    "count": np.int64,  # Records represented by the row (> 1 for rollups)
+    "category": np.int32,
+    "agent": np.int32,
+    "user": np.int32,
+    "task": np.int32,
+    "model": np.int32,
+}
+
+# A row as exposed by the store:
+# (timestamp, category, amount, agent_id, user_id, task_id, model_name, tokens_used, metadata)
+CostRow = Tuple[
+    datetime, str, float, Optional[str], Optional[str], Optional[str], Optional[str], int, Dict[str, Any]
+]
+
+
+def to_micros(timestamp: datetime) -> int:
+    """Convert a (naive, wall-clock) datetime to integer microseconds since 1970."""
+    return (timestamp.replace(tzinfo=None) - _EPOCH) // _MICROSECOND
+
+
+def from_micros(micros: int) -> datetime:
+    """Convert integer microseconds since 1970 back to a naive datetime."""
+    return _EPOCH + timedelta(microseconds=int(micros))
+
+
+_INTERVAL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def parse_interval(interval: str) -> int:
+    """Parse an interval such as "5m", "1h" or "1d" into seconds.
+
+    Args:
+        interval: Number followed by s, m, h, d or w
+
+    Returns:
+        Interval length in seconds
+    """
+    interval = interval.strip().lower()
+    unit = _INTERVAL_UNITS.get(interval[-1:]) if interval else None
+    if unit is None or not interval[:-1].isdigit() or int(interval[:-1]) <= 0:
+        raise ValueError(f"Invalid interval: {interval!r}")
+    return int(interval[:-1]) * unit
+
+
+class _StringDictionary:
+    """Dictionary encoding of optional strings to dense int codes (None = -1)."""
+
+    def __init__(self) -> None:
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def encode(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, value: str) -> Optional[int]:
+        return self.codes.get(value)
+
+    def decode(self, code: int) -> Optional[str]:
+        return self.values[code] if code >= 0 else None
+
+
+class _Partition:
+    """Growable NumPy columns for the records of one time partition."""
+
+    def __init__(self, key: int, capacity: int = 1024) -> None:
+        self.key = key
+        self.size = 0
+        self.columns = {
+            name: np.empty(capacity, dtype=dtype) for name, dtype in _COLUMN_DTYPES.items()
+        }
+        self.metadata: List[Optional[Dict[str, Any]]] = []
+
+    def column(self, name: str) -> "np.ndarray":
+        return self.columns[name][: self.size]
+
+    def _reserve(self, extra: int) -> None:
+        capacity = len(self.columns["timestamp"])
+        needed = self.size + extra
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name, values in self.columns.items():
+            grown = np.empty(capacity, dtype=values.dtype)
+            grown[: self.size] = values[: self.size]
+            self.columns[name] = grown
+
+    def append(self, values: Dict[str, Any], metadata: Optional[Dict[str, Any]]) -> None:
+        self._reserve(1)
+        position = self.size
+        for name, value in values.items():
+            self.columns[name][position] = value
+        self.metadata.append(metadata)
+        self.size += 1
+
+    def extend(self, values: Dict[str, "np.ndarray"], metadata: List[Optional[Dict[str, Any]]]) -> None:
+        count = len(metadata)
+        self._reserve(count)
+        for name, column in values.items():
+            self.columns[name][self.size:self.size + count] = column
+        self.metadata.extend(metadata)
+        self.size += count
+
+
+class CostRecordStore:
+    """Columnar, time-partitioned storage for cost records.
+
+    Records are appended in time order into partitions of
+    ``partition_hours``. Aggregates over whole partitions are cached until
+    the partition changes, so repeated queries over closed days are cheap.
+    When ``spill_path`` is set, partitions beyond the newest
+    ``max_memory_partitions`` are moved to a SQLite file and reloaded
+    one at a time when a query needs them.
+    """
+
+    def __init__(
+        self,
+        partition_hours: int = 24,
+        spill_path: Optional[str] = None,
+        max_memory_partitions: Optional[int] = None
+    ) -> None:
+        """Initialize an empty store.
+
+        Args:
+            partition_hours: Width of each time partition in hours
+            spill_path: Optional SQLite file for spilled partitions
+            max_memory_partitions: Partitions kept in memory when spilling
+        """
+        self._partition_us = partition_hours * _HOUR_US
+        self._dictionaries = {name: _StringDictionary() for name in DIMENSIONS}
+        self._partitions: Dict[int, _Partition] = {}
+        self._keys: List[int] = []
+        self._aggregates: Dict[int, Dict[Any, Any]] = {}
+        # Rollup interval (micros) applied to partitions that are entirely rolled up
+        self._rollup_units: Dict[int, int] = {}
+        self._size = 0
+
+        self._max_memory_partitions = max_memory_partitions
+        self._spilled: Set[int] = set()
+        self._db: Optional[sqlite3.Connection] = None
+        if spill_path is not None:
+            self._db = sqlite3.connect(spill_path)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cost_records ("
+                "partition INTEGER, timestamp INTEGER, category TEXT, amount REAL, "
+                "agent_id TEXT, user_id TEXT, task_id TEXT, model_name TEXT, "
+                "tokens_used INTEGER, metadata TEXT, record_count INTEGER)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS cost_records_partition ON cost_records (partition)"
+            )
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def num_partitions(self) -> int:
+        """Number of partitions, in memory or spilled."""
+        return len(self._keys)
+
+    @property
+    def num_spilled_partitions(self) -> int:
+        """Number of partitions currently held in the spill file."""
+        return len(self._spilled)
+
+    def append(
+        self,
+        timestamp: datetime,
+        category: str,
+        amount: float,
+        agent_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        task_id: Optional[str] = None,
+        model_name: Optional[str] = None,
+        tokens_used: int = 0,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Append a single cost record.
+
+        Args:
+            timestamp: When the cost occurred
+            category: Cost category value
+            amount: Cost amount in dollars
+            agent_id: Optional agent identifier
+            user_id: Optional user identifier
+            task_id: Optional task identifier
+            model_name: Optional model name
+            tokens_used: Number of tokens used
+            metadata: Optional additional metadata
+        """
+        micros = to_micros(timestamp)
+        encode = self._dictionaries
+        partition = self._writable_partition(micros // self._partition_us)
+        partition.append(
+            {
+                "timestamp": micros,
+                "amount": amount,
+                "tokens": tokens_used,
+                "count": 1,
+                "category": encode["category"].encode(category),
+                "agent": encode["agent"].encode(agent_id),
+                "user": encode["user"].encode(user_id),
+                "task": encode["task"].encode(task_id),
+                "model": encode["model"].encode(model_name),
+            },
+            metadata
+        )
+        self._size += 1
+
+    def extend(
+        self,
+        timestamps: Sequence[datetime],
+        categories: Sequence[str],
+        amounts: Sequence[float],
+        agent_ids: Optional[Sequence[Optional[str]]] = None,
+        user_ids: Optional[Sequence[Optional[str]]] = None,
+        task_ids: Optional[Sequence[Optional[str]]] = None,
+        model_names: Optional[Sequence[Optional[str]]] = None,
+        tokens_used: Optional[Sequence[int]] = None,
+        metadata: Optional[Sequence[Optional[Dict[str, Any]]]] = None
+    ) -> None:
+        """Bulk-append records given as parallel sequences.
+
+        Args:
+            timestamps: When each cost occurred
+            categories: Cost category values
+            amounts: Cost amounts in dollars
+            agent_ids: Optional agent identifiers
+            user_ids: Optional user identifiers
+            task_ids: Optional task identifiers
+            model_names: Optional model names
+            tokens_used: Optional token counts
+            metadata: Optional per-record metadata
+        """
+        count = len(timestamps)
+        micros = np.fromiter((to_micros(t) for t in timestamps), dtype=np.int64, count=count)
+        self._extend_columns(
+            micros,
+            {
+                "category": categories,
+                "agent": agent_ids,
+                "user": user_ids,
+                "task": task_ids,
+                "model": model_names,
+            },
+            np.asarray(amounts, dtype=np.float64),
+            np.asarray(tokens_used if tokens_used is not None else np.zeros(count), dtype=np.int64),
+            list(metadata) if metadata is not None else [None] * count
+        )
+
+    def _extend_columns(
+        self,
+        micros: "np.ndarray",
+        dimensions: Dict[str, Optional[Sequence[Optional[str]]]],
+        amounts: "np.ndarray",
+        tokens: "np.ndarray",
+        metadata: List[Optional[Dict[str, Any]]]
+    ) -> None:
+        """Encode dimension columns and append rows partition by partition."""
+        count = len(micros)
+        if count == 0:
+            return
+
+        columns: Dict[str, "np.ndarray"] = {
+            "timestamp": micros,
+            "amount": amounts,
+            "tokens": tokens,
+            "count": np.ones(count, dtype=np.int64),
+        }
+        for name, values in dimensions.items():
+            if values is None:
+                columns[name] = np.full(count, -1, dtype=np.int32)
+            else:
+                encode = self._dictionaries[name].encode
+                columns[name] = np.fromiter((encode(v) for v in values), dtype=np.int32, count=count)
+
+        keys = micros // self._partition_us
+        boundaries = np.flatnonzero(np.diff(keys)) + 1
+        for start, end in zip(
+            [0, *boundaries.tolist()], [*boundaries.tolist(), count]
+        ):
+            partition = self._writable_partition(int(keys[start]))
+            partition.extend(
+                {name: column[start:end] for name, column in columns.items()},
+                metadata[start:end]
+            )
+        self._size += count
+
+    def _writable_partition(self, key: int) -> _Partition:
+        """Return the in-memory partition for a key, creating or reloading it."""
+        partition = self._partitions.get(key)
+        if partition is None:
+            if key in self._spilled:
+                partition = self._load_spilled(key)
+                self._drop_spilled(key)
+            else:
+                partition = _Partition(key)
+                bisect.insort(self._keys, key)
+            self._partitions[key] = partition
+            self._spill_excess(keep=key)
+
+        self._aggregates.pop(key, None)
+        return partition
+
+    def _spill_excess(self, keep: int) -> None:
+        """Move the oldest in-memory partitions, except ``keep``, to the spill file."""
+        if self._db is None or self._max_memory_partitions is None:
+            return
+
+        while len(self._partitions) > max(self._max_memory_partitions, 1):
+            key = min(k for k in self._partitions if k != keep)
+            self._write_spilled(self._partitions.pop(key))
+
+    def _write_spilled(self, partition: _Partition) -> None:
+        """Write a partition's rows to the spill file."""
+        assert self._db is not None
+        self._db.executemany(
+            "INSERT INTO cost_records VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ((partition.key, *row) for row in self._partition_rows(partition, None, for_spill=True))
+        )
+        self._db.commit()
+        self._spilled.add(partition.key)
+
+    def _load_spilled(self, key: int) -> _Partition:
+        """Read a spilled partition back into columns."""
+        assert self._db is not None
+        rows = self._db.execute(
+            "SELECT timestamp, category, amount, agent_id, user_id, task_id, model_name, "
+            "tokens_used, metadata, record_count FROM cost_records WHERE partition = ? ORDER BY rowid",
+            (key,)
+        ).fetchall()
+
+        partition = _Partition(key, capacity=max(len(rows), 1))
+        if rows:
+            columns = list(zip(*rows))
+            encoded = {
+                name: np.fromiter(
+                    (self._dictionaries[name].encode(v) for v in values), dtype=np.int32, count=len(rows)
+                )
+                for name, values in zip(DIMENSIONS, (columns[1], *columns[3:7]))
+            }
+            partition.extend(
+                {
+                    "timestamp": np.asarray(columns[0], dtype=np.int64),
+                    "amount": np.asarray(columns[2], dtype=np.float64),
+                    "tokens": np.asarray(columns[7], dtype=np.int64),
+                    "count": np.asarray(columns[9], dtype=np.int64),
+                    **encoded,
+                },
+                [json.loads(m) if m is not None else None for m in columns[8]]
+            )
+        return partition
+
+    def _drop_spilled(self, key: int) -> None:
+        assert self._db is not None
+        self._db.execute("DELETE FROM cost_records WHERE partition = ?", (key,))
+        self._db.commit()
+        self._spilled.discard(key)
+
+    def compact(self, before: datetime, interval_seconds: int, label: Optional[str] = None) -> int:
+        """Collapse records older than ``before`` into per-interval rollup rows.
+
+        Rows sharing an interval bucket, category, agent, user, task and
+        model are merged: amounts, tokens and record counts are summed, the
+        timestamp becomes the bucket start and metadata is replaced by
+        {"rollup_interval": label, "record_count": n}. Compacting again
+        with a coarser interval rolls existing rollups up further.
+
+        Args:
+            before: Records strictly older than this are rolled up
+            interval_seconds: Rollup bucket width in seconds
+            label: Interval name stored in rollup metadata (e.g. "1h")
+
+        Returns:
+            Number of rows removed from the store
+        """
+        before_us = to_micros(before)
+        unit = interval_seconds * 1_000_000
+        label = label or f"{interval_seconds}s"
+        removed = 0
+
+        last = bisect.bisect_right(self._keys, before_us // self._partition_us)
+        for key in self._keys[:last]:
+            fully_old = (key + 1) * self._partition_us <= before_us
+            if fully_old and self._rollup_units.get(key, 0) >= unit:
+                continue
+
+            spilled = key in self._spilled
+            partition = self._load_spilled(key) if spilled else self._partitions[key]
+            compacted = self._rollup(partition, before_us, unit, label)
+            removed += partition.size - compacted.size
+
+            if spilled:
+                self._drop_spilled(key)
+                self._write_spilled(compacted)
+            else:
+                self._partitions[key] = compacted
+            self._aggregates.pop(key, None)
+            if fully_old:
+                self._rollup_units[key] = unit
+
+        self._size -= removed
+        return removed
+
+    def _rollup(self, partition: _Partition, before_us: int, unit: int, label: str) -> _Partition:
+        """Return a copy of a partition with rows before ``before_us`` rolled up."""
+        timestamps = partition.column("timestamp")
+        old = timestamps < before_us
+        old_positions = np.flatnonzero(old)
+        if len(old_positions) == 0:
+            return partition
+        kept_positions = np.flatnonzero(~old)
+
+        # Bucket starts never fall before the partition, so pruning stays valid
+        buckets = np.maximum(timestamps[old] // unit * unit, partition.key * self._partition_us)
+        group_keys = [buckets] + [partition.column(name)[old] for name in DIMENSIONS]
+        order = np.lexsort(group_keys[::-1])  # Bucket is the primary sort key
+        sorted_keys = [values[order] for values in group_keys]
+
+        starts_mask = np.zeros(len(order), dtype=bool)
+        starts_mask[0] = True
+        for values in sorted_keys:
+            starts_mask[1:] |= values[1:] != values[:-1]
+        starts = np.flatnonzero(starts_mask)
+
+        rollup = {"timestamp": sorted_keys[0][starts]}
+        for name, values in zip(DIMENSIONS, sorted_keys[1:]):
+            rollup[name] = values[starts]
+        for name in ("amount", "tokens", "count"):
+            rollup[name] = np.add.reduceat(partition.column(name)[old][order], starts)
+
+        compacted = _Partition(partition.key, capacity=max(len(starts) + len(kept_positions), 1))
+        compacted.extend(
+            rollup,
+            [{"rollup_interval": label, "record_count": count} for count in rollup["count"].tolist()]
+        )
+        compacted.extend(
+            {name: partition.column(name)[kept_positions] for name in _COLUMN_DTYPES},
+            [partition.metadata[position] for position in kept_positions.tolist()]
+        )
+        return compacted
+
+    def close(self) -> None:
+        """Close the spill file, if any."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _plan(
+        self,
+        start_time: Optional[datetime],
+        end_time: Optional[datetime],
+        filters: Optional[Dict[str, Optional[str]]]
+    ) -> Optional[Tuple[List[int], Optional[int], Optional[int], Dict[str, int]]]:
+        """Resolve filters to codes and prune partitions outside the time range.
+
+        Returns:
+            (partition keys, start micros, end micros, {dimension: code}),
+            or None when a filter value has never been recorded
+        """
+        codes: Dict[str, int] = {}
+        for name, value in (filters or {}).items():
+            if not value:
+                continue
+            code = self._dictionaries[name].lookup(value)
+            if code is None:
+                return None
+            codes[name] = code
+
+        start_us = to_micros(start_time) if start_time is not None else None
+        end_us = to_micros(end_time) if end_time is not None else None
+        low = bisect.bisect_left(self._keys, start_us // self._partition_us) if start_us is not None else 0
+        high = (
+            bisect.bisect_right(self._keys, end_us // self._partition_us)
+            if end_us is not None else len(self._keys)
+        )
+        return self._keys[low:high], start_us, end_us, codes
+
+    def _covers(self, key: int, start_us: Optional[int], end_us: Optional[int], codes: Dict[str, int]) -> bool:
+        """Whether every row of a partition matches the time range and filters."""
+        partition_start = key * self._partition_us
+        return (
+            not codes
+            and (start_us is None or start_us <= partition_start)
+            and (end_us is None or end_us >= partition_start + self._partition_us - 1)
+        )
+
+    def _partition_mask(
+        self,
+        key: int,
+        start_us: Optional[int],
+        end_us: Optional[int],
+        codes: Dict[str, int]
+    ) -> Tuple[_Partition, Optional["np.ndarray"]]:
+        """Load a partition (reading it back if spilled) and its row mask."""
+        partition = self._partitions.get(key)
+        if partition is None:
+            partition = self._load_spilled(key)
+
+        if self._covers(key, start_us, end_us, codes):
+            return partition, None
+
+        mask = np.ones(partition.size, dtype=bool)
+        if start_us is not None:
+            mask &= partition.column("timestamp") >= start_us
+        if end_us is not None:
+            mask &= partition.column("timestamp") <= end_us
+        for name, code in codes.items():
+            mask &= partition.column(name) == code
+        return partition, mask
+
+    def _aggregates_for(
+        self,
+        start_time: Optional[datetime],
+        end_time: Optional[datetime],
+        filters: Optional[Dict[str, Optional[str]]],
+        kind: Tuple,
+        compute: Callable[[_Partition, Optional["np.ndarray"]], Any]
+    ) -> Iterator[Any]:
+        """Yield one aggregate per matching partition, in time order.
+
+        Aggregates covering a whole partition are cached until it is next
+        written, so they are served without touching (or reloading) its rows.
+        """
+        plan = self._plan(start_time, end_time, filters)
+        if plan is None:
+            return
+        keys, start_us, end_us, codes = plan
+
+        for key in keys:
+            if self._covers(key, start_us, end_us, codes):
+                cache = self._aggregates.setdefault(key, {})
+                if kind not in cache:
+                    cache[kind] = compute(*self._partition_mask(key, start_us, end_us, codes))
+                yield cache[kind]
+            else:
+                yield compute(*self._partition_mask(key, start_us, end_us, codes))
+
+    def _group(
+        self,
+        partition: _Partition,
+        mask: Optional["np.ndarray"],
+        dimension: str
+    ) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Per-code amount sums and presence flags for a dimension (None excluded)."""
+        codes = partition.column(dimension)
+        amounts = partition.column("amount")
+        if mask is not None:
+            codes, amounts = codes[mask], amounts[mask]
+        present = codes >= 0
+        codes, amounts = codes[present], amounts[present]
+        minlength = len(self._dictionaries[dimension])
+        return (
+            np.bincount(codes, weights=amounts, minlength=minlength),
+            np.bincount(codes, minlength=minlength) > 0,
+        )
+
+    def _add_padded(self, total: Optional["np.ndarray"], part: "np.ndarray") -> "np.ndarray":
+        """Add per-code arrays that may predate later dictionary entries."""
+        if total is None:
+            return part.copy()
+        if len(part) > len(total):
+            total, part = part.copy(), total
+        total[: len(part)] += part
+        return total
+
+    def _decode_sums(
+        self,
+        dimension: str,
+        sums: Optional["np.ndarray"],
+        seen: Optional["np.ndarray"]
+    ) -> Dict[str, float]:
+        """Turn per-code sums into {value: amount}, in first-seen order."""
+        if sums is None or seen is None:
+            return {}
+        values = self._dictionaries[dimension].values
+        return {values[code]: float(sums[code]) for code in np.flatnonzero(seen).tolist()}
+
+    def summarize(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        filters: Optional[Dict[str, Optional[str]]] = None
+    ) -> Dict[str, Any]:
+        """Aggregate matching records.
+
+        Args:
+            start_time: Start of time period (inclusive)
+            end_time: End of time period (inclusive)
+            filters: Optional {dimension: value} equality filters
+
+        Returns:
+            Dictionary with request_count, total_cost, total_tokens,
+            cost_by_category, cost_by_model, first_timestamp and last_timestamp
+        """
+        count = 0
+        total_cost = 0.0
+        total_tokens = 0
+        first = last = None
+        sums: Dict[str, Any] = {"category": None, "model": None}
+        seen: Dict[str, Any] = {"category": None, "model": None}
+
+        def compute(partition: _Partition, mask: Optional["np.ndarray"]) -> Dict[str, Any]:
+            timestamps = partition.column("timestamp")
+            amounts = partition.column("amount")
+            tokens = partition.column("tokens")
+            counts = partition.column("count")
+            if mask is not None:
+                timestamps, amounts, tokens, counts = timestamps[mask], amounts[mask], tokens[mask], counts[mask]
+            result = {
+                "count": int(counts.sum()),
+                "amount": float(amounts.sum()),
+                "tokens": int(tokens.sum()),
+                "first": int(timestamps[0]) if len(timestamps) else None,
+                "last": int(timestamps[-1]) if len(timestamps) else None,
+            }
+            for name in ("category", "model"):
+                result[name], result[name + "_seen"] = self._group(partition, mask, name)
+            return result
+
+        for part in self._aggregates_for(start_time, end_time, filters, ("summary",), compute):
+            if part["count"] == 0:
+                continue
+            count += part["count"]
+            total_cost += part["amount"]
+            total_tokens += part["tokens"]
+            first = part["first"] if first is None else first
+            last = part["last"]
+            for name in ("category", "model"):
+                sums[name] = self._add_padded(sums[name], part[name])
+                seen[name] = self._add_padded(seen[name], part[name + "_seen"])
+
+        return {
+            "request_count": count,
+            "total_cost": total_cost,
+            "total_tokens": total_tokens,
+            "cost_by_category": self._decode_sums("category", sums["category"], seen["category"]),
+            "cost_by_model": self._decode_sums("model", sums["model"], seen["model"]),
+            "first_timestamp": from_micros(first) if first is not None else None,
+            "last_timestamp": from_micros(last) if last is not None else None,
+        }
+
+    def group_sum(
+        self,
+        dimension: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        filters: Optional[Dict[str, Optional[str]]] = None,
+        limit: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """Total cost per value of a dimension, highest first.
+
+        Args:
+            dimension: One of category, agent, user, task, model
+            start_time: Start of time period (inclusive)
+            end_time: End of time period (inclusive)
+            filters: Optional {dimension: value} equality filters
+            limit: Maximum number of results
+
+        Returns:
+            List of (value, total_cost) tuples sorted by cost, ties in
+            first-seen order
+        """
+        sums = None
+        seen = None
+        for part in self._aggregates_for(
+            start_time,
+            end_time,
+            filters,
+            ("group", dimension),
+            lambda partition, mask: self._group(partition, mask, dimension)
+        ):
+            sums = self._add_padded(sums, part[0])
+            seen = self._add_padded(seen, part[1])
+
+        if sums is None:
+            return []
+
+        codes = np.flatnonzero(seen)
+        if limit is not None and limit < len(codes):
+            # Keep everything tied with the limit-th largest so ordering stays stable
+            cutoff = np.partition(sums[codes], len(codes) - limit)[len(codes) - limit]
+            codes = codes[sums[codes] >= cutoff]
+        order = codes[np.lexsort((codes, -sums[codes]))]
+        if limit is not None:
+            order = order[:limit]
+        values = self._dictionaries[dimension].values
+        return [(values[code], float(sums[code])) for code in order.tolist()]
+
+    def trends(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        granularity: str = "daily"
+    ) -> Dict[str, List[Tuple[datetime, float]]]:
+        """Cost per category per time period.
+
+        Args:
+            start_time: Start of time period (inclusive)
+            end_time: End of time period (inclusive)
+            granularity: hourly, daily, weekly, or anything else for raw timestamps
+
+        Returns:
+            Dictionary mapping categories to sorted (period, cost) lists
+        """
+
+        def compute(partition: _Partition, mask: Optional["np.ndarray"]) -> Dict[Tuple[int, int], float]:
+            timestamps = partition.column("timestamp")
+            categories = partition.column("category")
+            amounts = partition.column("amount")
+            if mask is not None:
+                timestamps, categories, amounts = timestamps[mask], categories[mask], amounts[mask]
+            if len(timestamps) == 0:
+                return {}
+
+            if granularity == "weekly":
+                # 1970-01-01 was a Thursday (weekday 3); shift so buckets start on Monday
+                offset, unit = 3 * _DAY_US, 7 * _DAY_US
+            elif granularity in ("hourly", "daily"):
+                offset, unit = 0, _HOUR_US if granularity == "hourly" else _DAY_US
+            else:
+                offset, unit = 0, 1
+
+            num_categories = max(len(self._dictionaries["category"]), 1)
+            buckets = (timestamps + offset) // unit
+            if unit > 1:
+                # Few distinct periods: dense bincount over (period, category)
+                first_bucket = int(buckets.min())
+                combined = (buckets - first_bucket) * num_categories + categories
+                totals = np.bincount(combined, weights=amounts)
+                counts = np.bincount(combined)
+                present = np.flatnonzero(counts)
+                period_keys = present // num_categories + first_bucket
+                category_keys = present % num_categories
+                totals = totals[present]
+            else:
+                combined = buckets * num_categories + categories
+                unique, inverse = np.unique(combined, return_inverse=True)
+                totals = np.bincount(inverse.ravel(), weights=amounts)
+                period_keys = unique // num_categories
+                category_keys = unique % num_categories
+
+            periods = period_keys * unit - offset
+            return {
+                (int(category), int(period)): float(total)
+                for category, period, total in zip(category_keys.tolist(), periods.tolist(), totals.tolist())
+            }
+
+        merged: Dict[Tuple[int, int], float] = {}
+        first_seen: Dict[int, Tuple[int, int]] = {}
+        for part in self._aggregates_for(start_time, end_time, None, ("trend", granularity), compute):
+            for key, total in part.items():
+                merged[key] = merged.get(key, 0.0) + total
+                first_seen.setdefault(key[0], key)
+
+        categories = self._dictionaries["category"].values
+        result: Dict[str, List[Tuple[datetime, float]]] = {}
+        for category in sorted(first_seen, key=lambda code: first_seen[code][1]):
+            result[categories[category]] = []
+        for (category, period), total in sorted(merged.items(), key=lambda item: item[0][1]):
+            result[categories[category]].append((from_micros(period), total))
+        return result
+
+    def rows(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        filters: Optional[Dict[str, Optional[str]]] = None
+    ) -> Iterator[CostRow]:
+        """Iterate matching records in time order.
+
+        Args:
+            start_time: Start of time period (inclusive)
+            end_time: End of time period (inclusive)
+            filters: Optional {dimension: value} equality filters
+
+        Yields:
+            (timestamp, category, amount, agent_id, user_id, task_id,
+            model_name, tokens_used, metadata) tuples
+        """
+        plan = self._plan(start_time, end_time, filters)
+        if plan is None:
+            return
+        keys, start_us, end_us, codes = plan
+
+        for key in keys:
+            partition, mask = self._partition_mask(key, start_us, end_us, codes)
+            for row in self._partition_rows(partition, mask):
+                yield row
+
+    def _partition_rows(
+        self,
+        partition: _Partition,
+        mask: Optional["np.ndarray"],
+        for_spill: bool = False
+    ) -> Iterable[tuple]:
+        """Decode the (masked) rows of one partition.
+
+        Spill rows keep raw micros, JSON-encoded metadata and the record count.
+        """
+        positions = np.flatnonzero(mask) if mask is not None else np.arange(partition.size)
+        columns = {name: partition.column(name)[positions].tolist() for name in _COLUMN_DTYPES}
+        decoded = {
+            name: [self._dictionaries[name].decode(code) for code in columns[name]]
+            for name in DIMENSIONS
+        }
+        metadata = partition.metadata
+        for i, position in enumerate(positions.tolist()):
+            record_metadata = metadata[position]
+            if for_spill:
+                yield (
+                    columns["timestamp"][i],
+                    decoded["category"][i],
+                    columns["amount"][i],
+                    decoded["agent"][i],
+                    decoded["user"][i],
+                    decoded["task"][i],
+                    decoded["model"][i],
+                    columns["tokens"][i],
+                    json.dumps(record_metadata) if record_metadata is not None else None,
+                    columns["count"][i],
+                )
+                continue
+
+            timestamp = from_micros(columns["timestamp"][i])
+            record_metadata = record_metadata if record_metadata is not None else {}
+            yield (
+                timestamp,
+                decoded["category"][i],
+                columns["amount"][i],
+                decoded["agent"][i],
+                decoded["user"][i],
+                decoded["task"][i],
+                decoded["model"][i],
+                columns["tokens"][i],
+                record_metadata,
+            )
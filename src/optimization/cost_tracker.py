@@ -5,12 +5,46 @@ costs associated with LLM usage for budgeting and optimization.
 """
 
 from dataclasses import dataclass, field, asdict
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Callable, Optional, List, Set, Tuple, Iterator, TextIO
 from datetime import datetime, timedelta
-from collections import defaultdict
 from enum import Enum
+from pathlib import Path
+import csv
+import io
 import json
 
+import yaml
+
+from .cost_store import CostRecordStore, parse_interval
+
+# Mirrors retention.metrics.aggregation_intervals in config/observability.yaml
+DEFAULT_AGGREGATION_INTERVALS = ["1m", "5m", "1h", "1d"]
+
+EXPORT_FIELDS = [
+    "timestamp", "category", "amount", "agent_id", "user_id",
+    "task_id", "model_name", "tokens_used", "metadata"
+]
+
+
+def load_aggregation_intervals(config_path: str = "config/observability.yaml") -> List[str]:
+    """Load metric rollup intervals from the observability config.
+
+    Args:
+        config_path: Path to observability.yaml
+
+    Returns:
+        retention.metrics.aggregation_intervals, or the defaults if unset
+    """
+    path = Path(config_path)
+    if not path.exists():
+        raise FileNotFoundError(f"YAML file not found: {config_path}")
+
+    with open(path, 'r') as f:
+        data = yaml.safe_load(f) or {}
+
+    intervals = data.get("retention", {}).get("metrics", {}).get("aggregation_intervals")
+    return list(intervals) if intervals else list(DEFAULT_AGGREGATION_INTERVALS)
+
 
 class CostCategory(Enum):
     """Categories of costs to track."""
@@ -63,26 +97,104 @@ class BudgetAlert:
     timestamp: datetime
 
 
+class RollingWindow:
+    """Sliding-window sum over time-bucketed ring counters.
+
+    Amounts are added to fixed-width time buckets held in a ring; buckets
+    leave the running total as the window moves past them, so adding and
+    reading the total are amortized O(1). The bucket containing the window
+    start is kept whole, so the total may include up to one bucket width
+    of older spend (a conservative over-estimate for budgets).
+    """
+
+    def __init__(self, window_seconds: float, num_buckets: int = 1440) -> None:
+        """Initialize an empty window.
+
+        Args:
+            window_seconds: Length of the sliding window
+            num_buckets: Number of buckets the window is divided into
+        """
+        self._width = window_seconds / num_buckets
+        self._window_seconds = window_seconds
+        self._size = num_buckets + 1  # Plus the partially expired bucket
+        self._totals = [0.0] * self._size
+        self._bucket_ids = [-1] * self._size
+        self._oldest = -1
+        self._total = 0.0
+
+    def add(self, timestamp: float, amount: float) -> None:
+        """Add an amount at a POSIX timestamp within the current window.
+
+        Args:
+            timestamp: Time of the event in seconds since the epoch
+            amount: Amount to add
+        """
+        self._expire(timestamp)
+        bucket = int(timestamp // self._width)
+        if bucket < self._oldest:
+            return
+
+        slot = bucket % self._size
+        if self._bucket_ids[slot] != bucket:
+            self._bucket_ids[slot] = bucket
+            self._totals[slot] = 0.0
+        self._totals[slot] += amount
+        self._total += amount
+
+    def total(self, now: float) -> float:
+        """Return the windowed total as of a POSIX timestamp."""
+        self._expire(now)
+        return self._total
+
+    def _expire(self, now: float) -> None:
+        """Drop buckets that ended before the window start."""
+        start = int((now - self._window_seconds) // self._width)
+        if start <= self._oldest:
+            return
+
+        if start - self._oldest >= self._size:
+            # Idle for longer than the window: nothing left to keep
+            self._totals = [0.0] * self._size
+            self._bucket_ids = [-1] * self._size
+        else:
+            for bucket in range(self._oldest, start):
+                slot = bucket % self._size
+                if self._bucket_ids[slot] == bucket:
+                    self._bucket_ids[slot] = -1
+                    self._totals[slot] = 0.0
+
+        self._oldest = start
+        # Re-sum the live buckets to avoid drift from repeated subtraction
+        self._total = sum(self._totals)
+
+
 class CostTracker:
     """Track and analyze costs for LLM usage across dimensions.
 
     This tracker maintains detailed cost records and provides analytics
     for agents, users, tasks, and time periods to support cost optimization
-    and budget management.
+    and budget management. Records are kept in a columnar, time-partitioned
+    CostRecordStore so analytics queries are vectorized and only touch the
+    requested time range.
     """
 
     def __init__(
         self,
         enable_alerts: bool = True,
-        default_budget_period_days: int = 30
+        default_budget_period_days: int = 30,
+        store: Optional[CostRecordStore] = None,
+        aggregation_intervals: Optional[List[str]] = None
     ) -> None:
         """Initialize the cost tracker.
 
         Args:
             enable_alerts: Whether to generate budget alerts
             default_budget_period_days: Default period for budget calculations
+            store: Optional record store (e.g. configured to spill to disk)
+            aggregation_intervals: Rollup intervals allowed by compact()
         """
-        self._records: List[CostRecord] = []
+        self._store = store if store is not None else CostRecordStore()
+        self._aggregation_intervals = list(aggregation_intervals or DEFAULT_AGGREGATION_INTERVALS)
         self._budgets: Dict[str, Dict[str, float]] = {
             "agent": {},
             "user": {},
@@ -93,6 +205,14 @@ class CostTracker:
         self._default_budget_period_days = default_budget_period_days
         self._alerts: List[BudgetAlert] = []
 
+        # Running spend per (dimension, identifier, period_days) budget, and
+        # (dimension, identifier, threshold) pairs already alerted on
+        self._budget_windows: Dict[Tuple[str, str, int], RollingWindow] = {}
+        self._alerted: Set[Tuple[str, str, float]] = set()
+
+        # Callbacks notified of every new record (e.g. LLMRouter health)
+        self._listeners: List[Callable[[CostRecord], None]] = []
+
         # Model pricing (cost per 1K tokens)
         self._model_pricing: Dict[str, Tuple[float, float]] = {
             # (input_cost, output_cost) per 1K tokens
@@ -145,14 +265,35 @@ class CostTracker:
             metadata=metadata
         )
 
-        self._records.append(record)
+        self._store.append(
+            timestamp=record.timestamp,
+            category=category.value,
+            amount=amount,
+            agent_id=agent_id,
+            user_id=user_id,
+            task_id=task_id,
+            model_name=model_name,
+            tokens_used=tokens_used,
+            metadata=metadata
+        )
 
         # Check budgets and generate alerts
         if self._enable_alerts:
             self._check_budgets(record)
 
+        for listener in self._listeners:
+            listener(record)
+
         return record
 
+    def add_listener(self, listener: Callable[[CostRecord], None]) -> None:
+        """Register a callback invoked with every new CostRecord.
+
+        Args:
+            listener: Callable taking the recorded CostRecord
+        """
+        self._listeners.append(listener)
+
     def record_llm_call(
         self,
         model_name: str,
@@ -178,14 +319,7 @@ class CostTracker:
             Created CostRecord
         """
         # Calculate cost based on model pricing
-        if model_name in self._model_pricing:
-            input_cost_per_1k, output_cost_per_1k = self._model_pricing[model_name]
-            input_cost = (input_tokens / 1000) * input_cost_per_1k
-            output_cost = (output_tokens / 1000) * output_cost_per_1k
-            total_cost = input_cost + output_cost
-        else:
-            # Unknown model, use conservative estimate
-            total_cost = ((input_tokens + output_tokens) / 1000) * 0.01
+        total_cost = self.estimate_call_cost(model_name, input_tokens, output_tokens)
 
         metadata = metadata or {}
         metadata.update({
@@ -204,6 +338,31 @@ class CostTracker:
             metadata=metadata
         )
 
+    def estimate_call_cost(
+        self,
+        model_name: str,
+        input_tokens: int,
+        output_tokens: int
+    ) -> float:
+        """Price an LLM call with the model pricing table.
+
+        Args:
+            model_name: Name of the model
+            input_tokens: Number of input tokens
+            output_tokens: Number of output tokens
+
+        Returns:
+            Cost in dollars (conservative estimate for unknown models)
+        """
+        if model_name in self._model_pricing:
+            input_cost_per_1k, output_cost_per_1k = self._model_pricing[model_name]
+            input_cost = (input_tokens / 1000) * input_cost_per_1k
+            output_cost = (output_tokens / 1000) * output_cost_per_1k
+            return input_cost + output_cost
+
+        # Unknown model, use conservative estimate
+        return ((input_tokens + output_tokens) / 1000) * 0.01
+
     def get_stats(
         self,
         agent_id: Optional[str] = None,
@@ -226,17 +385,13 @@ class CostTracker:
         Returns:
             CostSummary with aggregated statistics
         """
-        # Filter records
-        filtered_records = self._filter_records(
-            agent_id=agent_id,
-            user_id=user_id,
-            task_id=task_id,
+        summary = self._store.summarize(
             start_time=start_time,
             end_time=end_time,
-            category=category
+            filters=self._record_filters(agent_id, user_id, task_id, category)
         )
 
-        if not filtered_records:
+        if not summary["request_count"]:
             return CostSummary(
                 total_cost=0.0,
                 total_tokens=0,
@@ -249,31 +404,19 @@ class CostTracker:
             )
 
         # Calculate aggregates
-        total_cost = sum(r.amount for r in filtered_records)
-        total_tokens = sum(r.tokens_used for r in filtered_records)
-        request_count = len(filtered_records)
+        total_cost = summary["total_cost"]
+        request_count = summary["request_count"]
         avg_cost = total_cost / request_count if request_count > 0 else 0.0
 
-        # Group by category
-        cost_by_category: Dict[str, float] = defaultdict(float)
-        for record in filtered_records:
-            cost_by_category[record.category.value] += record.amount
-
-        # Group by model
-        cost_by_model: Dict[str, float] = defaultdict(float)
-        for record in filtered_records:
-            if record.model_name:
-                cost_by_model[record.model_name] += record.amount
-
         return CostSummary(
             total_cost=round(total_cost, 4),
-            total_tokens=total_tokens,
+            total_tokens=summary["total_tokens"],
             request_count=request_count,
             average_cost_per_request=round(avg_cost, 4),
-            cost_by_category=dict(cost_by_category),
-            cost_by_model=dict(cost_by_model),
-            period_start=start_time or filtered_records[0].timestamp,
-            period_end=end_time or filtered_records[-1].timestamp
+            cost_by_category=summary["cost_by_category"],
+            cost_by_model=summary["cost_by_model"],
+            period_start=start_time or summary["first_timestamp"],
+            period_end=end_time or summary["last_timestamp"]
         )
 
     def get_agent_stats(self, agent_id: str, days: int = 30) -> CostSummary:
@@ -334,6 +477,9 @@ class CostTracker:
         key = identifier if identifier else "default"
         self._budgets[dimension][key] = limit
 
+        if dimension in ("agent", "user", "global"):
+            self._budget_window(dimension, key)
+
     def get_budget_status(
         self,
         dimension: str = "global",
@@ -404,22 +550,11 @@ class CostTracker:
         Returns:
             List of (identifier, total_cost) tuples sorted by cost
         """
+        if dimension not in ("agent", "user", "task"):
+            return []
+
         start_time = datetime.now() - timedelta(days=days)
-        filtered_records = self._filter_records(start_time=start_time)
-
-        # Aggregate by dimension
-        costs: Dict[str, float] = defaultdict(float)
-        for record in filtered_records:
-            if dimension == "agent" and record.agent_id:
-                costs[record.agent_id] += record.amount
-            elif dimension == "user" and record.user_id:
-                costs[record.user_id] += record.amount
-            elif dimension == "task" and record.task_id:
-                costs[record.task_id] += record.amount
-
-        # Sort and limit
-        sorted_costs = sorted(costs.items(), key=lambda x: x[1], reverse=True)
-        return sorted_costs[:limit]
+        return self._store.group_sum(dimension, start_time=start_time, limit=limit)
 
     def get_cost_trends(
         self,
@@ -436,34 +571,7 @@ class CostTracker:
             Dictionary mapping categories to (timestamp, cost) lists
         """
         start_time = datetime.now() - timedelta(days=days)
-        filtered_records = self._filter_records(start_time=start_time)
-
-        # Group by time period and category
-        trends: Dict[str, Dict[datetime, float]] = defaultdict(lambda: defaultdict(float))
-
-        for record in filtered_records:
-            # Round timestamp to granularity
-            if granularity == "hourly":
-                period = record.timestamp.replace(minute=0, second=0, microsecond=0)
-            elif granularity == "daily":
-                period = record.timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
-            elif granularity == "weekly":
-                days_since_monday = record.timestamp.weekday()
-                period = (record.timestamp - timedelta(days=days_since_monday)).replace(
-                    hour=0, minute=0, second=0, microsecond=0
-                )
-            else:
-                period = record.timestamp
-
-            trends[record.category.value][period] += record.amount
-
-        # Convert to sorted lists
-        result = {}
-        for category, period_costs in trends.items():
-            sorted_periods = sorted(period_costs.items())
-            result[category] = sorted_periods
-
-        return result
+        return self._store.trends(start_time=start_time, granularity=granularity)
 
     def get_alerts(self, clear: bool = False) -> List[BudgetAlert]:
         """Get budget alerts.
@@ -477,6 +585,7 @@ class CostTracker:
         alerts = self._alerts.copy()
         if clear:
             self._alerts.clear()
+            self._alerted.clear()
         return alerts
 
     def export_records(
@@ -495,31 +604,119 @@ class CostTracker:
         Returns:
             Serialized cost records
         """
-        filtered_records = self._filter_records(
-            start_time=start_time,
-            end_time=end_time
-        )
-
         if format == "json":
-            records_data = []
-            for record in filtered_records:
-                record_dict = {
-                    "timestamp": record.timestamp.isoformat(),
-                    "category": record.category.value,
-                    "amount": record.amount,
-                    "agent_id": record.agent_id,
-                    "user_id": record.user_id,
-                    "task_id": record.task_id,
-                    "model_name": record.model_name,
-                    "tokens_used": record.tokens_used,
-                    "metadata": record.metadata
-                }
-                records_data.append(record_dict)
-
-            return json.dumps(records_data, indent=2)
+            return json.dumps(list(self.iter_records(start_time, end_time)), indent=2)
+        elif format in ("ndjson", "csv"):
+            output = io.StringIO()
+            self.export_records_to(output, start_time, end_time, format=format)
+            return output.getvalue()
         else:
             raise ValueError(f"Unsupported export format: {format}")
 
+    def iter_records(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Iterate cost records as export dictionaries without materializing them all.
+
+        Args:
+            start_time: Start of time period
+            end_time: End of time period
+
+        Yields:
+            One dictionary per record (rollups carry rollup_interval and
+            record_count in their metadata)
+        """
+        for (
+            timestamp, category, amount, agent_id, user_id,
+            task_id, model_name, tokens_used, metadata
+        ) in self._store.rows(start_time=start_time, end_time=end_time):
+            yield {
+                "timestamp": timestamp.isoformat(),
+                "category": category,
+                "amount": amount,
+                "agent_id": agent_id,
+                "user_id": user_id,
+                "task_id": task_id,
+                "model_name": model_name,
+                "tokens_used": tokens_used,
+                "metadata": metadata
+            }
+
+    def export_records_to(
+        self,
+        output: TextIO,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        format: str = "ndjson",
+        chunk_size: int = 1000
+    ) -> int:
+        """Stream cost records to a file-like object.
+
+        Records are serialized and written ``chunk_size`` at a time, so
+        memory use does not grow with the size of the export.
+
+        Args:
+            output: Writable text file-like object
+            start_time: Start of time period
+            end_time: End of time period
+            format: Export format (ndjson, csv)
+            chunk_size: Records per write
+
+        Returns:
+            Number of records written
+        """
+        if format not in ("ndjson", "csv"):
+            raise ValueError(f"Unsupported export format: {format}")
+
+        written = 0
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, lineterminator="\n")
+        if format == "csv":
+            writer.writeheader()
+
+        for record in self.iter_records(start_time, end_time):
+            if format == "ndjson":
+                buffer.write(json.dumps(record))
+                buffer.write("\n")
+            else:
+                record["metadata"] = json.dumps(record["metadata"])
+                writer.writerow(record)
+
+            written += 1
+            if written % chunk_size == 0:
+                output.write(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+
+        output.write(buffer.getvalue())
+        return written
+
+    def compact(self, older_than_days: int, interval: str = "1h") -> int:
+        """Collapse records older than a number of days into rollups.
+
+        Rolled-up records keep totals, token counts and request counts per
+        interval, category, agent, user, task and model, so stats, top
+        spenders and trends at that granularity or coarser are unchanged
+        while tracker memory stays flat.
+
+        Args:
+            older_than_days: Roll up records older than this many days
+            interval: Rollup interval, one of the configured aggregation intervals
+
+        Returns:
+            Number of stored rows removed
+        """
+        if interval not in self._aggregation_intervals:
+            raise ValueError(
+                f"Unsupported rollup interval: {interval} "
+                f"(expected one of {', '.join(self._aggregation_intervals)})"
+            )
+
+        before = datetime.now() - timedelta(days=older_than_days)
+        return self._store.compact(before, parse_interval(interval), label=interval)
+
     def _filter_records(
         self,
         agent_id: Optional[str] = None,
@@ -542,98 +739,160 @@ class CostTracker:
         Returns:
             Filtered list of CostRecord objects
         """
-        filtered = self._records
-
-        if agent_id:
-            filtered = [r for r in filtered if r.agent_id == agent_id]
+        return [
+            CostRecord(
+                timestamp=timestamp,
+                category=CostCategory(category_value),
+                amount=amount,
+                agent_id=record_agent_id,
+                user_id=record_user_id,
+                task_id=record_task_id,
+                model_name=model_name,
+                tokens_used=tokens_used,
+                metadata=metadata
+            )
+            for (
+                timestamp, category_value, amount, record_agent_id, record_user_id,
+                record_task_id, model_name, tokens_used, metadata
+            ) in self._store.rows(
+                start_time=start_time,
+                end_time=end_time,
+                filters=self._record_filters(agent_id, user_id, task_id, category)
+            )
+        ]
 
-        if user_id:
-            filtered = [r for r in filtered if r.user_id == user_id]
+    def _record_filters(
+        self,
+        agent_id: Optional[str],
+        user_id: Optional[str],
+        task_id: Optional[str],
+        category: Optional[CostCategory]
+    ) -> Dict[str, Optional[str]]:
+        """Map filter arguments to store dimensions (falsy values are ignored)."""
+        return {
+            "agent": agent_id,
+            "user": user_id,
+            "task": task_id,
+            "category": category.value if category else None
+        }
 
-        if task_id:
-            filtered = [r for r in filtered if r.task_id == task_id]
+    def _budget_window(self, dimension: str, identifier: str) -> RollingWindow:
+        """Get the rolling spend window for a budget, backfilling it on creation.
 
-        if start_time:
-            filtered = [r for r in filtered if r.timestamp >= start_time]
+        Args:
+            dimension: Budget dimension (agent, user, global)
+            identifier: Dimension identifier ("default" for global)
 
-        if end_time:
-            filtered = [r for r in filtered if r.timestamp <= end_time]
+        Returns:
+            RollingWindow over the default budget period
+        """
+        period_days = self._default_budget_period_days
+        window_key = (dimension, identifier, period_days)
+        window = self._budget_windows.get(window_key)
+        if window is not None:
+            return window
 
-        if category:
-            filtered = [r for r in filtered if r.category == category]
+        window = RollingWindow(timedelta(days=period_days).total_seconds())
+        start_time = datetime.now() - timedelta(days=period_days)
+        filters = {dimension: identifier} if dimension != "global" else None
+        for row in self._store.rows(start_time=start_time, filters=filters):
+            window.add(row[0].timestamp(), row[2])
 
-        return filtered
+        self._budget_windows[window_key] = window
+        return window
 
     def _check_budgets(self, record: CostRecord) -> None:
         """Check if any budgets are exceeded and generate alerts.
 
+        Spend is tracked in rolling windows updated per record, so each
+        check is O(1) regardless of history length.
+
         Args:
             record: Most recent cost record
         """
         alert_thresholds = [0.8, 0.9, 1.0]  # 80%, 90%, 100%
+        timestamp = record.timestamp.timestamp()
 
         # Check agent budget
-        if record.agent_id and "agent" in self._budgets:
-            if record.agent_id in self._budgets["agent"]:
-                self._check_dimension_budget(
-                    "agent",
-                    record.agent_id,
-                    alert_thresholds
-                )
+        if record.agent_id and record.agent_id in self._budgets.get("agent", {}):
+            self._check_dimension_budget(
+                "agent",
+                record.agent_id,
+                alert_thresholds,
+                record.amount,
+                timestamp
+            )
 
         # Check user budget
-        if record.user_id and "user" in self._budgets:
-            if record.user_id in self._budgets["user"]:
-                self._check_dimension_budget(
-                    "user",
-                    record.user_id,
-                    alert_thresholds
-                )
+        if record.user_id and record.user_id in self._budgets.get("user", {}):
+            self._check_dimension_budget(
+                "user",
+                record.user_id,
+                alert_thresholds,
+                record.amount,
+                timestamp
+            )
 
         # Check global budget
-        if "global" in self._budgets and "default" in self._budgets["global"]:
+        if "default" in self._budgets.get("global", {}):
             self._check_dimension_budget(
                 "global",
                 "default",
-                alert_thresholds
+                alert_thresholds,
+                record.amount,
+                timestamp
             )
 
     def _check_dimension_budget(
         self,
         dimension: str,
         identifier: str,
-        thresholds: List[float]
+        thresholds: List[float],
+        amount: float,
+        timestamp: float
     ) -> None:
-        """Check budget for a specific dimension and generate alerts.
+        """Add a record to a budget's window and generate any new alerts.
 
         Args:
             dimension: Budget dimension
             identifier: Dimension identifier
             thresholds: List of threshold percentages to check
+            amount: Cost of the record being added
+            timestamp: POSIX timestamp of the record
         """
-        status = self.get_budget_status(dimension, identifier)
-        percentage_used = status["percentage_used"] / 100
+        window_key = (dimension, identifier, self._default_budget_period_days)
+        window = self._budget_windows.get(window_key)
+        if window is None:
+            # Backfilling from history already includes this record
+            window = self._budget_window(dimension, identifier)
+        else:
+            window.add(timestamp, amount)
+
+        budget_limit = self._budgets[dimension][identifier]
+        if budget_limit <= 0:
+            return
+
+        current_spending = round(window.total(timestamp), 4)
+        percentage_used = round(current_spending / budget_limit * 100, 2) / 100
 
         for threshold in thresholds:
-            if percentage_used >= threshold:
-                # Check if we already alerted for this threshold
-                existing_alert = any(
-                    alert.dimension == dimension and
-                    alert.identifier == identifier and
-                    abs(alert.threshold_percentage - threshold) < 0.01
-                    for alert in self._alerts
-                )
-
-                if not existing_alert:
-                    alert = BudgetAlert(
-                        dimension=dimension,
-                        identifier=identifier,
-                        current_cost=status["current_spending"],
-                        budget_limit=status["budget_limit"],
-                        threshold_percentage=threshold * 100,
-                        timestamp=datetime.now()
-                    )
-                    self._alerts.append(alert)
+            if percentage_used < threshold:
+                continue
+
+            # Check if we already alerted for this threshold
+            alert_key = (dimension, identifier, round(threshold * 100, 2))
+            if alert_key in self._alerted:
+                continue
+
+            self._alerted.add(alert_key)
+            self._alerts.append(BudgetAlert(
+                dimension=dimension,
+                identifier=identifier,
+                current_cost=current_spending,
+                budget_limit=budget_limit,
+                threshold_percentage=threshold * 100,
+                timestamp=datetime.now()
+            ))
 
     def add_model_pricing(
         self,
@@ -4,10 +4,16 @@ This module provides the LLMRouter class which analyzes request complexity
 and routes to the most cost-effective model while maintaining quality.
 """
 
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, replace
 from enum import Enum
-from typing import Dict, Any, Optional, List
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Tuple
+import hashlib
 import re
+import time
+
+import yaml
 
 
 class ComplexityLevel(Enum):
@@ -31,15 +37,101 @@ class ModelConfig:
     estimated_quality: float = 0.8  # 0.0 to 1.0
 
 
+@dataclass
+class ModelHealth:
+    """Exponentially weighted moving averages of a model's observed behaviour."""
+
+    model_name: str
+    latency_ms: Optional[float] = None
+    error_rate: float = 0.0
+    cost: Optional[float] = None
+    samples: int = 0
+    last_observed: float = 0.0  # time.monotonic() of the latest observation
+
+
+def _ewma(current: Optional[float], value: float, alpha: float) -> float:
+    """Fold ``value`` into a moving average (the first value seeds it)."""
+    if current is None:
+        return value
+    return current + alpha * (value - current)
+
+
+def load_routing_config(config_path: str = "config/optimization.yaml") -> Dict[str, Any]:
+    """Load the router settings from the optimization config.
+
+    Args:
+        config_path: Path to optimization.yaml
+
+    Returns:
+        Dictionary with the ``llm_routing`` section and the
+        ``cost_tracking.model_costs`` pricing table
+    """
+    path = Path(config_path)
+    if not path.exists():
+        raise FileNotFoundError(f"YAML file not found: {config_path}")
+
+    with open(path, 'r') as f:
+        data = yaml.safe_load(f) or {}
+
+    return {
+        "llm_routing": data.get("llm_routing") or {},
+        "model_costs": (data.get("cost_tracking") or {}).get("model_costs") or {},
+    }
+
+
+# Score added when a level's keywords appear in the prompt
+_KEYWORD_SCORES = {
+    ComplexityLevel.EXPERT: 4,
+    ComplexityLevel.COMPLEX: 2,
+    ComplexityLevel.MODERATE: 1,
+}
+
+# Largest-context-first order used when upgrading for long contexts
+_UPGRADE_ORDER = [
+    ComplexityLevel.EXPERT,
+    ComplexityLevel.COMPLEX,
+    ComplexityLevel.MODERATE,
+    ComplexityLevel.SIMPLE,
+]
+
+
 class LLMRouter:
     """Routes LLM requests to appropriate models based on complexity analysis.
 
     The router analyzes request characteristics to determine complexity level
     and selects the most cost-effective model that meets quality requirements.
+    Keyword and technical-term checks run through matchers compiled once
+    whenever the tables change, and complexity classifications are memoized in
+    an LRU keyed by a prompt fingerprint and the routing flags.
+
+    When built from ``config/optimization.yaml`` (see ``from_config``), each
+    tier has a primary and a fallback model and complexity is a weighted 1-10
+    score. The router keeps an EWMA of each model's observed latency, error
+    rate and cost, and sends a tier's traffic to its fallback while the
+    primary is erroring or too slow for the request's latency SLO.
     """
 
-    def __init__(self) -> None:
-        """Initialize the LLM router with default model configurations."""
+    def __init__(
+        self,
+        cache_size: int = 1024,
+        routing_config: Optional[Dict[str, Any]] = None,
+        model_costs: Optional[Dict[str, Dict[str, float]]] = None,
+        ewma_alpha: float = 0.2,
+        max_error_rate: float = 0.5,
+        health_ttl_seconds: float = 60.0
+    ) -> None:
+        """Initialize the LLM router with default model configurations.
+
+        Args:
+            cache_size: Maximum number of memoized classifications (0 disables)
+            routing_config: Optional ``llm_routing`` config section with tier
+                models, thresholds and complexity factors
+            model_costs: Optional per-model input/output prices per 1K tokens
+            ewma_alpha: Weight of the newest observation in health averages
+            max_error_rate: Error rate above which a model is avoided
+            health_ttl_seconds: Age after which a model's health is forgotten,
+                so a shed primary is retried
+        """
         self._model_configs: Dict[ComplexityLevel, ModelConfig] = {
             ComplexityLevel.SIMPLE: ModelConfig(
                 model_name="local-slm",
@@ -91,6 +183,403 @@ class LLMRouter:
             ]
         }
 
+        # Technical depth indicators: each group whose terms appear as
+        # whole words adds 1 to the score
+        self._technical_terms = [
+            ["algorithm", "complexity", "performance", "optimization"],
+            ["architecture", "design pattern", "best practice"],
+            ["security", "authentication", "authorization"],
+            ["distributed", "concurrent", "parallel", "async"]
+        ]
+
+        # Complexity classification LRU
+        self._cache_size = cache_size
+        self._route_cache: OrderedDict = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+        # Per-model health averages, fed by observe()
+        self._ewma_alpha = ewma_alpha
+        self._max_error_rate = max_error_rate
+        self._health_ttl_seconds = health_ttl_seconds
+        self._health: Dict[str, ModelHealth] = {}
+
+        # Tier fallbacks and weighted factors (None keeps the built-in scoring)
+        self._fallback_configs: Dict[ComplexityLevel, ModelConfig] = {}
+        self._complexity_factors: Optional[Dict[str, Any]] = None
+        self._tier_ceilings: List[Tuple[float, ComplexityLevel]] = []
+        if routing_config:
+            self._apply_routing_config(routing_config, model_costs or {})
+
+        self._compile_matchers()
+        self._index_model_configs()
+
+    @classmethod
+    def from_config(
+        cls,
+        config_path: str = "config/optimization.yaml",
+        **kwargs: Any
+    ) -> "LLMRouter":
+        """Create a router from the optimization config.
+
+        Args:
+            config_path: Path to optimization.yaml
+            **kwargs: Other LLMRouter constructor arguments
+
+        Returns:
+            LLMRouter using the configured tiers and complexity factors
+        """
+        config = load_routing_config(config_path)
+        return cls(
+            routing_config=config["llm_routing"],
+            model_costs=config["model_costs"],
+            **kwargs
+        )
+
+    def _apply_routing_config(
+        self,
+        routing_config: Dict[str, Any],
+        model_costs: Dict[str, Dict[str, float]]
+    ) -> None:
+        """Build tier models, ceilings and factor settings from config."""
+        builtin = {config.model_name: config for config in self._model_configs.values()}
+        thresholds = routing_config.get("complexity_threshold") or {}
+        tiers = routing_config.get("models") or {name: {} for name in thresholds}
+
+        ceilings = []
+        for tier_name, tier in tiers.items():
+            level = ComplexityLevel(tier_name)
+            base = self._model_configs[level]
+            if tier.get("primary"):
+                self._model_configs[level] = self._configured_model(
+                    tier["primary"], base, builtin, model_costs
+                )
+            if tier.get("fallback"):
+                self._fallback_configs[level] = self._configured_model(
+                    tier["fallback"], base, builtin, model_costs
+                )
+            ceiling = tier.get("max_complexity", thresholds.get(tier_name))
+            if ceiling is None:
+                raise ValueError(f"No max_complexity for routing tier: {tier_name}")
+            ceilings.append((float(ceiling), level))
+        self._tier_ceilings = sorted(ceilings, key=lambda item: item[0])
+
+        factors = routing_config.get("complexity_factors") or {}
+        self._complexity_factors = {
+            name: float((settings or {}).get("weight", 0.0))
+            for name, settings in factors.items()
+        }
+        prompt_length = factors.get("prompt_length") or {}
+        self._threshold_tokens = float(prompt_length.get("threshold_tokens", 1000))
+        keywords = (factors.get("technical_keywords") or {}).get("keywords") or []
+        self._factor_keywords = tuple(keyword.lower() for keyword in keywords)
+        output = factors.get("output_requirements") or {}
+        self._output_points = {
+            requirement: float(output.get(requirement, 0))
+            for requirement in ("structured_output", "code_generation", "multi_step_reasoning")
+        }
+
+    @staticmethod
+    def _configured_model(
+        model_name: str,
+        base: ModelConfig,
+        builtin: Dict[str, ModelConfig],
+        model_costs: Dict[str, Dict[str, float]]
+    ) -> ModelConfig:
+        """ModelConfig for a configured model name.
+
+        Known models keep their built-in settings; others inherit the tier's
+        context window and quality. Config pricing, when present, becomes the
+        blended mean of the input and output price.
+        """
+        template = builtin.get(model_name, base)
+        pricing = model_costs.get(model_name)
+        cost = template.cost_per_1k_tokens
+        if pricing:
+            cost = (float(pricing.get("input", 0.0)) + float(pricing.get("output", 0.0))) / 2
+        return replace(template, model_name=model_name, cost_per_1k_tokens=cost)
+
+    def _compile_matchers(self) -> None:
+        """Compile the keyword and technical-term tables into matchers.
+
+        Keyword levels become (score, keywords) tuples checked with C-level
+        substring search in table order. Each technical group becomes a
+        literal prefilter plus a precompiled word-boundary regex that only
+        runs when one of its terms occurs in the prompt.
+        """
+        self._keyword_matcher: List[Tuple[int, Tuple[str, ...]]] = [
+            (_KEYWORD_SCORES.get(level, 0), tuple(keywords))
+            for level, keywords in self._complexity_keywords.items()
+            if keywords
+        ]
+        self._technical_matcher: List[Tuple[Tuple[str, ...], "re.Pattern[str]"]] = [
+            (
+                tuple(terms),
+                re.compile(r'\b(?:' + '|'.join(
+                    re.escape(term) for term in sorted(terms, key=len, reverse=True)
+                ) + r')\b')
+            )
+            for terms in self._technical_terms
+            if terms
+        ]
+        self._route_cache.clear()
+
+    def _index_model_configs(self) -> None:
+        """Precompute name lookup and the context-window upgrade order."""
+        self._configs_by_name: Dict[str, ModelConfig] = {}
+        for config in list(self._model_configs.values()) + list(self._fallback_configs.values()):
+            self._configs_by_name.setdefault(config.model_name, config)
+        self._upgrade_configs = [
+            self._model_configs[level] for level in _UPGRADE_ORDER if level in self._model_configs
+        ]
+        self._route_cache.clear()
+
+    def set_complexity_keywords(
+        self,
+        complexity_level: ComplexityLevel,
+        keywords: List[str]
+    ) -> None:
+        """Replace the keywords that indicate a complexity level.
+
+        Args:
+            complexity_level: EXPERT, COMPLEX or MODERATE
+            keywords: Lowercase substrings to look for in prompts
+        """
+        if complexity_level not in _KEYWORD_SCORES:
+            raise ValueError(f"No keyword score for complexity level: {complexity_level.value}")
+        self._complexity_keywords[complexity_level] = list(keywords)
+        self._compile_matchers()
+
+    def set_technical_terms(self, term_groups: List[List[str]]) -> None:
+        """Replace the term groups that indicate technical depth.
+
+        Args:
+            term_groups: Groups of lowercase terms; each group adds 1 to the
+                score when any of its terms appears as a whole word
+        """
+        self._technical_terms = [list(terms) for terms in term_groups]
+        self._compile_matchers()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get routing decision cache statistics.
+
+        Returns:
+            Dictionary with size, max_size, hits, misses and hit_rate
+        """
+        lookups = self._cache_hits + self._cache_misses
+        return {
+            "size": len(self._route_cache),
+            "max_size": self._cache_size,
+            "hits": self._cache_hits,
+            "misses": self._cache_misses,
+            "hit_rate": self._cache_hits / lookups if lookups else 0.0,
+        }
+
+    def clear_cache(self) -> None:
+        """Clear memoized routing decisions and reset statistics."""
+        self._route_cache.clear()
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+    def observe(
+        self,
+        model_name: str,
+        latency_ms: Optional[float] = None,
+        success: Optional[bool] = None,
+        cost: Optional[float] = None
+    ) -> ModelHealth:
+        """Fold one observed call into a model's health averages.
+
+        Args:
+            model_name: Model that served the call
+            latency_ms: Observed latency in milliseconds
+            success: Whether the call succeeded
+            cost: Cost of the call in dollars
+
+        Returns:
+            Updated ModelHealth for the model
+        """
+        now = time.monotonic()
+        health = self._health.get(model_name)
+        if health is None or self._is_stale(health, now):
+            health = self._health[model_name] = ModelHealth(model_name=model_name)
+
+        alpha = self._ewma_alpha
+        if latency_ms is not None:
+            health.latency_ms = _ewma(health.latency_ms, float(latency_ms), alpha)
+        if success is not None:
+            health.error_rate += alpha * ((0.0 if success else 1.0) - health.error_rate)
+        if cost is not None:
+            health.cost = _ewma(health.cost, float(cost), alpha)
+        health.samples += 1
+        health.last_observed = now
+        return health
+
+    def observe_cost_record(self, record: Any) -> None:
+        """Update model health from a CostTracker record.
+
+        Latency comes from ``metadata["latency_ms"]`` and the outcome from
+        ``metadata["success"]`` (or the presence of ``metadata["error"]``);
+        the record amount is the call cost.
+
+        Args:
+            record: CostRecord with a model_name
+        """
+        if not record.model_name:
+            return
+        metadata = record.metadata or {}
+        success = metadata.get("success")
+        if success is None and "error" in metadata:
+            success = not metadata["error"]
+        self.observe(
+            record.model_name,
+            latency_ms=metadata.get("latency_ms"),
+            success=success,
+            cost=record.amount
+        )
+
+    def attach_cost_tracker(self, tracker: Any) -> None:
+        """Feed model health from every call recorded by a CostTracker.
+
+        Args:
+            tracker: CostTracker to listen to
+        """
+        tracker.add_listener(self.observe_cost_record)
+
+    def attach_metrics(self, metrics: Any) -> None:
+        """Feed model health from LLM requests recorded by AgentMetrics.
+
+        Args:
+            metrics: AgentMetrics to listen to
+        """
+        metrics.add_llm_observer(self._observe_llm_request)
+
+    def _observe_llm_request(
+        self,
+        model: str,
+        duration_seconds: float,
+        success: bool,
+        cost_usd: Optional[float]
+    ) -> None:
+        """AgentMetrics observer callback."""
+        self.observe(model, latency_ms=duration_seconds * 1000, success=success, cost=cost_usd)
+
+    def get_model_health(self, model_name: str) -> Optional[ModelHealth]:
+        """Get a model's current health averages.
+
+        Args:
+            model_name: Model name
+
+        Returns:
+            ModelHealth, or None if unobserved or expired
+        """
+        return self._live_health(model_name)
+
+    def _is_stale(self, health: ModelHealth, now: float) -> bool:
+        """Whether health statistics are too old to act on."""
+        return (
+            self._health_ttl_seconds > 0
+            and now - health.last_observed > self._health_ttl_seconds
+        )
+
+    def _live_health(self, model_name: str) -> Optional[ModelHealth]:
+        """Health for a model if it has recent observations."""
+        health = self._health.get(model_name)
+        if health is None or self._is_stale(health, time.monotonic()):
+            return None
+        return health
+
+    def _meets_slo(self, config: ModelConfig, latency_slo_ms: Optional[float]) -> bool:
+        """Whether a model is healthy and, if given, fast enough for the SLO.
+
+        Models without recent observations are assumed healthy.
+        """
+        health = self._live_health(config.model_name)
+        if health is None:
+            return True
+        if health.error_rate > self._max_error_rate:
+            return False
+        if latency_slo_ms is not None and health.latency_ms is not None:
+            return health.latency_ms <= latency_slo_ms
+        return True
+
+    def _expected_latency(self, config: ModelConfig) -> float:
+        """Observed latency inflated by retries for failed calls."""
+        health = self._live_health(config.model_name)
+        if health is None or health.latency_ms is None:
+            return 0.0
+        return health.latency_ms / max(1.0 - health.error_rate, 0.01)
+
+    def score_complexity(
+        self,
+        prompt: str,
+        context_length: int = 0,
+        requires_code: bool = False,
+        requires_reasoning: bool = False,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> float:
+        """Score a request on the 1-10 scale with the configured factors.
+
+        Each factor yields a 0-10 sub-score and the weighted mean is mapped
+        onto 1-10:
+
+        - prompt_length: estimated tokens relative to ``threshold_tokens``
+        - technical_keywords: 5 per configured keyword found
+        - context_depth: ``metadata["context_depth"]`` previous messages,
+          else one per 1K context tokens
+        - output_requirements: share of the configured bonus points asked
+          for (``metadata["structured_output"]`` or ``requires_functions``,
+          code generation, multi-step reasoning)
+
+        Args:
+            prompt: The user's request text
+            context_length: Length of conversation context in tokens
+            requires_code: Whether the task requires code generation
+            requires_reasoning: Whether the task requires multi-step reasoning
+            metadata: Additional metadata for complexity estimation
+
+        Returns:
+            Complexity score between 1 and 10
+        """
+        if self._complexity_factors is None:
+            raise ValueError("Weighted complexity scoring requires a routing config")
+        metadata = metadata or {}
+
+        prompt_lower = prompt.lower()
+        keyword_hits = sum(1 for keyword in self._factor_keywords if keyword in prompt_lower)
+        depth = metadata.get("context_depth")
+        if depth is None:
+            depth = context_length / 1000
+        requested = {
+            "structured_output": bool(
+                metadata.get("structured_output") or metadata.get("requires_functions")
+            ),
+            "code_generation": requires_code,
+            "multi_step_reasoning": requires_reasoning,
+        }
+        possible = sum(self._output_points.values())
+        earned = sum(
+            points for requirement, points in self._output_points.items()
+            if requested[requirement]
+        )
+
+        subscores = {
+            "prompt_length": 10.0 * len(prompt.split()) * 1.3 / self._threshold_tokens,
+            "technical_keywords": 5.0 * keyword_hits,
+            "context_depth": float(depth),
+            "output_requirements": 10.0 * earned / possible if possible else 0.0,
+        }
+
+        total_weight = 0.0
+        weighted = 0.0
+        for factor, weight in self._complexity_factors.items():
+            if factor in subscores:
+                total_weight += weight
+                weighted += weight * min(10.0, subscores[factor])
+        if total_weight <= 0:
+            return 1.0
+        return 1.0 + 9.0 * weighted / (10.0 * total_weight)
+
     def estimate_complexity(
         self,
         prompt: str,
@@ -111,6 +600,15 @@ class LLMRouter:
         Returns:
             ComplexityLevel enum indicating the estimated complexity
         """
+        if self._complexity_factors is not None:
+            score = self.score_complexity(
+                prompt, context_length, requires_code, requires_reasoning, metadata
+            )
+            for ceiling, level in self._tier_ceilings:
+                if score <= ceiling:
+                    return level
+            return self._tier_ceilings[-1][1]
+
         metadata = metadata or {}
         score = 0
 
@@ -131,16 +629,11 @@ class LLMRouter:
         elif context_length > 1000:
             score += 1
 
-        # Check for complexity keywords
+        # Check for complexity keywords (the first level in table order wins)
         prompt_lower = prompt.lower()
-        for level, keywords in self._complexity_keywords.items():
+        for keyword_score, keywords in self._keyword_matcher:
             if any(keyword in prompt_lower for keyword in keywords):
-                if level == ComplexityLevel.EXPERT:
-                    score += 4
-                elif level == ComplexityLevel.COMPLEX:
-                    score += 2
-                elif level == ComplexityLevel.MODERATE:
-                    score += 1
+                score += keyword_score
                 break
 
         # Code generation adds complexity
@@ -156,15 +649,8 @@ class LLMRouter:
             score += 2
 
         # Check for technical depth indicators
-        technical_patterns = [
-            r'\b(?:algorithm|complexity|performance|optimization)\b',
-            r'\b(?:architecture|design pattern|best practice)\b',
-            r'\b(?:security|authentication|authorization)\b',
-            r'\b(?:distributed|concurrent|parallel|async)\b'
-        ]
-
-        for pattern in technical_patterns:
-            if re.search(pattern, prompt_lower):
+        for terms, pattern in self._technical_matcher:
+            if any(term in prompt_lower for term in terms) and pattern.search(prompt_lower):
                 score += 1
 
         # Map score to complexity level
@@ -184,10 +670,16 @@ class LLMRouter:
         requires_code: bool = False,
         requires_reasoning: bool = False,
         metadata: Optional[Dict[str, Any]] = None,
-        force_model: Optional[str] = None
+        force_model: Optional[str] = None,
+        latency_slo_ms: Optional[float] = None
     ) -> ModelConfig:
         """Route a request to the appropriate model.
 
+        The tier's primary model is used unless its recent error rate is too
+        high or its average latency exceeds ``latency_slo_ms``, in which case
+        the tier's fallback is used. If neither qualifies, the one with the
+        lower expected latency wins.
+
         Args:
             prompt: The user's request text
             context_length: Length of conversation context in tokens
@@ -195,18 +687,109 @@ class LLMRouter:
             requires_reasoning: Whether the task requires multi-step reasoning
             metadata: Additional metadata for routing decisions
             force_model: Optional model name to force specific routing
+            latency_slo_ms: Optional latency target for this request
 
         Returns:
             ModelConfig with the selected model configuration
         """
         # Check for forced model
-        if force_model:
-            for config in self._model_configs.values():
-                if config.model_name == force_model:
-                    return config
+        if force_model and force_model in self._configs_by_name:
+            return self._configs_by_name[force_model]
+
+        if self._cache_size <= 0:
+            complexity = self._classify(
+                prompt, context_length, requires_code, requires_reasoning, metadata
+            )
+        else:
+            key = self._route_key(
+                prompt, context_length, requires_code, requires_reasoning, metadata
+            )
+            complexity = self._route_cache.get(key)
+            if complexity is not None:
+                self._route_cache.move_to_end(key)
+                self._cache_hits += 1
+            else:
+                self._cache_misses += 1
+                complexity = self._classify(
+                    prompt, context_length, requires_code, requires_reasoning, metadata
+                )
+                self._route_cache[key] = complexity
+                if len(self._route_cache) > self._cache_size:
+                    self._route_cache.popitem(last=False)
+
+        return self._select_model(complexity, context_length, latency_slo_ms)
+
+    def route_batch(
+        self,
+        prompts: List[str],
+        context_length: int = 0,
+        requires_code: bool = False,
+        requires_reasoning: bool = False,
+        metadata: Optional[Dict[str, Any]] = None,
+        latency_slo_ms: Optional[float] = None
+    ) -> List[ModelConfig]:
+        """Route many requests that share the same routing flags.
 
-        # Estimate complexity
-        complexity = self.estimate_complexity(
+        Duplicate prompts in the batch are classified once.
+
+        Args:
+            prompts: Request texts
+            context_length: Length of conversation context in tokens
+            requires_code: Whether the tasks require code generation
+            requires_reasoning: Whether the tasks require multi-step reasoning
+            metadata: Additional metadata for routing decisions
+            latency_slo_ms: Optional latency target for these requests
+
+        Returns:
+            ModelConfig for each prompt, in order
+        """
+        decisions: Dict[str, ModelConfig] = {}
+        results = []
+        for prompt in prompts:
+            model_config = decisions.get(prompt)
+            if model_config is None:
+                model_config = decisions[prompt] = self.route(
+                    prompt,
+                    context_length=context_length,
+                    requires_code=requires_code,
+                    requires_reasoning=requires_reasoning,
+                    metadata=metadata,
+                    latency_slo_ms=latency_slo_ms
+                )
+            results.append(model_config)
+        return results
+
+    def _route_key(
+        self,
+        prompt: str,
+        context_length: int,
+        requires_code: bool,
+        requires_reasoning: bool,
+        metadata: Optional[Dict[str, Any]]
+    ) -> Tuple[Any, ...]:
+        """Cache key: prompt fingerprint plus every input the decision depends on."""
+        fingerprint = hashlib.blake2b(prompt.encode(), digest_size=16).digest()
+        metadata = metadata or {}
+        return (
+            fingerprint,
+            context_length,
+            requires_code,
+            requires_reasoning,
+            bool(metadata.get("requires_functions", False)),
+            bool(metadata.get("structured_output", False)),
+            metadata.get("context_depth"),
+        )
+
+    def _classify(
+        self,
+        prompt: str,
+        context_length: int,
+        requires_code: bool,
+        requires_reasoning: bool,
+        metadata: Optional[Dict[str, Any]]
+    ) -> ComplexityLevel:
+        """Estimate the complexity level of a request."""
+        return self.estimate_complexity(
             prompt=prompt,
             context_length=context_length,
             requires_code=requires_code,
@@ -214,15 +797,31 @@ class LLMRouter:
             metadata=metadata
         )
 
-        # Get model configuration for complexity level
+    def _select_model(
+        self,
+        complexity: ComplexityLevel,
+        context_length: int,
+        latency_slo_ms: Optional[float]
+    ) -> ModelConfig:
+        """Pick the tier's primary or fallback, then fit the context window."""
         model_config = self._model_configs[complexity]
 
+        fallback = self._fallback_configs.get(complexity)
+        if (
+            fallback is not None
+            and self._health
+            and not self._meets_slo(model_config, latency_slo_ms)
+            and (
+                self._meets_slo(fallback, latency_slo_ms)
+                or self._expected_latency(fallback) < self._expected_latency(model_config)
+            )
+        ):
+            model_config = fallback
+
         # Check if we need to upgrade based on context length
         if context_length > model_config.max_tokens:
             # Upgrade to model with larger context window
-            for level in [ComplexityLevel.EXPERT, ComplexityLevel.COMPLEX,
-                         ComplexityLevel.MODERATE, ComplexityLevel.SIMPLE]:
-                config = self._model_configs[level]
+            for config in self._upgrade_configs:
                 if config.max_tokens >= context_length:
                     model_config = config
                     break
@@ -241,6 +840,7 @@ class LLMRouter:
             config: The model configuration
         """
         self._model_configs[complexity_level] = config
+        self._index_model_configs()
 
     def get_model_config(
         self,
@@ -0,0 +1,418 @@
+"""Local model inference behind a batching worker pool.
+
+This module lets LocalSLM hand prompts that its patterns only half
+recognise to a real CPU-runnable model instead of a paid API. Models plug
+in through the InferenceBackend interface; LocalInferencePool runs them
+in a process (or thread) pool, groups concurrent requests into
+micro-batches and keeps loaded models warm in each worker.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import urllib.request
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceBackend(ABC):
+    """Interface for a CPU-runnable local model.
+
+    Backend objects only carry configuration and are pickled to worker
+    processes; the loaded model returned by ``load`` stays in the worker's
+    model cache and is reused for every batch.
+    """
+
+    model_name: str = "local"
+
+    @property
+    def cache_key(self) -> str:
+        """Key identifying the loaded model in a worker's model cache."""
+        return f"{type(self).__name__}:{self.model_name}"
+
+    @abstractmethod
+    def load(self) -> Any:
+        """Load the model and return a handle passed to ``generate``."""
+
+    @abstractmethod
+    def generate(self, model: Any, prompts: List[str], max_tokens: int) -> List[str]:
+        """Generate one completion per prompt, in order."""
+
+
+class SleepBackend(InferenceBackend):
+    """Stub backend that sleeps instead of running a model, for tests."""
+
+    def __init__(
+        self,
+        model_name: str = "stub",
+        load_seconds: float = 0.0,
+        batch_seconds: float = 0.01,
+        per_prompt_seconds: float = 0.0
+    ) -> None:
+        """Initialize the stub.
+
+        Args:
+            model_name: Name echoed in responses
+            load_seconds: Simulated model load time
+            batch_seconds: Simulated fixed cost per batch
+            per_prompt_seconds: Simulated cost per prompt in a batch
+        """
+        self.model_name = model_name
+        self.load_seconds = load_seconds
+        self.batch_seconds = batch_seconds
+        self.per_prompt_seconds = per_prompt_seconds
+
+    def load(self) -> Any:
+        """Sleep for the load time and return a handle naming the worker."""
+        time.sleep(self.load_seconds)
+        return {"model": self.model_name, "pid": os.getpid()}
+
+    def generate(self, model: Any, prompts: List[str], max_tokens: int) -> List[str]:
+        """Sleep for the batch cost and echo each prompt."""
+        time.sleep(self.batch_seconds + self.per_prompt_seconds * len(prompts))
+        return [f"[{model['model']}] {prompt}" for prompt in prompts]
+
+
+class OllamaBackend(InferenceBackend):
+    """Backend for a model served by a local Ollama instance."""
+
+    def __init__(
+        self,
+        model_name: str = "llama3.2:3b",
+        base_url: str = "http://localhost:11434",
+        timeout: float = 30.0,
+        keep_alive: str = "30m"
+    ) -> None:
+        """Initialize the Ollama backend.
+
+        Args:
+            model_name: Ollama model tag
+            base_url: Ollama server URL
+            timeout: HTTP timeout in seconds
+            keep_alive: How long Ollama keeps the model loaded between calls
+        """
+        self.model_name = model_name
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+
+    @classmethod
+    def from_config(cls, config_path: str = "config/optimization.yaml") -> "OllamaBackend":
+        """Create a backend from the ``local_slm`` section of the config.
+
+        Args:
+            config_path: Path to optimization.yaml
+
+        Returns:
+            OllamaBackend for the configured model and port
+        """
+        path = Path(config_path)
+        if not path.exists():
+            raise FileNotFoundError(f"YAML file not found: {config_path}")
+
+        with open(path, 'r') as f:
+            data = yaml.safe_load(f) or {}
+
+        local_slm = data.get("local_slm") or {}
+        port = (local_slm.get("docker") or {}).get("port", 11434)
+        return cls(
+            model_name=local_slm.get("model", "llama3.2:3b"),
+            base_url=f"http://localhost:{port}"
+        )
+
+    def load(self) -> Any:
+        """Ask Ollama to load the model (an empty prompt only loads it)."""
+        self._post({"model": self.model_name, "prompt": "", "keep_alive": self.keep_alive})
+        return self.base_url
+
+    def generate(self, model: Any, prompts: List[str], max_tokens: int) -> List[str]:
+        """Generate completions one prompt at a time (Ollama has no batch API)."""
+        return [
+            self._post({
+                "model": self.model_name,
+                "prompt": prompt,
+                "stream": False,
+                "keep_alive": self.keep_alive,
+                "options": {"num_predict": max_tokens},
+            }).get("response", "")
+            for prompt in prompts
+        ]
+
+    def _post(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST to Ollama's generate endpoint and decode the JSON reply."""
+        request = urllib.request.Request(
+            f"{self.base_url}/api/generate",
+            data=json.dumps(payload).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read() or b"{}")
+
+
+# Loaded models for this process, keyed by InferenceBackend.cache_key
+_loaded_models: Dict[str, Any] = {}
+_loaded_models_lock = threading.Lock()
+
+
+def _load_model(backend: InferenceBackend) -> Any:
+    """Return the backend's loaded model, loading it on first use."""
+    key = backend.cache_key
+    model = _loaded_models.get(key)
+    if model is None:
+        with _loaded_models_lock:
+            model = _loaded_models.get(key)
+            if model is None:
+                model = _loaded_models[key] = backend.load()
+    return model
+
+
+def _run_batch(backend: InferenceBackend, prompts: List[str], max_tokens: int) -> List[str]:
+    """Worker entry point: run one micro-batch on the warm model."""
+    return backend.generate(_load_model(backend), prompts, max_tokens)
+
+
+def loaded_model_keys() -> List[str]:
+    """Cache keys of the models loaded in this process."""
+    return list(_loaded_models)
+
+
+class LocalInferencePool:
+    """Batching worker pool in front of an InferenceBackend.
+
+    Requests queue up and a dispatcher thread groups them into batches of
+    at most ``max_batch_size``, waiting up to ``max_batch_delay_ms`` for a
+    batch to fill. At most one batch per worker is in flight, so requests
+    arriving while every worker is busy join the next, larger batch.
+    Workers load the model once when they start.
+
+    Example:
+        >>> pool = LocalInferencePool(OllamaBackend(), max_workers=2)
+        >>> pool.start()
+        >>> text = pool.generate("Classify this ticket: printer is on fire")
+        >>> text = await pool.generate_async("Say hello")
+    """
+
+    def __init__(
+        self,
+        backend: InferenceBackend,
+        max_workers: int = 2,
+        max_batch_size: int = 8,
+        max_batch_delay_ms: float = 5.0,
+        max_tokens: int = 256,
+        use_processes: bool = True
+    ) -> None:
+        """Initialize the pool.
+
+        Args:
+            backend: Model backend run by the workers
+            max_workers: Number of worker processes (or threads)
+            max_batch_size: Most prompts per batch
+            max_batch_delay_ms: Longest wait for a batch to fill
+            max_tokens: Completion length limit passed to the backend
+            use_processes: Run workers in processes (True) or threads
+        """
+        self.backend = backend
+        self.max_workers = max_workers
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay_ms = max_batch_delay_ms
+        self.max_tokens = max_tokens
+        self.use_processes = use_processes
+
+        self._requests: "queue.Queue[Optional[Tuple[str, Future]]]" = queue.Queue()
+        self._slots = threading.Semaphore(max_workers)
+        self._executor: Optional[Executor] = None
+        self._dispatcher: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+
+        self._stats: Dict[str, int] = {
+            "requests": 0,
+            "batches": 0,
+            "errors": 0
+        }
+
+    def start(self, wait: bool = True) -> None:
+        """Start the workers and dispatcher.
+
+        Args:
+            wait: Block until a worker has loaded the model
+        """
+        with self._start_lock:
+            if self._closed:
+                raise RuntimeError("Inference pool is closed")
+            if self._executor is not None:
+                return
+            executor_class = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+            self._executor = executor_class(
+                max_workers=self.max_workers,
+                initializer=_load_model,
+                initargs=(self.backend,),
+            )
+            self._dispatcher = threading.Thread(
+                target=self._dispatch_loop,
+                name=f"local-inference-{self.backend.model_name}",
+                daemon=True,
+            )
+            self._dispatcher.start()
+            warmup = self._executor.submit(_load_model, self.backend)
+
+        if wait:
+            warmup.result()
+
+    def submit(self, prompt: str) -> "Future[str]":
+        """Queue a prompt for the next batch.
+
+        Args:
+            prompt: Prompt text
+
+        Returns:
+            Future resolving to the completion
+        """
+        if self._closed:
+            raise RuntimeError("Inference pool is closed")
+        if self._executor is None:
+            self.start(wait=False)
+        future: "Future[str]" = Future()
+        self._stats["requests"] += 1
+        self._requests.put((prompt, future))
+        return future
+
+    def generate(self, prompt: str, timeout: Optional[float] = None) -> str:
+        """Generate a completion, blocking until it is ready.
+
+        A request that times out while still queued is cancelled, so the
+        pool doesn't spend a worker on a prompt the caller has given up on.
+
+        Args:
+            prompt: Prompt text
+            timeout: Seconds to wait before raising TimeoutError
+
+        Returns:
+            Completion text
+        """
+        future = self.submit(prompt)
+        try:
+            return future.result(timeout=timeout)
+        except FuturesTimeoutError:
+            future.cancel()
+            raise
+
+    async def generate_async(self, prompt: str) -> str:
+        """Generate a completion without blocking the event loop.
+
+        Args:
+            prompt: Prompt text
+
+        Returns:
+            Completion text
+        """
+        return await asyncio.wrap_future(self.submit(prompt))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics.
+
+        Returns:
+            Dictionary with requests, batches, errors, avg_batch_size and
+            queued request count
+        """
+        batches = self._stats["batches"]
+        return {
+            **self._stats,
+            "avg_batch_size": self._stats["requests"] / batches if batches else 0.0,
+            "queued": self._requests.qsize(),
+        }
+
+    def close(self) -> None:
+        """Stop the dispatcher and shut the workers down after queued work."""
+        with self._start_lock:
+            if self._closed:
+                return
+            self._closed = True
+        if self._dispatcher is not None:
+            self._requests.put(None)
+            self._dispatcher.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "LocalInferencePool":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        self.close()
+
+    def _dispatch_loop(self) -> None:
+        """Collect queued requests into batches and hand them to workers."""
+        stopping = False
+        while not stopping:
+            first = self._requests.get()
+            if first is None:
+                break
+            batch = [first]
+
+            # Wait for a free worker; requests keep queueing meanwhile
+            self._slots.acquire()
+
+            deadline = time.monotonic() + self.max_batch_delay_ms / 1000
+            while len(batch) < self.max_batch_size:
+                try:
+                    item = self._requests.get_nowait()
+                except queue.Empty:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._requests.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._submit_batch(batch)
+
+    def _submit_batch(self, batch: List[Tuple[str, "Future[str]"]]) -> None:
+        """Run a batch on the executor and resolve its futures when done."""
+        # Drop requests cancelled while queued; the rest can no longer be cancelled
+        batch = [(prompt, future) for prompt, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            self._slots.release()
+            return
+
+        self._stats["batches"] += 1
+        prompts = [prompt for prompt, _ in batch]
+        futures = [future for _, future in batch]
+
+        def resolve(done: "Future[List[str]]") -> None:
+            self._slots.release()
+            error = done.exception()
+            if error is None and len(done.result()) != len(futures):
+                error = RuntimeError("Backend returned the wrong number of completions")
+            if error is not None:
+                self._stats["errors"] += 1
+                logger.warning(f"Local inference batch failed: {error}")
+                for future in futures:
+                    future.set_exception(error)
+                return
+            for future, completion in zip(futures, done.result()):
+                future.set_result(completion)
+
+        try:
+            done = self._executor.submit(_run_batch, self.backend, prompts, self.max_tokens)
+        except Exception as e:
+            done = Future()
+            done.set_exception(e)
+        done.add_done_callback(resolve)
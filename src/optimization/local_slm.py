@@ -4,11 +4,19 @@ This module provides the LocalSLM class which handles routine tasks locally
 without requiring API calls to cloud-based LLMs, reducing costs.
 """
 
-from dataclasses import dataclass
-from typing import Dict, Any, Optional, List, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Dict, Any, FrozenSet, Optional, List, Tuple
+import asyncio
+import logging
 import re
 import hashlib
-from datetime import datetime
+import time
+
+from .local_inference import LocalInferencePool
+
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -32,16 +40,98 @@ class LocalResponse:
     used_local_model: bool
 
 
+# Phrases that mark a prompt as needing full LLM reasoning
+_COMPLEX_INDICATORS = (
+    "analyze", "evaluate", "design", "architect", "optimize",
+    "explain why", "how does", "what if", "compare and contrast"
+)
+
+# Connectives that lower confidence in a routine match
+_COMPLEX_WORDS = ("however", "therefore", "consequently", "nevertheless")
+
+# A pattern that starts with \bword\b or \b(word|word...)\b can only match
+# a prompt containing one of those words as a whole token
+_ANCHOR_PREFIX = re.compile(r"\\b(?:\((?:\?:)?([a-z0-9_]+(?:\|[a-z0-9_]+)*)\)|([a-z0-9_]+))\\b")
+_WORD = re.compile(r"\w+")
+
+# Task types whose response depends only on the prompt and these context keys
+_CACHEABLE_TASK_TYPES: Dict[str, Tuple[str, ...]] = {
+    "greeting": ("user_name",),
+    "status_check": ("agent_count",),
+}
+
+
+def _has_top_level_branch(pattern: str) -> bool:
+    """Whether a regex has a ``|`` outside every group and character class."""
+    depth = 0
+    in_class = False
+    escaped = False
+    for char in pattern:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            return True
+    return False
+
+
+def _compile_pattern(
+    pattern: TaskPattern
+) -> Tuple[Optional[FrozenSet[str]], "re.Pattern[str]", TaskPattern]:
+    """Compile a task pattern and extract the whole words it must start with.
+
+    Returns:
+        Tuple of (anchor words or None, compiled regex, pattern)
+    """
+    anchors = None
+    prefix = _ANCHOR_PREFIX.match(pattern.pattern)
+    if prefix and not _has_top_level_branch(pattern.pattern):
+        anchors = frozenset((prefix.group(1) or prefix.group(2)).split("|"))
+    return anchors, re.compile(pattern.pattern, re.IGNORECASE), pattern
+
+
 class LocalSLM:
     """Local Small Language Model for handling routine tasks.
 
     This class identifies and executes routine tasks locally using
     pattern matching and template-based responses, avoiding costly
-    API calls for simple, repetitive tasks.
+    API calls for simple, repetitive tasks. Patterns are compiled once, and
+    each is skipped without running its regex when the prompt lacks the
+    whole words the pattern starts with. Responses for deterministic task
+    types are memoized in an LRU keyed by the normalized prompt.
+
+    With an inference pool attached, prompts that match a pattern with
+    marginal confidence (at least ``min_model_confidence`` but below the
+    pattern's threshold) go to the local model instead of the paid LLM.
     """
 
-    def __init__(self) -> None:
-        """Initialize the local SLM with task patterns and templates."""
+    def __init__(
+        self,
+        response_cache_size: int = 1024,
+        inference_pool: Optional[LocalInferencePool] = None,
+        min_model_confidence: float = 0.6,
+        model_timeout_seconds: float = 10.0
+    ) -> None:
+        """Initialize the local SLM with task patterns and templates.
+
+        Args:
+            response_cache_size: Maximum number of memoized responses
+                (0 disables)
+            inference_pool: Optional local model pool for marginal matches
+            min_model_confidence: Lowest pattern confidence sent to the
+                local model
+            model_timeout_seconds: Longest wait for the local model before
+                delegating to the LLM
+        """
         self._task_patterns: List[TaskPattern] = [
             # Greeting patterns
             TaskPattern(
@@ -106,9 +196,21 @@ class LocalSLM:
         self._stats: Dict[str, int] = {
             "total_requests": 0,
             "handled_locally": 0,
-            "delegated_to_llm": 0
+            "delegated_to_llm": 0,
+            "cache_hits": 0,
+            "handled_by_model": 0
         }
 
+        self._inference_pool = inference_pool
+        self._min_model_confidence = min_model_confidence
+        self._model_timeout_seconds = model_timeout_seconds
+
+        # Normalized prompt -> (response, context values it depends on)
+        self._response_cache_size = response_cache_size
+        self._response_cache: OrderedDict = OrderedDict()
+
+        self._matchers = [_compile_pattern(pattern) for pattern in self._task_patterns]
+
     def is_routine_task(
         self,
         prompt: str,
@@ -123,38 +225,47 @@ class LocalSLM:
         Returns:
             Tuple of (is_routine, confidence, task_type)
         """
-        context = context or {}
+        best_match, confidence, reason = self._match(prompt)
+        if best_match is not None and confidence >= best_match.confidence_threshold:
+            return True, confidence, best_match.task_type
+        return False, confidence, reason
+
+    def _match(self, prompt: str) -> Tuple[Optional[TaskPattern], float, str]:
+        """Find the first matching task pattern and the match confidence.
+
+        Args:
+            prompt: The user's request text
+
+        Returns:
+            Tuple of (matching pattern or None, confidence, task type
+            reported when the task is not routine)
+        """
         prompt_lower = prompt.lower().strip()
 
         # Check if prompt is too long (likely complex)
-        if len(prompt.split()) > 50:
-            return False, 0.0, "unknown"
+        word_count = len(prompt.split())
+        if word_count > 50:
+            return None, 0.0, "unknown"
 
         # Check if requires complex reasoning
-        complex_indicators = [
-            "analyze", "evaluate", "design", "architect", "optimize",
-            "explain why", "how does", "what if", "compare and contrast"
-        ]
-        if any(indicator in prompt_lower for indicator in complex_indicators):
-            return False, 0.0, "complex"
+        if any(indicator in prompt_lower for indicator in _COMPLEX_INDICATORS):
+            return None, 0.0, "complex"
 
-        # Match against task patterns
+        # Match against task patterns; confidence does not depend on which
+        # pattern matched, so the first matching pattern is the best match
+        tokens = set(_WORD.findall(prompt_lower)) if prompt_lower.isascii() else None
         best_match: Optional[TaskPattern] = None
-        best_confidence = 0.0
-
-        for pattern in self._task_patterns:
-            if re.search(pattern.pattern, prompt_lower, re.IGNORECASE):
-                # Calculate confidence based on pattern match strength
-                confidence = self._calculate_confidence(prompt, pattern)
+        for anchors, regex, pattern in self._matchers:
+            if anchors is not None and tokens is not None and anchors.isdisjoint(tokens):
+                continue
+            if regex.search(prompt_lower):
+                best_match = pattern
+                break
 
-                if confidence > best_confidence:
-                    best_confidence = confidence
-                    best_match = pattern
+        if best_match is None:
+            return None, 0.0, "unknown"
 
-        if best_match and best_confidence >= best_match.confidence_threshold:
-            return True, best_confidence, best_match.task_type
-
-        return False, best_confidence, "unknown"
+        return best_match, self._score_confidence(prompt_lower, word_count), "unknown"
 
     def execute(
         self,
@@ -163,6 +274,10 @@ class LocalSLM:
     ) -> LocalResponse:
         """Execute a routine task locally.
 
+        Marginal matches wait for the local model (up to the model timeout)
+        when an inference pool is attached; use execute_async() from an
+        event loop.
+
         Args:
             prompt: The user's request text
             context: Optional context information
@@ -170,34 +285,105 @@ class LocalSLM:
         Returns:
             LocalResponse with the execution result
         """
-        start_time = datetime.now()
+        start_time = time.perf_counter()
         context = context or {}
 
-        self._stats["total_requests"] += 1
+        response, marginal_match, confidence = self._execute_local(prompt, context, start_time)
+        if response is not None:
+            return response
 
-        # Check if task is routine
-        is_routine, confidence, task_type = self.is_routine_task(prompt, context)
-
-        if not is_routine:
-            self._stats["delegated_to_llm"] = self._stats.get("delegated_to_llm", 0) + 1
-            execution_time = (datetime.now() - start_time).total_seconds() * 1000
-
-            return LocalResponse(
-                content="Task requires full LLM processing",
-                confidence=0.0,
-                task_type="complex",
-                execution_time_ms=execution_time,
-                used_local_model=False
+        content = None
+        try:
+            content = self._inference_pool.generate(
+                prompt, timeout=self._model_timeout_seconds
             )
+        except Exception as e:
+            logger.warning(f"Local model failed, delegating to LLM: {e}")
+        return self._model_response(content, marginal_match, confidence, start_time)
 
+    async def execute_async(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]] = None
+    ) -> LocalResponse:
+        """Execute a task locally without blocking the event loop.
+
+        Args:
+            prompt: The user's request text
+            context: Optional context information
+
+        Returns:
+            LocalResponse with the execution result
+        """
+        start_time = time.perf_counter()
+        context = context or {}
+
+        response, marginal_match, confidence = self._execute_local(prompt, context, start_time)
+        if response is not None:
+            return response
+
+        content = None
+        try:
+            content = await asyncio.wait_for(
+                self._inference_pool.generate_async(prompt),
+                timeout=self._model_timeout_seconds
+            )
+        except Exception as e:
+            logger.warning(f"Local model failed, delegating to LLM: {e}")
+        return self._model_response(content, marginal_match, confidence, start_time)
+
+    def _execute_local(
+        self,
+        prompt: str,
+        context: Dict[str, Any],
+        start_time: float
+    ) -> Tuple[Optional[LocalResponse], Optional[TaskPattern], float]:
+        """Answer from the cache or templates, or decide to use the local model.
+
+        Returns:
+            Tuple of (response, or None with the marginal pattern and its
+            confidence when the local model should answer)
+        """
+        self._stats["total_requests"] += 1
+
+        cache_key = None
+        if self._response_cache_size > 0:
+            cache_key = " ".join(prompt.lower().split())
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                response, context_values = cached
+                keys = _CACHEABLE_TASK_TYPES[response.task_type]
+                if context_values == tuple(context.get(key) for key in keys):
+                    self._response_cache.move_to_end(cache_key)
+                    self._stats["handled_locally"] += 1
+                    self._stats["cache_hits"] += 1
+                    response = replace(
+                        response,
+                        execution_time_ms=(time.perf_counter() - start_time) * 1000
+                    )
+                    return response, None, 0.0
+
+        # Check if task is routine
+        best_match, confidence, _ = self._match(prompt)
+
+        if best_match is None or confidence < best_match.confidence_threshold:
+            if (
+                best_match is not None
+                and self._inference_pool is not None
+                and confidence >= self._min_model_confidence
+            ):
+                return None, best_match, confidence
+            return self._delegated_response(start_time), None, 0.0
+
+        task_type = best_match.task_type
         self._stats["handled_locally"] += 1
 
         # Execute based on task type
         response_content = self._execute_task(prompt, task_type, context)
 
-        execution_time = (datetime.now() - start_time).total_seconds() * 1000
+        execution_time = (time.perf_counter() - start_time) * 1000
 
-        return LocalResponse(
+        response = LocalResponse(
             content=response_content,
             confidence=confidence,
             task_type=task_type,
@@ -205,6 +391,51 @@ class LocalSLM:
             used_local_model=True
         )
 
+        if cache_key is not None and task_type in _CACHEABLE_TASK_TYPES:
+            keys = _CACHEABLE_TASK_TYPES[task_type]
+            self._response_cache[cache_key] = (
+                response, tuple(context.get(key) for key in keys)
+            )
+            self._response_cache.move_to_end(cache_key)
+            if len(self._response_cache) > self._response_cache_size:
+                self._response_cache.popitem(last=False)
+
+        return response, None, 0.0
+
+    def _model_response(
+        self,
+        content: Optional[str],
+        pattern: TaskPattern,
+        confidence: float,
+        start_time: float
+    ) -> LocalResponse:
+        """Wrap a local model completion, or delegate if there is none."""
+        if content is None:
+            return self._delegated_response(start_time)
+
+        self._stats["handled_locally"] += 1
+        self._stats["handled_by_model"] += 1
+        return LocalResponse(
+            content=content,
+            confidence=confidence,
+            task_type=pattern.task_type,
+            execution_time_ms=(time.perf_counter() - start_time) * 1000,
+            used_local_model=True
+        )
+
+    def _delegated_response(self, start_time: float) -> LocalResponse:
+        """Record and return a response handing the task to the full LLM."""
+        self._stats["delegated_to_llm"] = self._stats.get("delegated_to_llm", 0) + 1
+        execution_time = (time.perf_counter() - start_time) * 1000
+
+        return LocalResponse(
+            content="Task requires full LLM processing",
+            confidence=0.0,
+            task_type="complex",
+            execution_time_ms=execution_time,
+            used_local_model=False
+        )
+
     def _execute_task(
         self,
         prompt: str,
@@ -334,16 +565,32 @@ class LocalSLM:
         if re.search(pattern.pattern, prompt, re.IGNORECASE):
             confidence += 0.3
 
+        return self._score_confidence(prompt.lower(), len(prompt.split()), confidence)
+
+    @staticmethod
+    def _score_confidence(
+        prompt_lower: str,
+        word_count: int,
+        confidence: float = 0.8
+    ) -> float:
+        """Apply the length and language adjustments to a base confidence.
+
+        Args:
+            prompt_lower: Lowercased request text
+            word_count: Number of words in the request
+            confidence: Base confidence (0.8 for a pattern match)
+
+        Returns:
+            Confidence score between 0.0 and 1.0
+        """
         # Shorter prompts are more likely to be routine
-        word_count = len(prompt.split())
         if word_count <= 10:
             confidence += 0.2
         elif word_count <= 20:
             confidence += 0.1
 
         # Penalize complex language
-        complex_words = ["however", "therefore", "consequently", "nevertheless"]
-        if any(word in prompt.lower() for word in complex_words):
+        if any(word in prompt_lower for word in _COMPLEX_WORDS):
             confidence -= 0.2
 
         return min(1.0, max(0.0, confidence))
@@ -361,16 +608,25 @@ class LocalSLM:
             "total_requests": total,
             "handled_locally": self._stats["handled_locally"],
             "delegated_to_llm": self._stats["delegated_to_llm"],
-            "local_handling_rate": round(local_rate, 2)
+            "local_handling_rate": round(local_rate, 2),
+            "cache_hits": self._stats["cache_hits"],
+            "cache_size": len(self._response_cache),
+            "handled_by_model": self._stats["handled_by_model"]
         }
 
     def add_task_pattern(self, pattern: TaskPattern) -> None:
         """Add a new task pattern for routine task detection.
 
+        Only the new pattern is compiled. Memoized responses are dropped
+        since the new pattern can change how earlier prompts classify.
+
         Args:
             pattern: Task pattern to add
         """
+        matcher = _compile_pattern(pattern)
         self._task_patterns.append(pattern)
+        self._matchers.append(matcher)
+        self._response_cache.clear()
 
     def add_template(self, task_type: str, template: str) -> None:
         """Add a response template for a task type.
@@ -380,3 +636,4 @@ class LocalSLM:
             template: Response template
         """
         self._templates[task_type] = template
+        self._response_cache.clear()
@@ -0,0 +1,609 @@
+"""Two-tier result cache: in-process ResultCache in front of Redis.
+
+Each process keeps its own ResultCache (L1); Redis (L2) is shared by every
+replica, so a response computed by one agent pod is reused by the others.
+Redis traffic is pipelined, values are compact JSON (zlib-compressed when
+large), TTLs come from the ``cache_rules`` config, and concurrent misses
+for one key are coalesced into a single upstream call.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import uuid4
+
+import yaml
+
+from .caching import CacheRules, ResultCache
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+    _REDIS_ERRORS: Tuple[type, ...] = (redis.RedisError, OSError)
+except ImportError:
+    REDIS_AVAILABLE = False
+    _REDIS_ERRORS = (OSError,)
+
+try:
+    import fakeredis
+    FAKEREDIS_AVAILABLE = True
+except ImportError:
+    FAKEREDIS_AVAILABLE = False
+
+
+logger = logging.getLogger(__name__)
+
+# Value header bytes: plain JSON or zlib-compressed JSON
+_PLAIN = b"\x01"
+_ZLIB = b"\x02"
+
+
+def encode_value(
+    result: Any,
+    metadata: Optional[Dict[str, Any]] = None,
+    tags: Optional[List[str]] = None,
+    compress_threshold: int = 1024
+) -> bytes:
+    """Serialize a cached result for Redis.
+
+    Args:
+        result: JSON-serializable result
+        metadata: Entry metadata
+        tags: Entry tags
+        compress_threshold: Payloads at least this many bytes are zlib-compressed
+
+    Returns:
+        Header byte followed by the (possibly compressed) JSON payload
+
+    Raises:
+        TypeError: If the result or metadata is not JSON-serializable
+    """
+    payload = json.dumps(
+        [result, metadata or {}, tags or []],
+        separators=(",", ":"),
+        ensure_ascii=False
+    ).encode()
+    if len(payload) >= compress_threshold:
+        compressed = zlib.compress(payload, 6)
+        if len(compressed) < len(payload):
+            return _ZLIB + compressed
+    return _PLAIN + payload
+
+
+def decode_value(data: bytes) -> Tuple[Any, Dict[str, Any], List[str]]:
+    """Deserialize a value written by ``encode_value``.
+
+    Args:
+        data: Raw Redis value
+
+    Returns:
+        Tuple of (result, metadata, tags)
+    """
+    header, payload = data[:1], data[1:]
+    if header == _ZLIB:
+        payload = zlib.decompress(payload)
+    elif header != _PLAIN:
+        raise ValueError(f"Unknown cache value header: {header!r}")
+    result, metadata, tags = json.loads(payload)
+    return result, metadata, tags
+
+
+class TieredResultCache:
+    """
+    ResultCache (L1) backed by a shared Redis tier (L2).
+
+    Reads try L1, then Redis; Redis hits are copied into L1 for the rest of
+    their Redis lifetime. Writes go to both tiers. Batch reads and writes
+    use one pipelined round trip. Results that are not JSON-serializable
+    stay in L1 only. Redis errors are logged and the cache keeps working
+    from L1.
+
+    ``get_or_compute`` coalesces concurrent misses: within a process,
+    callers for a key in flight wait for the first caller's result; across
+    replicas, a short Redis lock lets one replica compute while the others
+    poll for its value.
+
+    Example:
+        >>> cache = TieredResultCache.from_config()
+        >>> key = cache.generate_key(prompt, model="gpt-4", namespace="frequently_asked")
+        >>> response = cache.get_or_compute(key, lambda: call_llm(prompt))
+    """
+
+    def __init__(
+        self,
+        local_cache: Optional[ResultCache] = None,
+        redis_client: Optional[Any] = None,
+        use_fakeredis: bool = False,
+        rules: Optional[CacheRules] = None,
+        default_ttl_seconds: Optional[int] = 3600,
+        key_prefix: str = "result_cache:",
+        compress_threshold: int = 1024,
+        lock_timeout_seconds: float = 30.0,
+        lock_poll_interval_ms: float = 50.0
+    ) -> None:
+        """Initialize the tiered cache.
+
+        Args:
+            local_cache: L1 cache (a default ResultCache if None)
+            redis_client: Redis client returning bytes (decode_responses=False);
+                None uses fakeredis if ``use_fakeredis`` is set, otherwise L1 only
+            use_fakeredis: Create an in-memory fakeredis L2 when no client is given
+            rules: Cache rules mapping keys to TTLs (None = default TTL everywhere)
+            default_ttl_seconds: TTL for keys no rule gives one (None = no expiry)
+            key_prefix: Prefix for Redis keys
+            compress_threshold: Payload size from which values are compressed
+            lock_timeout_seconds: Lifetime of the cross-replica compute lock
+            lock_poll_interval_ms: How often lock waiters poll Redis for the value
+        """
+        self.local = local_cache if local_cache is not None else ResultCache(
+            default_ttl_seconds=default_ttl_seconds
+        )
+        if redis_client is not None:
+            self.redis = redis_client
+        elif use_fakeredis and FAKEREDIS_AVAILABLE:
+            self.redis = fakeredis.FakeRedis()
+        else:
+            self.redis = None
+        self.rules = rules
+        self.default_ttl_seconds = default_ttl_seconds
+        self.key_prefix = key_prefix
+        self.compress_threshold = compress_threshold
+        self.lock_timeout_seconds = lock_timeout_seconds
+        self.lock_poll_interval_ms = lock_poll_interval_ms
+
+        # ResultCache is not thread-safe
+        self._local_lock = threading.RLock()
+        # Single-flight: key -> future of the call computing it
+        self._inflight: Dict[str, "Future[Any]"] = {}
+        self._async_inflight: Dict[str, "asyncio.Task[Any]"] = {}
+        self._inflight_lock = threading.Lock()
+
+        self._stats: Dict[str, int] = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "misses": 0,
+            "computes": 0,
+            "coalesced": 0,
+            "l2_errors": 0,
+            "l1_only_results": 0
+        }
+
+    @classmethod
+    def from_config(
+        cls,
+        config_path: str = "config/optimization.yaml",
+        redis_client: Optional[Any] = None,
+        cost_tracker: Optional[Any] = None,
+        **kwargs: Any
+    ) -> "TieredResultCache":
+        """Create a tiered cache from the ``caching`` section of the config.
+
+        L1 comes from ``ResultCache.from_config`` and TTLs from
+        ``cache_rules``. With ``backend: redis`` a client is built from the
+        ``redis`` settings (``${VAR}`` values are read from the environment)
+        unless one is passed in; with ``backend: memory`` there is no L2.
+
+        Args:
+            config_path: Path to optimization.yaml
+            redis_client: Redis client to use instead of the configured one
+            cost_tracker: CostTracker for the L1 "cost" eviction policy
+            **kwargs: Further constructor arguments
+
+        Returns:
+            Configured TieredResultCache
+        """
+        path = Path(config_path)
+        if not path.exists():
+            raise FileNotFoundError(f"YAML file not found: {config_path}")
+
+        with open(path, 'r') as f:
+            data = yaml.safe_load(f) or {}
+
+        caching = data.get("caching") or {}
+        if redis_client is None and caching.get("backend") == "redis" and REDIS_AVAILABLE:
+            settings = caching.get("redis") or {}
+            password = os.path.expandvars(str(settings["password"])) if settings.get("password") else None
+            redis_client = redis.Redis(
+                host=settings.get("host", "localhost"),
+                port=settings.get("port", 6379),
+                db=settings.get("db", 0),
+                password=None if not password or password.startswith("$") else password,
+                ssl=settings.get("ssl", False)
+            )
+
+        return cls(
+            local_cache=ResultCache.from_config(config_path, cost_tracker=cost_tracker),
+            redis_client=redis_client,
+            rules=CacheRules(caching.get("cache_rules") or []),
+            default_ttl_seconds=caching.get("ttl_seconds", 3600),
+            **kwargs
+        )
+
+    def generate_key(self, prompt: str, **kwargs: Any) -> str:
+        """Generate a cache key; see ``ResultCache.generate_key``."""
+        return self.local.generate_key(prompt, **kwargs)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Retrieve a result from L1, falling back to Redis.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached result if found in either tier, None otherwise
+        """
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Retrieve several results with at most one Redis round trip.
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Dictionary of the keys found, mapped to their results
+        """
+        found: Dict[str, Any] = {}
+        missing: List[str] = []
+        with self._local_lock:
+            for key in dict.fromkeys(keys):
+                result = self.local.get(key)
+                if result is None:
+                    missing.append(key)
+                else:
+                    found[key] = result
+        self._stats["l1_hits"] += len(found)
+
+        if missing and self.redis is not None:
+            remote = self._fetch_remote(missing)
+            found.update(remote)
+            self._stats["misses"] += len(missing) - len(remote)
+        else:
+            self._stats["misses"] += len(missing)
+        return found
+
+    def set(
+        self,
+        key: str,
+        result: Any,
+        metadata: Optional[Dict[str, Any]] = None,
+        ttl_seconds: Optional[int] = None,
+        tags: Optional[List[str]] = None
+    ) -> None:
+        """Store a result in both tiers.
+
+        Args:
+            key: Cache key
+            result: Result to cache
+            metadata: Optional metadata about the result
+            ttl_seconds: Time-to-live (None uses the matching cache rule)
+            tags: Optional tags for categorization
+        """
+        self.set_many([(key, result, metadata, ttl_seconds, tags)])
+
+    def set_many(
+        self,
+        items: Iterable[Tuple[str, Any, Optional[Dict[str, Any]], Optional[int], Optional[List[str]]]]
+    ) -> int:
+        """Store several results, writing Redis in one pipelined round trip.
+
+        Keys whose cache rule is disabled are skipped.
+
+        Args:
+            items: (key, result, metadata, ttl_seconds, tags) tuples
+
+        Returns:
+            Number of results stored
+        """
+        remote: List[Tuple[str, bytes, Optional[int]]] = []
+        stored = 0
+        with self._local_lock:
+            for key, result, metadata, ttl_seconds, tags in items:
+                if not self._cacheable(key):
+                    continue
+                if ttl_seconds is None:
+                    ttl_seconds = self._ttl_for(key)
+                self.local.set(key, result, metadata=metadata, ttl_seconds=ttl_seconds, tags=tags)
+                stored += 1
+                if self.redis is None:
+                    continue
+                try:
+                    value = encode_value(result, metadata, tags, self.compress_threshold)
+                except (TypeError, ValueError):
+                    self._stats["l1_only_results"] += 1
+                    continue
+                remote.append((key, value, ttl_seconds))
+
+        if remote:
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                for key, value, ttl_seconds in remote:
+                    pipe.set(self.key_prefix + key, value, ex=ttl_seconds)
+                pipe.execute()
+            except _REDIS_ERRORS as e:
+                self._redis_failed("write", e)
+        return stored
+
+    def invalidate(self, key: str) -> bool:
+        """Remove a key from both tiers.
+
+        Args:
+            key: Cache key to invalidate
+
+        Returns:
+            True if either tier held the key
+        """
+        with self._local_lock:
+            removed = self.local.invalidate(key)
+        if self.redis is not None:
+            try:
+                removed = bool(self.redis.delete(self.key_prefix + key)) or removed
+            except _REDIS_ERRORS as e:
+                self._redis_failed("delete", e)
+        return removed
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        metadata: Optional[Dict[str, Any]] = None,
+        ttl_seconds: Optional[int] = None,
+        tags: Optional[List[str]] = None
+    ) -> Any:
+        """Return the cached result for a key, computing it once on a miss.
+
+        Concurrent callers for the same key share one ``compute`` call. If
+        ``compute`` raises, every waiting caller gets the exception and
+        nothing is cached.
+
+        Args:
+            key: Cache key
+            compute: Zero-argument function producing the result
+            metadata: Metadata stored with a computed result
+            ttl_seconds: TTL for a computed result (None uses cache rules)
+            tags: Tags stored with a computed result
+
+        Returns:
+            Cached or freshly computed result
+        """
+        result = self.get(key)
+        if result is not None:
+            return result
+
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+
+        if not leader:
+            self._stats["coalesced"] += 1
+            return future.result()
+
+        try:
+            result = self._compute_once(key, compute, metadata, ttl_seconds, tags)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+        return result
+
+    async def get_or_compute_async(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        metadata: Optional[Dict[str, Any]] = None,
+        ttl_seconds: Optional[int] = None,
+        tags: Optional[List[str]] = None
+    ) -> Any:
+        """Async ``get_or_compute`` for coroutine-producing ``compute``.
+
+        Tasks on the event loop awaiting the same key share one call, run
+        in its own task: a caller that is cancelled stops waiting, but the
+        call carries on (and is cached) for the others. Redis is accessed
+        synchronously, so use it with a low-latency Redis or from a
+        dedicated loop.
+
+        Args:
+            key: Cache key
+            compute: Zero-argument function returning an awaitable result
+            metadata: Metadata stored with a computed result
+            ttl_seconds: TTL for a computed result (None uses cache rules)
+            tags: Tags stored with a computed result
+
+        Returns:
+            Cached or freshly computed result
+        """
+        result = self.get(key)
+        if result is not None:
+            return result
+
+        task = self._async_inflight.get(key)
+        if task is not None:
+            self._stats["coalesced"] += 1
+        else:
+            task = self._async_inflight[key] = asyncio.create_task(
+                self._compute_async(key, compute, metadata, ttl_seconds, tags)
+            )
+            # Mark the outcome retrieved so a call nobody awaits any more
+            # doesn't log a warning
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        return await asyncio.shield(task)
+
+    async def _compute_async(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        metadata: Optional[Dict[str, Any]],
+        ttl_seconds: Optional[int],
+        tags: Optional[List[str]]
+    ) -> Any:
+        """Run a shared async compute and cache its result."""
+        try:
+            result = await compute()
+            self._stats["computes"] += 1
+            if result is not None:
+                self.set(key, result, metadata=metadata, ttl_seconds=ttl_seconds, tags=tags)
+            return result
+        finally:
+            del self._async_inflight[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get statistics for both tiers.
+
+        Returns:
+            Dictionary with per-tier hits, misses, computes, coalesced
+            waiters, Redis errors, L1-only results, overall hit_rate and
+            the L1 CacheStats under "local"
+        """
+        lookups = self._stats["l1_hits"] + self._stats["l2_hits"] + self._stats["misses"]
+        hits = self._stats["l1_hits"] + self._stats["l2_hits"]
+        with self._local_lock:
+            local = self.local.get_stats()
+        return {
+            **self._stats,
+            "hit_rate": round(hits / lookups * 100, 2) if lookups else 0.0,
+            "redis_enabled": self.redis is not None,
+            "local": local
+        }
+
+    def _cacheable(self, key: str) -> bool:
+        """Whether the cache rules allow storing a key."""
+        return self.rules is None or self.rules.is_enabled(key)
+
+    def _ttl_for(self, key: str) -> Optional[int]:
+        """TTL from the cache rules, or the default TTL."""
+        if self.rules is None:
+            return self.default_ttl_seconds
+        return self.rules.ttl_for(key, self.default_ttl_seconds)
+
+    def _fetch_remote(self, keys: List[str]) -> Dict[str, Any]:
+        """MGET keys from Redis, with their remaining TTLs, and fill L1."""
+        redis_keys = [self.key_prefix + key for key in keys]
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.mget(redis_keys)
+            for redis_key in redis_keys:
+                pipe.pttl(redis_key)
+            replies = pipe.execute()
+        except _REDIS_ERRORS as e:
+            self._redis_failed("read", e)
+            return {}
+
+        values, ttls_ms = replies[0], replies[1:]
+        found: Dict[str, Any] = {}
+        with self._local_lock:
+            for key, value, ttl_ms in zip(keys, values, ttls_ms):
+                if value is None:
+                    continue
+                try:
+                    result, metadata, tags = decode_value(value)
+                except (ValueError, TypeError, zlib.error) as e:
+                    logger.warning(f"Discarding undecodable cache value for {key}: {e}")
+                    continue
+                # PTTL is -1 for keys without expiry; round partial seconds up
+                ttl_seconds = None if ttl_ms < 0 else max(1, -(-ttl_ms // 1000))
+                self.local.set(key, result, metadata=metadata, ttl_seconds=ttl_seconds, tags=tags)
+                found[key] = result
+        self._stats["l2_hits"] += len(found)
+        return found
+
+    def _compute_once(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        metadata: Optional[Dict[str, Any]],
+        ttl_seconds: Optional[int],
+        tags: Optional[List[str]]
+    ) -> Any:
+        """Compute a missing result, holding the cross-replica lock if possible.
+
+        A replica that doesn't get the lock polls Redis for the holder's
+        result until the lock expires, then computes it itself. Results
+        that are None or can't be encoded for Redis never reach the other
+        replicas, so their waiters time out and compute as well. Keys whose
+        cache rule is disabled are computed without taking the lock, since
+        nothing would be shared.
+        """
+        if not self._cacheable(key):
+            result = compute()
+            self._stats["computes"] += 1
+            return result
+
+        token = self._acquire_remote_lock(key)
+        if token is None:
+            deadline = time.monotonic() + self.lock_timeout_seconds
+            while time.monotonic() < deadline:
+                time.sleep(self.lock_poll_interval_ms / 1000)
+                result = self._fetch_remote([key]).get(key)
+                if result is not None:
+                    self._stats["coalesced"] += 1
+                    return result
+                token = self._acquire_remote_lock(key)
+                if token is not None:
+                    break
+
+        try:
+            result = compute()
+            self._stats["computes"] += 1
+            if result is not None:
+                self.set(key, result, metadata=metadata, ttl_seconds=ttl_seconds, tags=tags)
+            return result
+        finally:
+            if token:
+                self._release_remote_lock(key, token)
+
+    def _acquire_remote_lock(self, key: str) -> Optional[str]:
+        """Try to take the Redis compute lock for a key.
+
+        Returns:
+            Lock token if acquired, "" if there is no usable Redis (compute
+            without a lock), None if another replica holds the lock
+        """
+        if self.redis is None:
+            return ""
+        token = uuid4().hex
+        try:
+            acquired = self.redis.set(
+                self._lock_key(key), token, nx=True,
+                px=int(self.lock_timeout_seconds * 1000)
+            )
+        except _REDIS_ERRORS as e:
+            self._redis_failed("lock", e)
+            return ""
+        return token if acquired else None
+
+    def _release_remote_lock(self, key: str, token: str) -> None:
+        """Delete the compute lock if this caller still holds it."""
+        lock_key = self._lock_key(key)
+        try:
+            with self.redis.pipeline() as pipe:
+                pipe.watch(lock_key)
+                held = pipe.get(lock_key)
+                if held in (token, token.encode()):
+                    pipe.multi()
+                    pipe.delete(lock_key)
+                    pipe.execute()
+        except _REDIS_ERRORS as e:
+            # Includes WatchError: the lock changed hands, leave it alone
+            self._redis_failed("unlock", e)
+
+    def _lock_key(self, key: str) -> str:
+        """Redis key of the compute lock for a cache key."""
+        return f"lock:{self.key_prefix}{key}"
+
+    def _redis_failed(self, operation: str, error: Exception) -> None:
+        """Count and log a Redis failure; the cache carries on with L1."""
+        self._stats["l2_errors"] += 1
+        logger.warning(f"Redis cache {operation} failed: {error}")
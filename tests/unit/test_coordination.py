@@ -0,0 +1,71 @@
+"""
+Unit tests for agent coordination.
+
+Tests message broker routing, batching and unsubscription.
+"""
+
+import pytest
+
+from src.coordination.a2a_protocol import A2AMessage, MessageType
+from src.coordination.message_broker import MessageBroker
+
+
+def _drain(queue) -> list:
+    """Take every message currently in a queue."""
+    messages = []
+    while not queue.empty():
+        messages.append(queue.get_nowait())
+    return messages
+
+
+class TestMessageBroker:
+    """Test MessageBroker publish routing and subscription changes."""
+
+    @pytest.fixture
+    def broker(self):
+        return MessageBroker(max_queue_size=3)
+
+    async def test_routes_by_agent_topic_type_and_broadcast(self, broker):
+        """Test each queue receives a message once, whichever routes match."""
+        alice = await broker.subscribe("alice", topic="team", message_types=[MessageType.REQUEST])
+        bob = await broker.subscribe("bob", topic="broadcast")
+        monitor = await broker.subscribe("monitor", message_types=[MessageType.REQUEST, MessageType.REQUEST])
+
+        direct = A2AMessage(from_agent_id="bob", to_agent_id="alice", message_type=MessageType.REQUEST)
+        assert await broker.publish(direct, topic="team")
+        broadcast = A2AMessage(from_agent_id="alice")
+        assert await broker.publish(broadcast)
+
+        assert _drain(alice) == [direct]
+        assert _drain(bob) == [broadcast]
+        assert _drain(monitor) == [direct]
+
+        assert not await broker.publish(A2AMessage(to_agent_id="nobody"))
+        assert len(await broker.get_dead_letter_messages()) == 1
+
+    async def test_publish_many_and_full_queues(self, broker):
+        """Test batches deliver in order and overflow goes to the dead letter queue."""
+        queue = await broker.subscribe("alice")
+        messages = [A2AMessage(to_agent_id="alice", payload={"n": i}) for i in range(4)]
+
+        assert await broker.publish_many(messages) == [True, True, True, False]
+        assert [m.payload["n"] for m in _drain(queue)] == [0, 1, 2]
+        assert await broker.get_dead_letter_messages() == [messages[3], messages[3]]
+
+    async def test_unsubscribe_updates_only_routes_of_the_agent(self, broker):
+        """Test unsubscribing removes the agent's queue from its topics and types."""
+        alice = await broker.subscribe("alice", topic="team", message_types=[MessageType.NOTIFICATION])
+        bob = await broker.subscribe("bob", topic="team")
+        message = A2AMessage(message_type=MessageType.NOTIFICATION)
+        await broker.publish(message, topic="team")
+
+        await broker.unsubscribe("alice")
+        await broker.publish(message, topic="team")
+        assert len(_drain(alice)) == 1
+        assert len(_drain(bob)) == 2
+        assert broker.get_stats()["type_subscriptions"] == 0
+        assert broker.get_stats()["topic_subscriptions"] == 1
+
+        await broker.shutdown()
+        assert not await broker.publish(message)
+        assert await broker.publish_many([message]) == [False]
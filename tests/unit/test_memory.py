@@ -0,0 +1,1075 @@
+"""
+Unit tests for the memory system.
+
+Tests session storage, vector memory search and its index structures.
+"""
+
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+import fakeredis
+import numpy as np
+import pytest
+
+from src.memory.ann_index import IVFFlatIndex
+from src.memory.consolidation import (
+    ConsolidationConfig,
+    IncrementalConsolidator,
+    MemoryConsolidator,
+    find_redundant_memories,
+)
+from src.memory.patterns import ExperienceReplayPattern
+from src.memory.session_memory import (
+    AsyncSessionMemory,
+    JsonSessionCodec,
+    Session,
+    SessionEntry,
+    SessionMemory,
+    StructSessionCodec,
+    decode_entry,
+)
+from src.memory.snapshot import MemorySnapshot
+from src.memory.vector_memory import (
+    CompactMemoryVector,
+    MemoryVector,
+    SimpleEmbedding,
+    VectorMemory,
+)
+
+
+def _random_embedding(rng: random.Random, dim: int = 128) -> list:
+    """Generate a random embedding vector."""
+    return [rng.uniform(-1.0, 1.0) for _ in range(dim)]
+
+
+def _result_ids(results) -> list:
+    """Extract (memory_id, rounded similarity) pairs from search results."""
+    return [(r.memory.memory_id, round(r.similarity, 9)) for r in results]
+
+
+@pytest.fixture
+def populated_memories():
+    """Create an indexed and an unindexed store with identical memories."""
+    rng = random.Random(42)
+    indexed = VectorMemory(use_index=True)
+    scanned = VectorMemory(use_index=False)
+
+    for i in range(300):
+        embedding = _random_embedding(rng)
+        if i % 50 == 0:
+            embedding = [0.0] * 128  # Zero vectors always score 0.0
+        memory = MemoryVector(
+            agent_id=f"agent-{i % 4}",
+            content=f"memory {i}",
+            embedding=embedding,
+            tags=[f"tag-{i % 3}"],
+        )
+        indexed.import_memories([memory.to_dict()])
+        scanned.import_memories([memory.to_dict()])
+
+    for memory_id in list(indexed.memories)[::5]:
+        indexed.delete(memory_id)
+        scanned.delete(memory_id)
+
+    return indexed, scanned, rng
+
+
+# ===== Vector Memory Tests =====
+
+
+class TestVectorMemorySearch:
+    """Test VectorMemory search with and without the embedding index."""
+
+    def test_index_matches_scan(self, populated_memories):
+        """Test indexed search returns the same results as the scan."""
+        indexed, scanned, rng = populated_memories
+
+        for _ in range(5):
+            query = _random_embedding(rng)
+            for filters in ({}, {"agent_id": "agent-1"}, {"tags": ["tag-2"]}):
+                expected = scanned.search("", query_embedding=query, top_k=12, **filters)
+                actual = indexed.search("", query_embedding=query, top_k=12, **filters)
+                assert _result_ids(actual) == _result_ids(expected)
+                assert [r.rank for r in actual] == list(range(len(actual)))
+
+    def test_min_similarity_and_access_stats(self, populated_memories):
+        """Test min_similarity filtering and access counting match the scan."""
+        indexed, scanned, rng = populated_memories
+        query = _random_embedding(rng)
+
+        expected = scanned.search("", query_embedding=query, top_k=1000, min_similarity=0.6)
+        actual = indexed.search("", query_embedding=query, top_k=1000, min_similarity=0.6)
+
+        assert _result_ids(actual) == _result_ids(expected)
+        assert all(r.similarity >= 0.6 for r in actual)
+        for memory_id, memory in indexed.memories.items():
+            assert memory.access_count == scanned.memories[memory_id].access_count
+
+    def test_ties_keep_insertion_order(self):
+        """Test identical embeddings are returned oldest first."""
+        memory = VectorMemory(use_index=True)
+        ids = [memory.store("agent", "same text") for _ in range(5)]
+
+        results = memory.search("same text", top_k=3)
+
+        assert [r.memory.memory_id for r in results] == ids[:3]
+
+    def test_index_resyncs_after_direct_mutation(self):
+        """Test memories added directly to the dict are still searchable."""
+        memory = VectorMemory(use_index=True)
+        memory.store("agent", "first memory")
+        direct = MemoryVector(
+            agent_id="agent",
+            content="second memory",
+            embedding=memory.embedder.embed("second memory"),
+        )
+        memory.memories[direct.memory_id] = direct
+
+        results = memory.search("second memory", top_k=1)
+
+        assert results[0].memory.memory_id == direct.memory_id
+
+    def test_index_survives_compaction(self):
+        """Test search stays correct after many deletes compact the index."""
+        rng = random.Random(7)
+        memory = VectorMemory(use_index=True)
+        ids = [memory.store("agent", "", embedding=_random_embedding(rng)) for _ in range(3000)]
+        for memory_id in ids[:2500]:
+            memory.delete(memory_id)
+
+        query = _random_embedding(rng)
+        results = memory.search("", query_embedding=query, top_k=5)
+
+        expected = sorted(
+            ((memory._cosine_similarity(query, m.embedding), m.memory_id) for m in memory.memories.values()),
+            key=lambda pair: pair[0],
+            reverse=True,
+        )[:5]
+        assert [r.memory.memory_id for r in results] == [memory_id for _, memory_id in expected]
+
+
+class TestSimpleEmbedding:
+    """Test batched and cached embedding generation."""
+
+    @pytest.mark.parametrize("dim", [64, 128, 200])
+    def test_batch_matches_single(self, dim):
+        """Test embed_batch produces the same vectors as embed."""
+        embedder = SimpleEmbedding(dim, cache_size=0)
+        texts = ["Hello World 123", "", "   ", "naïve café 42", "a " * 50, "Hello World 123"]
+
+        batch = embedder.embed_batch(texts)
+
+        for text, embedding in zip(texts, batch):
+            assert embedding == pytest.approx(embedder.embed(text), abs=1e-12)
+
+    def test_cache_hits_and_eviction(self):
+        """Test the LRU cache serves repeats and evicts old entries."""
+        embedder = SimpleEmbedding(cache_size=2)
+        first = embedder.embed("first")
+        first[0] = 99.0  # Callers get copies, not the cached list
+
+        assert embedder.embed(" FIRST ") != first
+        embedder.embed_batch(["second", "third", "third"])
+
+        stats = embedder.get_cache_stats()
+        assert stats["size"] == 2
+        assert stats["hits"] == 2
+        assert stats["misses"] == 3
+        embedder.embed("first")
+        assert embedder.get_cache_stats()["misses"] == 4
+
+    def test_store_many_and_search_many(self):
+        """Test bulk ingestion and multi-query retrieval."""
+        memory = VectorMemory()
+        ids = memory.store_many("agent", ["deploy failed", "invoice paid"], tags=["ops"])
+
+        results = memory.search_many(["deploy failed", "invoice paid"], top_k=1, tags=["ops"])
+
+        assert [r[0].memory.memory_id for r in results] == ids
+        assert memory.memories[ids[0]].tags is not memory.memories[ids[1]].tags
+
+
+class TestCompactMemoryVector:
+    """Test compact memory storage."""
+
+    def test_compact_store_matches_default(self, populated_memories):
+        """Test compact memories search like regular ones."""
+        _, scanned, rng = populated_memories
+        compact = VectorMemory(compact=True)
+        compact.import_memories(scanned.export_memories())
+        query = _random_embedding(rng)
+
+        expected = scanned.search("", query_embedding=query, top_k=10, agent_id="agent-3")
+        actual = compact.search("", query_embedding=query, top_k=10, agent_id="agent-3")
+
+        assert isinstance(next(iter(compact.memories.values())), CompactMemoryVector)
+        assert [r.memory.memory_id for r in actual] == [r.memory.memory_id for r in expected]
+        for a, e in zip(actual, expected):
+            assert a.similarity == pytest.approx(e.similarity, abs=1e-6)
+
+    def test_compact_round_trip_and_slot_reuse(self):
+        """Test compact memories serialize like MemoryVector and recycle rows."""
+        memory = VectorMemory(compact=True)
+        first = memory.store("agent", "first", tags=["a"], metadata={"k": "v"})
+        stored = memory.memories[first]
+        data = stored.to_dict()
+
+        assert data["tags"] == ["a"]
+        assert data["metadata"] == {"k": "v"}
+        assert MemoryVector.from_dict(data).timestamp == stored.timestamp
+
+        embedding = list(stored.embedding)
+        memory.delete(first)
+        second = memory.store("agent", "second")
+
+        assert memory.memories[second]._slot == 0
+        assert list(stored.embedding) == embedding
+
+    def test_consolidation_on_compact_memories(self):
+        """Test decay, merge and prune work with compact memories."""
+        memory = VectorMemory(compact=True)
+        memory.store("agent", "same content", tags=["x"])
+        memory.store("agent", "same content", tags=["y"])
+
+        stats = MemoryConsolidator().consolidate(memory, agent_id="agent")
+
+        assert stats["merged"] == 1
+        remaining = next(iter(memory.memories.values()))
+        assert sorted(remaining.tags) == ["x", "y"]
+        assert remaining.metadata["merged_from"]
+
+
+class TestIVFFlatIndex:
+    """Test the IVF-flat approximate nearest neighbour index."""
+
+    def test_exhaustive_probe_matches_brute_force(self):
+        """Test probing every bucket returns the exact neighbours."""
+        rng = random.Random(3)
+        index = IVFFlatIndex(dim=16, nlist=8, train_threshold=200)
+        exact = VectorMemory(embedding_dim=16)
+        for _ in range(500):
+            embedding = _random_embedding(rng, 16)
+            memory_id = exact.store("agent", "", embedding=embedding)
+            index.add(memory_id, embedding)
+
+        assert index.is_trained
+        query = _random_embedding(rng, 16)
+        expected = [r.memory.memory_id for r in exact.search("", query_embedding=query, top_k=10)]
+        actual = [memory_id for memory_id, _ in index.search(query, 10, nprobe=8)]
+
+        assert actual == expected
+
+    def test_incremental_insert_and_delete(self):
+        """Test deleted vectors disappear and re-added ones are found."""
+        rng = random.Random(5)
+        index = IVFFlatIndex(dim=8, nlist=4, train_threshold=50)
+        vectors = {f"m{i}": _random_embedding(rng, 8) for i in range(200)}
+        for memory_id, embedding in vectors.items():
+            index.add(memory_id, embedding)
+
+        for i in range(0, 200, 2):
+            assert index.remove(f"m{i}") is True
+        assert index.remove("m0") is False
+        assert len(index) == 100
+
+        for memory_id, cosine in index.search(vectors["m1"], 200, nprobe=4):
+            assert int(memory_id[1:]) % 2 == 1
+        top_id, top_cosine = index.search(vectors["m1"], 1, nprobe=4)[0]
+        assert top_id == "m1"
+        assert top_cosine == pytest.approx(1.0, abs=1e-5)
+
+    def test_retraining_is_explicit_and_sampled(self):
+        """Test growth only flags a retrain and training uses a bounded sample."""
+        rng = random.Random(7)
+        index = IVFFlatIndex(dim=8, nlist=4, train_threshold=50, retrain_factor=2.0, training_sample_size=40)
+        vectors = {f"m{i}": _random_embedding(rng, 8) for i in range(150)}
+        for memory_id, embedding in list(vectors.items())[:60]:
+            index.add(memory_id, embedding)
+        assert index.is_trained and not index.needs_retrain
+        trained_centroids = index._centroids.copy()
+
+        for memory_id, embedding in list(vectors.items())[60:]:
+            index.add(memory_id, embedding)
+        assert index.needs_retrain
+        assert (index._centroids == trained_centroids).all()
+
+        index.train()
+        assert not index.needs_retrain
+        assert index.num_lists == 4 and len(index) == 150
+        query = vectors["m120"]
+        assert index.search(query, 1, nprobe=4)[0][0] == "m120"
+
+    def test_chunked_assignment_matches_full_matrix(self, monkeypatch):
+        """Test centroid assignment gives the same result when split into chunks."""
+        from src.memory import ann_index
+
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((1000, 16)).astype(np.float32)
+        centroids = rng.standard_normal((10, 16)).astype(np.float32)
+        expected = np.argmax(vectors @ centroids.T, axis=1)
+        monkeypatch.setattr(ann_index, "_ASSIGN_CHUNK_CELLS", 70)
+        assert (ann_index._assign(vectors, centroids) == expected).all()
+
+    def test_vector_memory_uses_ann_backend(self):
+        """Test VectorMemory routes unfiltered searches through the ANN index."""
+        memory = VectorMemory(ann_index=IVFFlatIndex(dim=128))
+        target = memory.store("agent", "quarterly revenue report")
+        memory.store("agent", "team offsite schedule")
+        memory.delete(memory.store("agent", "quarterly revenue report draft"))
+
+        results = memory.search("quarterly revenue report", top_k=2)
+
+        assert results[0].memory.memory_id == target
+        assert results[0].similarity == pytest.approx(1.0)
+        assert len(memory.ann_index) == memory.get_memory_count()
+
+
+class TestVectorMemoryAttributeIndexes:
+    """Test the per-agent and per-tag secondary indexes."""
+
+    def test_filters_match_linear_scan(self, populated_memories):
+        """Test agent and tag lookups return memories in insertion order."""
+        indexed, _, _ = populated_memories
+        memories = list(indexed.memories.values())
+
+        assert indexed.get_memories_by_agent("agent-2") == [
+            m for m in memories if m.agent_id == "agent-2"
+        ]
+        assert indexed.get_memories_by_tags(["tag-0", "tag-1"]) == [
+            m for m in memories if "tag-0" in m.tags or "tag-1" in m.tags
+        ]
+        assert indexed.get_memories_by_agent("missing") == []
+
+    def test_indexes_follow_delete_and_reindex(self):
+        """Test deletes and in-place tag edits keep the indexes current."""
+        memory = VectorMemory()
+        first = memory.store("agent-a", "first", tags=["alpha"])
+        second = memory.store("agent-a", "second", tags=["beta"])
+
+        memory.delete(first)
+        memory.memories[second].tags.append("alpha")
+        memory.reindex(second)
+
+        assert [m.memory_id for m in memory.get_memories_by_tags(["alpha"])] == [second]
+        assert memory.get_statistics()["total_tags"] == 2
+        results = memory.search("second", agent_id="agent-a", tags=["alpha"])
+        assert [r.memory.memory_id for r in results] == [second]
+
+    def test_merge_updates_tag_index(self):
+        """Test consolidation merges reindex the surviving memory's tags."""
+        memory = VectorMemory()
+        kept = memory.store("agent", "duplicate fact", tags=["old"])
+        memory.store("agent", "duplicate fact", tags=["new"])
+
+        merged = MemoryConsolidator().merge_similar_memories(memory, agent_id="agent")
+
+        assert merged == 1
+        assert [m.memory_id for m in memory.get_memories_by_tags(["new"])] == [kept]
+
+
+class TestMemorySnapshot:
+    """Test binary snapshots with delta log replay."""
+
+    def test_round_trip_with_delta_log(self, tmp_path):
+        """Test snapshot load restores memories and replays later changes."""
+        memory = VectorMemory()
+        kept = memory.store("agent-a", "kept memory", tags=["x"], metadata={"k": 1})
+        removed = memory.store("agent-b", "removed memory")
+        memory.store("agent-b", "", embedding=[])
+
+        snapshot = MemorySnapshot(tmp_path)
+        assert snapshot.save(memory) == 3
+
+        restored = snapshot.load()
+        added = restored.store("agent-a", "added after snapshot")
+        restored.delete(removed)
+        restored.update_importance(kept, 0.9)
+        snapshot.close()
+
+        reloaded = MemorySnapshot(tmp_path).load()
+        original = memory.get(kept)
+        loaded = reloaded.memories[kept]
+
+        assert set(reloaded.memories) == {kept, added} | {
+            m.memory_id for m in memory.memories.values() if not m.embedding
+        }
+        assert loaded.importance == 0.9
+        assert loaded.metadata == {"k": 1}
+        assert loaded.timestamp == original.timestamp
+        assert loaded.embedding == pytest.approx(original.embedding, abs=1e-6)
+        assert reloaded.search("kept memory", top_k=1)[0].memory.memory_id == kept
+        assert [m.memory_id for m in reloaded.get_memories_by_agent("agent-a")] == [kept, added]
+
+    def test_load_builds_memories_on_access(self, tmp_path):
+        """Test loading builds no memories until they are read, without losing access counts."""
+        rng = random.Random(5)
+        memory = VectorMemory(embedding_dim=16)
+        for i in range(50):
+            memory.store(
+                f"agent-{i % 3}", f"memory {i}", embedding=_random_embedding(rng, 16),
+                tags=[f"tag-{i % 4}"] if i % 2 else [], metadata={"i": i} if i % 5 else {},
+            )
+        memory.store("agent-0", "ragged", embedding=[1.0, 2.0])
+        memory.store("agent-0", "empty", embedding=[])
+        MemorySnapshot(tmp_path).save(memory)
+
+        loaded = MemorySnapshot(tmp_path).load()
+        assert loaded.memories.built == 0
+        results = loaded.search(
+            "", query_embedding=_random_embedding(rng, 16), top_k=3, agent_id="agent-1", tags=["tag-1"]
+        )
+        assert len(results) == 3 and loaded.memories.built == 3
+
+        matched = {m.memory_id for m in memory.memories.values() if m.content in {
+            f"memory {i}" for i in (1, 13, 25, 37, 49)
+        }}
+        for memory_id, original in memory.memories.items():
+            restored = loaded.memories[memory_id]
+            assert restored.access_count == (1 if memory_id in matched else 0)
+            assert (restored.agent_id, restored.content, restored.tags, restored.metadata) == (
+                original.agent_id, original.content, original.tags, original.metadata
+            )
+            assert restored.timestamp == original.timestamp
+            assert list(restored.embedding) == pytest.approx(list(original.embedding), abs=1e-6)
+
+        # Scans build the remaining memories in one batch
+        for touched in ([], [next(iter(memory.memories))]):
+            reloaded = MemorySnapshot(tmp_path).load()
+            for memory_id in touched:
+                reloaded.get(memory_id)
+            assert [(m.content, len(m.embedding)) for m in reloaded.memories.values()] == [
+                (m.content, len(m.embedding)) for m in memory.memories.values()
+            ]
+            assert reloaded.memories.built == len(memory.memories)
+
+    def test_loads_version_1_snapshot(self, tmp_path):
+        """Test snapshots with a JSON column sidecar still load and are upgraded on save."""
+        np.save(tmp_path / "embeddings-1.npy", np.asarray([[1.0, 0.0, 0.0, 0.0]], dtype=np.float32))
+        (tmp_path / "columns-1.json").write_text(json.dumps({
+            "memory_id": ["m1"], "agent_id": ["agent"], "content": ["kept"],
+            "timestamp": [86400.0], "access_count": [2], "last_accessed": [86400.0],
+            "importance": [0.7], "metadata": [{"k": 1}], "tags": [["t"]],
+            "empty_embedding": [False], "ragged_embeddings": {},
+        }))
+        (tmp_path / "delta-1.log").touch()
+        (tmp_path / "manifest.json").write_text(
+            json.dumps({"version": 1, "generation": 1, "dim": 4, "count": 1})
+        )
+
+        snapshot = MemorySnapshot(tmp_path)
+        memory = snapshot.load()
+        loaded = memory.memories["m1"]
+        assert (loaded.content, loaded.access_count, loaded.metadata, loaded.tags) == ("kept", 2, {"k": 1}, ["t"])
+        assert loaded.timestamp == datetime(1970, 1, 2)
+
+        snapshot.save(memory)
+        assert "columns-2.npz" in {p.name for p in tmp_path.iterdir()}
+        assert MemorySnapshot(tmp_path).load().memories["m1"].importance == 0.7
+
+    def test_delta_replay_keeps_matrix_mapped(self, tmp_path):
+        """Test replayed writes form an overlay on the mapped matrix and search like a fresh store."""
+        rng = random.Random(9)
+        memory = VectorMemory(embedding_dim=16)
+        ids = [memory.store("agent", f"m{i}", embedding=_random_embedding(rng, 16)) for i in range(300)]
+        snapshot = MemorySnapshot(tmp_path)
+        snapshot.save(memory)
+
+        restored = snapshot.load()
+        restored.import_memories([{**memory.get(ids[5]).to_dict(), "embedding": _random_embedding(rng, 16)}])
+        restored.delete(ids[7])
+        restored.store("agent", "zero", embedding=[0.0] * 16)
+        restored.store("agent", "new", embedding=_random_embedding(rng, 16))
+        snapshot.close()
+
+        reloaded = MemorySnapshot(tmp_path).load()
+        query = _random_embedding(rng, 16)
+        results = reloaded.search("", query_embedding=query, top_k=20)
+        index = reloaded._index
+        assert isinstance(index._base, np.memmap) and index._base_count == 300
+        assert set(index._patches) == {5}
+
+        fresh = VectorMemory(embedding_dim=16, use_index=False)
+        fresh.import_memories([m.to_dict() for m in reloaded.memories.values()])
+        expected = fresh.search("", query_embedding=query, top_k=20)
+        assert [r.memory.memory_id for r in results] == [r.memory.memory_id for r in expected]
+        assert [r.similarity for r in results] == pytest.approx([r.similarity for r in expected], abs=1e-5)
+        assert ids[7] not in {r.memory.memory_id for r in reloaded.search("", query_embedding=query, top_k=400)}
+
+    def test_decay_is_journaled_as_one_operation(self, tmp_path):
+        """Test consolidation decay reaches the delta log in a single batch."""
+        snapshot = MemorySnapshot(tmp_path)
+        memory = snapshot.load()
+        ids = [memory.store("agent", f"memory {i}", importance=0.8) for i in range(3)]
+        for memory_id in ids:
+            memory.memories[memory_id].timestamp = datetime.utcnow() - timedelta(days=10)
+        snapshot.save(memory)
+
+        assert MemoryConsolidator(ConsolidationConfig(decay_rate=0.05)).apply_decay(memory) == 3
+        snapshot.close()
+
+        ops = [json.loads(line) for line in (tmp_path / "delta-1.log").read_text().splitlines()]
+        assert [op["op"] for op in ops] == ["importances"]
+        reloaded = MemorySnapshot(tmp_path).load()
+        for memory_id in ids:
+            assert reloaded.memories[memory_id].importance == memory.memories[memory_id].importance
+
+    def test_save_starts_new_generation(self, tmp_path):
+        """Test saving again compacts the delta log into a new generation."""
+        snapshot = MemorySnapshot(tmp_path)
+        memory = snapshot.load()
+        memory.store("agent", "first")
+        snapshot.save(memory)
+        memory.store("agent", "second")
+        snapshot.save(memory)
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == [
+            "columns-2.npz", "delta-2.log", "embeddings-2.npy", "manifest.json",
+        ]
+        assert (tmp_path / "delta-2.log").read_text() == ""
+        assert MemorySnapshot(tmp_path).load().get_memory_count() == 2
+
+    def test_truncated_delta_entry_is_ignored(self, tmp_path):
+        """Test a partially written final log line does not break loading."""
+        snapshot = MemorySnapshot(tmp_path)
+        memory = VectorMemory()
+        memory.store("agent", "base")
+        snapshot.save(memory)
+        with open(tmp_path / "delta-1.log", "a") as f:
+            f.write('{"op": "delete", "memory_')
+
+        assert MemorySnapshot(tmp_path).load().get_memory_count() == 1
+
+
+class TestConsolidationBlocking:
+    """Test vectorized candidate search for merging and redundancy checks."""
+
+    @staticmethod
+    def _clustered_memories(count: int = 400, dim: int = 24) -> list:
+        """Build exported memories forming tight clusters, with odd embeddings mixed in."""
+        rng = random.Random(11)
+        centres = [_random_embedding(rng, dim) for _ in range(count // 6)]
+        data = []
+        for i in range(count):
+            embedding = [x + rng.gauss(0, 0.15) for x in rng.choice(centres)]
+            if i % 41 == 0:
+                embedding = [0.0] * dim
+            elif i % 43 == 0:
+                embedding = embedding[:8]
+            data.append(MemoryVector(
+                agent_id="agent",
+                embedding=embedding,
+                tags=[f"tag-{i % 5}"],
+                metadata={"i": i},
+                timestamp=datetime(2026, 1, 1) + timedelta(seconds=rng.randint(0, 50)),
+            ).to_dict())
+        return data
+
+    def _merge(self, data: list, blocking: str) -> tuple:
+        memory = VectorMemory(embedding_dim=24)
+        memory.import_memories(data)
+        config = ConsolidationConfig(merge_blocking=blocking, merge_similarity_threshold=0.95)
+        merged = MemoryConsolidator(config).merge_similar_memories(memory)
+        state = {
+            memory_id: (sorted(m.tags), m.metadata.get("merged_from"), m.access_count)
+            for memory_id, m in memory.memories.items()
+        }
+        return merged, state
+
+    def test_exact_blocking_matches_pairwise_merge(self):
+        """Test the NumPy kernel merges exactly what the pairwise loop does."""
+        data = self._clustered_memories()
+
+        expected = self._merge(data, "none")
+        actual = self._merge(data, "exact")
+
+        assert expected[0] > 0
+        assert actual == expected
+
+    def test_lsh_blocking_only_merges_true_pairs(self):
+        """Test approximate LSH blocking finds nearly all merges."""
+        data = self._clustered_memories()
+
+        expected_merged, _ = self._merge(data, "none")
+        lsh_merged, _ = self._merge(data, "lsh")
+
+        assert 0.9 * expected_merged <= lsh_merged <= expected_merged
+
+    @pytest.mark.parametrize("threshold", [0.0, 0.9])
+    def test_find_redundant_memories_matches_pairwise(self, threshold):
+        """Test redundant pair detection matches the pairwise loop."""
+        memory = VectorMemory(embedding_dim=24)
+        memory.import_memories(self._clustered_memories(count=120))
+
+        expected = find_redundant_memories(memory, similarity_threshold=threshold, blocking="none")
+        actual = find_redundant_memories(memory, similarity_threshold=threshold)
+
+        assert actual == expected
+
+
+class TestIncrementalConsolidator:
+    """Test budgeted background consolidation."""
+
+    def test_vectorized_decay_matches_formula(self):
+        """Test apply_decay computes the documented decay formula."""
+        memory = VectorMemory()
+        memory_id = memory.store("agent", "old memory", importance=0.8)
+        stored = memory.memories[memory_id]
+        stored.timestamp = datetime.utcnow() - timedelta(days=10)
+        stored.access_count = 2
+        config = ConsolidationConfig(decay_rate=0.05, access_boost=0.01)
+
+        assert MemoryConsolidator(config).apply_decay(memory) == 1
+        assert stored.importance == pytest.approx(0.8 * 2.718281828 ** -0.5 + 0.02, rel=1e-6)
+
+    def test_ticks_respect_item_budget_and_complete_cycles(self):
+        """Test each tick decays at most max_items and cycles wrap around."""
+        memory = VectorMemory()
+        memory.store_many("agent", [f"distinct memory {i}" for i in range(10)], importance=0.9)
+        config = ConsolidationConfig(merge_enabled=False, max_memories=8)
+        consolidator = IncrementalConsolidator(memory, config, time_budget_ms=1000)
+
+        ticks = [consolidator.tick(max_items=4) for _ in range(3)]
+
+        assert all(t["decayed"] <= 4 for t in ticks)
+        assert [t["cycles_completed"] for t in ticks] == [0, 0, 1]
+        assert ticks[2]["pruned"] == 2
+        assert memory.get_memory_count() == 8
+
+    def test_back_to_back_ticks_decay_like_one_consolidation(self):
+        """Test a small store is decayed once per cycle interval, not once per tick."""
+        stores = []
+        for _ in range(2):
+            memory = VectorMemory()
+            memory.store_many("agent", [f"distinct memory {i}" for i in range(200)], importance=0.8)
+            for stored in memory.memories.values():
+                stored.timestamp = datetime.utcnow() - timedelta(days=2)
+            stores.append(memory)
+        batch, incremental = stores
+
+        MemoryConsolidator().consolidate(batch)
+        consolidator = IncrementalConsolidator(incremental, time_budget_ms=1000)
+        for _ in range(100):
+            consolidator.tick()
+
+        expected = {m.content: m.importance for m in batch.memories.values()}
+        actual = {m.content: m.importance for m in incremental.memories.values()}
+        assert consolidator.cycles_completed == 1
+        assert len(actual) > 150
+        assert actual == pytest.approx(expected, rel=1e-6)
+
+    def test_dirty_memories_merge_into_oldest(self):
+        """Test newly stored duplicates are merged into the older memory."""
+        memory = VectorMemory()
+        original = memory.store("agent", "customer prefers email", tags=["a"])
+        consolidator = IncrementalConsolidator(memory, time_budget_ms=1000)
+        consolidator.tick()
+        assert consolidator.pending == 0
+
+        memory.store("agent", "customer prefers email", tags=["b"])
+        assert consolidator.pending == 1
+        stats = consolidator.tick(max_items=0)
+
+        assert stats["merged"] == 1
+        assert list(memory.memories) == [original]
+        assert sorted(memory.memories[original].tags) == ["a", "b"]
+
+    def test_float32_index_keeps_pairs_at_threshold(self):
+        """Test the candidate pre-filter tolerates float32 index rounding."""
+        rng = random.Random(3)
+        for _ in range(20):
+            memory = VectorMemory(embedding_dim=32, compact=True)
+            first = memory.store("agent", "a", embedding=_random_embedding(rng, 32))
+            second = memory.store(
+                "agent", "b", embedding=[x + rng.gauss(0, 0.3) for x in memory.memories[first].embedding]
+            )
+            threshold = memory._cosine_similarity(
+                memory.memories[first].embedding, memory.memories[second].embedding
+            )
+            consolidator = IncrementalConsolidator(
+                memory, ConsolidationConfig(merge_similarity_threshold=threshold)
+            )
+            neighbours = consolidator._neighbours(memory.memories[first])
+            assert [m.memory_id for m in neighbours] == [second]
+
+    async def test_background_task(self):
+        """Test the asyncio driver consolidates without blocking the loop."""
+        memory = VectorMemory()
+        memory.store("agent", "duplicate")
+        memory.store("agent", "duplicate")
+        consolidator = IncrementalConsolidator(memory)
+
+        consolidator.start(interval_seconds=0.001)
+        for _ in range(100):
+            if memory.get_memory_count() == 1:
+                break
+            await asyncio.sleep(0.001)
+        await consolidator.stop()
+
+        assert memory.get_memory_count() == 1
+        memory.store("agent", "after stop")
+        assert consolidator.pending == 0
+
+
+class TestExperienceReplayPattern:
+    """Test the ring buffer and sum-tree backed experience replay."""
+
+    def _add(self, replay, agent_id="agent", reward=0.0, priority=None):
+        return replay.add_experience(agent_id, {}, {}, reward, {}, priority=priority)
+
+    def test_ring_buffer_evicts_oldest(self):
+        """Test the oldest experiences are overwritten at capacity."""
+        replay = ExperienceReplayPattern(max_experiences=3)
+        ids = [self._add(replay, reward=float(i)) for i in range(5)]
+
+        assert [e.experience_id for e in replay.experiences] == ids[2:]
+        assert replay.get_experience(ids[0]) is None
+        assert replay.get_experience(ids[4]).reward == 4.0
+        assert replay.get_statistics()["capacity_usage"] == 1.0
+        assert [e.reward for e in replay.get_recent_experiences(2)] == [3.0, 4.0]
+
+    def test_default_priority_is_current_max(self):
+        """Test new experiences default to the max priority still stored."""
+        replay = ExperienceReplayPattern(max_experiences=2)
+        self._add(replay, priority=5.0)
+        self._add(replay, priority=2.0)
+        self._add(replay)  # Evicts the 5.0 entry
+
+        assert replay.priorities == [2.0, 2.0]
+
+    def test_prioritized_sampling_follows_weights(self):
+        """Test sampling frequency is proportional to priority ** alpha."""
+        random.seed(7)
+        replay = ExperienceReplayPattern(priority_alpha=1.0)
+        low = self._add(replay, priority=1.0)
+        high = self._add(replay, priority=3.0)
+        zero = self._add(replay, priority=0.0)
+
+        counts = {low: 0, high: 0, zero: 0}
+        for _ in range(500):
+            for experience in replay.sample_batch(batch_size=8):
+                counts[experience.experience_id] += 1
+
+        assert counts[zero] == 0
+        assert 2.6 < counts[high] / counts[low] < 3.4
+
+    def test_update_priorities_and_agent_sampling(self):
+        """Test priority updates reach both the global and per-agent trees."""
+        random.seed(3)
+        replay = ExperienceReplayPattern(priority_alpha=1.0)
+        a1 = self._add(replay, "a", priority=1.0)
+        a2 = self._add(replay, "a", priority=1.0)
+        self._add(replay, "b", priority=1.0)
+
+        assert replay.update_priorities([a1, "missing"], [0.0, 9.0]) == 1
+        sampled = replay.sample_batch(batch_size=20, agent_id="a")
+        assert {e.experience_id for e in sampled} == {a2}
+        assert replay.sample_batch(agent_id="unknown") == []
+
+        uniform = replay.sample_batch(batch_size=5, agent_id="a", use_priority=False)
+        assert {e.experience_id for e in uniform} == {a1, a2}
+
+    def test_clear_agent_keeps_order_and_priorities(self):
+        """Test clearing one agent rebuilds the buffer for the others."""
+        replay = ExperienceReplayPattern(max_experiences=4)
+        for i in range(6):
+            self._add(replay, "a" if i % 2 else "b", reward=float(i), priority=float(i))
+
+        assert replay.clear("a") == 2
+        assert [e.reward for e in replay.experiences] == [2.0, 4.0]
+        assert replay.priorities == [2.0, 4.0]
+        assert replay.sample_batch(agent_id="a") == []
+
+        self._add(replay, "c")
+        assert replay.priorities[-1] == 4.0
+        assert replay.clear() == 3
+        assert replay.get_statistics()["total_experiences"] == 0
+
+
+# ===== Session Memory Tests =====
+
+
+class TestSessionMemoryLayout:
+    """Test the native Redis layout of SessionMemory."""
+
+    @pytest.fixture
+    def memory(self):
+        return SessionMemory(max_history_length=3, ttl_seconds=600)
+
+    def _store(self, memory, **kwargs):
+        session = Session(agent_id="agent-1", context={"topic": "billing"}, metadata={"tier": [1, 2]}, **kwargs)
+        memory.store_session(session)
+        return session
+
+    def test_round_trip_and_layout(self, memory):
+        """Test a session is split into a hash, a list and two hashes sharing a TTL."""
+        session = self._store(memory, history=[SessionEntry(role="user", content="hi")])
+        sid = session.session_id
+        assert {memory.redis.type(key) for key in memory._session_keys(sid)} == {"hash", "list"}
+        assert all(0 < memory.redis.ttl(key) <= 600 for key in memory._session_keys(sid))
+
+        loaded = memory.get_session(sid)
+        assert loaded.to_dict()["history"] == session.to_dict()["history"]
+        assert (loaded.agent_id, loaded.context, loaded.metadata) == ("agent-1", {"topic": "billing"}, {"tier": [1, 2]})
+        assert loaded.created_at == session.created_at
+
+    def test_append_trims_and_touches_without_rewrite(self, memory):
+        """Test appends push onto the list, trim it and only touch the session."""
+        session = self._store(memory)
+        sid = session.session_id
+        memory.redis.expire(f"session_context:{sid}", 5)
+        for i in range(5):
+            assert memory.append_to_history(sid, "user", f"msg {i}", {"turn": i})
+        assert memory.update_context(sid, {"step": 2})
+
+        assert memory.redis.llen(f"session_history:{sid}") == 3
+        assert memory.redis.ttl(f"session_context:{sid}") > 5
+        loaded = memory.get_session(sid)
+        assert [e.content for e in loaded.history] == ["msg 2", "msg 3", "msg 4"]
+        assert loaded.history[-1].metadata == {"turn": 4}
+        assert loaded.context == {"topic": "billing", "step": 2}
+        assert loaded.last_accessed > session.last_accessed
+
+    def test_missing_session_leaves_no_keys(self, memory):
+        """Test writes and reads for unknown sessions fail without creating keys."""
+        assert not memory.append_to_history("missing", "user", "hello")
+        assert not memory.update_context("missing", {"a": 1})
+        assert memory.get_session("missing") is None
+        assert memory.redis.keys("*") == []
+
+    def test_legacy_json_sessions_are_migrated(self, memory):
+        """Test sessions stored as one JSON string are read and converted."""
+        legacy = Session(agent_id="agent-2", history=[SessionEntry(content="old")], context={"a": 1})
+        memory.redis.set(f"session:{legacy.session_id}", json.dumps(legacy.to_dict()), ex=100)
+
+        assert memory.append_to_history(legacy.session_id, "user", "new")
+        loaded = memory.get_session(legacy.session_id)
+        assert [e.content for e in loaded.history] == ["old", "new"]
+        assert loaded.context == {"a": 1}
+        assert memory.redis.type(f"session:{legacy.session_id}") == "hash"
+
+    def test_queries_and_bytes_client(self):
+        """Test agent listing, cleanup and count, on a client returning bytes."""
+        memory = SessionMemory(redis_client=fakeredis.FakeRedis())
+        a = Session(agent_id="agent-1")
+        b = Session(agent_id="agent-2")
+        for session in (a, b):
+            memory.store_session(session)
+        memory.append_to_history(a.session_id, "user", "hi")
+
+        assert [s.session_id for s in memory.get_sessions_by_agent("agent-1")] == [a.session_id]
+        assert memory.get_session(a.session_id).history[0].content == "hi"
+        assert memory.get_session_count() == 2
+        assert memory.cleanup_expired_sessions(max_age_seconds=3600) == 0
+        assert memory.cleanup_expired_sessions(max_age_seconds=0) == 2
+        assert memory.get_session_count() == 0
+        assert memory.redis.keys("*") == []
+
+
+class TestSessionMemoryIndexes:
+    """Test the agent and access-time indexes behind session queries."""
+
+    @pytest.fixture
+    def memory(self):
+        memory = SessionMemory(ttl_seconds=600)
+        memory.redis.keys = None  # Queries must not fall back to KEYS
+        return memory
+
+    def test_agent_listing_and_count(self, memory):
+        """Test listing reads only the agent's sessions and drops stale IDs."""
+        sessions = [Session(agent_id=f"agent-{i % 3}") for i in range(9)]
+        for session in sessions:
+            memory.store_session(session)
+
+        listed = memory.get_sessions_by_agent("agent-1")
+        assert sorted(s.session_id for s in listed) == sorted(s.session_id for s in sessions[1::3])
+        assert memory.get_session_count() == 9
+
+        moved = sessions[1]
+        moved.agent_id = "agent-2"
+        memory.store_session(moved)
+        memory.redis.delete(f"session:{sessions[4].session_id}")  # As if expired by TTL
+        assert [s.session_id for s in memory.get_sessions_by_agent("agent-1")] == [sessions[7].session_id]
+        assert memory.redis.scard("session_index:agent:agent-1") == 1
+
+        memory.delete_session(sessions[0].session_id)
+        assert memory.get_session_count() == 8  # The TTL-expired one counts until swept
+        assert sorted(s.session_id for s in memory.get_sessions_by_agent("agent-0")) == sorted(
+            [sessions[3].session_id, sessions[6].session_id]
+        )
+
+    def test_cleanup_sweeps_by_access_time(self, memory):
+        """Test cleanup removes only sessions idle past the cutoff, with their index entries."""
+        old = Session(agent_id="agent-1")
+        recent = Session(agent_id="agent-1")
+        memory.store_session(old)
+        memory.store_session(recent)
+        memory.redis.zadd("session_index:last_access", {old.session_id: time.time() - 7200})
+
+        assert memory.cleanup_expired_sessions(max_age_seconds=3600) == 1
+        assert memory.get_session(old.session_id) is None
+        assert memory.get_session(recent.session_id) is not None
+        assert memory.redis.zscore("session_index:last_access", old.session_id) is None
+        assert memory.redis.smembers("session_index:agent:agent-1") == {recent.session_id}
+
+        memory.redis.zadd("session_index:expires", {recent.session_id: 0})
+        assert memory.get_session_count() == 0
+        assert memory.cleanup_expired_sessions(max_age_seconds=3600) == 1
+
+    def test_rebuild_indexes_with_scan(self, memory):
+        """Test indexes are rebuilt in SCAN batches, migrating legacy sessions."""
+        sessions = [Session(agent_id=f"agent-{i % 2}") for i in range(7)]
+        for session in sessions[:5]:
+            memory.store_session(session)
+        for session in sessions[5:]:
+            memory.redis.set(f"session:{session.session_id}", json.dumps(session.to_dict()), ex=100)
+        for key in ("session_index:last_access", "session_index:expires",
+                    "session_index:agent:agent-0", "session_index:agent:agent-1"):
+            memory.redis.delete(key)
+
+        assert memory.rebuild_indexes(batch_size=2) == 7
+        assert memory.get_session_count() == 7
+        assert len(memory.get_sessions_by_agent("agent-0")) == 4
+
+
+class TestSessionBatchAndAsync:
+    """Test batched session reads and the asyncio session store."""
+
+    def test_get_sessions_many_touches_found_sessions(self):
+        """Test a batch read returns found sessions and leaves no keys for missing ones."""
+        memory = SessionMemory(ttl_seconds=600)
+        sessions = [Session(agent_id="agent-1", context={"n": i}) for i in range(3)]
+        for session in sessions:
+            memory.store_session(session)
+        memory.redis.expire(f"session:{sessions[0].session_id}", 5)
+
+        ids = [s.session_id for s in sessions]
+        found = memory.get_sessions_many(ids + ["missing", ids[0]])
+        assert list(found) == ids
+        assert [found[sid].context["n"] for sid in ids] == [0, 1, 2]
+        assert memory.redis.ttl(f"session:{ids[0]}") > 5
+        assert not memory.redis.exists("session:missing")
+        assert memory.get_sessions_many([]) == {}
+
+    async def test_async_round_trip_and_queries(self):
+        """Test the async store shares the sync layout and query behaviour."""
+        server = fakeredis.FakeServer()
+        memory = AsyncSessionMemory(
+            redis_client=fakeredis.FakeAsyncRedis(server=server, decode_responses=True),
+            max_history_length=2,
+        )
+        session = Session(agent_id="agent-1", context={"topic": "billing"})
+        await memory.store_session(session)
+        sid = session.session_id
+        for i in range(3):
+            assert await memory.append_to_history(sid, "user", f"msg {i}")
+        assert await memory.update_context(sid, {"step": 1})
+        assert not await memory.append_to_history("missing", "user", "hi")
+
+        loaded = await memory.get_session(sid)
+        assert [e.content for e in loaded.history] == ["msg 1", "msg 2"]
+        assert loaded.context == {"topic": "billing", "step": 1}
+
+        sync = SessionMemory(redis_client=fakeredis.FakeRedis(server=server, decode_responses=True))
+        assert sync.get_session(sid).context == loaded.context
+        assert [s.session_id for s in await memory.get_sessions_by_agent("agent-1")] == [sid]
+        assert await memory.get_session_count() == 1
+        assert not sync.redis.exists("session:missing")
+
+        assert await memory.cleanup_expired_sessions(max_age_seconds=0) == 1
+        assert await memory.get_session(sid) is None
+        await memory.close()
+
+    async def test_local_cache_serves_hot_sessions(self):
+        """Test reads hit the local cache until it expires or this instance writes."""
+        memory = AsyncSessionMemory(local_cache_ttl_seconds=60, local_cache_size=2)
+        sessions = [Session(agent_id="agent-1") for _ in range(3)]
+        for session in sessions:
+            await memory.store_session(session)
+        sid = sessions[2].session_id
+
+        first = await memory.get_session(sid)
+        first.context["mutated"] = True
+        assert (await memory.get_session(sid)).context == {}
+        assert memory.get_cache_stats()["local_hits"] == 2
+
+        await memory.redis.hset(f"session_context:{sid}", "remote", "1")
+        assert (await memory.get_session(sid)).context == {}  # Stale until expiry
+        assert await memory.update_context(sid, {"local": 2})
+        assert (await memory.get_session(sid)).context == {"remote": 1, "local": 2}
+
+        found = await memory.get_sessions_many([s.session_id for s in sessions])
+        assert len(found) == 3
+        assert memory.get_cache_stats()["cached"] == 2
+
+        await memory.delete_session(sid)
+        assert await memory.get_session(sid) is None
+
+        uncached = AsyncSessionMemory(redis_client=memory.redis, local_cache_ttl_seconds=0)
+        await uncached.get_session(sessions[0].session_id)
+        await uncached.get_session(sessions[0].session_id)
+        assert uncached.get_cache_stats() == {"local_hits": 0, "redis_reads": 2, "cached": 0}
+
+
+class TestSessionCodecs:
+    """Test binary session codecs and reading mixed formats."""
+
+    def _entries(self):
+        return [
+            SessionEntry(role="user", content="héllo " * 3),
+            SessionEntry(role="agent", content="x" * 5000, metadata={"tokens": 12, "tags": ["a"]}),
+            SessionEntry(role="system", content="", timestamp=datetime(2024, 5, 1, 12, 30, 0, 123456)),
+        ]
+
+    def test_struct_round_trip_and_compression(self):
+        """Test entries round-trip exactly and large bodies are compressed."""
+        codec = StructSessionCodec(compress_threshold=1024)
+        for entry in self._entries():
+            data = codec.encode_entry(entry)
+            assert decode_entry(data) == entry
+            assert data[0] == (0x81 if len(entry.content) > 1024 else 0x01)
+            assert len(data) < len(JsonSessionCodec().encode_entry(entry).encode())
+
+        with pytest.raises(ValueError):
+            decode_entry(codec.encode_entry(self._entries()[0])[:-2])
+        with pytest.raises(ValueError):
+            decode_entry(b"\x7f\x00")
+
+    def test_binary_memory_reads_json_entries(self):
+        """Test a struct-codec store reads sessions and entries written as JSON."""
+        server = fakeredis.FakeServer()
+        json_memory = SessionMemory(redis_client=fakeredis.FakeRedis(server=server))
+        session = Session(agent_id="agent-1", history=self._entries()[:1])
+        json_memory.store_session(session)
+
+        memory = SessionMemory(redis_client=fakeredis.FakeRedis(server=server), codec=StructSessionCodec())
+        assert memory.append_to_history(session.session_id, "agent", "reply", {"n": 1})
+        loaded = memory.get_session(session.session_id)
+        assert [e.content for e in loaded.history] == [session.history[0].content, "reply"]
+        assert loaded.history[0] == session.history[0]
+        assert loaded.created_at == session.created_at
+        assert memory.redis.hget(f"session:{session.session_id}", "last_accessed").isdigit()
+
+        with pytest.raises(ValueError):
+            SessionMemory(redis_client=fakeredis.FakeRedis(decode_responses=True), codec=StructSessionCodec())
+
+    async def test_async_store_with_struct_codec(self):
+        """Test the async store creates a bytes client for a binary codec."""
+        memory = AsyncSessionMemory(codec=StructSessionCodec(), local_cache_ttl_seconds=0)
+        session = Session(agent_id="agent-1", history=self._entries())
+        await memory.store_session(session)
+        loaded = await memory.get_session(session.session_id)
+        assert loaded.history == session.history
+        assert [s.session_id for s in await memory.get_sessions_by_agent("agent-1")] == [session.session_id]
+        await memory.close()
+
+    def test_msgpack_round_trip(self):
+        """Test the msgpack codec when msgpack is installed."""
+        pytest.importorskip("msgpack")
+        from src.memory.session_memory import MsgpackSessionCodec
+
+        codec = MsgpackSessionCodec()
+        for entry in self._entries():
+            assert decode_entry(codec.encode_entry(entry)) == entry
@@ -0,0 +1,922 @@
+"""
+Unit tests for the cost optimization components.
+
+Tests result caching, cost tracking, model routing and local task handling.
+"""
+
+import asyncio
+import csv
+import io
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+import fakeredis
+import pytest
+
+from src.optimization.caching import CacheRules, ResultCache
+from src.optimization.cost_store import CostRecordStore
+from src.optimization.cost_tracker import (
+    CostCategory,
+    CostTracker,
+    RollingWindow,
+    load_aggregation_intervals,
+)
+from src.optimization.llm_router import ComplexityLevel, LLMRouter, ModelConfig
+from src.optimization.local_inference import (
+    InferenceBackend,
+    LocalInferencePool,
+    SleepBackend,
+    loaded_model_keys,
+)
+from src.optimization.local_slm import LocalSLM, TaskPattern
+from src.optimization.tiered_cache import TieredResultCache, decode_value, encode_value
+
+
+class TestResultCacheSimilarity:
+    """Test indexed similar-prompt lookup in the result cache."""
+
+    def _store(self, cache, key, prompt, model="gpt-4", **kwargs):
+        cache.set(key, f"result for {prompt}", metadata={"prompt": prompt, "model": model}, **kwargs)
+
+    def test_index_matches_full_scan(self):
+        """Test indexed lookup returns the same results as a linear scan."""
+        rng = random.Random(5)
+        vocabulary = [f"w{i}" for i in range(40)]
+        cache = ResultCache(max_size=300)
+        for i in range(400):
+            prompt = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(1, 8)))
+            self._store(cache, f"k{i}", prompt, model=rng.choice(["a", "b"]))
+
+        for threshold in (0.2, 0.5, 0.6, 0.95, 1.0):
+            for _ in range(30):
+                query = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(1, 8)))
+                model = rng.choice(["a", "b"])
+                indexed = cache.find_similar(query, model, threshold)
+                scanned = cache._scan_similar(query, model, threshold)
+                assert [(k, s) for k, _, s in indexed] == [(k, s) for k, _, s in scanned]
+
+    def test_scoped_per_model_and_tracks_removals(self):
+        """Test the index follows model scoping, eviction and invalidation."""
+        cache = ResultCache(max_size=2)
+        self._store(cache, "k1", "What is machine learning?", model="gpt-4")
+        self._store(cache, "k2", "what is machine learning", model="gpt-3.5")
+
+        assert [k for k, _, _ in cache.find_similar("What is machine learning", "gpt-4")] == ["k1"]
+
+        self._store(cache, "k3", "unrelated prompt")  # Evicts k1
+        assert cache.find_similar("What is machine learning", "gpt-4") == []
+
+        cache.invalidate("k2")
+        cache.update_metadata("k3", {"prompt": "what is machine learning"})
+        assert [k for k, _, _ in cache.find_similar("what is machine learning?", "gpt-4")] == ["k3"]
+
+        cache.clear()
+        assert cache.find_similar("what is machine learning", "gpt-4") == []
+
+    def test_get_or_similar(self):
+        """Test exact hits, similar fallbacks and misses count as one request each."""
+        cache = ResultCache(similarity_threshold=0.75)
+        prompt = "summarize the quarterly sales report"
+        cache.set(
+            cache.generate_key(prompt, model="gpt-4"),
+            "summary",
+            metadata={"prompt": prompt, "model": "gpt-4"},
+        )
+
+        assert cache.get_or_similar("Summarize the quarterly sales report!", model="gpt-4") == "summary"
+        assert cache.get_or_similar("summarize the quarterly sales report now", model="gpt-4") == "summary"
+        assert cache.get_or_similar("summarize the weekly report", model="gpt-4") is None
+        assert cache.get_or_similar(prompt, model="gpt-3.5") is None
+
+        stats = cache.get_stats()
+        assert (stats.total_requests, stats.cache_hits, stats.cache_misses) == (4, 2, 2)
+
+    def test_get_or_similar_skips_expired(self):
+        """Test expired similar entries are removed rather than returned."""
+        cache = ResultCache(similarity_threshold=0.5)
+        self._store(cache, "old", "translate this sentence to french", ttl_seconds=0)
+        time.sleep(0.01)
+
+        assert cache.get_or_similar("translate this sentence to german", model="gpt-4") is None
+        assert cache.get_entry("old") is None
+
+
+class TestResultCacheEviction:
+    """Test byte accounting, eviction policies and heap-driven expiry."""
+
+    def test_byte_budget(self):
+        """Test total bytes stay within budget and oversized results are skipped."""
+        cache = ResultCache(max_size=100, max_size_bytes=1000)
+        for i in range(20):
+            cache.set(f"k{i}", "x" * 98)  # 100 bytes serialized
+        stats = cache.get_stats()
+        assert stats.total_size_bytes == 1000
+        assert stats.total_entries == 10
+        assert cache.get("k9") is None and cache.get("k10") is not None
+
+        cache.set("k19", "y" * 5000)
+        assert cache.get_entry("k19") is None
+        assert cache.get_stats().admission_rejections == 1
+        assert cache.get_stats().total_size_bytes == 900
+
+    def test_lfu_and_cost_policies(self):
+        """Test LFU keeps popular entries and cost-aware keeps expensive ones."""
+        cache = ResultCache(max_size=3, eviction_policy="lfu")
+        for key in ("a", "b", "c"):
+            cache.set(key, key)
+        cache.get("a")
+        cache.get("a")
+        cache.get("b")
+        cache.set("d", "d")
+        assert sorted(cache._cache) == ["a", "b", "d"]
+
+        tracker = CostTracker(enable_alerts=False)
+        cache = ResultCache(max_size=2, eviction_policy="cost", cost_tracker=tracker)
+        cache.set("cheap", "x", metadata={"model": "local-slm", "output_tokens": 500})
+        cache.set("pricey", "x", metadata={"model": "gpt-4", "output_tokens": 500})
+        cache.set("newer", "x", metadata={"cost": 0.01})
+        assert sorted(cache._cache) == ["newer", "pricey"]
+
+        # A cleared cache ranks new entries like a fresh one, even after
+        # evicting entries whose priorities dwarf the new ones
+        for key in ("h1", "h2", "h3"):
+            cache.set(key, "x", metadata={"cost": 1e15})
+        cache.clear()
+        cache.set("pricey", "x", metadata={"cost": 0.01})
+        cache.set("cheap", "x", metadata={"cost": 0.0001})
+        cache.set("newer", "x", metadata={"cost": 0.01})
+        assert sorted(cache._cache) == ["newer", "pricey"]
+
+        with pytest.raises(ValueError):
+            ResultCache(eviction_policy="random")
+
+    def test_tinylfu_resists_scans(self):
+        """Test one-off requests do not flush frequently requested entries."""
+        lru = ResultCache(max_size=100, default_ttl_seconds=None)
+        tiny = ResultCache(max_size=100, default_ttl_seconds=None, eviction_policy="tinylfu")
+        for cache in (lru, tiny):
+            for _ in range(5):
+                for i in range(50):
+                    if cache.get(f"hot{i}") is None:
+                        cache.set(f"hot{i}", "value")
+            for i in range(1000):
+                if cache.get(f"scan{i}") is None:
+                    cache.set(f"scan{i}", "value")
+
+        assert sum(f"hot{i}" in lru._cache for i in range(50)) == 0
+        assert sum(f"hot{i}" in tiny._cache for i in range(50)) >= 45
+        assert tiny.get_stats().admission_rejections > 0
+
+    def test_expiry_heap(self):
+        """Test cleanup only removes due entries, including replaced keys' new TTLs."""
+        cache = ResultCache(max_size=10)
+        cache.set("short", "v", ttl_seconds=0)
+        cache.set("long", "v", ttl_seconds=3600)
+        cache.set("replaced", "v", ttl_seconds=0)
+        cache.set("replaced", "v", ttl_seconds=3600)
+        time.sleep(0.01)
+
+        assert cache.cleanup_expired() == 1
+        assert sorted(cache._cache) == ["long", "replaced"]
+        assert cache.get_stats().total_size_bytes == 6
+
+    def test_from_config(self):
+        """Test memory limits and policy come from the caching config."""
+        cache = ResultCache.from_config("config/optimization.yaml")
+        assert cache._max_size == 10000
+        assert cache._max_size_bytes == 1000 * 1024 * 1024
+        assert cache._similarity_threshold == 0.95
+        assert type(cache._policy).__name__ == "LRUPolicy"
+
+
+class TestResultCacheRulesAndIndexes:
+    """Test cache rules applied in set() and the tag/metadata indexes."""
+
+    def test_rules_set_ttl_and_disable_caching(self):
+        """Test rule TTLs apply unless a TTL is passed, and disabled keys are skipped."""
+        cache = ResultCache.from_config("config/optimization.yaml")
+        cache.set("real_time:quote", "101.5")
+        cache.set("frequently_asked:hours", "9-5")
+        cache.set("other", "x")
+        cache.set("real_time:explicit", "x", ttl_seconds=5)
+        assert cache.get_entry("real_time:quote").ttl_seconds == 60
+        assert cache.get_entry("frequently_asked:hours").ttl_seconds == 86400
+        assert cache.get_entry("other").ttl_seconds == 3600
+        assert cache.get_entry("real_time:explicit").ttl_seconds == 5
+
+        cache.set("no_cache:balance", "42")
+        assert cache.get("no_cache:balance") is None
+
+        cache = ResultCache(default_ttl_seconds=10, cache_rules=[{"pattern": "x.*", "enabled": False}])
+        cache.set("y", "v")
+        assert cache.get_entry("y").ttl_seconds == 10
+
+    def test_tag_index(self):
+        """Test tag invalidation removes exactly the tagged entries."""
+        cache = ResultCache(max_size=10)
+        cache.set("a", 1, tags=["prices", "eu"])
+        cache.set("b", 2, tags=["prices"])
+        cache.set("c", 3, tags=["docs"])
+        cache.set("b", 2, tags=["docs"])  # Replacement drops the old tags
+
+        assert cache.invalidate_by_tag("prices") == 1
+        assert sorted(cache._cache) == ["b", "c"]
+        assert cache.invalidate_by_tag("docs") == 2
+        assert cache.invalidate_by_tag("docs") == 0
+        assert cache._tag_index == {}
+
+    def test_metadata_index(self):
+        """Test indexed metadata search matches a full scan."""
+        cache = ResultCache(max_size=100)
+        for i in range(30):
+            cache.set(f"k{i}", i, metadata={
+                "model": "gpt-4" if i % 3 else "claude",
+                "agent": f"agent-{i % 5}",
+                "params": {"temperature": 0.7},
+            })
+        cache.set("bare", 0)
+
+        def scan(metadata_filter):
+            return [
+                key for key, entry in cache._cache.items()
+                if all(entry.metadata.get(k) == v for k, v in metadata_filter.items())
+            ]
+
+        for metadata_filter in (
+            {"model": "claude"},
+            {"model": "gpt-4", "agent": "agent-1"},
+            {"agent": "agent-2", "params": {"temperature": 0.7}},
+            {"params": {"temperature": 0.7}},
+            {"model": None},
+            {"model": "unknown"},
+        ):
+            assert [key for key, _ in cache.search_by_metadata(metadata_filter)] == scan(metadata_filter)
+
+        cache.update_metadata("k0", {"model": "gpt-4"})
+        assert "k0" not in [key for key, _ in cache.search_by_metadata({"model": "claude"})]
+        cache.get_entry("k3").metadata["model"] = "mutated"
+        cache.invalidate("k3")
+        assert "k3" not in [key for key, _ in cache.search_by_metadata({"model": "claude"})]
+
+        cache.clear()
+        assert cache._metadata_index == {} and cache._entry_fields == {}
+
+
+class TestTieredResultCache:
+    """Test the Redis-backed second cache tier."""
+
+    @pytest.fixture
+    def server(self):
+        """Shared fake Redis server, as seen by several replicas."""
+        return fakeredis.FakeServer()
+
+    def _replica(self, server, **kwargs):
+        return TieredResultCache(
+            redis_client=fakeredis.FakeRedis(server=server),
+            rules=CacheRules.from_config("config/optimization.yaml"),
+            **kwargs
+        )
+
+    def _remote_ttl(self, cache, key):
+        return cache.redis.ttl(cache.key_prefix + key)
+
+    def test_cache_rules(self):
+        """Test later rules win and disabled rules stop caching."""
+        rules = CacheRules.from_config("config/optimization.yaml")
+        assert rules.ttl_for("anything") == 3600
+        assert rules.ttl_for("frequently_asked:abc") == 86400
+        assert rules.ttl_for("real_time:abc") == 60
+        assert not rules.is_enabled("no_cache:abc")
+        assert rules.ttl_for("no_cache:abc", default=5) == 5
+
+        nested = CacheRules([{"pattern": "(a)(b).*", "ttl": 1}, {"pattern": "x(y(z))", "ttl": 2}])
+        assert nested.ttl_for("abc") == 1 and nested.ttl_for("xyz") == 2
+        assert nested.match("q") is None
+
+        key = ResultCache().generate_key("What's the price?", namespace="real_time")
+        assert key.startswith("real_time:") and rules.ttl_for(key) == 60
+
+    def test_value_encoding(self):
+        """Test compact values round-trip and large ones are compressed."""
+        small = encode_value({"answer": 42}, {"model": "gpt-4"}, ["faq"])
+        assert decode_value(small) == ({"answer": 42}, {"model": "gpt-4"}, ["faq"])
+
+        large = encode_value("word " * 1000)
+        assert len(large) < 1000
+        assert decode_value(large)[0] == "word " * 1000
+
+    def test_replicas_share_results(self, server):
+        """Test one replica's writes are L2 hits for another, with rule TTLs."""
+        first, second = self._replica(server), self._replica(server)
+        first.set("real_time:quote", "101.5", metadata={"model": "gpt-4"})
+        first.set("no_cache:secret", "hidden")
+
+        assert second.get("real_time:quote") == "101.5"
+        assert second.get("real_time:quote") == "101.5"
+        assert second.get("no_cache:secret") is None
+        stats = second.get_stats()
+        assert (stats["l2_hits"], stats["l1_hits"], stats["misses"]) == (1, 1, 1)
+        assert second.local.get_entry("real_time:quote").ttl_seconds == 60
+        assert second.local.get_entry("real_time:quote").metadata == {"model": "gpt-4"}
+        assert 0 < self._remote_ttl(first, "real_time:quote") <= 60
+
+        first.set_many([("a", 1, None, None, None), ("b", 2, None, 10, None)])
+        assert second.get_many(["a", "b", "c"]) == {"a": 1, "b": 2}
+        assert self._remote_ttl(first, "b") <= 10
+
+        assert second.invalidate("a")
+        assert first.redis.get("result_cache:a") is None
+
+    def test_single_flight(self, server):
+        """Test concurrent misses across threads and replicas compute once."""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return "answer"
+
+        replicas = [self._replica(server, lock_poll_interval_ms=5) for _ in range(2)]
+        results = []
+        threads = [
+            threading.Thread(target=lambda r=replica: results.append(r.get_or_compute("q", compute)))
+            for replica in replicas for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == ["answer"] * 8
+        assert len(calls) == 1
+        assert sum(r.get_stats()["coalesced"] for r in replicas) >= 3
+
+    def test_disabled_keys_compute_without_lock(self, server):
+        """Test rule-disabled keys never take the cross-replica lock."""
+        first, second = self._replica(server), self._replica(server, lock_timeout_seconds=5)
+        first.redis.set("lock:result_cache:no_cache:q", "other-replica")
+
+        start = time.monotonic()
+        assert second.get_or_compute("no_cache:q", lambda: "fresh") == "fresh"
+        assert time.monotonic() - start < 1
+        assert second.get("no_cache:q") is None
+        assert second.get_stats()["coalesced"] == 0
+
+    def test_single_flight_failure_and_async(self):
+        """Test errors reach every waiter uncached, and async callers coalesce."""
+        cache = TieredResultCache(use_fakeredis=True)
+        with pytest.raises(RuntimeError):
+            cache.get_or_compute("q", lambda: (_ for _ in ()).throw(RuntimeError("down")))
+        assert cache.get("q") is None
+        assert cache.redis.get("lock:result_cache:q") is None
+
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "answer"
+
+        async def run():
+            return await asyncio.gather(*(cache.get_or_compute_async("k", compute) for _ in range(5)))
+
+        assert asyncio.run(run()) == ["answer"] * 5
+        assert len(calls) == 1
+
+    def test_async_single_flight_survives_cancelled_caller(self):
+        """Test cancelling the first async caller leaves the shared call running."""
+        cache = TieredResultCache(use_fakeredis=True)
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return "answer"
+
+        async def run():
+            first = asyncio.create_task(cache.get_or_compute_async("k", compute))
+            await asyncio.sleep(0)
+            second = asyncio.create_task(cache.get_or_compute_async("k", compute))
+            await asyncio.sleep(0)
+            first.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            return await second
+
+        assert asyncio.run(run()) == "answer"
+        assert len(calls) == 1
+        assert cache.get("k") == "answer"
+
+    def test_redis_failure_falls_back_to_l1(self):
+        """Test a broken Redis leaves the L1 cache working."""
+
+        class BrokenRedis:
+            def pipeline(self, transaction=True):
+                raise ConnectionError("redis down")
+
+            def set(self, *args, **kwargs):
+                raise ConnectionError("redis down")
+
+        cache = TieredResultCache(redis_client=BrokenRedis())
+        cache.set("k", "v")
+        assert cache.get("k") == "v"
+        assert cache.get("missing") is None
+        assert cache.get_or_compute("other", lambda: "computed") == "computed"
+        assert cache.get_stats()["l2_errors"] >= 3
+
+    def test_from_config(self):
+        """Test the config builds L1 limits and rules; an injected client is used as L2."""
+        client = fakeredis.FakeRedis()
+        cache = TieredResultCache.from_config("config/optimization.yaml", redis_client=client)
+        assert cache.redis is client
+        assert cache.local._max_size == 10000
+        assert cache._ttl_for("frequently_asked:x") == 86400
+
+
+class TestRollingWindow:
+    """Test the bucketed sliding-window sum."""
+
+    def test_buckets_expire_as_window_moves(self):
+        """Test amounts leave the total once their bucket is out of the window."""
+        window = RollingWindow(window_seconds=100, num_buckets=10)
+        window.add(1000.0, 1.0)
+        window.add(1055.0, 2.0)
+
+        assert window.total(1060.0) == 3.0
+        assert window.total(1105.0) == 3.0  # Window start still inside the first bucket
+        assert window.total(1110.0) == 2.0
+        assert window.total(5000.0) == 0.0
+
+        window.add(5000.0, 4.0)
+        assert window.total(5000.0) == 4.0
+
+
+class TestCostTrackerBudgets:
+    """Test incrementally maintained budget checks."""
+
+    def test_alerts_fire_once_per_threshold(self):
+        """Test each threshold alerts once until alerts are cleared."""
+        tracker = CostTracker()
+        tracker.set_budget(1.0, dimension="agent", identifier="agent-1")
+        for _ in range(100):
+            tracker.record(0.01, agent_id="agent-1")
+            tracker.record(0.01, agent_id="agent-2")
+
+        alerts = tracker.get_alerts(clear=True)
+        assert [a.threshold_percentage for a in alerts] == [80.0, 90.0, 100.0]
+        assert [a.current_cost for a in alerts] == [0.8, 0.9, 1.0]
+
+        tracker.record(0.01, agent_id="agent-1")
+        assert [a.threshold_percentage for a in tracker.get_alerts()] == [80.0, 90.0, 100.0]
+
+    def test_budget_set_after_spending_is_backfilled(self):
+        """Test a new budget window includes spend recorded before it existed."""
+        tracker = CostTracker()
+        for _ in range(85):
+            tracker.record(0.01, user_id="user-1")
+        tracker.set_budget(1.0, dimension="user", identifier="user-1")
+        tracker.set_budget(10.0)
+
+        tracker.record(0.01, user_id="user-1")
+
+        alerts = tracker.get_alerts()
+        assert [(a.dimension, a.threshold_percentage) for a in alerts] == [("user", 80.0)]
+        assert alerts[0].current_cost == tracker.get_budget_status("user", "user-1")["current_spending"]
+
+
+@pytest.fixture
+def cost_rows():
+    """Generate time-ordered cost rows spanning several days."""
+    rng = random.Random(11)
+    start = datetime(2024, 3, 1, 5, 30)
+    return [
+        (
+            start + timedelta(minutes=37 * i),
+            rng.choice(["llm_api", "embedding"]),
+            round(rng.random(), 3),
+            rng.choice([None, "agent-1", "agent-2", "agent-3"]),
+            rng.choice([None, "user-1", "user-2"]),
+            None,
+            rng.choice([None, "gpt-4", "claude-3-haiku"]),
+            rng.randint(0, 500),
+            {"index": i},
+        )
+        for i in range(800)
+    ]
+
+
+def _load(store, rows):
+    for row in rows:
+        store.append(*row)
+    return store
+
+
+class TestCostRecordStore:
+    """Test the columnar, time-partitioned cost record store."""
+
+    def test_queries_match_row_scan(self, cost_rows):
+        """Test pruned, vectorized queries agree with a plain scan."""
+        store = _load(CostRecordStore(partition_hours=24), cost_rows)
+        start = cost_rows[100][0] + timedelta(seconds=1)
+        end = cost_rows[600][0]
+        selected = [r for r in cost_rows if start <= r[0] <= end and r[3] == "agent-2"]
+
+        summary = store.summarize(start, end, filters={"agent": "agent-2"})
+        assert summary["request_count"] == len(selected)
+        assert summary["total_cost"] == pytest.approx(sum(r[2] for r in selected))
+        assert summary["total_tokens"] == sum(r[7] for r in selected)
+        assert summary["first_timestamp"] == selected[0][0]
+        assert summary["last_timestamp"] == selected[-1][0]
+        assert list(store.rows(start, end, filters={"agent": "agent-2"})) == selected
+
+        expected = {}
+        for row in cost_rows:
+            if row[0] >= start and row[4]:
+                expected[row[4]] = expected.get(row[4], 0.0) + row[2]
+        spenders = store.group_sum("user", start_time=start)
+        assert [user for user, _ in spenders] == sorted(expected, key=expected.get, reverse=True)
+        assert dict(spenders) == pytest.approx(expected)
+        assert store.group_sum("user", start_time=start, limit=1) == spenders[:1]
+        assert store.summarize(filters={"agent": "unknown"})["request_count"] == 0
+
+    def test_weekly_trends_start_on_monday(self, cost_rows):
+        """Test trend buckets follow calendar weeks."""
+        store = _load(CostRecordStore(), cost_rows)
+        trends = store.trends(granularity="weekly")
+
+        expected = {}
+        for timestamp, category, amount, *_ in cost_rows:
+            monday = (timestamp - timedelta(days=timestamp.weekday())).replace(hour=0, minute=0)
+            expected.setdefault(category, {}).setdefault(monday, 0.0)
+            expected[category][monday] += amount
+
+        assert set(trends) == set(expected)
+        for category, points in trends.items():
+            assert [p for p, _ in points] == sorted(expected[category])
+            assert all(p.weekday() == 0 for p, _ in points)
+            assert dict(points) == pytest.approx(expected[category])
+
+    def test_spill_to_sqlite(self, cost_rows, tmp_path):
+        """Test spilled partitions still answer queries and can take new rows."""
+        store = _load(
+            CostRecordStore(partition_hours=24, spill_path=str(tmp_path / "costs.db"), max_memory_partitions=2),
+            cost_rows
+        )
+
+        assert store.num_spilled_partitions == store.num_partitions - 2
+        assert list(store.rows()) == cost_rows
+        assert store.summarize()["total_cost"] == pytest.approx(sum(r[2] for r in cost_rows))
+
+        late = (cost_rows[0][0], "llm_api", 1.0, "agent-9", None, None, None, 0, {})
+        store.append(*late)
+        assert store.group_sum("agent", filters={"agent": "agent-9"}) == [("agent-9", 1.0)]
+        assert len(store) == len(cost_rows) + 1
+        store.close()
+
+    def test_tracker_uses_store(self):
+        """Test tracker analytics and export run on the store."""
+        tracker = CostTracker(enable_alerts=False)
+        tracker.record_llm_call("gpt-4", 1000, 500, agent_id="agent-1", user_id="user-1")
+        tracker.record(0.5, category=CostCategory.STORAGE, agent_id="agent-2")
+
+        stats = tracker.get_stats(agent_id="agent-1")
+        assert stats.request_count == 1
+        assert stats.cost_by_model == {"gpt-4": pytest.approx(0.06)}
+        assert tracker.get_top_spenders("agent") == [("agent-2", 0.5), ("agent-1", pytest.approx(0.06))]
+        assert tracker.get_top_spenders("model") == []
+        assert set(tracker.get_cost_trends(granularity="hourly")) == {"llm_api", "storage"}
+        assert '"input_tokens": 1000' in tracker.export_records()
+
+
+class TestCostExportAndCompaction:
+    """Test streaming export and rollup compaction."""
+
+    def _tracker(self, cost_rows):
+        now = datetime.now()
+        shift = now - timedelta(days=10) - cost_rows[0][0]
+        store = _load(CostRecordStore(), [(r[0] + shift, *r[1:]) for r in cost_rows])
+        return CostTracker(enable_alerts=False, store=store)
+
+    def test_streaming_export_formats(self, cost_rows):
+        """Test NDJSON and CSV exports carry the same records as JSON."""
+        tracker = self._tracker(cost_rows)
+        expected = json.loads(tracker.export_records())
+
+        output = io.StringIO()
+        assert tracker.export_records_to(output, chunk_size=64) == len(cost_rows)
+        assert [json.loads(line) for line in output.getvalue().splitlines()] == expected
+
+        rows = list(csv.DictReader(io.StringIO(tracker.export_records(format="csv"))))
+        assert len(rows) == len(expected)
+        assert rows[5]["agent_id"] == (expected[5]["agent_id"] or "")
+        assert json.loads(rows[5]["metadata"]) == expected[5]["metadata"]
+        assert next(tracker.iter_records()) == expected[0]
+
+        with pytest.raises(ValueError):
+            tracker.export_records_to(io.StringIO(), format="xml")
+
+    def test_compaction_preserves_aggregates(self, cost_rows):
+        """Test daily rollups keep totals, counts and top spenders."""
+        tracker = self._tracker(cost_rows)
+        stats = tracker.get_stats()
+        spenders = tracker.get_top_spenders("agent", days=30)
+        trends = tracker.get_cost_trends(days=30, granularity="daily")
+
+        removed = tracker.compact(older_than_days=5, interval="1d")
+        assert removed > 0
+        assert tracker.compact(older_than_days=5, interval="1h") == 0
+
+        compacted = tracker.get_stats()
+        assert compacted.request_count == stats.request_count == len(cost_rows)
+        assert compacted.total_tokens == stats.total_tokens
+        assert compacted.total_cost == pytest.approx(stats.total_cost)
+        assert dict(tracker.get_top_spenders("agent", days=30)) == pytest.approx(dict(spenders))
+        for category, points in tracker.get_cost_trends(days=30, granularity="daily").items():
+            assert dict(points) == pytest.approx(dict(trends[category]))
+
+        rollup = next(tracker.iter_records())
+        assert rollup["metadata"]["rollup_interval"] == "1d"
+        assert len(list(tracker.iter_records())) == len(cost_rows) - removed
+
+        with pytest.raises(ValueError):
+            tracker.compact(older_than_days=5, interval="2h")
+
+    def test_load_aggregation_intervals(self):
+        """Test rollup intervals come from the observability config."""
+        assert load_aggregation_intervals("config/observability.yaml") == ["1m", "5m", "1h", "1d"]
+
+
+class TestLLMRouterMatching:
+    """Test the compiled complexity matchers and routing cache."""
+
+    def test_keyword_and_technical_scoring(self):
+        """Test keyword priority, substring keywords and whole-word technical terms."""
+        router = LLMRouter()
+
+        # "specialist" contains the MODERATE keyword "list"
+        assert router.estimate_complexity("ask a specialist") == ComplexityLevel.SIMPLE
+        assert router.estimate_complexity("list then analyze", requires_code=True) == ComplexityLevel.COMPLEX
+        # Technical groups count once each and need word boundaries
+        assert router.estimate_complexity("async, parallel security algorithm") == ComplexityLevel.MODERATE
+        assert router.estimate_complexity("asynchronous securityx algorithms") == ComplexityLevel.SIMPLE
+
+        router.set_complexity_keywords(ComplexityLevel.EXPERT, ["deep dive"])
+        assert router.estimate_complexity("deep dive", requires_code=True) == ComplexityLevel.COMPLEX
+        router.set_technical_terms([["latency"]])
+        assert router.estimate_complexity("latency basic", requires_code=True) == ComplexityLevel.MODERATE
+
+    def test_route_cache(self):
+        """Test decisions are memoized per prompt and flags, and invalidated on config changes."""
+        router = LLMRouter(cache_size=2)
+        first = router.route("summarize this basic report")
+        assert router.route("summarize this basic report") is first
+        assert router.route("summarize this basic report", requires_reasoning=True) is not first
+        assert router.get_cache_stats()["hits"] == 1
+
+        replacement = ModelConfig(model_name="tiny", cost_per_1k_tokens=0.0, max_tokens=1024)
+        router.add_model_config(ComplexityLevel.MODERATE, replacement)
+        assert router.route("summarize this basic report", requires_code=True) is replacement
+        assert router.route("anything", force_model="tiny") is replacement
+        assert router.get_cache_stats()["size"] == 1
+
+    def test_route_batch(self):
+        """Test batch routing matches individual routing."""
+        router = LLMRouter()
+        prompts = ["hello", "analyze the distributed architecture", "hello", "translate this"]
+        expected = [LLMRouter(cache_size=0).route(p, context_length=20000) for p in prompts]
+
+        routed = router.route_batch(prompts, context_length=20000)
+        assert [c.model_name for c in routed] == [c.model_name for c in expected]
+        assert routed[0] is routed[2]
+
+
+class TestLLMRouterConfig:
+    """Test config-driven tiers, weighted scoring and health-based fallback."""
+
+    @pytest.fixture
+    def router(self):
+        """Router built from the optimization config."""
+        return LLMRouter.from_config("config/optimization.yaml")
+
+    def test_tiers_and_weighted_scoring(self, router):
+        """Test tier models, pricing and the 1-10 weighted complexity score."""
+        simple = router.get_model_config(ComplexityLevel.SIMPLE)
+        assert simple.model_name == "local-slm"
+        assert router.route("anything", force_model="gpt-4").model_name == "gpt-4"
+        flash = router.route("anything", force_model="gemini-2.0-flash")
+        assert flash.cost_per_1k_tokens == pytest.approx(0.0002)
+
+        assert router.score_complexity("hi") == pytest.approx(1.0, abs=0.01)
+        assert router.route("hi").model_name == "local-slm"
+        # Three keywords saturate the keyword factor: 1 + 9 * 0.3 = 3.7
+        assert router.score_complexity("analyze, compare and optimize") == pytest.approx(3.7, abs=0.01)
+        assert router.route("analyze, compare and optimize").model_name == "gemini-2.0-flash"
+
+        heavy = router.route(
+            "analyze " * 800,
+            requires_code=True,
+            requires_reasoning=True,
+            metadata={"structured_output": True, "context_depth": 10},
+        )
+        assert heavy.model_name == "gemini-2.0-ultra"
+        with pytest.raises(ValueError):
+            LLMRouter().score_complexity("hi")
+
+    def test_latency_slo_and_error_fallback(self, router):
+        """Test slow or failing primaries shed load to the tier fallback."""
+        for _ in range(3):
+            router.observe("local-slm", latency_ms=900, success=True)
+        assert router.route("hi").model_name == "local-slm"
+        assert router.route("hi", latency_slo_ms=1000).model_name == "local-slm"
+        assert router.route("hi", latency_slo_ms=500).model_name == "gemini-2.0-flash"
+
+        # When neither meets the SLO the lower expected latency wins
+        router.observe("gemini-2.0-flash", latency_ms=2000)
+        assert router.route("hi", latency_slo_ms=500).model_name == "local-slm"
+
+        for _ in range(10):
+            router.observe("local-slm", success=False)
+        assert router.get_model_health("local-slm").error_rate > 0.5
+        assert router.route("hi").model_name == "gemini-2.0-flash"
+
+    def test_health_expires(self):
+        """Test a shed primary is retried once its statistics expire."""
+        router = LLMRouter.from_config(health_ttl_seconds=0.01)
+        router.observe("local-slm", latency_ms=5000)
+        assert router.route("hi", latency_slo_ms=100).model_name == "gemini-2.0-flash"
+        time.sleep(0.02)
+        assert router.get_model_health("local-slm") is None
+        assert router.route("hi", latency_slo_ms=100).model_name == "local-slm"
+        assert router.observe("local-slm", latency_ms=50).latency_ms == 50
+
+    def test_fed_from_cost_tracker_and_metrics(self, router):
+        """Test CostTracker records and AgentMetrics LLM requests update health."""
+        from src.observability.metrics import AgentMetrics
+
+        tracker = CostTracker()
+        router.attach_cost_tracker(tracker)
+        tracker.record_llm_call("gpt-4", 1000, 1000, metadata={"latency_ms": 800, "success": True})
+        tracker.record_llm_call("gpt-4", 1000, 1000, metadata={"latency_ms": 1800, "error": "timeout"})
+        health = router.get_model_health("gpt-4")
+        assert health.samples == 2
+        assert health.latency_ms == pytest.approx(1000)
+        assert health.error_rate == pytest.approx(0.2)
+        assert health.cost == pytest.approx(0.09)
+
+        metrics = AgentMetrics()
+        router.attach_metrics(metrics)
+        metrics.record_llm_request("agent-1", "gpt-4-turbo", 1.5, success=False, cost_usd=0.01)
+        health = router.get_model_health("gpt-4-turbo")
+        assert health.latency_ms == pytest.approx(1500)
+        assert health.error_rate == pytest.approx(0.2)
+
+
+class TestLocalSLMPatterns:
+    """Test the precompiled pattern matcher and response cache."""
+
+    def test_first_matching_pattern_wins(self):
+        """Test pattern order decides ties and word anchors need whole words."""
+        slm = LocalSLM()
+        # "list" (listing) appears first but status_check is the earlier pattern
+        assert slm.is_routine_task("list status") == (True, 1.0, "status_check")
+        # "this" contains "hi" but not as a whole word
+        assert slm.is_routine_task("this thing")[2] == "unknown"
+        assert slm.is_routine_task("Hi-there!") == (True, 1.0, "greeting")
+        assert slm.is_routine_task("please analyze the status")[2] == "complex"
+        routine, confidence, task_type = slm.is_routine_task(
+            "check items however " + "word " * 12
+        )
+        assert (routine, task_type) == (False, "unknown")
+        assert confidence == pytest.approx(0.7)
+
+    def test_add_task_pattern(self):
+        """Test added patterns, with and without word anchors, are matched."""
+        slm = LocalSLM()
+        assert slm.is_routine_task("bye now")[2] == "unknown"
+        slm.add_task_pattern(TaskPattern(pattern=r"\b(bye|goodbye)\b", task_type="farewell"))
+        slm.add_task_pattern(TaskPattern(pattern=r"thank|\bthx\b", task_type="thanks"))
+        assert slm.is_routine_task("bye now") == (True, 1.0, "farewell")
+        assert slm.is_routine_task("many thanks") == (True, 1.0, "thanks")
+
+    def test_response_cache(self):
+        """Test deterministic responses are memoized per normalized prompt and context."""
+        slm = LocalSLM(response_cache_size=2)
+        first = slm.execute("Hello  there")
+        assert slm.execute("hello there ").content == first.content
+        named = slm.execute("hello there", {"user_name": "Ada"})
+        assert named.content.startswith("Hello Ada!")
+        assert slm.get_stats()["cache_hits"] == 1
+
+        slm.execute("calculate 2 add 3")
+        slm.execute("calculate 2 add 3")
+        assert slm.get_stats()["cache_hits"] == 1
+
+        slm.add_template("greeting", "Hi!")
+        assert slm.execute("hello there").content == "Hi!"
+        stats = slm.get_stats()
+        assert stats["handled_locally"] == 6
+        assert stats["cache_size"] == 1
+
+
+class _FailingBackend(InferenceBackend):
+    """Backend whose batches always fail."""
+
+    model_name = "failing"
+
+    def load(self):
+        return None
+
+    def generate(self, model, prompts, max_tokens):
+        raise RuntimeError("model crashed")
+
+
+# Matches status_check with confidence 0.7, below its 0.85 threshold
+MARGINAL_PROMPT = "check items however " + "word " * 12
+
+
+class TestLocalInference:
+    """Test the batching local model pool and LocalSLM dispatch."""
+
+    def test_micro_batching_and_warm_start(self):
+        """Test concurrent requests share batches and the model loads once up front."""
+        backend = SleepBackend(model_name="warm", load_seconds=0.2, batch_seconds=0.02)
+        with LocalInferencePool(backend, max_workers=2, max_batch_size=8, use_processes=False) as pool:
+            assert "SleepBackend:warm" in loaded_model_keys()
+            start = time.perf_counter()
+            futures = [pool.submit(f"prompt {i}") for i in range(32)]
+            assert [f.result(timeout=5) for f in futures] == [f"[warm] prompt {i}" for i in range(32)]
+            assert time.perf_counter() - start < 0.2
+            stats = pool.get_stats()
+            assert stats["requests"] == 32
+            assert stats["batches"] < 32
+
+    def test_cancelled_request_does_not_block_its_batch(self):
+        """Test cancelling one queued request still resolves the rest of its batch."""
+        with LocalInferencePool(SleepBackend(batch_seconds=0.05), max_workers=1, use_processes=False) as pool:
+            busy = pool.submit("busy")
+            first = pool.submit("a")
+            second = pool.submit("b")
+            assert first.cancel()
+            assert second.result(timeout=2) == "[stub] b"
+            assert busy.result(timeout=2) == "[stub] busy"
+            assert first.cancelled()
+
+            only = pool.submit("c")
+            only.cancel()
+            assert pool.generate("d", timeout=2) == "[stub] d"
+
+    def test_timed_out_request_is_not_run(self):
+        """Test generate cancels a request that times out while queued."""
+        with LocalInferencePool(SleepBackend(batch_seconds=0.2), max_workers=1, use_processes=False) as pool:
+            submitted = []
+            submit = pool.submit
+            pool.submit = lambda prompt: submitted.append(submit(prompt)) or submitted[-1]
+
+            busy = submit("busy")
+            while not busy.running():
+                time.sleep(0.001)
+            with pytest.raises(TimeoutError):
+                pool.generate("late", timeout=0.01)
+            assert submitted[0].cancelled()
+            assert busy.result(timeout=2) == "[stub] busy"
+            assert pool.generate("next", timeout=2) == "[stub] next"
+            assert pool.get_stats()["batches"] == 2
+
+    def test_process_pool(self):
+        """Test batches run in worker processes."""
+        with LocalInferencePool(SleepBackend(batch_seconds=0.0), max_workers=1) as pool:
+            assert pool.generate("hi", timeout=30) == "[stub] hi"
+        with pytest.raises(RuntimeError):
+            pool.submit("closed")
+
+    def test_local_slm_dispatches_marginal_matches(self):
+        """Test marginal matches go to the model and failures fall back to the LLM."""
+        assert LocalSLM().execute(MARGINAL_PROMPT).used_local_model is False
+
+        with LocalInferencePool(SleepBackend(batch_seconds=0.0), use_processes=False) as pool:
+            slm = LocalSLM(inference_pool=pool)
+            response = slm.execute(MARGINAL_PROMPT)
+            assert response.used_local_model
+            assert response.task_type == "status_check"
+            assert response.content == f"[stub] {MARGINAL_PROMPT}"
+            assert slm.execute("write a poem").used_local_model is False
+            assert slm.get_stats()["handled_by_model"] == 1
+
+        with LocalInferencePool(_FailingBackend(), use_processes=False) as pool:
+            slm = LocalSLM(inference_pool=pool)
+            assert slm.execute(MARGINAL_PROMPT).used_local_model is False
+            assert slm.get_stats()["delegated_to_llm"] == 1
+
+    async def test_execute_async(self):
+        """Test async execution batches concurrent marginal prompts."""
+        with LocalInferencePool(SleepBackend(batch_seconds=0.05), use_processes=False) as pool:
+            slm = LocalSLM(inference_pool=pool)
+            responses = await asyncio.gather(
+                *[slm.execute_async(f"{i} {MARGINAL_PROMPT}") for i in range(10)]
+            )
+            assert all(r.used_local_model for r in responses)
+            assert (await slm.execute_async("hello")).content.startswith("Hello")
+            assert pool.get_stats()["batches"] < 10